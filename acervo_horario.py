@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Acervo horário em disco: cada variável de todas as estações em um array
+contíguo mapeado em memória (np.memmap), numa grade horária fixa.
+
+Layout da pasta do acervo:
+
+  acervo.json       - grade (primeira hora, número de horas), variáveis,
+                      ordem das estações e dtype;
+  estacoes.csv      - catálogo (Codigo_Estacao, linha, uf, estacao,
+                      latitude, longitude, altitude...) dos cabeçalhos;
+  <variavel>.bin    - float32 cru (estações, horas), em ordem C: a série de
+                      uma estação é um trecho contíguo do arquivo.
+
+Abrir o acervo só lê o JSON e o catálogo e mapeia os arquivos; nada é
+interpretado. As consultas (AcervoHorario.array / serie / frame) devolvem
+visões do mapa sem cópia (somente leitura) para uma estação ou uma faixa
+contínua de estações e qualquer intervalo de datas; o sistema operacional
+só carrega as páginas tocadas, então o histórico inteiro cabe em disco sem
+caber na RAM. Conjuntos não contíguos de estações exigem cópia (indexação
+avançada) e só copiam o intervalo pedido.
+
+Construção: cada CSV (ou membro de ZIP) é lido pelo parser_inmet em um pool
+de processos e cada worker grava direto na sua linha/faixa de horas do mapa
+(regiões disjuntas). Construir de novo sobre um acervo existente acrescenta
+estações novas e regrava as horas dos arquivos informados.
+
+Uso:
+    python acervo_horario.py construir --pasta dados_inmet --destino acervo_inmet --inicio 2000 --fim 2024
+    python acervo_horario.py construir --zip 2022.zip 2023.zip --destino acervo_inmet
+    python acervo_horario.py info --destino acervo_inmet
+    python acervo_horario.py consultar --destino acervo_inmet --estacao A409 --inicio 2023-03-01 --fim 2023-03-31
+    python acervo_horario.py benchmark --estacoes 20 --anos 2019 2020 2021 2022 2023
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from inmet_comum import COLUNAS_MAPEAMENTO, AGREGACOES_DIARIAS, extrair_info_nome_arquivo, reamostrar_diario
+from parser_inmet import ler_inmet_rapido
+
+DIRETORIO_ACERVO = 'acervo_inmet'
+ARQUIVO_META = 'acervo.json'
+ARQUIVO_ESTACOES = 'estacoes.csv'
+EXTENSAO = '.bin'
+DTYPE = np.float32
+VERSAO = 1
+HORAS_POR_BLOCO_NAN = 1 << 22     # valores escritos por vez ao preencher estações novas com NaN
+UMA_HORA = np.timedelta64(1, 'h')
+
+
+def _caminho_variavel(pasta, variavel):
+    return os.path.join(pasta, variavel + EXTENSAO)
+
+
+def _ler_meta(pasta):
+    with open(os.path.join(pasta, ARQUIVO_META), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _gravar_meta(pasta, meta):
+    temporario = os.path.join(pasta, ARQUIVO_META + '.tmp')
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1)
+    os.replace(temporario, os.path.join(pasta, ARQUIVO_META))
+
+
+# ============================================================================
+# CONSULTA
+# ============================================================================
+
+class AcervoHorario:
+    """Acervo aberto para leitura: visões sem cópia por estação e intervalo de datas."""
+
+    def __init__(self, pasta=DIRETORIO_ACERVO):
+        self.pasta = pasta
+        meta = _ler_meta(pasta)
+        self.inicio = np.datetime64(meta['inicio'], 'h')
+        self.horas = meta['horas']
+        self.variaveis = list(meta['variaveis'])
+        self.estacoes = pd.Index(meta['estacoes'], name='Codigo_Estacao')
+        self.dtype = np.dtype(meta['dtype'])
+        forma = (len(self.estacoes), self.horas)
+        self._mapas = {v: np.memmap(_caminho_variavel(pasta, v), dtype=self.dtype, mode='r', shape=forma)
+                       for v in self.variaveis} if len(self.estacoes) else {}
+        self._catalogo = None
+
+    def __repr__(self):
+        fim = self.inicio + (self.horas - 1) * UMA_HORA
+        return (f"AcervoHorario({self.pasta!r}, {len(self.estacoes)} estações, {len(self.variaveis)} variáveis, "
+                f"{self.inicio} a {fim})")
+
+    @property
+    def catalogo(self):
+        if self._catalogo is None:
+            self._catalogo = pd.read_csv(os.path.join(self.pasta, ARQUIVO_ESTACOES), index_col='Codigo_Estacao',
+                                         dtype={'Codigo_Estacao': str})
+        return self._catalogo
+
+    @property
+    def nbytes(self):
+        return sum(m.nbytes for m in self._mapas.values())
+
+    def horas_do_intervalo(self, inicio=None, fim=None):
+        """slice de horas da grade para [inicio, fim] (fim inclusivo; só a data = dia inteiro)."""
+        a = 0 if inicio is None else int((np.datetime64(pd.Timestamp(inicio), 'h') - self.inicio) // UMA_HORA)
+        if fim is None:
+            b = self.horas
+        else:
+            ultima = pd.Timestamp(fim)
+            if isinstance(fim, str) and len(fim.strip()) <= 10:
+                ultima += pd.Timedelta(hours=23)
+            b = int((np.datetime64(ultima, 'h') - self.inicio) // UMA_HORA) + 1
+        return slice(min(max(a, 0), self.horas), min(max(b, 0), self.horas))
+
+    def linhas(self, estacoes=None):
+        """Linhas do mapa: slice quando a seleção é contínua (visão), senão array de índices."""
+        if estacoes is None:
+            return slice(0, len(self.estacoes))
+        if isinstance(estacoes, str):
+            return self.estacoes.get_loc(estacoes)
+        posicoes = self.estacoes.get_indexer(list(estacoes))
+        if (posicoes < 0).any():
+            faltando = [e for e, p in zip(estacoes, posicoes) if p < 0]
+            raise KeyError(f"Estação(ões) fora do acervo: {', '.join(map(str, faltando))}")
+        if len(posicoes) and np.array_equal(posicoes, np.arange(posicoes[0], posicoes[0] + len(posicoes))):
+            return slice(int(posicoes[0]), int(posicoes[0]) + len(posicoes))
+        return posicoes
+
+    def indice_tempo(self, inicio=None, fim=None):
+        horas = self.horas_do_intervalo(inicio, fim)
+        return pd.DatetimeIndex(self.inicio + np.arange(horas.start, horas.stop) * UMA_HORA, name='Data_Hora')
+
+    def array(self, variavel, estacoes=None, inicio=None, fim=None):
+        """ndarray (horas,) para uma estação ou (estações, horas) para várias; visão quando possível."""
+        return self._mapas[variavel][self.linhas(estacoes), self.horas_do_intervalo(inicio, fim)]
+
+    def serie(self, estacao, variavel, inicio=None, fim=None):
+        return pd.Series(self.array(variavel, estacao, inicio, fim), index=self.indice_tempo(inicio, fim),
+                         name=variavel, copy=False)
+
+    def frame(self, estacao, inicio=None, fim=None, variaveis=None):
+        """DataFrame horário de uma estação (colunas = variáveis), cada coluna uma visão do mapa."""
+        variaveis = variaveis or self.variaveis
+        return pd.DataFrame({v: self.array(v, estacao, inicio, fim) for v in variaveis},
+                            index=self.indice_tempo(inicio, fim), copy=False)
+
+    def diario(self, estacao, inicio=None, fim=None, agregacoes=AGREGACOES_DIARIAS):
+        """Mesmo formato de inmet_comum.preprocessar_inmet, direto do acervo."""
+        df = self.frame(estacao, inicio, fim, [v for v in agregacoes if v in self.variaveis])
+        return reamostrar_diario(df.dropna(how='all'), {v: f for v, f in agregacoes.items() if v in df.columns})
+
+
+# ============================================================================
+# CONSTRUÇÃO
+# ============================================================================
+
+def _codigo_origem(origem):
+    nome = origem[1] if isinstance(origem, tuple) else origem
+    return (extrair_info_nome_arquivo(nome) or {}).get('codigo')
+
+
+def _ler_origem(origem):
+    if isinstance(origem, tuple):
+        caminho_zip, nome_membro = origem
+        with zipfile.ZipFile(caminho_zip) as zf, zf.open(nome_membro) as f:
+            return ler_inmet_rapido(f, dtype=DTYPE)
+    return ler_inmet_rapido(origem, dtype=DTYPE)
+
+
+def _gravar_origem(tarefa):
+    """Worker: lê um arquivo e grava suas horas na linha da estação (nunca lança exceção)."""
+    pasta, origem, linha, n_estacoes, inicio, horas, variaveis = tarefa
+    inicio_tarefa = time.perf_counter()
+    resultado = {'origem': origem, 'linha': linha, 'metadados': None, 'horas': 0, 'erro': None}
+    try:
+        metadados, df = _ler_origem(origem)
+        posicoes = ((df.index.to_numpy().astype('datetime64[h]') - np.datetime64(inicio, 'h')) // UMA_HORA)
+        dentro = (posicoes >= 0) & (posicoes < horas)
+        posicoes = posicoes[dentro]
+        for variavel in variaveis:
+            mapa = np.memmap(_caminho_variavel(pasta, variavel), dtype=DTYPE, mode='r+', shape=(n_estacoes, horas))
+            if variavel in df.columns:
+                mapa[linha, posicoes] = df[variavel].to_numpy()[dentro]
+            mapa.flush()
+            del mapa
+        resultado['metadados'] = metadados
+        resultado['horas'] = int(dentro.sum())
+    except Exception as e:
+        resultado['erro'] = f"{type(e).__name__}: {e}"
+    resultado['segundos'] = time.perf_counter() - inicio_tarefa
+    return resultado
+
+
+def _acrescentar_estacoes(pasta, variaveis, n_antes, n_depois, horas):
+    """Aumenta cada arquivo de variável com linhas NaN para as estações novas."""
+    bloco = np.full(min(HORAS_POR_BLOCO_NAN, max((n_depois - n_antes) * horas, 1)), np.nan, dtype=DTYPE)
+    for variavel in variaveis:
+        caminho = _caminho_variavel(pasta, variavel)
+        modo = 'r+b' if os.path.exists(caminho) else 'wb'
+        with open(caminho, modo) as f:
+            f.seek(n_antes * horas * np.dtype(DTYPE).itemsize)
+            f.truncate()
+            restante = (n_depois - n_antes) * horas
+            while restante > 0:
+                f.write(bloco[:min(restante, len(bloco))].tobytes())
+                restante -= min(restante, len(bloco))
+
+
+def construir_acervo(origens, pasta=DIRETORIO_ACERVO, inicio=None, fim=None,
+                     variaveis=tuple(COLUNAS_MAPEAMENTO.values()), workers=None, ao_concluir=None):
+    """Cria ou amplia o acervo com os CSVs/membros de ZIP em `origens`; devolve os resultados por arquivo.
+
+    `inicio`/`fim` (anos ou datas) definem a grade na criação; num acervo
+    existente a grade é mantida e horas fora dela são ignoradas.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    if os.path.exists(os.path.join(pasta, ARQUIVO_META)):
+        meta = _ler_meta(pasta)
+    else:
+        if inicio is None or fim is None:
+            anos = [int(info[k][-4:]) for o in origens
+                    for info in [extrair_info_nome_arquivo(o[1] if isinstance(o, tuple) else o) or {}]
+                    for k in ('inicio', 'fim') if k in info]
+            inicio = inicio if inicio is not None else min(anos)
+            fim = fim if fim is not None else max(anos)
+        primeira = np.datetime64(pd.Timestamp(str(inicio)), 'h')
+        ultima = np.datetime64(pd.Timestamp(f'{fim}-12-31 23:00' if len(str(fim)) == 4 else str(fim)), 'h')
+        meta = {'versao': VERSAO, 'inicio': str(primeira), 'horas': int((ultima - primeira) // UMA_HORA) + 1,
+                'variaveis': list(variaveis), 'dtype': np.dtype(DTYPE).name, 'estacoes': []}
+
+    estacoes = list(meta['estacoes'])
+    codigos = [_codigo_origem(o) for o in origens]
+    novas = [c for c in dict.fromkeys(codigos) if c is not None and c not in estacoes]
+    _acrescentar_estacoes(pasta, meta['variaveis'], len(estacoes), len(estacoes) + len(novas), meta['horas'])
+    estacoes += novas
+    meta['estacoes'] = estacoes
+    _gravar_meta(pasta, meta)
+
+    linha = {codigo: i for i, codigo in enumerate(estacoes)}
+    tarefas = [(pasta, o, linha[c], len(estacoes), meta['inicio'], meta['horas'], meta['variaveis'])
+               for o, c in zip(origens, codigos) if c is not None]
+    resultados = [{'origem': o, 'linha': None, 'metadados': None, 'horas': 0, 'segundos': 0.0,
+                   'erro': "Nome de arquivo fora do padrão do INMET"} for o, c in zip(origens, codigos) if c is None]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for tarefa in tarefas:
+            resultados.append(_gravar_origem(tarefa))
+            if ao_concluir:
+                ao_concluir(resultados[-1], len(resultados), len(origens))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for futuro in as_completed([executor.submit(_gravar_origem, t) for t in tarefas]):
+                resultados.append(futuro.result())
+                if ao_concluir:
+                    ao_concluir(resultados[-1], len(resultados), len(origens))
+
+    # Catálogo: cabeçalho mais recente de cada estação
+    caminho_catalogo = os.path.join(pasta, ARQUIVO_ESTACOES)
+    catalogo = {}
+    if os.path.exists(caminho_catalogo):
+        anterior = pd.read_csv(caminho_catalogo, index_col='Codigo_Estacao', dtype={'Codigo_Estacao': str})
+        catalogo = {codigo: registro for codigo, registro in anterior.drop(columns='linha').iterrows()}
+    for r in sorted((r for r in resultados if r['metadados']), key=lambda r: str(r['origem'])):
+        catalogo[estacoes[r['linha']]] = pd.Series(r['metadados']).drop('codigo', errors='ignore')
+    df_catalogo = pd.DataFrame.from_dict(catalogo, orient='index').reindex(estacoes)
+    df_catalogo.index.name = 'Codigo_Estacao'
+    df_catalogo.insert(0, 'linha', np.arange(len(estacoes)))
+    df_catalogo.to_csv(caminho_catalogo)
+    return resultados
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def benchmark(n_estacoes, anos, workers=None):
+    from gerador_inmet_sintetico import gerar_conjunto
+    from inmet_comum import preprocessar_inmet
+
+    with tempfile.TemporaryDirectory() as temporario:
+        pasta_csv = os.path.join(temporario, 'csv')
+        pasta_acervo = os.path.join(temporario, 'acervo')
+        arquivos = gerar_conjunto(pasta_csv, n_estacoes, anos)
+        mb_csv = sum(os.path.getsize(a) for a in arquivos) / 1e6
+        print(f"   {n_estacoes} estações x {len(anos)} anos ({len(arquivos)} CSVs, {mb_csv:,.0f} MB)")
+
+        inicio = time.perf_counter()
+        construir_acervo(arquivos, pasta_acervo, workers=workers)
+        t_construir = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        acervo = AcervoHorario(pasta_acervo)
+        t_abrir = time.perf_counter() - inicio
+
+        codigo = acervo.estacoes[n_estacoes // 2]
+        mes = (f'{anos[-1]}-03-01', f'{anos[-1]}-03-31')
+        inicio = time.perf_counter()
+        for _ in range(100):
+            df_mes = acervo.frame(codigo, *mes)
+        t_mes = (time.perf_counter() - inicio) / 100
+
+        inicio = time.perf_counter()
+        total = float(np.nansum(acervo.array('Precipitacao_mm', None, *mes)))
+        t_rede = time.perf_counter() - inicio
+
+        arquivo = [a for a in arquivos if f'_{codigo}_' in os.path.basename(a) and str(anos[-1]) in a][0]
+        inicio = time.perf_counter()
+        df_csv = ler_inmet_rapido(arquivo)[1].loc[mes[0]:f'{mes[1]} 23:00']
+        t_csv = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        preprocessar_inmet(arquivo)
+        t_legado = time.perf_counter() - inicio
+
+        igual = np.allclose(df_mes.loc[df_csv.index].to_numpy(), df_csv[acervo.variaveis].to_numpy(), equal_nan=True)
+        print(f"   - construir ({workers or os.cpu_count()} worker(s)): {t_construir:7.2f}s "
+              f"({acervo.nbytes / 1e6:,.0f} MB mapeados)")
+        print(f"   - abrir o acervo:            {t_abrir * 1e3:7.2f}ms")
+        print(f"   - um mês de uma estação:     {t_mes * 1e6:7.1f}µs (sem cópia: "
+              f"{np.shares_memory(df_mes['Precipitacao_mm'].to_numpy(), acervo._mapas['Precipitacao_mm'])})")
+        print(f"   - um mês da rede (soma):     {t_rede * 1e3:7.2f}ms (total {total:,.0f} mm)")
+        print(f"   - mesmo mês via CSV (parser rápido): {t_csv * 1e3:7.1f}ms | "
+              f"preprocessar_inmet: {t_legado * 1e3:7.1f}ms")
+        print(f"   - valores iguais ao CSV: {igual}")
+        del acervo, df_mes
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def _imprimir_progresso(resultado, n, total):
+    nome = os.path.basename(str(resultado['origem'][1] if isinstance(resultado['origem'], tuple)
+                                else resultado['origem']))
+    if resultado['erro']:
+        print(f"  [{n}/{total}] ❌ {nome}: {resultado['erro']}")
+    else:
+        print(f"  [{n}/{total}] ✓ {nome} ({resultado['horas']:,} horas, {resultado['segundos']:.2f}s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Acervo horário mapeado em memória (np.memmap)")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p = sub.add_parser('construir', help="Cria ou amplia o acervo a partir de CSVs/ZIPs do INMET")
+    p.add_argument('--destino', default=DIRETORIO_ACERVO)
+    p.add_argument('--pasta', default='.', help="Pasta com os CSVs (busca recursiva)")
+    p.add_argument('--zip', nargs='*', default=[], help="ZIPs anuais do INMET (lidos sem extrair)")
+    p.add_argument('--uf', nargs='*', help="Filtrar membros dos ZIPs por UF")
+    p.add_argument('--inicio', help="Primeiro ano/data da grade (padrão: pelos nomes dos arquivos)")
+    p.add_argument('--fim', help="Último ano/data da grade")
+    p.add_argument('--workers', type=int, default=None)
+
+    p = sub.add_parser('info', help="Resumo do acervo")
+    p.add_argument('--destino', default=DIRETORIO_ACERVO)
+
+    p = sub.add_parser('consultar', help="Série horária (ou diária) de uma estação em um intervalo")
+    p.add_argument('--destino', default=DIRETORIO_ACERVO)
+    p.add_argument('--estacao', required=True)
+    p.add_argument('--inicio')
+    p.add_argument('--fim')
+    p.add_argument('--diario', action='store_true', help="Agrega como o PASSO 1 (AGREGACOES_DIARIAS)")
+    p.add_argument('--saida', help="Grava a consulta em CSV")
+
+    p = sub.add_parser('benchmark', help="Compara o acervo com a leitura dos CSVs")
+    p.add_argument('--estacoes', type=int, default=20)
+    p.add_argument('--anos', type=int, nargs='+', default=[2021, 2022, 2023])
+    p.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("ACERVO HORÁRIO MAPEADO EM MEMÓRIA")
+    print("=" * 70)
+
+    if args.comando == 'benchmark':
+        benchmark(args.estacoes, args.anos, args.workers)
+        return 0
+
+    if args.comando == 'construir':
+        from processar_lote_inmet import encontrar_arquivos_inmet, encontrar_membros_zip
+        origens = encontrar_membros_zip(args.zip, uf=args.uf) if args.zip else encontrar_arquivos_inmet(args.pasta)
+        if not origens:
+            print("❌ ERRO: Nenhum arquivo INMET encontrado")
+            return 1
+        inicio = time.perf_counter()
+        resultados = construir_acervo(origens, args.destino, args.inicio, args.fim, workers=args.workers,
+                                      ao_concluir=_imprimir_progresso)
+        falhas = [r for r in resultados if r['erro']]
+        print(f"\n✓ {len(resultados) - len(falhas)} arquivo(s) em {time.perf_counter() - inicio:.2f}s")
+        print(f"✓ {AcervoHorario(args.destino)}")
+        return 0 if len(falhas) < len(resultados) else 1
+
+    if not os.path.exists(os.path.join(args.destino, ARQUIVO_META)):
+        print(f"❌ ERRO: Acervo não encontrado: {args.destino}")
+        return 1
+    inicio = time.perf_counter()
+    acervo = AcervoHorario(args.destino)
+    t_abrir = time.perf_counter() - inicio
+
+    if args.comando == 'info':
+        print(f"✓ {acervo} | aberto em {t_abrir * 1e3:.2f}ms")
+        print(f"  - Variáveis: {', '.join(acervo.variaveis)}")
+        print(f"  - Tamanho: {acervo.nbytes / 1e6:,.1f} MB ({acervo.dtype.name})")
+        print(acervo.catalogo.to_string(max_rows=20))
+        return 0
+
+    if args.estacao not in acervo.estacoes:
+        print(f"❌ ERRO: Estação fora do acervo: {args.estacao}")
+        return 1
+    inicio = time.perf_counter()
+    if args.diario:
+        df = acervo.diario(args.estacao, args.inicio, args.fim)
+    else:
+        df = acervo.frame(args.estacao, args.inicio, args.fim)
+    print(f"✓ {args.estacao}: {len(df):,} linha(s) em {(time.perf_counter() - inicio) * 1e3:.2f}ms "
+          f"(acervo aberto em {t_abrir * 1e3:.2f}ms)")
+    if args.saida:
+        df.to_csv(args.saida)
+        print(f"✓ Salvo: {args.saida}")
+    else:
+        print(df.describe().round(2).to_string())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
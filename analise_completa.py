@@ -1,12 +1,21 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
 
+from inmet_comum import (ler_csv_inmet, processar_datas, converter_colunas, reamostrar_diario,
+                         extrair_info_nome_arquivo, COLUNAS_MAPEAMENTO, AGREGACOES_DIARIAS)
+from cache_etapas import chave_cache, ler_cache, salvar_cache, assinatura_codigo
+from etapas_pipeline import (criar_desastres_dummy, calcular_correlacao, grafico_heatmap,
+                             grafico_precipitacao, grafico_temperatura, COLUNAS_ANALISE,
+                             PARAMETROS_DESASTRES)
+from instrumentacao import rastreador_do_ambiente
+
+arquivo_csv = "INMET_NE_SE_A409_ARACAJU_01-01-2023_A_31-12-2023.CSV"
+
+# Tempo, CPU, pico de RSS, linhas e bytes lidos por etapa (--trace / --perfil)
+rastro = rastreador_do_ambiente('analise_completa', estacao=extrair_info_nome_arquivo(arquivo_csv)['codigo'])
+
 print("=" * 70)
 print("ANÁLISE COMPLETA DE CORRELAÇÃO")
 print("Dados Climáticos vs Desastres Naturais")
@@ -17,10 +26,7 @@ print("=" * 70)
 # PASSO 1: PRÉ-PROCESSAMENTO DE DADOS CLIMÁTICOS DO INMET
 # ============================================================================
 
-print("\n[PASSO 1/3] PRÉ-PROCESSAMENTO DE DADOS CLIMÁTICOS")
-print("-" * 70)
-
-arquivo_csv = "INMET_NE_SE_A409_ARACAJU_01-01-2023_A_31-12-2023.CSV"
+rastro.proximo('passo1_preprocessamento', "\n[PASSO 1/3] PRÉ-PROCESSAMENTO DE DADOS CLIMÁTICOS\n" + "-" * 70)
 
 if not os.path.exists(arquivo_csv):
     print(f"❌ ERRO: Arquivo não encontrado: {arquivo_csv}")
@@ -30,53 +36,52 @@ if not os.path.exists(arquivo_csv):
 print(f"✓ Arquivo encontrado: {arquivo_csv}")
 
 try:
-    # Ler o arquivo CSV
-    print("  [1/4] Lendo arquivo CSV...")
-    df_inmet = pd.read_csv(arquivo_csv, encoding='latin1', sep=';', skiprows=8)
-    print(f"      ✓ Dimensões: {df_inmet.shape}")
-    
-    # Limpar nomes das colunas
-    print("  [2/4] Limpando nomes das colunas...")
-    df_inmet.columns = df_inmet.columns.str.strip()
-    
-    # Combinar Data e Hora
-    print("  [3/4] Processando datas...")
-    df_inmet['Data_Hora'] = pd.to_datetime(
-        df_inmet['Data'] + ' ' + df_inmet['Hora UTC'].str.replace(' UTC', ''),
-        format='%Y/%m/%d %H%M'
-    )
-    df_inmet.set_index('Data_Hora', inplace=True)
-    
-    # Converter colunas para numérico
-    print("  [4/4] Convertendo colunas para numérico...")
-    
-    # Mapeamento de colunas
-    colunas_mapeamento = {
-        'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)': 'Precipitacao_mm',
-        'TEMPERATURA MÁXIMA NA HORA ANT. (AUT) (°C)': 'Temperatura_Maxima_C',
-        'TEMPERATURA MÍNIMA NA HORA ANT. (AUT) (°C)': 'Temperatura_Minima_C',
-        'UMIDADE RELATIVA DO AR, HORARIA (%)': 'Umidade_Relativa_Media_pct',
-        'VENTO, RAJADA MAXIMA (m/s)': 'Vento_Rajada_Maxima_ms'
-    }
-    
-    df_processado = pd.DataFrame(index=df_inmet.index)
-    
-    for col_original, col_novo in colunas_mapeamento.items():
-        if col_original in df_inmet.columns:
-            df_processado[col_novo] = df_inmet[col_original].astype(str).str.replace(',', '.').astype(float)
-    
-    # Resample para dados diários
-    df_inmet_daily = df_processado.resample('D').agg({
-        'Precipitacao_mm': 'sum',
-        'Temperatura_Maxima_C': 'max',
-        'Temperatura_Minima_C': 'min',
-        'Umidade_Relativa_Media_pct': 'mean',
-        'Vento_Rajada_Maxima_ms': 'max'
-    })
+    # Etapas com saída em cache (cache_etapas.py): a chave depende do conteúdo do CSV
+    # e do código que produz cada etapa (assinatura_codigo)
+    chave_horario = chave_cache('horario', [arquivo_csv],
+                                 [COLUNAS_MAPEAMENTO, assinatura_codigo(ler_csv_inmet, processar_datas, converter_colunas)])
+    chave_diario = chave_cache('diario', [chave_horario], [AGREGACOES_DIARIAS, assinatura_codigo(reamostrar_diario)])
+    df_inmet_daily = ler_cache(chave_diario)
+    
+    if df_inmet_daily is not None:
+        print("  ✓ Dados diários carregados do cache (entrada inalterada)")
+        rastro.anotar(cache=True)
+    else:
+        df_processado = ler_cache(chave_horario)
+        if df_processado is not None:
+            print("  ✓ Dados horários carregados do cache (entrada inalterada)")
+        else:
+            # Ler o arquivo CSV
+            with rastro.etapa('leitura', "  [1/4] Lendo arquivo CSV..."):
+                df_inmet = ler_csv_inmet(arquivo_csv)
+                rastro.anotar(linhas=len(df_inmet))
+            print(f"      ✓ Dimensões: {df_inmet.shape}")
+            
+            # Limpar nomes das colunas (feito em ler_csv_inmet)
+            print("  [2/4] Limpando nomes das colunas...")
+            
+            # Combinar Data e Hora
+            with rastro.etapa('datas', "  [3/4] Processando datas..."):
+                df_inmet = processar_datas(df_inmet)
+                rastro.anotar(linhas=len(df_inmet))
+            
+            # Converter colunas para numérico (mapeamento em inmet_comum.COLUNAS_MAPEAMENTO)
+            with rastro.etapa('conversao', "  [4/4] Convertendo colunas para numérico..."):
+                df_processado = converter_colunas(df_inmet)
+                rastro.anotar(linhas=len(df_processado))
+            salvar_cache(chave_horario, df_processado)
+        
+        # Resample para dados diários
+        with rastro.etapa('reamostragem'):
+            df_inmet_daily = reamostrar_diario(df_processado)
+            rastro.anotar(linhas=len(df_inmet_daily))
+        salvar_cache(chave_diario, df_inmet_daily)
     
     print(f"✓ Pré-processamento concluído! Dimensões: {df_inmet_daily.shape}")
+    rastro.anotar(linhas=len(df_inmet_daily))
     
 except Exception as e:
+    rastro.falhar(e)
     print(f"❌ ERRO: {e}")
     import traceback
     traceback.print_exc()
@@ -86,56 +91,37 @@ except Exception as e:
 # PASSO 2: CRIAÇÃO DE DATASET DUMMY DE DESASTRES
 # ============================================================================
 
-print("\n[PASSO 2/3] CRIAÇÃO DE DATASET DUMMY DE DESASTRES")
-print("-" * 70)
+rastro.proximo('passo2_desastres', "\n[PASSO 2/3] CRIAÇÃO DE DATASET DUMMY DE DESASTRES\n" + "-" * 70)
 
 try:
-    print("  [1/3] Criando dataset de desastres...")
-    
-    dates_2023 = pd.date_range(start='2023-01-01', end='2023-12-31', freq='D')
-    df_disasters = pd.DataFrame(index=dates_2023)
-    
-    df_disasters['Inundacao_Alagamento'] = 0
-    df_disasters['Deslizamento'] = 0
-    df_disasters['Chuvas_Intensas'] = 0
-    
-    # Simular eventos baseados em precipitação
-    print("  [2/3] Simulando eventos de desastre...")
-    
-    precipitation_threshold = df_inmet_daily['Precipitacao_mm'].quantile(0.95)
-    high_precip_days = df_inmet_daily[df_inmet_daily['Precipitacao_mm'] > precipitation_threshold].index
-    
-    df_disasters.loc[high_precip_days, 'Inundacao_Alagamento'] = 1
-    df_disasters.loc[high_precip_days, 'Chuvas_Intensas'] = 1
-    
-    # Adicionar deslizamentos
-    np.random.seed(42)
-    dias_com_chuva = df_inmet_daily[df_inmet_daily['Precipitacao_mm'] > 5]
-    if len(dias_com_chuva) > 0:
-        n_deslizamentos = min(5, len(dias_com_chuva))
-        random_disaster_days = dias_com_chuva.sample(n=n_deslizamentos, random_state=42).index
-        df_disasters.loc[random_disaster_days, 'Deslizamento'] = 1
-    
-    print("  [3/3] Mesclando datasets...")
-    
-    # Mesclar datasets
-    df_merged = pd.merge(df_inmet_daily, df_disasters, left_index=True, right_index=True, how='left')
-    
-    # Preencher NaNs
-    df_merged['Inundacao_Alagamento'] = df_merged['Inundacao_Alagamento'].fillna(0).astype(int)
-    df_merged['Deslizamento'] = df_merged['Deslizamento'].fillna(0).astype(int)
-    df_merged['Chuvas_Intensas'] = df_merged['Chuvas_Intensas'].fillna(0).astype(int)
+    chave_mesclado = chave_cache('mesclado', [chave_diario], [PARAMETROS_DESASTRES, assinatura_codigo(criar_desastres_dummy)])
+    df_merged = ler_cache(chave_mesclado)
+    
+    if df_merged is not None:
+        print("  ✓ Dataset mesclado carregado do cache (entrada inalterada)")
+        rastro.anotar(cache=True)
+    else:
+        # Simular eventos baseados em precipitação e mesclar (etapas_pipeline.criar_desastres_dummy)
+        with rastro.etapa('simulacao_e_merge', "  [1/2] Simulando eventos de desastre..."):
+            df_merged = criar_desastres_dummy(df_inmet_daily, **PARAMETROS_DESASTRES)
+            rastro.anotar(linhas=len(df_merged))
+        print("  [2/2] Mesclando datasets...")
+        salvar_cache(chave_mesclado, df_merged)
     
     # Salvar arquivo mesclado
     arquivo_mesclado = "merged_climatic_disaster_data_aracaju_2023.csv"
-    df_merged.to_csv(arquivo_mesclado)
+    with rastro.etapa('salvar_mesclado'):
+        df_merged.to_csv(arquivo_mesclado)
+        rastro.anotar(linhas=len(df_merged))
     
     print(f"✓ Dataset criado! Dimensões: {df_merged.shape}")
+    rastro.anotar(linhas=len(df_merged))
     print(f"  - Inundações/Alagamentos: {df_merged['Inundacao_Alagamento'].sum()} dias")
     print(f"  - Deslizamentos: {df_merged['Deslizamento'].sum()} dias")
     print(f"  - Chuvas Intensas: {df_merged['Chuvas_Intensas'].sum()} dias")
     
 except Exception as e:
+    rastro.falhar(e)
     print(f"❌ ERRO: {e}")
     import traceback
     traceback.print_exc()
@@ -145,24 +131,19 @@ except Exception as e:
 # PASSO 3: ANÁLISE DE CORRELAÇÃO E GERAÇÃO DE GRÁFICOS
 # ============================================================================
 
-print("\n[PASSO 3/3] ANÁLISE DE CORRELAÇÃO E GERAÇÃO DE GRÁFICOS")
-print("-" * 70)
+rastro.proximo('passo3_correlacao_graficos', "\n[PASSO 3/3] ANÁLISE DE CORRELAÇÃO E GERAÇÃO DE GRÁFICOS\n" + "-" * 70)
 
 try:
-    print("  [1/5] Calculando matriz de correlação...")
-    
-    colunas_analise = [
-        'Precipitacao_mm',
-        'Temperatura_Maxima_C',
-        'Temperatura_Minima_C',
-        'Umidade_Relativa_Media_pct',
-        'Vento_Rajada_Maxima_ms',
-        'Inundacao_Alagamento',
-        'Deslizamento',
-        'Chuvas_Intensas'
-    ]
-    
-    correlation_matrix = df_merged[colunas_analise].corr()
+    with rastro.etapa('correlacao', "  [1/5] Calculando matriz de correlação..."):
+        chave_correlacao = chave_cache('correlacao', [chave_mesclado], [COLUNAS_ANALISE, assinatura_codigo(calcular_correlacao)])
+        correlation_matrix = ler_cache(chave_correlacao)
+        if correlation_matrix is None:
+            correlation_matrix = calcular_correlacao(df_merged, COLUNAS_ANALISE)
+            salvar_cache(chave_correlacao, correlation_matrix)
+        else:
+            print("      ✓ Matriz carregada do cache (entrada inalterada)")
+            rastro.anotar(cache=True)
+        rastro.anotar(linhas=len(df_merged))
     
     # Salvar matriz
     arquivo_correlacao = "correlation_matrix.csv"
@@ -176,58 +157,24 @@ try:
     print(f"     - Precip vs Chuvas Intensas: {correlation_matrix.loc['Precipitacao_mm', 'Chuvas_Intensas']:.3f}")
     
     # Gerar gráficos
-    print("\n  [2/5] Gerando heatmap...")
-    plt.figure(figsize=(12, 10))
-    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt='.2f', linewidths=.5)
-    plt.title('Matriz de Correlação - Aracaju 2023')
-    plt.tight_layout()
-    plt.savefig('correlation_heatmap.png', dpi=150, bbox_inches='tight')
-    plt.close()
+    with rastro.etapa('heatmap', "\n  [2/5] Gerando heatmap..."):
+        grafico_heatmap(correlation_matrix, 'correlation_heatmap.png', 'Matriz de Correlação - Aracaju 2023')
     print("     ✓ Salvo: correlation_heatmap.png")
     
-    print("  [3/5] Gerando série temporal de precipitação...")
-    plt.figure(figsize=(15, 7))
-    plt.plot(df_merged.index, df_merged['Precipitacao_mm'], label='Precipitação (mm)', color='blue', linewidth=2)
-    
-    disaster_days = df_merged[df_merged['Inundacao_Alagamento'] == 1].index
-    if len(disaster_days) > 0:
-        plt.scatter(disaster_days, 
-                    df_merged.loc[disaster_days, 'Precipitacao_mm'], 
-                    color='red', marker='o', s=50, label='Inundação/Alagamento', zorder=5)
-    
-    plt.title('Precipitação Diária e Inundação/Alagamento - Aracaju 2023', fontsize=14)
-    plt.xlabel('Data', fontsize=12)
-    plt.ylabel('Precipitação (mm)', fontsize=12)
-    plt.legend(fontsize=10)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('precipitation_inundation_timeseries.png', dpi=150, bbox_inches='tight')
-    plt.close()
+    with rastro.etapa('grafico_precipitacao', "  [3/5] Gerando série temporal de precipitação..."):
+        grafico_precipitacao(df_merged, 'precipitation_inundation_timeseries.png', 'Aracaju 2023')
+        rastro.anotar(linhas=len(df_merged))
     print("     ✓ Salvo: precipitation_inundation_timeseries.png")
     
-    print("  [4/5] Gerando série temporal de temperatura...")
-    plt.figure(figsize=(15, 7))
-    plt.plot(df_merged.index, df_merged['Temperatura_Maxima_C'], label='Temperatura Máxima (°C)', color='orange', linewidth=2)
-    
-    disaster_days_landslide = df_merged[df_merged['Deslizamento'] == 1].index
-    if len(disaster_days_landslide) > 0:
-        plt.scatter(disaster_days_landslide, 
-                    df_merged.loc[disaster_days_landslide, 'Temperatura_Maxima_C'], 
-                    color='green', marker='o', s=50, label='Deslizamento', zorder=5)
-    
-    plt.title('Temperatura Máxima e Deslizamento - Aracaju 2023', fontsize=14)
-    plt.xlabel('Data', fontsize=12)
-    plt.ylabel('Temperatura Máxima (°C)', fontsize=12)
-    plt.legend(fontsize=10)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('temperature_landslide_timeseries.png', dpi=150, bbox_inches='tight')
-    plt.close()
+    with rastro.etapa('grafico_temperatura', "  [4/5] Gerando série temporal de temperatura..."):
+        grafico_temperatura(df_merged, 'temperature_landslide_timeseries.png', 'Aracaju 2023')
+        rastro.anotar(linhas=len(df_merged))
     print("     ✓ Salvo: temperature_landslide_timeseries.png")
     
     print("  [5/5] Finalizando...")
     
 except Exception as e:
+    rastro.falhar(e)
     print(f"❌ ERRO: {e}")
     import traceback
     traceback.print_exc()
@@ -237,6 +184,8 @@ except Exception as e:
 # RESUMO FINAL
 # ============================================================================
 
+rastro.encerrar()
+
 print("\n" + "=" * 70)
 print("✓ ANÁLISE COMPLETA CONCLUÍDA COM SUCESSO!")
 print("=" * 70)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark por etapa do pipeline em dados sintéticos de vários tamanhos.
+
+Para cada tamanho (anos de dados horários de uma estação, gerados por
+gerador_inmet_sintetico) mede tempo (mínimo de N repetições) e pico de
+memória alocada (tracemalloc, em uma execução à parte) de cada etapa:
+
+  leitura      ler_csv_inmet + processar_datas
+  conversao    converter_colunas (vírgula decimal -> float)
+  reamostragem reamostrar_diario
+  desastres    criar_desastres_dummy (merge com os desastres)
+  correlacao   calcular_correlacao (.corr())
+  graficos     as três figuras do PASSO 3
+
+Os resultados ficam em um arquivo de baseline (JSON). Nas execuções seguintes
+cada etapa é comparada com a baseline e qualquer piora acima do limite
+(--limite, em fração) é sinalizada; o código de saída é 1 se houver regressão.
+
+Uso:
+    python benchmark_etapas.py --salvar-baseline          # grava a baseline
+    python benchmark_etapas.py                            # compara com ela
+    python benchmark_etapas.py --tamanhos 1 5 --limite 0.3 --sem-graficos
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from inmet_comum import ler_csv_inmet, processar_datas, converter_colunas, reamostrar_diario
+from etapas_pipeline import criar_desastres_dummy, calcular_correlacao, PARAMETROS_DESASTRES
+from gerador_inmet_sintetico import gerar_arquivo
+
+ARQUIVO_BASELINE = 'benchmark_etapas_baseline.json'
+TAMANHOS_PADRAO = [1, 5, 20]
+ANO_INICIAL = 2000
+LIMITE_REGRESSAO = 0.25
+# Diferenças absolutas abaixo disso são ruído de medição, não regressão
+MINIMO_SEGUNDOS = 0.005
+MINIMO_MB = 1.0
+
+
+# ============================================================================
+# ETAPAS
+# ============================================================================
+
+def _etapa_leitura(caminho):
+    return processar_datas(ler_csv_inmet(caminho))
+
+
+def _etapa_graficos(dados):
+    import renderizacao_graficos as rg
+    df_merged, correlation_matrix, pasta = dados
+    rg._modelos.clear()   # mede o desenho completo, não só a atualização do modelo
+    for tipo, df, caminho, titulo in rg.tarefas_estacao(df_merged, correlation_matrix, 'Benchmark', pasta):
+        rg.renderizar_figura(tipo, df, caminho, titulo)
+
+
+def etapas(com_graficos=True):
+    """Lista (nome, função, como obter a entrada a partir das saídas anteriores)."""
+    lista = [
+        ('leitura', _etapa_leitura, lambda s: s['caminho']),
+        ('conversao', converter_colunas, lambda s: s['leitura']),
+        ('reamostragem', reamostrar_diario, lambda s: s['conversao']),
+        ('desastres', lambda df: criar_desastres_dummy(df, **PARAMETROS_DESASTRES), lambda s: s['reamostragem']),
+        ('correlacao', calcular_correlacao, lambda s: s['desastres']),
+    ]
+    if com_graficos:
+        lista.append(('graficos', _etapa_graficos, lambda s: (s['desastres'], s['correlacao'], s['pasta'])))
+    return lista
+
+
+def medir_etapa(funcao, entrada, repeticoes):
+    """(menor tempo, pico de memória em MB, saída)."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        saida = funcao(entrada)
+        tempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    funcao(entrada)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(tempos), pico / 1e6, saida
+
+
+def medir_tamanho(anos, repeticoes, com_graficos=True, semente=0):
+    """Gera um arquivo com `anos` anos e mede todas as etapas sobre ele."""
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = gerar_arquivo(pasta, 0, range(ANO_INICIAL, ANO_INICIAL + anos), semente)
+        saidas = {'caminho': caminho, 'pasta': pasta}
+        resultado = {'linhas': None, 'mb_arquivo': round(os.path.getsize(caminho) / 1e6, 2), 'etapas': {}}
+        for nome, funcao, entrada in etapas(com_graficos):
+            segundos, pico_mb, saidas[nome] = medir_etapa(funcao, entrada(saidas), repeticoes)
+            resultado['etapas'][nome] = {'segundos': round(segundos, 5), 'pico_mb': round(pico_mb, 2)}
+        resultado['linhas'] = len(saidas['leitura'])
+    return resultado
+
+
+# ============================================================================
+# BASELINE E REGRESSÕES
+# ============================================================================
+
+def ambiente():
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def salvar_baseline(caminho, resultados):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump({'criado_em': datetime.now().isoformat(timespec='seconds'),
+                   'ambiente': ambiente(), 'resultados': resultados}, f, indent=2)
+
+
+def ler_baseline(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def comparar(base, atual, limite=LIMITE_REGRESSAO):
+    """Lista de regressões: (tamanho, etapa, métrica, valor base, valor atual)."""
+    regressoes = []
+    for tamanho, resultado in atual.items():
+        etapas_base = base.get(tamanho, {}).get('etapas', {})
+        for etapa, medidas in resultado['etapas'].items():
+            if etapa not in etapas_base:
+                continue
+            for metrica, minimo in (('segundos', MINIMO_SEGUNDOS), ('pico_mb', MINIMO_MB)):
+                antes, agora = etapas_base[etapa][metrica], medidas[metrica]
+                if agora > antes * (1 + limite) and agora - antes > minimo:
+                    regressoes.append((tamanho, etapa, metrica, antes, agora))
+    return regressoes
+
+
+def imprimir_resultado(anos, resultado, base=None):
+    print(f"\n📊 {anos} ano(s): {resultado['linhas']:,} linhas horárias ({resultado['mb_arquivo']:.1f} MB)")
+    print(f"   {'etapa':<14} {'tempo (s)':>10} {'pico (MB)':>10}" + (f" {'vs base':>9}" if base else ''))
+    for etapa, medidas in resultado['etapas'].items():
+        linha = f"   {etapa:<14} {medidas['segundos']:10.4f} {medidas['pico_mb']:10.1f}"
+        anterior = (base or {}).get('etapas', {}).get(etapa)
+        if anterior and anterior['segundos'] > 0:
+            linha += f" {medidas['segundos'] / anterior['segundos']:8.2f}x"
+        print(linha)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark por etapa do pipeline com dados sintéticos")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO,
+                        help="Anos de dados horários por execução")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--baseline', default=ARQUIVO_BASELINE)
+    parser.add_argument('--salvar-baseline', action='store_true',
+                        help="Grava os resultados como nova baseline")
+    parser.add_argument('--limite', type=float, default=LIMITE_REGRESSAO,
+                        help="Piora relativa tolerada antes de acusar regressão (0.25 = 25%%)")
+    parser.add_argument('--sem-graficos', action='store_true')
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    base = None
+    if not args.salvar_baseline and os.path.exists(args.baseline):
+        base = ler_baseline(args.baseline)
+
+    print("=" * 70)
+    print("BENCHMARK POR ETAPA DO PIPELINE (DADOS SINTÉTICOS)")
+    print(f"Tamanhos: {args.tamanhos} ano(s) | Repetições: {args.repeticoes}")
+    print("=" * 70)
+    if base is not None:
+        print(f"Baseline: {args.baseline} ({base['criado_em']})")
+        if base['ambiente'] != ambiente():
+            print("⚠️  Ambiente diferente do da baseline; compare com cautela:")
+            for chave, valor in ambiente().items():
+                if base['ambiente'].get(chave) != valor:
+                    print(f"   - {chave}: {base['ambiente'].get(chave)} -> {valor}")
+
+    resultados = {}
+    for anos in args.tamanhos:
+        resultados[str(anos)] = medir_tamanho(anos, args.repeticoes, not args.sem_graficos, args.semente)
+        imprimir_resultado(anos, resultados[str(anos)], (base or {}).get('resultados', {}).get(str(anos)))
+
+    print("\n" + "=" * 70)
+    if base is None:
+        salvar_baseline(args.baseline, resultados)
+        print(f"✓ Baseline salva em: {args.baseline}")
+        return 0
+
+    regressoes = comparar(base['resultados'], resultados, args.limite)
+    if not regressoes:
+        print(f"✓ Nenhuma regressão acima de {args.limite:.0%} em relação à baseline")
+        return 0
+    print(f"❌ {len(regressoes)} regressão(ões) acima de {args.limite:.0%}:")
+    for tamanho, etapa, metrica, antes, agora in regressoes:
+        aumento = f" (+{agora / antes - 1:.0%})" if antes > 0 else ''
+        print(f"   - {tamanho} ano(s) / {etapa} / {metrica}: {antes} -> {agora}{aumento}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
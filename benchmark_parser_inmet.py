@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: caminho atual de parsing (ler_csv_inmet + processar_datas +
+converter_colunas) vs parser_inmet.ler_inmet_rapido.
+
+Roda no arquivo real de Aracaju (8.769 linhas) e em arquivos sintéticos com
+milhões de linhas, montados repetindo o corpo do arquivo real com anos
+diferentes.
+
+Uso:
+    python benchmark_parser_inmet.py --linhas 1000000 3000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from inmet_comum import ler_csv_inmet, processar_datas, converter_colunas, LINHAS_CABECALHO
+from parser_inmet import ler_inmet_rapido
+
+ARQUIVO_REAL = "INMET_NE_SE_A409_ARACAJU_01-01-2023_A_31-12-2023.CSV"
+ANO_INICIAL_SINTETICO = 1700
+
+
+def caminho_atual(caminho):
+    return converter_colunas(processar_datas(ler_csv_inmet(caminho)))
+
+
+def caminho_rapido(caminho):
+    return ler_inmet_rapido(caminho)[1]
+
+
+def gerar_arquivo_sintetico(caminho_saida, n_linhas, modelo=ARQUIVO_REAL):
+    """Repete o corpo do arquivo modelo, trocando o ano, até ter `n_linhas` linhas."""
+    with open(modelo, 'r', encoding='latin1', newline='') as f:
+        linhas = f.readlines()
+    cabecalho, corpo = linhas[:LINHAS_CABECALHO + 1], linhas[LINHAS_CABECALHO + 1:]
+    bloco = ''.join(corpo)
+    ano_modelo = corpo[0][:4]
+    escritas = 0
+    with open(caminho_saida, 'w', encoding='latin1', newline='') as f:
+        f.writelines(cabecalho)
+        ano = ANO_INICIAL_SINTETICO
+        while escritas < n_linhas:
+            restante = n_linhas - escritas
+            if restante >= len(corpo):
+                f.write(bloco.replace(ano_modelo + '/', f'{ano}/'))
+                escritas += len(corpo)
+            else:
+                f.write(''.join(corpo[:restante]).replace(ano_modelo + '/', f'{ano}/'))
+                escritas += restante
+            ano += 1
+    return caminho_saida
+
+
+def medir(funcao, caminho, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(caminho)
+        tempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    df = funcao(caminho)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(tempos), pico, df.memory_usage(deep=True).sum()
+
+
+def comparar(rotulo, caminho, repeticoes):
+    t_atual, pico_atual, mem_atual = medir(caminho_atual, caminho, repeticoes)
+    t_rapido, pico_rapido, mem_rapido = medir(caminho_rapido, caminho, repeticoes)
+    print(f"\n📊 {rotulo}")
+    print(f"   {'':10} {'tempo (s)':>10} {'pico (MB)':>10} {'df (MB)':>10}")
+    print(f"   {'atual':10} {t_atual:10.3f} {pico_atual / 1e6:10.1f} {mem_atual / 1e6:10.1f}")
+    print(f"   {'rápido':10} {t_rapido:10.3f} {pico_rapido / 1e6:10.1f} {mem_rapido / 1e6:10.1f}")
+    print(f"   ⚡ Speedup: {t_atual / t_rapido:.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do parser rápido do INMET")
+    parser.add_argument('--linhas', type=int, nargs='*', default=[1_000_000, 3_000_000],
+                        help="Tamanhos dos arquivos sintéticos (linhas)")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("BENCHMARK: PARSER ATUAL vs PARSER RÁPIDO")
+    print("=" * 70)
+
+    if not os.path.exists(ARQUIVO_REAL):
+        print(f"❌ ERRO: Arquivo não encontrado: {ARQUIVO_REAL}")
+        return 1
+
+    comparar(f"Aracaju 2023 ({ARQUIVO_REAL})", ARQUIVO_REAL, args.repeticoes)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for n_linhas in args.linhas:
+            caminho = os.path.join(pasta, f"sintetico_{n_linhas}.CSV")
+            gerar_arquivo_sintetico(caminho, n_linhas)
+            tamanho_mb = os.path.getsize(caminho) / 1e6
+            comparar(f"Sintético: {n_linhas:,} linhas ({tamanho_mb:.0f} MB)", caminho, 1)
+            os.remove(caminho)
+
+    print("\n" + "=" * 70)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache em disco, endereçado por conteúdo, para as saídas das etapas do pipeline
+(dados horários, agregado diário, dados mesclados, matriz de correlação).
+
+Cada saída é gravada em formato colunar binário (.npz, um array NumPy por
+coluna, sem pickle) com nome igual ao hash SHA-256 da etapa, dos seus
+parâmetros e das suas entradas. Entradas podem ser caminhos de arquivo (hash
+do conteúdo), chaves de outras etapas (encadeamento) ou DataFrames.
+
+O tamanho total é limitado (LRU: o acesso atualiza o mtime do arquivo e os
+menos recentes são removidos primeiro).
+
+Uso:
+    python cache_etapas.py info
+    python cache_etapas.py limpar
+"""
+
+import argparse
+import ast
+import functools
+import hashlib
+import json
+import os
+import sys
+import time
+import types
+
+import numpy as np
+import pandas as pd
+
+DIRETORIO_CACHE = os.environ.get('CACHE_ETAPAS_DIR', '.cache_etapas')
+LIMITE_BYTES = int(float(os.environ.get('CACHE_ETAPAS_LIMITE_MB', 512)) * 1_000_000)
+EXTENSAO = '.npz'
+
+
+# ============================================================================
+# CHAVES
+# ============================================================================
+
+def hash_arquivo(caminho, tamanho_bloco=1 << 20):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def hash_dataframe(df):
+    h = hashlib.sha256()
+    h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    h.update(json.dumps([str(c) for c in df.columns]).encode())
+    h.update(json.dumps([str(t) for t in df.dtypes]).encode())
+    return h.hexdigest()
+
+
+def _impressao_entrada(entrada):
+    if isinstance(entrada, pd.Series):
+        entrada = entrada.to_frame()
+    if isinstance(entrada, pd.DataFrame):
+        return 'df:' + hash_dataframe(entrada)
+    if isinstance(entrada, str) and os.path.isfile(entrada):
+        return 'arquivo:' + hash_arquivo(entrada)
+    # Chaves de outras etapas ou valores simples
+    return 'valor:' + str(entrada)
+
+
+def _atualizar_com_codigo(h, codigo):
+    h.update(codigo.co_code)
+    h.update(repr(codigo.co_names).encode())
+    for constante in codigo.co_consts:
+        if isinstance(constante, types.CodeType):
+            _atualizar_com_codigo(h, constante)
+        elif isinstance(constante, frozenset):
+            # A ordem de um frozenset de str muda com PYTHONHASHSEED
+            h.update(repr(sorted(constante, key=repr)).encode())
+        else:
+            h.update(repr(constante).encode())
+
+
+@functools.lru_cache(maxsize=None)
+def _hash_fontes(caminho):
+    """Hash do fonte de um módulo e, transitivamente, dos módulos do repositório que ele importa.
+
+    Imports dentro de funções (lazy) também contam: uma etapa que chama
+    eventos_desastre só na hora de rodar muda de chave quando ele muda.
+    """
+    pasta = os.path.dirname(caminho)
+    vistos, pendentes = set(), [caminho]
+    while pendentes:
+        atual = pendentes.pop()
+        if atual in vistos:
+            continue
+        vistos.add(atual)
+        with open(atual, 'rb') as f:
+            arvore = ast.parse(f.read())
+        for no in ast.walk(arvore):
+            if isinstance(no, ast.Import):
+                nomes = [alias.name for alias in no.names]
+            elif isinstance(no, ast.ImportFrom) and no.module and not no.level:
+                nomes = [no.module]
+            else:
+                continue
+            for nome in nomes:
+                arquivo = os.path.join(pasta, nome.split('.')[0] + '.py')
+                if os.path.isfile(arquivo):
+                    pendentes.append(arquivo)
+    h = hashlib.sha256()
+    for arquivo in sorted(vistos):
+        h.update(os.path.basename(arquivo).encode())
+        h.update(hash_arquivo(arquivo).encode())
+    return h.hexdigest()
+
+
+def assinatura_codigo(*funcoes):
+    """Hash do código que produz uma saída, para entrar nos `parametros` de chave_cache.
+
+    Cobre o bytecode, os nomes e as constantes de cada função e o fonte do seu
+    módulo mais o dos módulos do repositório que ele importa. Assim, uma
+    correção no parser, na reamostragem ou na mesclagem invalida o cache.
+    """
+    h = hashlib.sha256()
+    for funcao in funcoes:
+        funcao = getattr(funcao, 'func', funcao)   # functools.partial
+        h.update(f"{getattr(funcao, '__module__', '')}.{getattr(funcao, '__qualname__', repr(funcao))}".encode())
+        codigo = getattr(funcao, '__code__', None)
+        if codigo is not None:
+            _atualizar_com_codigo(h, codigo)
+        arquivo = getattr(sys.modules.get(getattr(funcao, '__module__', None)), '__file__', None)
+        if arquivo and arquivo.endswith('.py'):
+            h.update(_hash_fontes(os.path.abspath(arquivo)).encode())
+    return h.hexdigest()
+
+
+def chave_cache(etapa, entradas=(), parametros=None):
+    """Hash SHA-256 da etapa + parâmetros + impressões digitais das entradas."""
+    h = hashlib.sha256()
+    h.update(etapa.encode())
+    h.update(json.dumps(parametros, sort_keys=True, default=str).encode())
+    for entrada in entradas:
+        h.update(_impressao_entrada(entrada).encode())
+    return h.hexdigest()
+
+
+# ============================================================================
+# LEITURA / ESCRITA
+# ============================================================================
+
+def _caminho(chave, diretorio):
+    return os.path.join(diretorio or DIRETORIO_CACHE, chave + EXTENSAO)
+
+
+def _para_array(serie):
+    valores = serie.to_numpy()
+    if valores.dtype == object:
+        valores = np.asarray(serie.astype(str).to_numpy(), dtype=str)
+    return valores
+
+
+def salvar_frame_colunar(df, caminho):
+    """Grava um DataFrame em .npz, um array por coluna (índice incluído)."""
+    nomes_indice = [n if n is not None else f'__indice_{i}__' for i, n in enumerate(df.index.names)]
+    plano = df.copy()
+    plano.index.names = nomes_indice
+    plano = plano.reset_index()
+    meta = {
+        'indice': nomes_indice,
+        'colunas': [str(c) for c in plano.columns],
+        'nomes_indice_originais': list(df.index.names),
+    }
+    arrays = {f'c{i}': _para_array(plano[c]) for i, c in enumerate(plano.columns)}
+    arrays['__meta__'] = np.array(json.dumps(meta))
+    temporario = caminho + '.tmp'
+    with open(temporario, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(temporario, caminho)
+
+
+def ler_frame_colunar(caminho):
+    with np.load(caminho, allow_pickle=False) as dados:
+        meta = json.loads(str(dados['__meta__']))
+        df = pd.DataFrame({nome: dados[f'c{i}'] for i, nome in enumerate(meta['colunas'])})
+    df = df.set_index(meta['indice'])
+    df.index.names = meta['nomes_indice_originais']
+    return df
+
+
+def salvar_cache(chave, df, diretorio=None, limite_bytes=None):
+    """Grava o DataFrame em formato colunar e aplica o limite de tamanho."""
+    diretorio = diretorio or DIRETORIO_CACHE
+    os.makedirs(diretorio, exist_ok=True)
+    salvar_frame_colunar(df, _caminho(chave, diretorio))
+    aplicar_limite(diretorio, limite_bytes)
+
+
+def ler_cache(chave, diretorio=None):
+    """Devolve o DataFrame guardado na chave, ou None se não estiver no cache."""
+    caminho = _caminho(chave, diretorio)
+    if not os.path.exists(caminho):
+        return None
+    df = ler_frame_colunar(caminho)
+    # Marca o acesso para a política LRU
+    os.utime(caminho, None)
+    return df
+
+
+def cache_ou_calcular(etapa, funcao, entradas=(), parametros=None, diretorio=None, limite_bytes=None):
+    """Devolve (df, chave, veio_do_cache); só chama `funcao()` se a chave não existir."""
+    chave = chave_cache(etapa, entradas, parametros)
+    df = ler_cache(chave, diretorio)
+    if df is not None:
+        return df, chave, True
+    df = funcao()
+    salvar_cache(chave, df, diretorio, limite_bytes)
+    return df, chave, False
+
+
+# ============================================================================
+# MANUTENÇÃO
+# ============================================================================
+
+def listar_entradas(diretorio=None):
+    diretorio = diretorio or DIRETORIO_CACHE
+    if not os.path.isdir(diretorio):
+        return []
+    entradas = []
+    for nome in os.listdir(diretorio):
+        if nome.endswith(EXTENSAO):
+            estado = os.stat(os.path.join(diretorio, nome))
+            entradas.append({'chave': nome[:-len(EXTENSAO)], 'bytes': estado.st_size, 'acesso': estado.st_mtime})
+    return sorted(entradas, key=lambda e: e['acesso'])
+
+
+def aplicar_limite(diretorio=None, limite_bytes=None):
+    """Remove as entradas usadas há mais tempo até o total caber no limite."""
+    diretorio = diretorio or DIRETORIO_CACHE
+    limite_bytes = LIMITE_BYTES if limite_bytes is None else limite_bytes
+    entradas = listar_entradas(diretorio)
+    total = sum(e['bytes'] for e in entradas)
+    removidas = 0
+    for entrada in entradas:
+        if total <= limite_bytes:
+            break
+        os.remove(_caminho(entrada['chave'], diretorio))
+        total -= entrada['bytes']
+        removidas += 1
+    return removidas
+
+
+def limpar_cache(diretorio=None):
+    entradas = listar_entradas(diretorio)
+    for entrada in entradas:
+        os.remove(_caminho(entrada['chave'], diretorio))
+    return len(entradas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspeciona ou limpa o cache das etapas do pipeline")
+    parser.add_argument('comando', choices=['info', 'limpar'])
+    parser.add_argument('--diretorio', default=DIRETORIO_CACHE)
+    args = parser.parse_args(argv)
+
+    if args.comando == 'limpar':
+        n = limpar_cache(args.diretorio)
+        print(f"✓ {n} entrada(s) removida(s) de {args.diretorio}")
+        return 0
+
+    entradas = listar_entradas(args.diretorio)
+    total = sum(e['bytes'] for e in entradas)
+    print(f"📁 Cache: {os.path.abspath(args.diretorio)}")
+    print(f"   - Entradas: {len(entradas)}")
+    print(f"   - Tamanho: {total / 1e6:.2f} MB (limite {LIMITE_BYTES / 1e6:.0f} MB)")
+    for entrada in reversed(entradas):
+        acesso = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entrada['acesso']))
+        print(f"   {entrada['chave'][:16]}…  {entrada['bytes'] / 1e3:10.1f} KB  último acesso {acesso}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cenários de Monte Carlo para o dataset sintético de desastres.
+
+criar_desastres_dummy gera um único cenário (quantil 0,95 fixo, 5
+deslizamentos, np.random.seed(42)), então cada correlação de
+"Correlações Principais" é um número só. Aqui cada cenário sorteia os seus
+parâmetros dentro de FAIXAS_CENARIOS:
+
+  - quantil de precipitação das inundações e, à parte, das chuvas intensas;
+  - limiar de chuva e número de deslizamentos;
+  - ruído multiplicativo (lognormal) na precipitação usada para decidir os
+    eventos, simulando incerteza de medição/registro (a coluna de
+    precipitação da correlação continua sendo a observada).
+
+Um lote de cenários é gerado de uma vez em arrays (cenários x dias):
+quantis por linha a partir da série ordenada, deslizamentos por sorteio de
+chaves aleatórias entre os dias elegíveis, e as matrizes de correlação do
+lote saem de significancia_correlacao.correlacao_em_lote (pares completos,
+como o .corr()). Os lotes vão para um pool de processos; cada lote usa a
+sua própria semente derivada de (estação, lote), então o resultado não
+depende do número de workers.
+
+O resultado é a distribuição de cada coeficiente (média, desvio, quantis e
+fração de cenários em que ele nem existe, ex.: nenhum deslizamento).
+
+Uso:
+    python cenarios_monte_carlo.py                              # Aracaju 2023, 10.000 cenários
+    python cenarios_monte_carlo.py --cenarios 50000 --salvar-cenarios cenarios.npz
+    python cenarios_monte_carlo.py --lote inmet_diario_lote.csv --workers 8
+    python cenarios_monte_carlo.py --benchmark
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from etapas_pipeline import (COLUNAS_CLIMATICAS, COLUNAS_DESASTRES, ARQUIVO_MESCLADO, PARAMETROS_DESASTRES,
+                             criar_desastres_dummy, calcular_correlacao)
+from significancia_correlacao import correlacao_em_lote
+
+ARQUIVO_CENARIOS = 'correlation_scenarios.csv'
+CENARIOS = 10_000
+TAMANHO_LOTE = 500
+QUANTIS_RESUMO = (0.025, 0.25, 0.5, 0.75, 0.975)
+
+# Faixas (mínimo, máximo) sorteadas uniformemente em cada cenário
+FAIXAS_CENARIOS = {
+    'quantil_inundacao': (0.90, 0.98),
+    'quantil_chuvas': (0.90, 0.98),
+    'limiar_deslizamento_mm': (2.0, 10.0),
+    'n_deslizamentos': (1, 10),          # inteiro, inclusive
+    'ruido_precipitacao': (0.0, 0.3),    # desvio do log do fator multiplicativo
+}
+
+
+# ============================================================================
+# CENÁRIOS EM LOTE
+# ============================================================================
+
+def sortear_parametros(rng, cenarios, faixas=FAIXAS_CENARIOS):
+    """{parâmetro: array (cenários,)} sorteado dentro das faixas."""
+    parametros = {}
+    for nome, (minimo, maximo) in faixas.items():
+        if isinstance(minimo, int) and isinstance(maximo, int):
+            parametros[nome] = rng.integers(minimo, maximo + 1, cenarios)
+        else:
+            parametros[nome] = rng.uniform(minimo, maximo, cenarios)
+    return parametros
+
+
+def quantil_por_linha(valores, q):
+    """Quantil (interpolação linear, como Series.quantile) de cada linha, com seu próprio q; ignora NaN."""
+    ordenados = np.sort(valores, axis=1)          # NaN vão para o fim
+    n = (~np.isnan(valores)).sum(axis=1)
+    posicao = q * np.maximum(n - 1, 0)
+    abaixo = np.floor(posicao).astype(np.int64)
+    acima = np.minimum(abaixo + 1, np.maximum(n - 1, 0))
+    linhas = np.arange(len(valores))
+    inferior, superior = ordenados[linhas, abaixo], ordenados[linhas, acima]
+    resultado = inferior + (superior - inferior) * (posicao - abaixo)
+    return np.where(n > 0, resultado, np.nan)
+
+
+def flags_cenarios(precipitacao, parametros, rng):
+    """(cenários, dias, desastres) com os flags de COLUNAS_DESASTRES de cada cenário."""
+    cenarios = len(parametros['quantil_inundacao'])
+    ruido = np.exp(rng.standard_normal((cenarios, len(precipitacao))) * parametros['ruido_precipitacao'][:, None])
+    chuva = precipitacao[None, :] * ruido
+
+    with np.errstate(invalid='ignore'):
+        inundacao = chuva > quantil_por_linha(chuva, parametros['quantil_inundacao'])[:, None]
+        chuvas = chuva > quantil_por_linha(chuva, parametros['quantil_chuvas'])[:, None]
+        elegiveis = chuva > parametros['limiar_deslizamento_mm'][:, None]
+
+    # n dias sorteados sem reposição entre os elegíveis: as n menores chaves aleatórias
+    chaves = np.where(elegiveis, rng.random(chuva.shape), np.inf)
+    posto = np.argsort(np.argsort(chaves, axis=1), axis=1)
+    deslizamento = elegiveis & (posto < parametros['n_deslizamentos'][:, None])
+
+    flags = {'Inundacao_Alagamento': inundacao, 'Deslizamento': deslizamento, 'Chuvas_Intensas': chuvas}
+    return np.stack([flags[coluna] for coluna in COLUNAS_DESASTRES], axis=-1).astype(np.float64)
+
+
+def _lote(tarefa):
+    """Worker do pool: (estação, lote, parâmetros, r (cenários, colunas, colunas))."""
+    estacao, lote, clima, cenarios, faixas, semente = tarefa
+    rng = np.random.default_rng(np.random.SeedSequence(semente, spawn_key=(estacao, lote)))
+    parametros = sortear_parametros(rng, cenarios, faixas)
+    precipitacao = clima[:, COLUNAS_CLIMATICAS.index('Precipitacao_mm')]
+    flags = flags_cenarios(precipitacao, parametros, rng)
+    dados = np.concatenate([np.broadcast_to(clima, (cenarios,) + clima.shape), flags], axis=-1)
+    r, _ = correlacao_em_lote(dados)
+    return estacao, lote, parametros, r.astype(np.float32)
+
+
+def simular_estacoes(estacoes, cenarios=CENARIOS, faixas=FAIXAS_CENARIOS, workers=None, semente=0,
+                     tamanho_lote=TAMANHO_LOTE):
+    """{codigo: DataFrame diário com COLUNAS_CLIMATICAS} -> {codigo: (parâmetros, r (cenários, col, col))}."""
+    codigos = list(estacoes)
+    climas = {codigo: df[COLUNAS_CLIMATICAS].to_numpy(dtype=np.float64) for codigo, df in estacoes.items()}
+    tarefas = [(i, lote, climas[codigo], min(tamanho_lote, cenarios - inicio), faixas, semente)
+               for i, codigo in enumerate(codigos)
+               for lote, inicio in enumerate(range(0, cenarios, tamanho_lote))]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tarefas) == 1:
+        resultados = list(map(_lote, tarefas))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            resultados = list(executor.map(_lote, tarefas, chunksize=max(1, len(tarefas) // (4 * workers))))
+
+    saida = {}
+    for i, codigo in enumerate(codigos):
+        lotes = sorted((x for x in resultados if x[0] == i), key=lambda x: x[1])
+        parametros = {nome: np.concatenate([x[2][nome] for x in lotes]) for nome in faixas}
+        saida[codigo] = (parametros, np.concatenate([x[3] for x in lotes]))
+    return saida
+
+
+# ============================================================================
+# RESUMO DAS DISTRIBUIÇÕES
+# ============================================================================
+
+def resumir(r, colunas=COLUNAS_CLIMATICAS + COLUNAS_DESASTRES, referencia=None, quantis=QUANTIS_RESUMO):
+    """Uma linha por par (variável, desastre) com a distribuição do coeficiente entre os cenários.
+
+    Com `referencia` (matriz do cenário único do dummy), inclui o percentil
+    em que ela cai na distribuição.
+    """
+    pares = [(i, colunas.index(d)) for i, v in enumerate(colunas) if v not in COLUNAS_DESASTRES
+             for d in COLUNAS_DESASTRES] + \
+            [(colunas.index(a), colunas.index(b)) for k, a in enumerate(COLUNAS_DESASTRES)
+             for b in COLUNAS_DESASTRES[k + 1:]]
+    i, j = np.array(pares).T
+    valores = r[:, i, j].astype(np.float64)
+    existe = ~np.isnan(valores)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)   # pares sem nenhum cenário definido
+        tabela = pd.DataFrame({
+            'Variavel_1': np.asarray(colunas)[i],
+            'Variavel_2': np.asarray(colunas)[j],
+            'media': np.nanmean(valores, axis=0),
+            'desvio': np.nanstd(valores, axis=0),
+            **{f'q{q * 100:g}': v for q, v in zip(quantis, np.nanquantile(valores, quantis, axis=0))},
+            'fracao_definida': existe.mean(axis=0),
+        })
+    if referencia is not None:
+        ref = np.array([referencia.loc[a, b] if a in referencia.index and b in referencia.columns else np.nan
+                        for a, b in zip(tabela['Variavel_1'], tabela['Variavel_2'])])
+        tabela['r_dummy'] = ref
+        tabela['percentil_dummy'] = np.where(np.isnan(ref), np.nan,
+                                             (valores <= ref).sum(axis=0) / np.maximum(existe.sum(axis=0), 1))
+    return tabela
+
+
+def imprimir_principais(tabela):
+    print("\n📈 Correlações Principais (distribuição entre cenários):")
+    principais = [('Precipitacao_mm', 'Inundacao_Alagamento', 'Precip vs Inundação'),
+                  ('Precipitacao_mm', 'Deslizamento', 'Precip vs Deslizamento'),
+                  ('Precipitacao_mm', 'Chuvas_Intensas', 'Precip vs Chuvas Intensas'),
+                  ('Temperatura_Maxima_C', 'Inundacao_Alagamento', 'Temp. Máx. vs Inundação'),
+                  ('Temperatura_Minima_C', 'Inundacao_Alagamento', 'Temp. Mín. vs Inundação')]
+    for v1, v2, rotulo in principais:
+        linha = tabela[(tabela['Variavel_1'] == v1) & (tabela['Variavel_2'] == v2)]
+        if linha.empty:
+            continue
+        linha = linha.iloc[0]
+        texto = (f"   - {rotulo:<26} mediana {linha['q50']:+.3f}  95% [{linha['q2.5']:+.3f}, "
+                 f"{linha['q97.5']:+.3f}]  desvio {linha['desvio']:.3f}")
+        if 'r_dummy' in linha:
+            texto += f"  | dummy {linha['r_dummy']:+.3f} (p{100 * linha['percentil_dummy']:.0f})"
+        print(texto)
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def benchmark(cenarios, workers):
+    df_merged = pd.read_csv(ARQUIVO_MESCLADO, index_col=0, parse_dates=True)
+    df_clima = df_merged[COLUNAS_CLIMATICAS]
+
+    inicio = time.perf_counter()
+    simular_estacoes({'estacao': df_clima}, cenarios, workers=1)
+    t_lote = time.perf_counter() - inicio
+
+    # Referência: criar_desastres_dummy + .corr() por cenário
+    rng = np.random.default_rng(0)
+    amostra = min(100, cenarios)
+    parametros = sortear_parametros(rng, amostra)
+    inicio = time.perf_counter()
+    for k in range(amostra):
+        calcular_correlacao(criar_desastres_dummy(
+            df_clima, quantil_inundacao=parametros['quantil_inundacao'][k],
+            limiar_deslizamento_mm=parametros['limiar_deslizamento_mm'][k],
+            n_deslizamentos=int(parametros['n_deslizamentos'][k]), random_state=k))
+    t_laco = (time.perf_counter() - inicio) * cenarios / amostra
+
+    print(f"   1 estação, {cenarios:,} cenários:")
+    print(f"   - em lote:                     {t_lote:7.2f}s ({cenarios / t_lote:,.0f} cenários/s)")
+    print(f"   - laço dummy + .corr():        {t_laco:7.2f}s (estimado de {amostra})  -> {t_laco / t_lote:.0f}x")
+
+    n = workers or os.cpu_count() or 1
+    if n > 1:
+        estacoes = {f'E{i:03d}': df_clima for i in range(n)}
+        inicio = time.perf_counter()
+        simular_estacoes(estacoes, cenarios, workers=n)
+        segundos = time.perf_counter() - inicio
+        print(f"   - {n} estações em {n} workers: {segundos:7.2f}s ({segundos / n:.2f}s por estação)")
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cenários de Monte Carlo para os desastres sintéticos")
+    parser.add_argument('--mesclado', default=ARQUIVO_MESCLADO)
+    parser.add_argument('--lote', help="Tabela diária (Codigo_Estacao, Data) de várias estações")
+    parser.add_argument('--saida', default=ARQUIVO_CENARIOS)
+    parser.add_argument('--cenarios', type=int, default=CENARIOS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--salvar-cenarios', metavar='NPZ', help="Grava parâmetros e matrizes de todos os cenários")
+    parser.add_argument('--benchmark', action='store_true')
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("CENÁRIOS DE MONTE CARLO - DESASTRES SINTÉTICOS")
+    print("=" * 70)
+
+    if args.benchmark:
+        benchmark(args.cenarios, args.workers)
+        return 0
+
+    origem = args.lote or args.mesclado
+    if not os.path.exists(origem):
+        print(f"❌ ERRO: Arquivo não encontrado: {origem}")
+        return 1
+
+    if args.lote:
+        df_lote = pd.read_csv(origem, index_col=['Codigo_Estacao', 'Data'], parse_dates=['Data'])
+        estacoes = {codigo: df.droplevel('Codigo_Estacao') for codigo, df in df_lote.groupby(level='Codigo_Estacao')}
+    else:
+        estacoes = {'estacao': pd.read_csv(origem, index_col=0, parse_dates=True)}
+
+    inicio = time.perf_counter()
+    resultados = simular_estacoes(estacoes, args.cenarios, workers=args.workers, semente=args.semente)
+    segundos = time.perf_counter() - inicio
+
+    tabelas = []
+    for codigo, (parametros, r) in resultados.items():
+        df = estacoes[codigo]
+        referencia = calcular_correlacao(criar_desastres_dummy(df[COLUNAS_CLIMATICAS], **PARAMETROS_DESASTRES))
+        tabela = resumir(r, referencia=referencia)
+        if args.lote:
+            tabela.insert(0, 'Codigo_Estacao', codigo)
+        tabelas.append(tabela)
+    tabela = pd.concat(tabelas, ignore_index=True)
+    if not args.lote:
+        imprimir_principais(tabela)
+
+    tabela.to_csv(args.saida, index=False)
+    if args.salvar_cenarios:
+        np.savez_compressed(args.salvar_cenarios, codigos=np.array(list(resultados)),
+                            colunas=np.array(COLUNAS_CLIMATICAS + COLUNAS_DESASTRES),
+                            **{f'{codigo}__r': r for codigo, (_, r) in resultados.items()},
+                            **{f'{codigo}__{nome}': valores for codigo, (parametros, _) in resultados.items()
+                               for nome, valores in parametros.items()})
+        print(f"✓ Cenários salvos: {args.salvar_cenarios}")
+
+    print(f"\n✓ {len(resultados)} estação(ões) x {args.cenarios:,} cenários em {segundos:.2f}s")
+    print(f"✓ Salvo: {args.saida}")
+    print("=" * 70)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,621 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Controle de qualidade (QC) dos dados horários do INMET.
+
+O PASSO 1 agrega o que vier no CSV: células vazias e sentinelas (-9999)
+passam direto, e um dia inteiro sem chuva registrada vira 0 mm no
+resample('D').sum(). Aqui cada hora de cada variável recebe uma máscara de
+bits (uint8) com o resultado de todos os testes, feitos em uma passada
+vetorizada sobre o array (estações, horas):
+
+  QC_AUSENTE        célula vazia no arquivo
+  QC_SENTINELA      valor sentinela (SENTINELAS)
+  QC_FAIXA          fora da faixa física da variável
+  QC_SALTO          pico isolado: variação acima de 'salto' em relação à
+                    hora anterior, não confirmada pela hora seguinte
+  QC_PERSISTENCIA   mesmo valor repetido por 'persistencia' horas ou mais
+                    (exceto os valores em 'repeticao_permitida', ex.: 0 mm)
+  QC_INCONSISTENTE  temperatura mínima acima da máxima na mesma hora
+  QC_INTERPOLADO    lacuna de até max_lacuna_horas preenchida por
+                    interpolação linear no tempo
+  QC_VIZINHO        lacuna preenchida pela média IDW das estações vizinhas
+                    observadas na mesma hora (indice_estacoes)
+
+Os valores diários só saem com cobertura (fração das 24 horas com dado
+aceito ou preenchido) de ao menos cobertura_minima; abaixo disso ficam NaN,
+e a cobertura de cada variável vai junto na coluna Cobertura_<variavel>.
+
+No acervo horário (acervo_horario) as máscaras ficam em <variavel>.qc ao
+lado de <variavel>.bin, no mesmo layout (estações, horas):
+
+  1ª passada, por blocos de estações: testes -> máscaras;
+  2ª passada, por blocos de dias da rede inteira (com margem para a
+  interpolação): preenchimento -> bits de preenchimento -> tabela diária
+  (Codigo_Estacao, Data) no formato de processar_lote_inmet.
+
+Uso:
+    python controle_qualidade.py arquivo --arquivo INMET_NE_SE_A409_ARACAJU_01-01-2023_A_31-12-2023.CSV
+    python controle_qualidade.py acervo --destino acervo_inmet --preenchimento interpolar+vizinhos
+    python controle_qualidade.py benchmark --estacoes 20 --anos 2021 2022 2023
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from inmet_comum import AGREGACOES_DIARIAS
+
+# Bits da máscara (uma por hora e variável)
+QC_AUSENTE = 1 << 0
+QC_SENTINELA = 1 << 1
+QC_FAIXA = 1 << 2
+QC_SALTO = 1 << 3
+QC_PERSISTENCIA = 1 << 4
+QC_INCONSISTENTE = 1 << 5
+QC_INTERPOLADO = 1 << 6
+QC_VIZINHO = 1 << 7
+QC_REJEITADO = QC_AUSENTE | QC_SENTINELA | QC_FAIXA | QC_SALTO | QC_PERSISTENCIA | QC_INCONSISTENTE
+QC_PREENCHIDO = QC_INTERPOLADO | QC_VIZINHO
+
+NOMES_FLAGS = {
+    QC_AUSENTE: 'ausente',
+    QC_SENTINELA: 'sentinela',
+    QC_FAIXA: 'faixa',
+    QC_SALTO: 'salto',
+    QC_PERSISTENCIA: 'persistencia',
+    QC_INCONSISTENTE: 'inconsistente',
+    QC_INTERPOLADO: 'interpolado',
+    QC_VIZINHO: 'vizinho',
+}
+
+SENTINELAS = (-9999.0, 9999.0)
+
+# faixa: (mínimo, máximo) físico; salto: variação máxima plausível em 1 h;
+# persistencia: horas seguidas com o mesmo valor para suspeitar do sensor;
+# interpolar: se lacunas curtas podem ser interpoladas no tempo
+LIMITES_QC = {
+    'Precipitacao_mm': {'faixa': (0.0, 150.0), 'salto': None, 'persistencia': 6,
+                        'repeticao_permitida': (0.0,), 'interpolar': False},
+    'Temperatura_Maxima_C': {'faixa': (-10.0, 48.0), 'salto': 8.0, 'persistencia': 8, 'interpolar': True},
+    'Temperatura_Minima_C': {'faixa': (-10.0, 48.0), 'salto': 8.0, 'persistencia': 8, 'interpolar': True},
+    'Umidade_Relativa_Media_pct': {'faixa': (1.0, 100.0), 'salto': 40.0, 'persistencia': 12,
+                                   'repeticao_permitida': (100.0,), 'interpolar': True},
+    'Vento_Rajada_Maxima_ms': {'faixa': (0.0, 60.0), 'salto': None, 'persistencia': 12,
+                               'repeticao_permitida': (0.0,), 'interpolar': True},
+}
+PAR_CONSISTENCIA = ('Temperatura_Minima_C', 'Temperatura_Maxima_C')
+
+PREENCHIMENTOS = ('nenhum', 'interpolar', 'vizinhos', 'interpolar+vizinhos')
+PREENCHIMENTO = 'interpolar'
+MAX_LACUNA_HORAS = 3
+COBERTURA_MINIMA = 0.75
+VIZINHOS_PREENCHIMENTO = 4
+RAIO_MAX_VIZINHOS_KM = 150.0
+
+ESTACOES_POR_BLOCO = 32
+DIAS_POR_BLOCO = 120
+EXTENSAO_QC = '.qc'
+ARQUIVO_PARAMETROS_QC = 'qc.json'
+ARQUIVO_DIARIO_QC = 'inmet_diario_qc.csv'
+
+
+def coluna_cobertura(variavel):
+    return f'Cobertura_{variavel}'
+
+
+def _modos(preenchimento):
+    if preenchimento not in PREENCHIMENTOS:
+        raise ValueError(f"Preenchimento desconhecido: {preenchimento} (use {', '.join(PREENCHIMENTOS)})")
+    return 'interpolar' in preenchimento, 'vizinhos' in preenchimento
+
+
+# ============================================================================
+# TESTES VETORIZADOS
+# ============================================================================
+
+def _tamanho_das_sequencias(v):
+    """Para cada hora, o tamanho da sequência de valores iguais consecutivos (na linha) que a contém."""
+    novo = np.ones(v.shape, dtype=bool)
+    novo[:, 1:] = v[:, 1:] != v[:, :-1]        # NaN != NaN: cada NaN é uma sequência
+    rotulos = np.cumsum(novo.ravel()) - 1       # a 1ª hora de cada linha sempre abre sequência
+    return np.bincount(rotulos)[rotulos].reshape(v.shape)
+
+
+def verificar_variavel(valores, limites=None, sentinelas=SENTINELAS):
+    """Testes de uma variável em (estações, horas) ou (horas,) de uma vez.
+
+    Devolve (limpos, flags): cópia 2D com NaN nas horas rejeitadas e a máscara uint8.
+    """
+    v = np.array(valores, ndmin=2, copy=True)
+    if v.dtype.kind != 'f':
+        v = v.astype(np.float64)
+    limites = limites or {}
+    flags = np.zeros(v.shape, dtype=np.uint8)
+    flags[np.isnan(v)] |= QC_AUSENTE
+
+    sentinela = np.isin(v, sentinelas)
+    flags[sentinela] |= QC_SENTINELA
+    v[sentinela] = np.nan
+
+    minimo, maximo = limites.get('faixa', (-np.inf, np.inf))
+    with np.errstate(invalid='ignore'):
+        fora = (v < minimo) | (v > maximo)
+    flags[fora] |= QC_FAIXA
+    v[fora] = np.nan
+
+    salto = limites.get('salto')
+    if salto is not None and v.shape[1] > 1:
+        with np.errstate(invalid='ignore'):
+            variacao = np.abs(np.diff(v, axis=1))
+            pico = np.zeros(v.shape, dtype=bool)
+            pico[:, 1:] = variacao > salto
+            # Mudança confirmada pela hora seguinte é degrau real (frente fria, chuva), não pico
+            pico[:, 1:-1] &= ~(variacao[:, 1:] <= salto)
+        flags[pico] |= QC_SALTO
+
+    persistencia = limites.get('persistencia')
+    if persistencia:
+        parado = (_tamanho_das_sequencias(v) >= persistencia) & ~np.isnan(v)
+        parado &= ~np.isin(v, limites.get('repeticao_permitida', ()))
+        flags[parado] |= QC_PERSISTENCIA
+
+    v[(flags & QC_REJEITADO) != 0] = np.nan
+    return v, flags
+
+
+def verificar(valores, limites=LIMITES_QC, sentinelas=SENTINELAS):
+    """Testes de todas as variáveis ({variavel: (estações, horas)}) e consistência entre elas."""
+    limpos, flags = {}, {}
+    for variavel, array in valores.items():
+        limpos[variavel], flags[variavel] = verificar_variavel(array, limites.get(variavel), sentinelas)
+    if all(c in limpos for c in PAR_CONSISTENCIA):
+        minima, maxima = (limpos[c] for c in PAR_CONSISTENCIA)
+        with np.errstate(invalid='ignore'):
+            inconsistente = minima > maxima
+        for c in PAR_CONSISTENCIA:
+            flags[c][inconsistente] |= QC_INCONSISTENTE
+            limpos[c][inconsistente] = np.nan
+    return limpos, flags
+
+
+# ============================================================================
+# PREENCHIMENTO E AGREGAÇÃO DIÁRIA
+# ============================================================================
+
+def interpolar_lacunas(v, flags, max_horas=MAX_LACUNA_HORAS):
+    """Interpola no tempo (in place) lacunas de até `max_horas` entre dois valores válidos da linha."""
+    n_horas = v.shape[1]
+    valido = ~np.isnan(v)
+    posicao = np.arange(n_horas)
+    anterior = np.maximum.accumulate(np.where(valido, posicao, -1), axis=1)
+    seguinte = np.minimum.accumulate(np.where(valido, posicao, n_horas)[:, ::-1], axis=1)[:, ::-1]
+    lacuna = ~valido & (anterior >= 0) & (seguinte < n_horas) & (seguinte - anterior - 1 <= max_horas)
+    linhas, horas = np.nonzero(lacuna)
+    a, b = anterior[linhas, horas], seguinte[linhas, horas]
+    va, vb = v[linhas, a], v[linhas, b]
+    v[linhas, horas] = va + (vb - va) * (horas - a) / (b - a)
+    flags[linhas, horas] |= QC_INTERPOLADO
+    return len(linhas)
+
+
+def vizinhos_para_preenchimento(latitude, longitude, k=VIZINHOS_PREENCHIMENTO, raio_max_km=RAIO_MAX_VIZINHOS_KM):
+    """(índices, pesos) (estações, k) das k estações mais próximas de cada uma, sem ela própria.
+
+    Vizinhos além de `raio_max_km` (ou estações sem coordenadas) ficam com índice -1 e peso 0.
+    """
+    from indice_estacoes import IndiceEstacoes, pesos_idw
+
+    latitude = np.asarray(latitude, dtype=np.float64)
+    longitude = np.asarray(longitude, dtype=np.float64)
+    n = len(latitude)
+    catalogo = pd.DataFrame({'latitude': latitude, 'longitude': longitude}, index=np.arange(n))
+    indice = IndiceEstacoes(catalogo)
+    indices, distancias = indice.vizinhos(latitude, longitude, k + 1)
+    indices = np.where(indices >= 0, indice.codigos[np.maximum(indices, 0)], -1)
+
+    # Tira a própria estação (ou a primeira coluna, se ela não veio) e mantém k
+    proprio = indices == np.arange(n)[:, None]
+    proprio[~proprio.any(axis=1), -1] = True
+    mantidos = ~proprio
+    indices = indices[mantidos].reshape(n, -1)
+    distancias = distancias[mantidos].reshape(n, -1)
+    if raio_max_km is not None:
+        distancias = np.where(distancias <= raio_max_km, distancias, np.nan)
+    indices = np.where(np.isfinite(distancias), indices, -1)
+    return indices, np.nan_to_num(pesos_idw(distancias))
+
+
+def preencher_com_vizinhos(v, flags, observados, indices, pesos):
+    """Preenche (in place) NaN de v (estações, horas) com a média IDW dos vizinhos em `observados`.
+
+    `observados` é o mesmo recorte só com valores aceitos pelos testes (sem
+    preenchimentos), para que um valor preenchido não alimente outro.
+    """
+    numerador = np.zeros(v.shape, dtype=np.float64)
+    denominador = np.zeros(v.shape, dtype=np.float64)
+    for j in range(indices.shape[1]):
+        linhas = np.maximum(indices[:, j], 0)
+        peso = np.where(indices[:, j] >= 0, pesos[:, j], 0.0)[:, None]
+        valores = observados[linhas]
+        presente = ~np.isnan(valores)
+        numerador += np.where(presente, valores, 0.0) * peso
+        denominador += presente * peso
+    alvo = np.isnan(v) & (denominador > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        v[alvo] = (numerador / denominador)[alvo]
+    flags[alvo] |= QC_VIZINHO
+    return int(alvo.sum())
+
+
+def agregar_diario(limpos, agregacoes=AGREGACOES_DIARIAS, cobertura_minima=COBERTURA_MINIMA):
+    """{variavel: (estações, 24 * dias)} -> {variavel: diário (estações, dias)}, {variavel: cobertura}.
+
+    Dias com cobertura abaixo do mínimo ficam NaN (a soma de um dia sem dado
+    não vira 0 mm). Acima dele, agrega as horas disponíveis.
+    """
+    diarios, coberturas = {}, {}
+    for variavel, funcao in agregacoes.items():
+        if variavel not in limpos:
+            continue
+        v = limpos[variavel]
+        horas = v.reshape(v.shape[0], -1, 24)
+        presente = ~np.isnan(horas)
+        contagem = presente.sum(axis=2)
+        if funcao == 'sum':
+            diario = np.where(presente, horas, 0.0).sum(axis=2)
+        elif funcao == 'max':
+            diario = np.fmax.reduce(horas, axis=2)
+        elif funcao == 'min':
+            diario = np.fmin.reduce(horas, axis=2)
+        elif funcao == 'mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                diario = np.where(presente, horas, 0.0).sum(axis=2) / contagem
+        else:
+            raise ValueError(f"Agregação não suportada no QC: {funcao}")
+        cobertura = contagem / 24.0
+        diario = diario.astype(np.float64)
+        diario[(cobertura < cobertura_minima) | (contagem == 0)] = np.nan
+        diarios[variavel], coberturas[variavel] = diario, cobertura
+    return diarios, coberturas
+
+
+def resumo_flags(flags, horas_validas=None):
+    """Fração das horas com cada bit ligado, por variável (DataFrame variável x flag)."""
+    linhas = {}
+    for variavel, mascara in flags.items():
+        mascara = mascara if horas_validas is None else mascara[..., horas_validas]
+        contagens = np.bincount(mascara.ravel(), minlength=256)
+        total = max(mascara.size, 1)
+        linhas[variavel] = {nome: contagens[(np.arange(256) & bit) != 0].sum() / total
+                            for bit, nome in NOMES_FLAGS.items()}
+    return pd.DataFrame.from_dict(linhas, orient='index')
+
+
+# ============================================================================
+# UMA ESTAÇÃO (DataFrame horário)
+# ============================================================================
+
+def _grade_horaria(df_horario):
+    df_horario = df_horario[~df_horario.index.duplicated(keep='first')].sort_index()
+    inicio = df_horario.index.min().floor('D')
+    fim = df_horario.index.max().floor('D') + pd.Timedelta(hours=23)
+    return df_horario.reindex(pd.date_range(inicio, fim, freq='h', name=df_horario.index.name))
+
+
+def qc_horario(df_horario, limites=LIMITES_QC, preenchimento=PREENCHIMENTO, max_lacuna_horas=MAX_LACUNA_HORAS):
+    """(df_limpo, df_flags) horários de uma estação, na grade completa de dias.
+
+    Preenchimento por vizinhos precisa da rede (qc_acervo); aqui só 'nenhum' ou 'interpolar'.
+    """
+    interpolar, vizinhos = _modos(preenchimento)
+    if vizinhos:
+        raise ValueError("Preenchimento por vizinhos exige a rede de estações (use qc_acervo)")
+    df_horario = _grade_horaria(df_horario)
+    limpos, flags = verificar({c: df_horario[c].to_numpy() for c in df_horario.columns}, limites)
+    if interpolar:
+        for variavel in limpos:
+            if limites.get(variavel, {}).get('interpolar'):
+                interpolar_lacunas(limpos[variavel], flags[variavel], max_lacuna_horas)
+    indice = df_horario.index
+    return (pd.DataFrame({c: v[0] for c, v in limpos.items()}, index=indice),
+            pd.DataFrame({c: f[0] for c, f in flags.items()}, index=indice))
+
+
+def qc_diario(df_horario, limites=LIMITES_QC, preenchimento=PREENCHIMENTO, max_lacuna_horas=MAX_LACUNA_HORAS,
+              agregacoes=AGREGACOES_DIARIAS, cobertura_minima=COBERTURA_MINIMA):
+    """Dados diários de uma estação no formato do PASSO 1, com as colunas Cobertura_<variavel>."""
+    df_limpo, _ = qc_horario(df_horario, limites, preenchimento, max_lacuna_horas)
+    diarios, coberturas = agregar_diario({c: df_limpo[c].to_numpy()[None, :] for c in df_limpo.columns},
+                                         agregacoes, cobertura_minima)
+    dias = pd.DatetimeIndex(df_limpo.index[::24], name=df_limpo.index.name)
+    df = pd.DataFrame({v: d[0] for v, d in diarios.items()}, index=dias)
+    for variavel, cobertura in coberturas.items():
+        df[coluna_cobertura(variavel)] = cobertura[0]
+    return df
+
+
+def preprocessar_inmet_qc(origem, preenchimento=PREENCHIMENTO, cobertura_minima=COBERTURA_MINIMA):
+    """PASSO 1 com QC: como inmet_comum.preprocessar_inmet, mais as colunas de cobertura."""
+    from parser_inmet import ler_inmet_rapido
+    _, df_horario = ler_inmet_rapido(origem, dtype=np.float64)
+    return qc_diario(df_horario, preenchimento=preenchimento, cobertura_minima=cobertura_minima)
+
+
+# ============================================================================
+# ACERVO HORÁRIO (rede inteira)
+# ============================================================================
+
+def _caminho_qc(pasta, variavel):
+    return os.path.join(pasta, variavel + EXTENSAO_QC)
+
+
+def abrir_flags(acervo, modo='r'):
+    """{variavel: memmap uint8 (estações, horas)} das máscaras gravadas por qc_acervo."""
+    forma = (len(acervo.estacoes), acervo.horas)
+    return {v: np.memmap(_caminho_qc(acervo.pasta, v), dtype=np.uint8, mode=modo, shape=forma)
+            for v in acervo.variaveis}
+
+
+def _recorte(mapa, a, b):
+    """Colunas [a, b) de um mapa (estações, horas), com NaN fora da grade."""
+    n_horas = mapa.shape[1]
+    saida = np.full((mapa.shape[0], b - a), np.nan, dtype=np.float64)
+    ia, ib = max(a, 0), min(b, n_horas)
+    if ib > ia:
+        saida[:, ia - a:ib - a] = mapa[:, ia:ib]
+    return saida
+
+
+def qc_acervo(acervo, limites=LIMITES_QC, preenchimento=PREENCHIMENTO, max_lacuna_horas=MAX_LACUNA_HORAS,
+              agregacoes=AGREGACOES_DIARIAS, cobertura_minima=COBERTURA_MINIMA, k=VIZINHOS_PREENCHIMENTO,
+              raio_max_km=RAIO_MAX_VIZINHOS_KM, estacoes_por_bloco=ESTACOES_POR_BLOCO, dias_por_bloco=DIAS_POR_BLOCO):
+    """QC da rede inteira: grava <variavel>.qc no acervo e devolve a tabela diária (Codigo_Estacao, Data).
+
+    Rode de novo depois de ampliar o acervo (construir_acervo).
+    """
+    interpolar, usar_vizinhos = _modos(preenchimento)
+    variaveis = [v for v in acervo.variaveis if v in agregacoes]
+    n_estacoes, n_horas = len(acervo.estacoes), acervo.horas
+    flags_mapa = {v: np.memmap(_caminho_qc(acervo.pasta, v), dtype=np.uint8, mode='w+', shape=(n_estacoes, n_horas))
+                  for v in acervo.variaveis}
+
+    # 1ª passada: testes por blocos de estações (série inteira, contígua no mapa)
+    for a in range(0, n_estacoes, estacoes_por_bloco):
+        linhas = slice(a, min(a + estacoes_por_bloco, n_estacoes))
+        _, flags = verificar({v: acervo.array(v, acervo.estacoes[linhas]) for v in acervo.variaveis}, limites)
+        for variavel, mascara in flags.items():
+            flags_mapa[variavel][linhas] = mascara
+
+    indices = pesos = None
+    if usar_vizinhos:
+        catalogo = acervo.catalogo.reindex(acervo.estacoes)
+        indices, pesos = vizinhos_para_preenchimento(catalogo['latitude'], catalogo['longitude'], k, raio_max_km)
+
+    # 2ª passada: preenchimento e agregação por blocos de dias da rede inteira
+    hora0 = int((acervo.inicio - acervo.inicio.astype('datetime64[D]')) // np.timedelta64(1, 'h'))
+    primeira = -hora0
+    n_dias = -(-(n_horas - primeira) // 24)
+    dias = pd.date_range(pd.Timestamp(acervo.inicio.astype('datetime64[D]')), periods=n_dias, freq='D', name='Data')
+    diarios = {v: np.empty((n_estacoes, n_dias)) for v in variaveis}
+    coberturas = {v: np.empty((n_estacoes, n_dias)) for v in variaveis}
+    margem = max_lacuna_horas + 1 if interpolar else 0
+    passo = dias_por_bloco * 24
+    for d0 in range(0, n_dias, dias_por_bloco):
+        a = primeira + d0 * 24
+        b = min(a + passo, primeira + n_dias * 24)
+        nucleo = slice(margem, margem + b - a)
+        limpos, flags_bloco = {}, {}
+        for variavel in variaveis:
+            brutos = _recorte(acervo._mapas[variavel], a - margem, b + margem)
+            flags = _recorte(flags_mapa[variavel], a - margem, b + margem)
+            flags = np.where(np.isnan(flags), QC_AUSENTE, flags).astype(np.uint8)
+            brutos[(flags & QC_REJEITADO) != 0] = np.nan
+            observados = brutos[:, nucleo].copy() if usar_vizinhos else None
+            if interpolar and limites.get(variavel, {}).get('interpolar'):
+                interpolar_lacunas(brutos, flags, max_lacuna_horas)
+            brutos, flags = brutos[:, nucleo], flags[:, nucleo]
+            if usar_vizinhos:
+                preencher_com_vizinhos(brutos, flags, observados, indices, pesos)
+            limpos[variavel], flags_bloco[variavel] = brutos, flags
+
+            # Só as horas dentro da grade voltam para o mapa
+            ia, ib = max(a, 0), min(b, n_horas)
+            flags_mapa[variavel][:, ia:ib] = flags[:, ia - a:ib - a]
+        d_bloco, c_bloco = agregar_diario(limpos, {v: agregacoes[v] for v in variaveis}, cobertura_minima)
+        for variavel in variaveis:
+            diarios[variavel][:, d0:d0 + (b - a) // 24] = d_bloco[variavel]
+            coberturas[variavel][:, d0:d0 + (b - a) // 24] = c_bloco[variavel]
+
+    for mapa in flags_mapa.values():
+        mapa.flush()
+    with open(os.path.join(acervo.pasta, ARQUIVO_PARAMETROS_QC), 'w', encoding='utf-8') as f:
+        json.dump({'limites': limites, 'sentinelas': SENTINELAS, 'preenchimento': preenchimento,
+                   'max_lacuna_horas': max_lacuna_horas, 'cobertura_minima': cobertura_minima,
+                   'vizinhos': k, 'raio_max_km': raio_max_km, 'estacoes': list(acervo.estacoes),
+                   'horas': n_horas}, f, indent=1)
+
+    indice = pd.MultiIndex.from_product([acervo.estacoes, dias], names=['Codigo_Estacao', 'Data'])
+    df = pd.DataFrame({v: diarios[v].ravel().astype(acervo.dtype) for v in variaveis}, index=indice)
+    for variavel in variaveis:
+        df[coluna_cobertura(variavel)] = coberturas[variavel].ravel()
+    # Estações sem nenhum dado num período (anos antes da fundação) não viram linhas
+    return df[df[[coluna_cobertura(v) for v in variaveis]].to_numpy().any(axis=1)]
+
+
+# ============================================================================
+# REFERÊNCIA (pandas, uma estação por vez) E BENCHMARK
+# ============================================================================
+
+def flags_ingenuo(serie, limites, sentinelas=SENTINELAS):
+    """Mesmos testes de verificar_variavel com pandas, hora a hora por estação (referência)."""
+    s = serie.astype(np.float64)
+    flags = pd.Series(0, index=s.index, dtype=np.uint8)
+    flags[s.isna()] |= QC_AUSENTE
+    flags[s.isin(sentinelas)] |= QC_SENTINELA
+    s = s.mask(s.isin(sentinelas))
+    minimo, maximo = limites.get('faixa', (-np.inf, np.inf))
+    fora = (s < minimo) | (s > maximo)
+    flags[fora] |= QC_FAIXA
+    s = s.mask(fora)
+    if limites.get('salto') is not None:
+        antes = s.diff().abs() > limites['salto']
+        depois = ~(s.diff(-1).abs() <= limites['salto'])
+        depois.iloc[0] = True
+        flags[antes & depois] |= QC_SALTO
+    if limites.get('persistencia'):
+        grupos = (s != s.shift()).cumsum()
+        tamanhos = s.groupby(grupos).transform('size')
+        parado = (tamanhos >= limites['persistencia']) & s.notna() & ~s.isin(limites.get('repeticao_permitida', ()))
+        flags[parado] |= QC_PERSISTENCIA
+    return flags
+
+
+def benchmark(n_estacoes, anos, preenchimento='interpolar+vizinhos', workers=None):
+    from gerador_inmet_sintetico import gerar_conjunto
+    from acervo_horario import AcervoHorario, construir_acervo
+
+    with tempfile.TemporaryDirectory() as temporario:
+        pasta_csv = os.path.join(temporario, 'csv')
+        pasta_acervo = os.path.join(temporario, 'acervo')
+        arquivos = gerar_conjunto(pasta_csv, n_estacoes, anos)
+        inicio = time.perf_counter()
+        construir_acervo(arquivos, pasta_acervo, workers=workers)
+        t_construir = time.perf_counter() - inicio
+
+        acervo = AcervoHorario(pasta_acervo)
+        # Injeta sentinelas, picos e um sensor travado para os testes terem o que achar
+        rng = np.random.default_rng(0)
+        with open(os.path.join(pasta_acervo, 'Temperatura_Maxima_C.bin'), 'r+b') as f:
+            mapa = np.memmap(f, dtype=acervo.dtype, mode='r+', shape=(len(acervo.estacoes), acervo.horas))
+            linhas = rng.integers(0, len(acervo.estacoes), 2000)
+            horas = rng.integers(1, acervo.horas - 1, 2000)
+            mapa[linhas[:1000], horas[:1000]] = -9999.0
+            mapa[linhas[1000:], horas[1000:]] += 15.0
+            mapa[0, 5000:5030] = 25.0
+            mapa.flush()
+            del mapa
+        acervo = AcervoHorario(pasta_acervo)
+
+        inicio = time.perf_counter()
+        df_diario = qc_acervo(acervo, preenchimento=preenchimento)
+        t_qc = time.perf_counter() - inicio
+
+        flags = abrir_flags(acervo)
+        estacao_anos = n_estacoes * len(anos)
+        horas_valor = len(acervo.estacoes) * acervo.horas * len(acervo.variaveis)
+        print(f"   {n_estacoes} estações x {len(anos)} anos ({horas_valor / 1e6:,.1f} M valores horários)")
+        print(f"   - construir o acervo (ingestão): {t_construir:7.2f}s "
+              f"({estacao_anos / t_construir:,.1f} estação-anos/s)")
+        print(f"   - QC + {preenchimento} + diário:  {t_qc:7.2f}s "
+              f"({estacao_anos / t_qc:,.1f} estação-anos/s, {horas_valor / t_qc / 1e6:,.1f} M valores/s)")
+
+        # Referência em pandas, estação por estação, só para os testes (sem preenchimento)
+        inicio = time.perf_counter()
+        iguais = True
+        for linha, codigo in enumerate(acervo.estacoes):
+            for variavel in acervo.variaveis:
+                ref = flags_ingenuo(pd.Series(acervo.array(variavel, codigo)), LIMITES_QC.get(variavel, {}))
+                obtido = flags[variavel][linha] & (QC_REJEITADO & ~QC_INCONSISTENTE)
+                iguais &= np.array_equal(ref.to_numpy(), obtido)
+        t_ingenuo = time.perf_counter() - inicio
+        print(f"   - testes em pandas, uma série por vez: {t_ingenuo:7.2f}s "
+              f"(sem preenchimento nem agregação) | máscaras iguais: {iguais}")
+
+        print(f"   - tabela diária: {len(df_diario):,} linhas (Codigo_Estacao, Data)")
+        print(resumo_flags(flags).map(lambda x: f"{x:.2%}").to_string())
+        del acervo, flags
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def _imprimir_resumo(flags):
+    resumo = resumo_flags(flags)
+    print("\n   Fração das horas por flag:")
+    print(resumo.map(lambda x: f"{x:.2%}").to_string())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Controle de qualidade dos dados horários do INMET")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p = sub.add_parser('arquivo', help="QC de um CSV do INMET -> dados diários com cobertura")
+    p.add_argument('--arquivo', default="INMET_NE_SE_A409_ARACAJU_01-01-2023_A_31-12-2023.CSV")
+    p.add_argument('--preenchimento', choices=('nenhum', 'interpolar'), default=PREENCHIMENTO)
+    p.add_argument('--cobertura-minima', type=float, default=COBERTURA_MINIMA)
+    p.add_argument('--saida', help="Grava os dados diários em CSV")
+
+    p = sub.add_parser('acervo', help="QC da rede inteira no acervo horário")
+    p.add_argument('--destino', default='acervo_inmet', help="Pasta do acervo (acervo_horario)")
+    p.add_argument('--preenchimento', choices=PREENCHIMENTOS, default=PREENCHIMENTO)
+    p.add_argument('--max-lacuna', type=int, default=MAX_LACUNA_HORAS, help="Horas interpoláveis")
+    p.add_argument('--vizinhos', type=int, default=VIZINHOS_PREENCHIMENTO)
+    p.add_argument('--raio-max', type=float, default=RAIO_MAX_VIZINHOS_KM, help="km")
+    p.add_argument('--cobertura-minima', type=float, default=COBERTURA_MINIMA)
+    p.add_argument('--saida', default=ARQUIVO_DIARIO_QC, help="Tabela diária (Codigo_Estacao, Data)")
+
+    p = sub.add_parser('benchmark', help="QC de uma rede sintética e comparação com pandas")
+    p.add_argument('--estacoes', type=int, default=20)
+    p.add_argument('--anos', type=int, nargs='+', default=[2021, 2022, 2023])
+    p.add_argument('--preenchimento', choices=PREENCHIMENTOS, default='interpolar+vizinhos')
+    p.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("CONTROLE DE QUALIDADE - DADOS HORÁRIOS DO INMET")
+    print("=" * 70)
+
+    if args.comando == 'benchmark':
+        benchmark(args.estacoes, args.anos, args.preenchimento, args.workers)
+        return 0
+
+    if args.comando == 'arquivo':
+        if not os.path.exists(args.arquivo):
+            print(f"❌ ERRO: Arquivo não encontrado: {args.arquivo}")
+            return 1
+        from parser_inmet import ler_inmet_rapido
+        inicio = time.perf_counter()
+        _, df_horario = ler_inmet_rapido(args.arquivo, dtype=np.float64)
+        _, df_flags = qc_horario(df_horario, preenchimento=args.preenchimento)
+        df = qc_diario(df_horario, preenchimento=args.preenchimento, cobertura_minima=args.cobertura_minima)
+        print(f"✓ {os.path.basename(args.arquivo)}: {len(df_flags):,} horas, {len(df)} dias "
+              f"em {time.perf_counter() - inicio:.2f}s")
+        _imprimir_resumo({c: df_flags[c].to_numpy() for c in df_flags.columns})
+        print("\n   Dias com valor diário (cobertura >= "
+              f"{args.cobertura_minima:.0%}) e cobertura média:")
+        for variavel in AGREGACOES_DIARIAS:
+            if variavel in df.columns:
+                print(f"   - {variavel:<28} {df[variavel].notna().sum():4d}/{len(df)} dias, "
+                      f"cobertura {df[coluna_cobertura(variavel)].mean():.1%}")
+        if args.saida:
+            df.to_csv(args.saida)
+            print(f"\n✓ Dados diários salvos: {args.saida}")
+        return 0
+
+    from acervo_horario import AcervoHorario, ARQUIVO_META
+    if not os.path.exists(os.path.join(args.destino, ARQUIVO_META)):
+        print(f"❌ ERRO: Acervo não encontrado: {args.destino}")
+        return 1
+    acervo = AcervoHorario(args.destino)
+    print(f"✓ {acervo}")
+    inicio = time.perf_counter()
+    df = qc_acervo(acervo, preenchimento=args.preenchimento, max_lacuna_horas=args.max_lacuna,
+                   cobertura_minima=args.cobertura_minima, k=args.vizinhos, raio_max_km=args.raio_max)
+    print(f"✓ QC ({args.preenchimento}) em {time.perf_counter() - inicio:.2f}s; "
+          f"máscaras em {args.destino}/<variavel>{EXTENSAO_QC}")
+    _imprimir_resumo(abrir_flags(acervo))
+    df.to_csv(args.saida)
+    print(f"\n✓ Tabela diária salva: {args.saida} ({len(df):,} linhas)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Correlação cruzada defasada (lags de -30 a +30 dias) entre as variáveis
+climáticas e as colunas de desastre, via FFT.
+
+Convenção: no lag L, compara-se a variável no dia t - L com o desastre no
+dia t; L > 0 = o clima antecede o desastre (ex.: chuva 2 dias antes de um
+deslizamento aparece em L = +2).
+
+Falhas (NaN) são tratadas como na correlação pareada do pandas: em cada lag
+só entram os pares em que os dois valores existem. Para isso, além de
+sum(x*y), as somas sum(x), sum(x²), sum(y), sum(y²) e a contagem de pares
+também são correlações cruzadas (de x, x², máscaras...) e saem todas das
+mesmas FFTs, em lote para estações x variáveis x desastres.
+
+Somas de estações diferentes podem ser somadas antes de virar correlação,
+então a correlação da rede inteira (pares só dentro da mesma estação) sai
+das mesmas contas.
+
+Uso:
+    python correlacao_defasada.py                              # dataset mesclado de Aracaju
+    python correlacao_defasada.py --lote inmet_diario_lote.csv --saida defasada_rede.npz
+    python correlacao_defasada.py --benchmark 600
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from etapas_pipeline import COLUNAS_CLIMATICAS, COLUNAS_DESASTRES, ARQUIVO_MESCLADO
+
+LAG_MAXIMO = 30
+ARQUIVO_HEATMAP_DEFASADO = 'lagged_correlation_heatmap.png'
+# Limite de elementos complexos por produto de espectros (controla a memória)
+ELEMENTOS_POR_LOTE = 20_000_000
+
+
+# ============================================================================
+# NÚCLEO FFT
+# ============================================================================
+
+def _tamanho_fft(n):
+    """Menor tamanho 2^a * 3^b * 5^c >= n (rápido para a FFT)."""
+    melhor = 1 << (n - 1).bit_length()
+    p5 = 1
+    while p5 < melhor:
+        p35 = p5
+        while p35 < melhor:
+            p = p35
+            while p < n:
+                p *= 2
+            melhor = min(melhor, p)
+            p35 *= 3
+        p5 *= 5
+    return melhor
+
+
+def _medias(A):
+    """Média de cada série (eixo dos dias), ignorando NaN; 0 se a série for vazia."""
+    validos = ~np.isnan(A)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = np.where(validos, A, 0.0).sum(axis=1) / validos.sum(axis=1)
+    return np.nan_to_num(media)
+
+
+def somas_defasadas(X, Y, lag_maximo=LAG_MAXIMO):
+    """Somas por lag para todos os pares (variável, desastre).
+
+    X: (estações, dias, variáveis), Y: (estações, dias, desastres), NaN = falha,
+    dias contínuos. Devolve dict com n, sx, sy, sxx, syy, sxy, cada um com
+    forma (estações, lags, variáveis, desastres), lags = -lag_maximo..lag_maximo.
+    """
+    T = X.shape[1]
+    mx, my = ~np.isnan(X), ~np.isnan(Y)
+    # Centraliza pela média de cada série (menos cancelamento nas somas)
+    X = np.where(mx, X - _medias(X)[:, None, :], 0.0)
+    Y = np.where(my, Y - _medias(Y)[:, None, :], 0.0)
+
+    n_fft = _tamanho_fft(T + lag_maximo)
+    fft = lambda a: np.fft.rfft(np.moveaxis(a, 1, -1), n=n_fft, axis=-1)
+    # Espectros: (estações, variáveis|desastres, frequências)
+    FX, FXX, FMX = fft(X), fft(X * X), fft(mx.astype(np.float64))
+    FY, FYY, FMY = fft(Y), fft(Y * Y), fft(my.astype(np.float64))
+    lags = np.arange(-lag_maximo, lag_maximo + 1)
+
+    def cruzada(A, B):
+        # c[L] = sum_t a[t - L] * b[t]  ->  irfft(conj(A) * B)[L]
+        c = np.fft.irfft(np.conj(A)[:, :, None, :] * B[:, None, :, :], n=n_fft, axis=-1)
+        return np.moveaxis(c[..., lags % n_fft], -1, 1)
+
+    somas = {
+        'n': np.rint(cruzada(FMX, FMY)),
+        'sx': cruzada(FX, FMY),
+        'sy': cruzada(FMX, FY),
+        'sxx': cruzada(FXX, FMY),
+        'syy': cruzada(FMX, FYY),
+        'sxy': cruzada(FX, FY),
+    }
+    return somas
+
+
+def correlacao_das_somas(somas, minimo_pares=3):
+    """Pearson a partir das somas por lag (qualquer forma, elemento a elemento)."""
+    n = somas['n']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = somas['sxy'] - somas['sx'] * somas['sy'] / n
+        vx = somas['sxx'] - somas['sx'] ** 2 / n
+        vy = somas['syy'] - somas['sy'] ** 2 / n
+        # Resíduos da FFT (~1e-12) em séries constantes contam como variância nula
+        escala_x = np.maximum(somas['sxx'], 1e-300) * 1e-9
+        escala_y = np.maximum(somas['syy'], 1e-300) * 1e-9
+        valido = (n >= minimo_pares) & (vx > escala_x) & (vy > escala_y)
+        r = np.where(valido, cov / np.sqrt(np.where(valido, vx * vy, 1.0)), np.nan)
+    return np.clip(r, -1.0, 1.0)
+
+
+def correlacao_defasada(X, Y, lag_maximo=LAG_MAXIMO, elementos_por_lote=ELEMENTOS_POR_LOTE):
+    """(por_estacao, rede): correlações (estações, lags, variáveis, desastres) e (lags, variáveis, desastres).
+
+    As estações são processadas em lotes para limitar a memória dos espectros.
+    """
+    S, T, V = X.shape
+    D = Y.shape[2]
+    n_freq = _tamanho_fft(T + lag_maximo) // 2 + 1
+    por_lote = max(1, elementos_por_lote // (V * D * n_freq))
+    por_estacao = np.empty((S, 2 * lag_maximo + 1, V, D))
+    total = None
+    for inicio in range(0, S, por_lote):
+        fatia = slice(inicio, inicio + por_lote)
+        somas = somas_defasadas(X[fatia], Y[fatia], lag_maximo)
+        por_estacao[fatia] = correlacao_das_somas(somas)
+        # Para a rede, as somas precisam de um centro comum: converte para momentos brutos
+        brutos = _somas_brutas(somas, _medias(X[fatia]), _medias(Y[fatia]))
+        parcial = {k: v.sum(axis=0) for k, v in brutos.items()}
+        total = parcial if total is None else {k: total[k] + parcial[k] for k in total}
+    return por_estacao, correlacao_das_somas(total)
+
+
+def _somas_brutas(somas, media_x, media_y):
+    """Desfaz a centralização por estação (x = x_c + média) nas somas por lag."""
+    media_x = media_x[:, None, :, None]
+    media_y = media_y[:, None, None, :]
+    n, sx, sy = somas['n'], somas['sx'], somas['sy']
+    return {
+        'n': n,
+        'sx': sx + n * media_x,
+        'sy': sy + n * media_y,
+        'sxx': somas['sxx'] + 2 * media_x * sx + n * media_x ** 2,
+        'syy': somas['syy'] + 2 * media_y * sy + n * media_y ** 2,
+        'sxy': somas['sxy'] + media_x * sy + media_y * sx + n * media_x * media_y,
+    }
+
+
+# ============================================================================
+# DADOS
+# ============================================================================
+
+def matrizes_estacao(df_diario, variaveis=COLUNAS_CLIMATICAS, desastres=COLUNAS_DESASTRES):
+    """(X, Y) com forma (1, dias, ·) para uma estação, em grade diária contínua."""
+    indice = pd.date_range(df_diario.index.min(), df_diario.index.max(), freq='D')
+    df = df_diario.reindex(indice)
+    variaveis = [c for c in variaveis if c in df.columns]
+    desastres = [c for c in desastres if c in df.columns]
+    return (df[variaveis].to_numpy(dtype=np.float64)[None], df[desastres].to_numpy(dtype=np.float64)[None],
+            variaveis, desastres)
+
+
+def matrizes_rede(df_lote, variaveis=COLUNAS_CLIMATICAS, desastres=COLUNAS_DESASTRES):
+    """(X, Y, estações, variáveis, desastres) a partir de uma tabela (Codigo_Estacao, Data)."""
+    datas = df_lote.index.get_level_values('Data')
+    indice = pd.date_range(datas.min(), datas.max(), freq='D')
+    estacoes = df_lote.index.get_level_values('Codigo_Estacao').unique()
+    variaveis = [c for c in variaveis if c in df_lote.columns]
+    desastres = [c for c in desastres if c in df_lote.columns]
+    completo = pd.MultiIndex.from_product([estacoes, indice], names=['Codigo_Estacao', 'Data'])
+    df = df_lote.reindex(completo)
+    forma = (len(estacoes), len(indice), -1)
+    X = df[variaveis].to_numpy(dtype=np.float64).reshape(forma)
+    Y = df[desastres].to_numpy(dtype=np.float64).reshape(forma)
+    return X, Y, list(estacoes), variaveis, desastres
+
+
+def ler_lote(caminho):
+    """Tabela diária (Codigo_Estacao, Data); sem colunas de desastre, simula-as por estação."""
+    df_lote = pd.read_csv(caminho, index_col=['Codigo_Estacao', 'Data'], parse_dates=['Data'])
+    if not set(COLUNAS_DESASTRES) & set(df_lote.columns):
+        # Tabela do processar_lote_inmet (só clima): desastres simulados como no PASSO 2
+        from etapas_pipeline import criar_desastres_dummy, PARAMETROS_DESASTRES
+        print("⚠️  Sem colunas de desastre na tabela; simulando por estação (PASSO 2)")
+        df_lote = df_lote.groupby(level='Codigo_Estacao', group_keys=True).apply(
+            lambda g: criar_desastres_dummy(g.droplevel('Codigo_Estacao'), **PARAMETROS_DESASTRES))
+        df_lote.index.names = ['Codigo_Estacao', 'Data']
+    return df_lote
+
+
+def tabela_defasada(r, variaveis, desastres, lag_maximo=LAG_MAXIMO):
+    """Array (lags, variáveis, desastres) em formato longo: Lag, Variavel, Desastre, r."""
+    lags = np.arange(-lag_maximo, lag_maximo + 1)
+    indice = pd.MultiIndex.from_product([lags, variaveis, desastres], names=['Lag', 'Variavel', 'Desastre'])
+    return pd.Series(r.ravel(), index=indice, name='r').reset_index()
+
+
+def lag_mais_forte(r, variaveis, desastres, lag_maximo=LAG_MAXIMO):
+    """Para cada (variável, desastre), o lag de maior |r|."""
+    lags = np.arange(-lag_maximo, lag_maximo + 1)
+    linhas = []
+    for j, variavel in enumerate(variaveis):
+        for k, desastre in enumerate(desastres):
+            serie = r[:, j, k]
+            if np.isnan(serie).all():
+                continue
+            i = int(np.nanargmax(np.abs(serie)))
+            linhas.append({'Variavel': variavel, 'Desastre': desastre, 'Lag': int(lags[i]),
+                           'r': serie[i], 'r_lag0': serie[lag_maximo]})
+    return pd.DataFrame(linhas)
+
+
+# ============================================================================
+# GRÁFICO
+# ============================================================================
+
+def grafico_defasado(r, variaveis, desastres, caminho, titulo, lag_maximo=LAG_MAXIMO, dpi=150):
+    """Um painel por desastre: lag (x) x variável (y), com o lag de maior |r| marcado."""
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+
+    lags = np.arange(-lag_maximo, lag_maximo + 1)
+    fig = Figure(figsize=(15, 2.2 + 1.6 * len(desastres) * max(1, len(variaveis) / 4)))
+    eixos = fig.subplots(len(desastres), 1, squeeze=False, sharex=True)[:, 0]
+    for k, (ax, desastre) in enumerate(zip(eixos, desastres)):
+        imagem = ax.imshow(r[:, :, k].T, aspect='auto', cmap='coolwarm', vmin=-1, vmax=1,
+                           extent=(lags[0] - 0.5, lags[-1] + 0.5, len(variaveis) - 0.5, -0.5),
+                           interpolation='nearest')
+        for j in range(len(variaveis)):
+            serie = r[:, j, k]
+            if not np.isnan(serie).all():
+                ax.plot(lags[int(np.nanargmax(np.abs(serie)))], j, 'k*', markersize=8)
+        ax.axvline(0, color='k', linewidth=0.8, alpha=0.5)
+        ax.set_yticks(range(len(variaveis)), variaveis, fontsize=9)
+        ax.set_title(desastre, fontsize=11)
+        fig.colorbar(imagem, ax=ax, fraction=0.02, pad=0.01)
+    eixos[-1].set_xlabel('Lag (dias; > 0 = variável antecede o desastre)', fontsize=11)
+    fig.suptitle(titulo, fontsize=14)
+    fig.tight_layout()
+    fig.savefig(caminho, dpi=dpi)
+    return caminho
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _correlacao_por_laco(X, Y, lag_maximo):
+    """Referência: um pandas .corr() por estação, lag e par."""
+    S, _, V = X.shape
+    D = Y.shape[2]
+    r = np.empty((S, 2 * lag_maximo + 1, V, D))
+    for s in range(S):
+        for i, lag in enumerate(range(-lag_maximo, lag_maximo + 1)):
+            for j in range(V):
+                x = pd.Series(X[s, :, j]).shift(lag)
+                for k in range(D):
+                    r[s, i, j, k] = x.corr(pd.Series(Y[s, :, k]))
+    return r
+
+
+def _rede_sintetica(n_estacoes, n_dias, semente=0):
+    rng = np.random.default_rng(semente)
+    X = rng.gamma(0.5, 8.0, (n_estacoes, n_dias, len(COLUNAS_CLIMATICAS)))
+    X[rng.random(X.shape) < 0.05] = np.nan
+    # Desastre = chuva alta 2 dias antes (para haver um pico em L = +2)
+    chuva = np.nan_to_num(X[:, :, 0])
+    evento = np.roll(chuva, 2, axis=1) > np.quantile(chuva, 0.95)
+    Y = np.stack([evento, rng.random(evento.shape) < 0.01, evento], axis=2).astype(np.float64)
+    return X, Y
+
+
+def benchmark(n_estacoes, n_dias=365 * 10, lag_maximo=LAG_MAXIMO):
+    X, Y = _rede_sintetica(n_estacoes, n_dias)
+    inicio = time.perf_counter()
+    por_estacao, rede = correlacao_defasada(X, Y, lag_maximo)
+    t_fft = time.perf_counter() - inicio
+
+    amostra = min(2, n_estacoes)
+    inicio = time.perf_counter()
+    referencia = _correlacao_por_laco(X[:amostra], Y[:amostra], lag_maximo)
+    t_laco = (time.perf_counter() - inicio) * n_estacoes / amostra
+    diferenca = np.nanmax(np.abs(por_estacao[:amostra] - referencia))
+
+    print(f"   Estações: {n_estacoes} | Dias: {n_dias:,} | Lags: {2 * lag_maximo + 1} | "
+          f"Pares: {X.shape[2] * Y.shape[2]}")
+    print(f"   FFT em lote:            {t_fft:8.2f}s")
+    print(f"   Laço por lag (estimado): {t_laco:8.2f}s ({amostra} estação(ões) medida(s))")
+    print(f"   Speedup: {t_laco / t_fft:.0f}x | Diferença máxima vs pandas: {diferenca:.1e}")
+    print(f"   Rede: lag de maior r para chuva x inundação = "
+          f"{int(np.nanargmax(rede[:, 0, 0])) - lag_maximo:+d} dias")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Correlação cruzada defasada (clima x desastres) via FFT")
+    parser.add_argument('--mesclado', default=ARQUIVO_MESCLADO, help="Dataset diário mesclado de uma estação")
+    parser.add_argument('--lote', help="Tabela diária (Codigo_Estacao, Data) de várias estações")
+    parser.add_argument('--lag-maximo', type=int, default=LAG_MAXIMO)
+    parser.add_argument('--saida', default='lagged_correlation.csv',
+                        help="CSV longo (uma estação) ou .npz com o array (rede)")
+    parser.add_argument('--grafico', default=ARQUIVO_HEATMAP_DEFASADO)
+    parser.add_argument('--benchmark', type=int, metavar='ESTACOES', help="Benchmark com N estações sintéticas")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("CORRELAÇÃO CRUZADA DEFASADA (FFT)")
+    print("=" * 70)
+
+    if args.benchmark:
+        benchmark(args.benchmark, lag_maximo=args.lag_maximo)
+        return 0
+
+    origem = args.lote or args.mesclado
+    if not os.path.exists(origem):
+        print(f"❌ ERRO: Arquivo não encontrado: {origem}")
+        return 1
+
+    inicio = time.perf_counter()
+    if args.lote:
+        df_lote = ler_lote(args.lote)
+        X, Y, estacoes, variaveis, desastres = matrizes_rede(df_lote)
+        titulo = f'Correlação defasada - rede ({len(estacoes)} estações)'
+    else:
+        df_merged = pd.read_csv(origem, index_col=0, parse_dates=True)
+        X, Y, variaveis, desastres = matrizes_estacao(df_merged)
+        estacoes = None
+        titulo = 'Correlação defasada - Aracaju 2023'
+
+    por_estacao, rede = correlacao_defasada(X, Y, args.lag_maximo)
+    print(f"✓ {X.shape[0]} estação(ões) x {X.shape[1]:,} dias x {2 * args.lag_maximo + 1} lags "
+          f"em {time.perf_counter() - inicio:.2f}s")
+
+    if args.saida.endswith('.npz'):
+        np.savez(args.saida, por_estacao=por_estacao, rede=rede,
+                 lags=np.arange(-args.lag_maximo, args.lag_maximo + 1),
+                 estacoes=np.asarray(estacoes or ['estacao'], dtype=str),
+                 variaveis=np.asarray(variaveis, dtype=str), desastres=np.asarray(desastres, dtype=str))
+    else:
+        tabela_defasada(rede, variaveis, desastres, args.lag_maximo).to_csv(args.saida, index=False)
+    print(f"✓ Salvo: {args.saida}")
+
+    grafico_defasado(rede, variaveis, desastres, args.grafico, titulo, args.lag_maximo)
+    print(f"✓ Salvo: {args.grafico}")
+
+    print("\n📊 Lag de maior |r| (vs lag 0):")
+    for _, linha in lag_mais_forte(rede, variaveis, desastres, args.lag_maximo).iterrows():
+        print(f"   - {linha['Variavel']:<28} x {linha['Desastre']:<22} lag {linha['Lag']:+3d}: "
+              f"r = {linha['r']:+.3f} (lag 0: {linha['r_lag0']:+.3f})")
+    print("=" * 70)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Matriz de correlação da rede inteira: uma coluna por (estação, variável),
+incluindo as séries de desastre, com milhares de colunas.
+
+O .corr() do pandas (pairwise-complete) percorre os pares um a um. Aqui a
+matriz sai em blocos de colunas por produtos de matrizes (BLAS): com X0 =
+valores centrados e zerados onde falta dado e M = máscara de presença,
+para cada par de blocos (I, J)
+
+    n   = M_I' M_J          (dias com os dois valores)
+    Sx  = X0_I' M_J         Sy  = M_I' X0_J
+    Sxx = (X0_I²)' M_J      Syy = M_I' (X0_J²)
+    Sxy = X0_I' X0_J
+
+e r = (n Sxy - Sx Sy) / sqrt((n Sxx - Sx²)(n Syy - Sy²)), o mesmo
+pairwise-complete do pandas. As colunas são centradas pela média antes dos
+produtos, o que evita o cancelamento em float32. Pares com menos de
+min_pares dias em comum ficam NaN.
+
+Os blocos do triângulo superior são distribuídos em threads (o numpy
+libera o GIL nos produtos) e gravados direto em um .npy mapeado em memória
+(np.lib.format.open_memmap), com os rótulos das colunas em um CSV ao lado.
+Quando a matriz é grande demais para o heatmap, pares_mais_fortes() extrai
+os k pares de maior |r| varrendo a matriz em faixas de linhas.
+
+Uso:
+    python correlacao_rede.py --lote inmet_diario_qc.csv --saida correlacao_rede.npy --top-k 100
+    python correlacao_rede.py --acervo acervo_inmet --variaveis Precipitacao_mm Temperatura_Maxima_C
+    python correlacao_rede.py --benchmark 600 --dias 3650
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from etapas_pipeline import COLUNAS_ANALISE
+
+BLOCO_COLUNAS = 512
+MIN_PARES = 30
+TOP_K = 50
+MAX_COLUNAS_HEATMAP = 40
+LINHAS_POR_FAIXA = 1024
+ARQUIVO_MATRIZ = 'correlacao_rede.npy'
+
+
+def caminho_rotulos(caminho_matriz):
+    return os.path.splitext(caminho_matriz)[0] + '_colunas.csv'
+
+
+# ============================================================================
+# MONTAGEM DAS COLUNAS
+# ============================================================================
+
+def colunas_do_lote(df_lote, variaveis=None):
+    """Tabela (Codigo_Estacao, Data) -> (X (dias, colunas), rótulos Codigo_Estacao/Variavel, datas)."""
+    variaveis = [v for v in (variaveis or COLUNAS_ANALISE) if v in df_lote.columns]
+    largo = df_lote[variaveis].unstack('Codigo_Estacao')
+    largo = largo.reorder_levels([1, 0], axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+    rotulos = largo.columns.to_frame(index=False)
+    rotulos.columns = ['Codigo_Estacao', 'Variavel']
+    return largo.to_numpy(dtype=np.float64), rotulos, largo.index
+
+
+def colunas_da_piramide(piramide, variaveis=None, inicio=None, fim=None):
+    """Agregado diário (piramide_agregados, nível 'dia') de cada estação e variável do acervo."""
+    from piramide_agregados import derivar
+    variaveis = [v for v in (variaveis or piramide.acervo.variaveis) if v in piramide.acervo.variaveis]
+    blocos = [derivar(piramide.estatisticas(v, 'dia', None, inicio, fim), 'agregado', variavel=v) for v in variaveis]
+    # (variáveis, estações, dias) -> colunas na ordem estação, variável
+    X = np.stack(blocos).transpose(2, 1, 0).reshape(blocos[0].shape[1], -1)
+    estacoes = piramide.acervo.estacoes
+    rotulos = pd.DataFrame({'Codigo_Estacao': np.repeat(estacoes, len(variaveis)),
+                            'Variavel': np.tile(variaveis, len(estacoes))})
+    datas = piramide.indice('dia')[piramide.periodos('dia', inicio, fim)]
+    return X, rotulos, datas
+
+
+# ============================================================================
+# MATRIZ EM BLOCOS
+# ============================================================================
+
+def _preparar(X, dtype):
+    """Máscara, valores centrados (zero onde falta) e seus quadrados, no dtype dos produtos."""
+    presente = ~np.isnan(X)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = np.nansum(X, axis=0) / presente.sum(axis=0)
+    X0 = np.where(presente, X - np.nan_to_num(media), 0.0).astype(dtype)
+    return presente.astype(dtype), X0, X0 * X0
+
+
+def _correlacao_bloco(M, X0, Q, i, j, min_pares):
+    MI, MJ = M[:, i], M[:, j]
+    XI, XJ = X0[:, i], X0[:, j]
+    n = (MI.T @ MJ).astype(np.float64)
+    sx = (XI.T @ MJ).astype(np.float64)
+    sy = (MI.T @ XJ).astype(np.float64)
+    sxx = (Q[:, i].T @ MJ).astype(np.float64)
+    syy = (MI.T @ Q[:, j]).astype(np.float64)
+    sxy = (XI.T @ XJ).astype(np.float64)
+    vx, vy = n * sxx - sx * sx, n * syy - sy * sy
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = (n * sxy - sx * sy) / np.sqrt(vx * vy)
+    r = np.clip(r, -1.0, 1.0)
+    # Coluna constante nos dias em comum: a variância deveria ser 0, mas o
+    # arredondamento deixa um resíduo (relativo até ~eps * n) que viraria ±1
+    eps = np.finfo(M.dtype).eps * n
+    r[(vx <= eps * n * sxx) | (vy <= eps * n * syy)] = np.nan
+    r[n < max(min_pares, 2)] = np.nan
+    return r
+
+
+def correlacao_em_blocos(X, saida=None, dtype=np.float32, bloco=BLOCO_COLUNAS, min_pares=MIN_PARES,
+                         workers=None):
+    """Matriz (colunas, colunas) pairwise-complete de X (dias, colunas) com NaN onde falta dado.
+
+    Com `saida`, grava em um .npy mapeado em memória (float32) e devolve o
+    memmap; senão, devolve um array em memória.
+    """
+    n_colunas = X.shape[1]
+    if saida:
+        r = np.lib.format.open_memmap(saida, mode='w+', dtype=np.float32, shape=(n_colunas, n_colunas))
+    else:
+        r = np.empty((n_colunas, n_colunas), dtype=np.float32)
+    M, X0, Q = _preparar(X, dtype)
+
+    fatias = [slice(a, min(a + bloco, n_colunas)) for a in range(0, n_colunas, bloco)]
+    pares = [(a, b) for ia, a in enumerate(fatias) for b in fatias[ia:]]
+
+    def calcular(par):
+        i, j = par
+        parcial = _correlacao_bloco(M, X0, Q, i, j, min_pares)
+        if i == j:
+            diagonal = np.diag(parcial).copy()
+            np.fill_diagonal(parcial, np.where(np.isnan(diagonal), np.nan, 1.0))
+        r[i, j] = parcial
+        r[j, i] = parcial.T
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for par in pares:
+            calcular(par)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(calcular, pares))
+    if saida:
+        r.flush()
+    return r
+
+
+def abrir_matriz(caminho):
+    """(memmap somente leitura da matriz, rótulos) gravados por correlacao_em_blocos/main."""
+    return np.load(caminho, mmap_mode='r'), pd.read_csv(caminho_rotulos(caminho), dtype={'Codigo_Estacao': str})
+
+
+# ============================================================================
+# PARES MAIS FORTES
+# ============================================================================
+
+def pares_mais_fortes(r, rotulos, k=TOP_K, minimo_abs=0.0, excluir_mesma_estacao=False,
+                      linhas_por_faixa=LINHAS_POR_FAIXA):
+    """Os k pares (i < j) de maior |r|, varrendo a matriz em faixas de linhas."""
+    n_colunas = r.shape[0]
+    estacoes = pd.factorize(rotulos['Codigo_Estacao'])[0]
+    colunas = np.arange(n_colunas)
+    candidatos_i, candidatos_j, candidatos_r = [], [], []
+    for a in range(0, n_colunas, linhas_por_faixa):
+        b = min(a + linhas_por_faixa, n_colunas)
+        faixa = np.abs(np.asarray(r[a:b], dtype=np.float64))
+        valido = (colunas[None, :] > np.arange(a, b)[:, None]) & ~np.isnan(faixa) & (faixa >= minimo_abs)
+        if excluir_mesma_estacao:
+            valido &= estacoes[None, :] != estacoes[a:b, None]
+        faixa = np.where(valido, faixa, -1.0).ravel()
+        m = min(k, int(valido.sum()))
+        if m == 0:
+            continue
+        melhores = np.argpartition(faixa, -m)[-m:]
+        linhas, cols = np.divmod(melhores, n_colunas)
+        candidatos_i.append(linhas + a)
+        candidatos_j.append(cols)
+        candidatos_r.append(np.asarray(r[a:b], dtype=np.float64)[linhas, cols])
+    if not candidatos_r:
+        return pd.DataFrame(columns=['Estacao_A', 'Variavel_A', 'Estacao_B', 'Variavel_B', 'r'])
+    i, j, valores = (np.concatenate(c) for c in (candidatos_i, candidatos_j, candidatos_r))
+    ordem = np.argsort(-np.abs(valores), kind='stable')[:k]
+    i, j, valores = i[ordem], j[ordem], valores[ordem]
+    return pd.DataFrame({
+        'Estacao_A': rotulos['Codigo_Estacao'].to_numpy()[i], 'Variavel_A': rotulos['Variavel'].to_numpy()[i],
+        'Estacao_B': rotulos['Codigo_Estacao'].to_numpy()[j], 'Variavel_B': rotulos['Variavel'].to_numpy()[j],
+        'r': valores,
+    })
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def colunas_sinteticas(n_estacoes, n_dias, variaveis=8, fracao_faltante=0.1, semente=0):
+    """Estações com fator regional comum, variáveis correlacionadas, lacunas (isoladas e em blocos) e flags."""
+    rng = np.random.default_rng(semente)
+    regioes = rng.integers(0, max(n_estacoes // 25, 1), n_estacoes)
+    fator_regional = rng.normal(size=(n_dias, regioes.max() + 1))
+    cargas = rng.normal(size=variaveis)
+    X = (fator_regional[:, np.repeat(regioes, variaveis)] * np.tile(cargas, n_estacoes)
+         + rng.normal(size=(n_dias, n_estacoes * variaveis)) * 1.5 + 20.0)
+    X[rng.random(X.shape) < fracao_faltante] = np.nan
+    # Sensores parados por meses em algumas estações
+    for coluna in rng.choice(X.shape[1], X.shape[1] // 10, replace=False):
+        inicio = rng.integers(0, n_dias)
+        X[inicio:inicio + rng.integers(30, 365), coluna] = np.nan
+    # Última série = flag de desastre (0/1); em parte das estações só há
+    # eventos nos primeiros anos, e parte das estações foi instalada na
+    # metade do período: a flag fica constante nos dias em comum (r = NaN)
+    flags = np.arange(variaveis - 1, X.shape[1], variaveis)
+    X[:, flags] = rng.random((n_dias, n_estacoes)) < 0.02
+    X[int(n_dias * 0.4):, flags[::4]] = 0.0
+    tardias = np.arange(0, n_estacoes, 5)
+    clima = (tardias[:, None] * variaveis + np.arange(variaveis - 1)).ravel()
+    X[:n_dias // 2, clima] = np.nan
+    rotulos = pd.DataFrame({'Codigo_Estacao': np.repeat([f'E{i:04d}' for i in range(n_estacoes)], variaveis),
+                            'Variavel': np.tile([f'V{v}' for v in range(variaveis)], n_estacoes)})
+    return X, rotulos
+
+
+def benchmark(n_estacoes, n_dias, workers=None, variaveis=8, colunas_pandas=240):
+    import tempfile
+    X, rotulos = colunas_sinteticas(n_estacoes, n_dias, variaveis)
+    n_colunas = X.shape[1]
+    print(f"   {n_estacoes} estações x {variaveis} séries = {n_colunas:,} colunas, {n_dias:,} dias "
+          f"({np.isnan(X).mean():.0%} faltando)")
+
+    sub = min(colunas_pandas, n_colunas)
+    inicio = time.perf_counter()
+    referencia = pd.DataFrame(X[:, :sub]).corr(min_periods=MIN_PARES).to_numpy()
+    t_pandas = time.perf_counter() - inicio
+    t_estimado = t_pandas * (n_colunas / sub) ** 2
+    print(f"   - pandas .corr() em {sub} colunas: {t_pandas:6.2f}s "
+          f"(estimado para {n_colunas:,}: {t_estimado:,.0f}s)")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for dtype in (np.float32, np.float64):
+            saida = os.path.join(pasta, f'r_{np.dtype(dtype).name}.npy')
+            inicio = time.perf_counter()
+            r = correlacao_em_blocos(X, saida, dtype=dtype, workers=workers)
+            t = time.perf_counter() - inicio
+            erro = np.nanmax(np.abs(r[:sub, :sub] - referencia))
+            nan_iguais = np.array_equal(np.isnan(r[:sub, :sub]), np.isnan(referencia))
+            print(f"   - blocos {np.dtype(dtype).name}: {t:6.2f}s ({t_estimado / t:,.0f}x o estimado do pandas), "
+                  f"erro máx {erro:.1e}, NaN iguais: {nan_iguais}")
+            del r
+
+        r = np.load(os.path.join(pasta, 'r_float32.npy'), mmap_mode='r')
+        inicio = time.perf_counter()
+        top = pares_mais_fortes(r, rotulos, k=TOP_K, excluir_mesma_estacao=True)
+        t_top = time.perf_counter() - inicio
+        print(f"   - top {TOP_K} pares entre estações diferentes: {t_top:.2f}s "
+              f"(|r| de {top['r'].abs().min():.3f} a {top['r'].abs().max():.3f})")
+        del r
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Correlação em blocos da rede inteira (estação x variável)")
+    origem = parser.add_mutually_exclusive_group()
+    origem.add_argument('--lote', help="Tabela diária (Codigo_Estacao, Data), ex.: processar_lote_inmet/controle_qualidade")
+    origem.add_argument('--acervo', help="Acervo horário com a pirâmide de agregados (piramide_agregados)")
+    origem.add_argument('--benchmark', type=int, metavar='ESTACOES', help="Rede sintética com esse número de estações")
+    parser.add_argument('--dias', type=int, default=3650, help="Dias da rede sintética (--benchmark)")
+    parser.add_argument('--variaveis', nargs='*', help="Padrão: clima + desastres disponíveis")
+    parser.add_argument('--inicio')
+    parser.add_argument('--fim')
+    parser.add_argument('--saida', default=ARQUIVO_MATRIZ, help="Matriz .npy (float32, mapeada em memória)")
+    parser.add_argument('--dtype', choices=('float32', 'float64'), default='float32', help="Precisão dos produtos")
+    parser.add_argument('--bloco', type=int, default=BLOCO_COLUNAS, help="Colunas por bloco")
+    parser.add_argument('--min-pares', type=int, default=MIN_PARES, help="Dias em comum para um r válido")
+    parser.add_argument('--workers', type=int, default=None, help="Threads (padrão: núcleos da CPU)")
+    parser.add_argument('--top-k', type=int, default=TOP_K)
+    parser.add_argument('--mesma-estacao', action='store_true', help="Inclui pares da mesma estação no top-k")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("CORRELAÇÃO DA REDE EM BLOCOS")
+    print("=" * 70)
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.dias, args.workers)
+        return 0
+
+    inicio = time.perf_counter()
+    if args.acervo:
+        from piramide_agregados import PiramideAgregados
+        try:
+            piramide = PiramideAgregados(args.acervo)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"❌ ERRO: {e}")
+            return 1
+        X, rotulos, datas = colunas_da_piramide(piramide, args.variaveis, args.inicio, args.fim)
+    else:
+        from correlacao_defasada import ler_lote
+        caminho = args.lote or 'inmet_diario_lote.csv'
+        if not os.path.exists(caminho):
+            print(f"❌ ERRO: Tabela não encontrada: {caminho}")
+            return 1
+        df_lote = ler_lote(caminho)
+        if args.inicio or args.fim:
+            datas_lote = df_lote.index.get_level_values('Data')
+            df_lote = df_lote[(datas_lote >= pd.Timestamp(args.inicio or datas_lote.min()))
+                              & (datas_lote <= pd.Timestamp(args.fim or datas_lote.max()))]
+        X, rotulos, datas = colunas_do_lote(df_lote, args.variaveis)
+    print(f"✓ {X.shape[1]:,} colunas ({rotulos['Codigo_Estacao'].nunique()} estações) x {len(datas):,} dias "
+          f"em {time.perf_counter() - inicio:.2f}s")
+
+    inicio = time.perf_counter()
+    r = correlacao_em_blocos(X, args.saida, dtype=np.dtype(args.dtype).type, bloco=args.bloco,
+                             min_pares=args.min_pares, workers=args.workers)
+    rotulos.to_csv(caminho_rotulos(args.saida), index=False)
+    print(f"✓ Matriz {r.shape[0]:,} x {r.shape[1]:,} em {time.perf_counter() - inicio:.2f}s: {args.saida} "
+          f"(rótulos em {caminho_rotulos(args.saida)})")
+
+    if X.shape[1] <= MAX_COLUNAS_HEATMAP:
+        from renderizacao_graficos import renderizar_figura
+        nomes = rotulos['Codigo_Estacao'] + ' ' + rotulos['Variavel']
+        caminho_figura = os.path.splitext(args.saida)[0] + '_heatmap.png'
+        renderizar_figura('heatmap', pd.DataFrame(np.asarray(r), index=nomes, columns=nomes), caminho_figura,
+                          'Matriz de Correlação - Rede')
+        print(f"✓ Heatmap: {caminho_figura}")
+    else:
+        top = pares_mais_fortes(r, rotulos, args.top_k, excluir_mesma_estacao=not args.mesma_estacao)
+        caminho_top = os.path.splitext(args.saida)[0] + '_top.csv'
+        top.to_csv(caminho_top, index=False)
+        print(f"⚠️  {X.shape[1]:,} colunas: grande demais para o heatmap; {len(top)} pares mais fortes em {caminho_top}")
+        print(top.head(20).to_string(index=False, float_format=lambda x: f"{x:+.3f}"))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,11 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 
+from instrumentacao import rastreador_do_ambiente
+
+# Tempo, CPU, pico de RSS, linhas e bytes lidos por passo (--trace / --perfil)
+rastro = rastreador_do_ambiente('correlation_analysis_and_plotting', estacao='A409')
+
 print("=" * 70)
 print("ANÁLISE DE CORRELAÇÃO E GERAÇÃO DE GRÁFICOS")
 print("=" * 70)
@@ -25,12 +30,13 @@ print("   Iniciando análise de correlação...")
 
 try:
     # Carregar os dados mesclados
-    print("\n[1/5] Carregando dados mesclados...")
+    rastro.proximo('leitura', "\n[1/5] Carregando dados mesclados...")
     df_merged = pd.read_csv(arquivo_mesclado, index_col='Data_Hora', parse_dates=True)
+    rastro.anotar(linhas=len(df_merged))
     print(f"   ✓ Carregado com sucesso! Dimensões: {df_merged.shape}")
     
     # Selecionar variáveis para correlação
-    print("\n[2/5] Selecionando variáveis para correlação...")
+    rastro.proximo('selecao', "\n[2/5] Selecionando variáveis para correlação...")
     climatic_vars = [
         'Precipitacao_mm',
         'Temperatura_Maxima_C',
@@ -51,7 +57,7 @@ try:
         print(f"      - {col}")
     
     # Calcular matriz de correlação
-    print("\n[3/5] Calculando matriz de correlação...")
+    rastro.proximo('correlacao', "\n[3/5] Calculando matriz de correlação...")
     correlation_matrix = df_merged[colunas_disponiveis].corr()
     print("   ✓ Matriz calculada com sucesso!")
     
@@ -65,7 +71,7 @@ try:
     print(f"\n   ✓ Matriz salva em: {arquivo_correlacao}")
     
     # Gerar gráficos
-    print("\n[4/5] Gerando gráficos...")
+    rastro.proximo('graficos', "\n[4/5] Gerando gráficos...")
     
     # Configurar estilo
     sns.set_style("whitegrid")
@@ -125,7 +131,7 @@ try:
     plt.close()
     print("     ✓ Salvo: temperature_landslide_timeseries.png")
     
-    print("\n[5/5] Finalizando...")
+    rastro.proximo('finalizacao', "\n[5/5] Finalizando...")
     
     # Exibir estatísticas
     print("\n📈 Correlações Principais:")
@@ -145,6 +151,8 @@ try:
         if 'Inundacao_Alagamento' in correlation_matrix.columns:
             print(f"   Temperatura Mínima vs Inundação/Alagamento: {correlation_matrix.loc['Temperatura_Minima_C', 'Inundacao_Alagamento']:.3f}")
     
+    rastro.encerrar()
+    
     print("\n" + "=" * 70)
     print("✓ ANÁLISE DE CORRELAÇÃO CONCLUÍDA COM SUCESSO!")
     print("=" * 70)
@@ -161,6 +169,7 @@ try:
     print("   - Use os dados para sua apresentação em slides!")
     
 except Exception as e:
+    rastro.falhar(e)
     print(f"\n❌ ERRO ao analisar correlação: {e}")
     print(f"   Tipo de erro: {type(e).__name__}")
     import traceback
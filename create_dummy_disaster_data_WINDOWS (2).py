@@ -2,6 +2,11 @@ import pandas as pd
 import numpy as np
 import os
 
+from instrumentacao import rastreador_do_ambiente
+
+# Tempo, CPU, pico de RSS, linhas e bytes lidos por passo (--trace / --perfil)
+rastro = rastreador_do_ambiente('create_dummy_disaster_data', estacao='A409')
+
 print("=" * 70)
 print("CRIAÇÃO DE DATASET DUMMY DE DESASTRES NATURAIS")
 print("=" * 70)
@@ -23,8 +28,9 @@ print("   Iniciando criação de dados de desastres...")
 
 try:
     # Carregar os dados climáticos pré-processados
-    print("\n[1/5] Carregando dados climáticos...")
+    rastro.proximo('leitura', "\n[1/5] Carregando dados climáticos...")
     df_inmet = pd.read_csv(arquivo_inmet)
+    rastro.anotar(linhas=len(df_inmet))
     print(f"   ✓ Carregado com sucesso! Dimensões: {df_inmet.shape}")
     
     # Exibir nomes das colunas
@@ -33,7 +39,7 @@ try:
         print(f"      {i}. {col}")
     
     # Combinar Data e Hora em uma única coluna
-    print("\n[2/5] Processando datas...")
+    rastro.proximo('datas', "\n[2/5] Processando datas...")
     df_inmet['Data_Hora'] = pd.to_datetime(
         df_inmet['Data'] + ' ' + df_inmet['Hora UTC'].str.replace(' UTC', ''),
         format='%Y/%m/%d %H%M'
@@ -42,7 +48,7 @@ try:
     print(f"   ✓ Datas processadas com sucesso!")
     
     # Preparar colunas numéricas
-    print("\n[3/5] Convertendo colunas para formato numérico...")
+    rastro.proximo('conversao', "\n[3/5] Convertendo colunas para formato numérico...")
     
     # Mapeamento de colunas do INMET para nomes simplificados
     colunas_mapeamento = {
@@ -65,7 +71,7 @@ try:
             print(f"   ⚠️  Coluna não encontrada: {col_original}")
     
     # Resample para dados diários
-    print("\n[4/5] Reamostrando para frequência diária...")
+    rastro.proximo('reamostragem', "\n[4/5] Reamostrando para frequência diária...")
     df_inmet_daily = df_processado.resample('D').agg({
         'Precipitacao_mm': 'sum',
         'Temperatura_Maxima_C': 'max',
@@ -74,9 +80,10 @@ try:
         'Vento_Rajada_Maxima_ms': 'max'
     })
     print(f"   ✓ Dados reamostrais com sucesso! Dimensões: {df_inmet_daily.shape}")
+    rastro.anotar(linhas=len(df_inmet_daily))
     
     # Criar DataFrame de desastres
-    print("\n[5/5] Criando dataset dummy de desastres...")
+    rastro.proximo('desastres', "\n[5/5] Criando dataset dummy de desastres...")
     dates_2023 = pd.date_range(start='2023-01-01', end='2023-12-31', freq='D')
     df_disasters = pd.DataFrame(index=dates_2023)
     
@@ -110,6 +117,7 @@ try:
     # Salvar arquivo mesclado
     arquivo_mesclado = "merged_climatic_disaster_data_aracaju_2023.csv"
     df_merged.to_csv(arquivo_mesclado)
+    rastro.anotar(linhas=len(df_merged))
     
     print(f"\n✓ Dataset criado com sucesso!")
     print(f"   - Linhas: {len(df_merged)}")
@@ -128,12 +136,15 @@ try:
     print(f"   - Temperatura média máxima: {df_merged['Temperatura_Maxima_C'].mean():.2f} °C")
     print(f"   - Temperatura média mínima: {df_merged['Temperatura_Minima_C'].mean():.2f} °C")
     
+    rastro.encerrar()
+    
     print("\n" + "=" * 70)
     print("✓ DATASET DUMMY CRIADO COM SUCESSO!")
     print("=" * 70)
     print(f"\nPróximo passo: execute 'python correlation_analysis_and_plotting_WINDOWS.py'")
     
 except Exception as e:
+    rastro.falhar(e)
     print(f"\n❌ ERRO ao criar dataset: {e}")
     print(f"   Tipo de erro: {type(e).__name__}")
     import traceback
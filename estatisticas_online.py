@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Acumuladores de correlação de Pearson atualizáveis (estilo Welford/Chan).
+
+Para reproduzir df.corr() (correlação pareada, ignorando NaN par a par), o
+acumulador guarda, para cada par de colunas (i, j), apenas as linhas em que
+as duas são válidas:
+
+    n[i, j]   número de linhas válidas no par
+    media[i, j]  média de x_i nessas linhas
+    m2[i, j]  soma dos quadrados dos desvios de x_i nessas linhas
+    c[i, j]   co-momento  sum((x_i - media_i) * (x_j - media_j))
+
+Acumuladores de lotes diferentes são combinados (e removidos) exatamente com
+as fórmulas de Chan et al., então a matriz é atualizada em O(linhas novas).
+"""
+
+import numpy as np
+import pandas as pd
+
+CAMPOS = ('n', 'media', 'm2', 'c')
+TOLERANCIA_VARIANCIA = 1e-10
+
+
+def acumulador_vazio(p):
+    return {campo: np.zeros((p, p)) for campo in CAMPOS}
+
+
+def acumular_lote(X):
+    """Acumulador de um lote X (linhas x colunas, NaN = ausente) em operações matriciais."""
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim == 1:
+        X = X[None, :]
+    valido = ~np.isnan(X)
+    M = valido.astype(np.float64)
+    # Centraliza pela média de cada coluna no lote (estabilidade); a covariância não muda
+    contagem = M.sum(axis=0)
+    centro = np.divide(np.where(valido, X, 0.0).sum(axis=0), contagem,
+                       out=np.zeros(X.shape[1]), where=contagem > 0)
+    Z = np.where(valido, X - centro, 0.0)
+
+    n = M.T @ M
+    s = Z.T @ M                 # s[i, j] = soma de z_i nas linhas válidas em i e j
+    ss = (Z * Z).T @ M          # soma de z_i^2 nas mesmas linhas
+    zz = Z.T @ Z                # soma de z_i * z_j (zera automaticamente as linhas inválidas)
+    media_z = np.divide(s, n, out=np.zeros_like(n), where=n > 0)
+    m2 = ss - n * media_z ** 2
+    c = zz - n * media_z * media_z.T
+    return {'n': n, 'media': media_z + centro[:, None], 'm2': m2, 'c': c}
+
+
+def combinar(a, b):
+    """Acumulador de A ∪ B."""
+    n = a['n'] + b['n']
+    delta = b['media'] - a['media']
+    fracao_b = np.divide(b['n'], n, out=np.zeros_like(n), where=n > 0)
+    peso = a['n'] * fracao_b
+    return {
+        'n': n,
+        'media': a['media'] + delta * fracao_b,
+        'm2': a['m2'] + b['m2'] + delta ** 2 * peso,
+        'c': a['c'] + b['c'] + delta * delta.T * peso,
+    }
+
+
+def remover(total, a):
+    """Acumulador de (total − A), supondo que A está contido em total."""
+    n = total['n'] - a['n']
+    media = np.divide(total['n'] * total['media'] - a['n'] * a['media'], n, out=np.zeros_like(n), where=n > 0)
+    delta = media - a['media']
+    peso = np.divide(a['n'] * n, total['n'], out=np.zeros_like(n), where=total['n'] > 0)
+    m2 = total['m2'] - a['m2'] - delta ** 2 * peso
+    c = total['c'] - a['c'] - delta * delta.T * peso
+    # Sem linhas restantes o par volta a zero (evita resíduos de arredondamento)
+    vazio = n <= 0
+    return {
+        'n': np.where(vazio, 0.0, n),
+        'media': np.where(vazio, 0.0, media),
+        'm2': np.where(vazio, 0.0, m2),
+        'c': np.where(vazio, 0.0, c),
+    }
+
+
+def correlacao(acumulador, colunas=None):
+    """Matriz de correlação (como DataFrame.corr()) a partir do acumulador."""
+    n = acumulador['n']
+    # Variância residual de arredondamento (após remoções) conta como variância nula
+    m2 = np.where(acumulador['m2'] > TOLERANCIA_VARIANCIA * n, acumulador['m2'], 0.0)
+    denominador = np.sqrt(m2 * m2.T)
+    valido = (n >= 2) & (denominador > 0)
+    r = np.divide(acumulador['c'], denominador, out=np.full_like(n, np.nan), where=valido)
+    r = np.clip(r, -1.0, 1.0)
+    # Diagonal: 1 onde há variância (como o pandas)
+    diagonal = np.where((np.diag(n) >= 2) & (np.diag(m2) > 0), 1.0, np.nan)
+    np.fill_diagonal(r, diagonal)
+    if colunas is None:
+        return r
+    return pd.DataFrame(r, index=colunas, columns=colunas)
+
+
+def salvar_acumulador(caminho, acumulador, colunas):
+    np.savez(caminho, colunas=np.asarray(colunas, dtype=str), **acumulador)
+
+
+def ler_acumulador(caminho):
+    """Devolve (acumulador, colunas)."""
+    with np.load(caminho, allow_pickle=False) as dados:
+        return {campo: dados[campo] for campo in CAMPOS}, list(dados['colunas'])
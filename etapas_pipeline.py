@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+As três etapas do pipeline como funções importáveis que trocam DataFrames em
+memória (antes eram três scripts encadeados via CSV e subprocess):
+
+  1. preprocessar_clima       - CSV do INMET -> dados diários
+     (ou preprocessar_clima_qc, com o controle de qualidade de controle_qualidade)
+  2. criar_desastres_dummy    - dados diários -> dados mesclados com desastres
+     (ou mesclar_desastres_reais, com os eventos de eventos_desastre)
+  3. calcular_correlacao      - dados mesclados -> matriz de correlação
+     grafico_heatmap / grafico_precipitacao / grafico_temperatura - figuras
+
+Os gráficos são desenhados por renderizacao_graficos (matplotlib e seaborn só
+são importados na primeira figura). montar_dag() monta o grafo usado por
+executor_dag.executar_dag.
+"""
+
+import numpy as np
+import pandas as pd
+
+from inmet_comum import preprocessar_inmet, COLUNAS_MAPEAMENTO, AGREGACOES_DIARIAS
+from executor_dag import No
+from renderizacao_graficos import renderizar_figura, FIGURAS
+from features_chuva_acumulada import (features_do_arquivo, juntar_features, COLUNAS_FEATURES, JANELAS,
+                                      COEFICIENTES_API, COBERTURA_MINIMA)
+from controle_qualidade import (preprocessar_inmet_qc, LIMITES_QC, SENTINELAS, PREENCHIMENTO, MAX_LACUNA_HORAS,
+                                COBERTURA_MINIMA as COBERTURA_MINIMA_QC)
+
+ARQUIVO_INMET = "INMET_NE_SE_A409_ARACAJU_01-01-2023_A_31-12-2023.CSV"
+ARQUIVO_MESCLADO = "merged_climatic_disaster_data_aracaju_2023.csv"
+ARQUIVO_CORRELACAO = "correlation_matrix.csv"
+ARQUIVO_HEATMAP = "correlation_heatmap.png"
+ARQUIVO_PRECIPITACAO = "precipitation_inundation_timeseries.png"
+ARQUIVO_TEMPERATURA = "temperature_landslide_timeseries.png"
+
+COLUNAS_CLIMATICAS = [
+    'Precipitacao_mm',
+    'Temperatura_Maxima_C',
+    'Temperatura_Minima_C',
+    'Umidade_Relativa_Media_pct',
+    'Vento_Rajada_Maxima_ms'
+]
+COLUNAS_DESASTRES = [
+    'Inundacao_Alagamento',
+    'Deslizamento',
+    'Chuvas_Intensas'
+]
+COLUNAS_ANALISE = COLUNAS_CLIMATICAS + COLUNAS_DESASTRES
+
+PARAMETROS_DESASTRES = {
+    'quantil_inundacao': 0.95,
+    'limiar_deslizamento_mm': 5,
+    'n_deslizamentos': 5,
+    'random_state': 42,
+}
+
+
+# ============================================================================
+# PASSO 1: PRÉ-PROCESSAMENTO
+# ============================================================================
+
+def preprocessar_clima(arquivo_csv):
+    """Lê o CSV do INMET e devolve os dados diários."""
+    return preprocessar_inmet(arquivo_csv)
+
+
+def preprocessar_clima_qc(arquivo_csv, preenchimento=PREENCHIMENTO):
+    """Como preprocessar_clima, com QC horário e colunas Cobertura_<variavel>."""
+    return preprocessar_inmet_qc(arquivo_csv, preenchimento)
+
+
+# ============================================================================
+# PASSO 2: DATASET DUMMY DE DESASTRES
+# ============================================================================
+
+def criar_desastres_dummy(df_inmet_daily, quantil_inundacao=0.95, limiar_deslizamento_mm=5,
+                          n_deslizamentos=5, random_state=42):
+    """Simula desastres a partir da precipitação e mescla com os dados diários."""
+    datas = pd.date_range(start=df_inmet_daily.index.min(), end=df_inmet_daily.index.max(), freq='D')
+    df_disasters = pd.DataFrame(index=datas)
+
+    df_disasters['Inundacao_Alagamento'] = 0
+    df_disasters['Deslizamento'] = 0
+    df_disasters['Chuvas_Intensas'] = 0
+
+    # Simular eventos baseados em precipitação
+    precipitation_threshold = df_inmet_daily['Precipitacao_mm'].quantile(quantil_inundacao)
+    high_precip_days = df_inmet_daily[df_inmet_daily['Precipitacao_mm'] > precipitation_threshold].index
+
+    df_disasters.loc[high_precip_days, 'Inundacao_Alagamento'] = 1
+    df_disasters.loc[high_precip_days, 'Chuvas_Intensas'] = 1
+
+    # Adicionar deslizamentos
+    np.random.seed(random_state)
+    dias_com_chuva = df_inmet_daily[df_inmet_daily['Precipitacao_mm'] > limiar_deslizamento_mm]
+    if len(dias_com_chuva) > 0:
+        n = min(n_deslizamentos, len(dias_com_chuva))
+        random_disaster_days = dias_com_chuva.sample(n=n, random_state=random_state).index
+        df_disasters.loc[random_disaster_days, 'Deslizamento'] = 1
+
+    # Mesclar datasets
+    df_merged = pd.merge(df_inmet_daily, df_disasters, left_index=True, right_index=True, how='left')
+
+    # Preencher NaNs
+    for coluna in COLUNAS_DESASTRES:
+        df_merged[coluna] = df_merged[coluna].fillna(0).astype(int)
+    return df_merged
+
+
+def mesclar_desastres_reais(df_inmet_daily, arquivo_eventos, arquivo_csv):
+    """Flags de desastre a partir de um CSV de eventos reais (eventos_desastre), sem dados simulados."""
+    from eventos_desastre import mesclar_eventos_arquivo
+    return mesclar_eventos_arquivo(df_inmet_daily, arquivo_eventos, arquivo_csv)
+
+
+# ============================================================================
+# PASSO 3: CORRELAÇÃO E GRÁFICOS
+# ============================================================================
+
+def calcular_correlacao(df_merged, colunas=COLUNAS_ANALISE):
+    """Matriz de correlação de Pearson das colunas disponíveis."""
+    colunas_disponiveis = [col for col in colunas if col in df_merged.columns]
+    return df_merged[colunas_disponiveis].corr()
+
+
+def salvar_csv(df, caminho):
+    df.to_csv(caminho)
+
+
+def grafico_heatmap(correlation_matrix, caminho, titulo):
+    renderizar_figura('heatmap', correlation_matrix, caminho, titulo)
+
+
+def grafico_precipitacao(df_merged, caminho, local):
+    renderizar_figura('precipitacao', df_merged, caminho, FIGURAS['precipitacao']['titulo'].format(local=local))
+
+
+def grafico_temperatura(df_merged, caminho, local):
+    renderizar_figura('temperatura', df_merged, caminho, FIGURAS['temperatura']['titulo'].format(local=local))
+
+
+# ============================================================================
+# GRAFO DO PIPELINE
+# ============================================================================
+
+def montar_dag(arquivo_csv=ARQUIVO_INMET, local='Aracaju 2023', prefixo='', gerar_graficos=True,
+               features_chuva=False, arquivo_eventos=None, qc=False):
+    """Nós do pipeline completo para um arquivo do INMET.
+
+    `prefixo` diferencia os nós (e arquivos) quando várias estações vão no mesmo grafo.
+    Com `features_chuva`, as features de chuva acumulada (features_chuva_acumulada)
+    entram na matriz de correlação. Com `arquivo_eventos`, os desastres vêm
+    desse CSV de eventos reais em vez do dataset dummy. Com `qc`, os dados
+    diários passam pelo controle de qualidade (controle_qualidade).
+    """
+    p = prefixo
+    if qc:
+        nos = [
+            No(f'{p}diario', preprocessar_clima_qc, parametros={'arquivo_csv': arquivo_csv},
+               entradas=(arquivo_csv,),
+               versao=[COLUNAS_MAPEAMENTO, AGREGACOES_DIARIAS, LIMITES_QC, SENTINELAS, MAX_LACUNA_HORAS,
+                       COBERTURA_MINIMA_QC]),
+        ]
+    else:
+        nos = [
+            No(f'{p}diario', preprocessar_clima, parametros={'arquivo_csv': arquivo_csv},
+               entradas=(arquivo_csv,), versao=[COLUNAS_MAPEAMENTO, AGREGACOES_DIARIAS]),
+        ]
+    if arquivo_eventos:
+        nos.append(No(f'{p}mesclado', mesclar_desastres_reais, dependencias=(f'{p}diario',),
+                      parametros={'arquivo_eventos': arquivo_eventos, 'arquivo_csv': arquivo_csv},
+                      entradas=(arquivo_eventos, arquivo_csv)))
+    else:
+        nos.append(No(f'{p}mesclado', criar_desastres_dummy, dependencias=(f'{p}diario',),
+                      parametros=PARAMETROS_DESASTRES))
+    if features_chuva:
+        nos += [
+            No(f'{p}features_chuva', features_do_arquivo, parametros={'arquivo_csv': arquivo_csv},
+               entradas=(arquivo_csv,), versao=[JANELAS, COEFICIENTES_API, COBERTURA_MINIMA]),
+            No(f'{p}mesclado_features', juntar_features, dependencias=(f'{p}mesclado', f'{p}features_chuva')),
+            No(f'{p}correlacao', calcular_correlacao, dependencias=(f'{p}mesclado_features',),
+               parametros={'colunas': COLUNAS_ANALISE + COLUNAS_FEATURES}),
+        ]
+    else:
+        nos.append(No(f'{p}correlacao', calcular_correlacao, dependencias=(f'{p}mesclado',)))
+    nos += [
+        No(f'{p}salvar_mesclado', salvar_csv, dependencias=(f'{p}mesclado',),
+           parametros={'caminho': p + ARQUIVO_MESCLADO}, saidas=(p + ARQUIVO_MESCLADO,)),
+        No(f'{p}salvar_correlacao', salvar_csv, dependencias=(f'{p}correlacao',),
+           parametros={'caminho': p + ARQUIVO_CORRELACAO}, saidas=(p + ARQUIVO_CORRELACAO,)),
+    ]
+    if gerar_graficos:
+        nos += [
+            No(f'{p}heatmap', grafico_heatmap, dependencias=(f'{p}correlacao',),
+               parametros={'caminho': p + ARQUIVO_HEATMAP,
+                           'titulo': FIGURAS['heatmap']['titulo'].format(local=local)},
+               saidas=(p + ARQUIVO_HEATMAP,)),
+            No(f'{p}grafico_precipitacao', grafico_precipitacao, dependencias=(f'{p}mesclado',),
+               parametros={'caminho': p + ARQUIVO_PRECIPITACAO, 'local': local},
+               saidas=(p + ARQUIVO_PRECIPITACAO,)),
+            No(f'{p}grafico_temperatura', grafico_temperatura, dependencias=(f'{p}mesclado',),
+               parametros={'caminho': p + ARQUIVO_TEMPERATURA, 'local': local},
+               saidas=(p + ARQUIVO_TEMPERATURA,)),
+        ]
+    return nos
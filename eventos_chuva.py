@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Segmentação da chuva horária em eventos de tempestade.
+
+A análise diária trata cada dia do calendário como independente: uma
+tempestade que atravessa a meia-noite UTC vira dois dias, e o detalhe
+horário some no resample('D'). Aqui a série horária de cada estação é
+dividida em eventos:
+
+  - hora molhada = chuva > LIMIAR_MOLHADO_MM (hora sem dado conta como seca);
+  - horas molhadas separadas por menos de LACUNA_SECA_HORAS horas secas
+    pertencem ao mesmo evento;
+  - eventos com total abaixo de PROFUNDIDADE_MINIMA_MM são descartados.
+
+Tudo por codificação de trechos (run-length) com np.diff/np.cumsum sobre
+as posições das horas molhadas da matriz (estações, horas) achatada, sem
+laço em Python por hora: um evento novo começa onde a estação muda ou onde
+a distância até a hora molhada anterior passa da lacuna; total e pico saem
+de np.add/np.maximum.reduceat e as horas sem dado dentro do evento, de um
+cumsum da máscara de faltas.
+
+Cada evento traz início, fim, duração, horas com chuva, total, pico,
+intensidade média, horas sem dado (e se encosta em falta de dado, quando
+pode ter sido cortado) e quantos dias do calendário ele toca. Os eventos
+podem ser ligados aos desastres: por eventos reais (eventos_desastre,
+sobreposição de intervalos) ou pelas flags diárias da tabela em lote, com
+uma defasagem após o fim do evento.
+
+Uso:
+    python eventos_chuva.py --acervo acervo_inmet --lacuna-seca 6 --profundidade-minima 5
+    python eventos_chuva.py --acervo acervo_inmet --eventos s2id.csv --catalogo estacoes_inmet.csv
+    python eventos_chuva.py --arquivos INMET_NE_SE_A409_ARACAJU_01-01-2023_A_31-12-2023.CSV --lote inmet_diario_lote.csv
+    python eventos_chuva.py --benchmark 600 --anos 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from etapas_pipeline import COLUNAS_DESASTRES
+
+COLUNA_PRECIPITACAO = 'Precipitacao_mm'
+LIMIAR_MOLHADO_MM = 0.0
+LACUNA_SECA_HORAS = 6
+PROFUNDIDADE_MINIMA_MM = 1.0
+DEFASAGEM_HORAS = 24
+CASAS_DECIMAIS = 3
+ESTACOES_POR_BLOCO = 64
+ARQUIVO_EVENTOS_CHUVA = 'eventos_chuva.csv'
+UMA_HORA = np.timedelta64(1, 'h')
+
+
+# ============================================================================
+# SEGMENTAÇÃO (RUN-LENGTH)
+# ============================================================================
+
+def segmentar(chuva, lacuna_seca=LACUNA_SECA_HORAS, profundidade_minima=PROFUNDIDADE_MINIMA_MM,
+              limiar_molhado=LIMIAR_MOLHADO_MM):
+    """Eventos de uma matriz (estações, horas) de chuva horária, NaN = sem dado.
+
+    Devolve {campo: array por evento}: linha, inicio e fim (horas da grade,
+    fim inclusivo), horas_chuva, total, pico, horas_sem_dado e borda_sem_dado.
+    """
+    chuva = np.atleast_2d(chuva)
+    n_horas = chuva.shape[1]
+    plano = np.asarray(chuva).ravel()
+    with np.errstate(invalid='ignore'):
+        molhado = np.flatnonzero(plano > limiar_molhado)
+    campos = ('linha', 'inicio', 'fim', 'horas_chuva', 'total', 'pico', 'horas_sem_dado', 'borda_sem_dado')
+    if len(molhado) == 0:
+        return {c: np.array([], dtype=np.float64 if c in ('total', 'pico') else np.int64) for c in campos}
+
+    linha, hora = np.divmod(molhado, n_horas)
+    novo = np.ones(len(molhado), dtype=bool)
+    # Lacuna seca entre duas horas molhadas = diferença - 1
+    novo[1:] = (linha[1:] != linha[:-1]) | (np.diff(hora) > lacuna_seca)
+    inicios = np.flatnonzero(novo)
+    fins = np.append(inicios[1:], len(molhado)) - 1
+
+    valores = plano[molhado].astype(np.float64)
+    total = np.add.reduceat(valores, inicios)
+    pico = np.maximum.reduceat(valores, inicios)
+    horas_chuva = np.diff(np.append(inicios, len(molhado)))
+
+    sem_dado = np.isnan(plano)
+    faltas = np.concatenate([[0], np.cumsum(sem_dado)])
+    primeira, ultima = molhado[inicios], molhado[fins]
+    horas_sem_dado = faltas[ultima + 1] - faltas[primeira]
+    # Falta de dado logo antes ou logo depois: o evento pode ter sido cortado
+    antes = (hora[inicios] > 0) & sem_dado[np.maximum(primeira - 1, 0)]
+    depois = (hora[fins] < n_horas - 1) & sem_dado[np.minimum(ultima + 1, len(plano) - 1)]
+
+    # Arredonda o ruído do float32 do acervo (0.2 -> 0.20000000298) e da soma
+    total, pico = np.round(total, CASAS_DECIMAIS), np.round(pico, CASAS_DECIMAIS)
+    manter = total >= profundidade_minima
+    eventos = {
+        'linha': linha[inicios], 'inicio': hora[inicios], 'fim': hora[fins], 'horas_chuva': horas_chuva,
+        'total': total, 'pico': pico, 'horas_sem_dado': horas_sem_dado, 'borda_sem_dado': antes | depois,
+    }
+    return {c: v[manter] for c, v in eventos.items()}
+
+
+def tabela_eventos(eventos, codigos, inicio_grade):
+    """DataFrame de eventos (segmentar) com códigos das estações e instantes reais."""
+    inicio = np.datetime64(inicio_grade, 'h') + eventos['inicio'] * UMA_HORA
+    fim = np.datetime64(inicio_grade, 'h') + eventos['fim'] * UMA_HORA
+    duracao = eventos['fim'] - eventos['inicio'] + 1
+    dias = (fim.astype('datetime64[D]') - inicio.astype('datetime64[D]')).astype(np.int64) + 1
+    df = pd.DataFrame({
+        'Codigo_Estacao': np.asarray(codigos)[eventos['linha']],
+        'Inicio': inicio.astype('datetime64[ns]'),
+        'Fim': fim.astype('datetime64[ns]'),
+        'Duracao_h': duracao,
+        'Horas_chuva': eventos['horas_chuva'],
+        'Total_mm': eventos['total'],
+        'Pico_mm_h': eventos['pico'],
+        'Intensidade_media_mm_h': eventos['total'] / duracao,
+        'Horas_sem_dado': eventos['horas_sem_dado'],
+        'Borda_sem_dado': eventos['borda_sem_dado'],
+        'Dias_calendario': dias,
+    })
+    df.index.name = 'Evento'
+    return df
+
+
+def eventos_do_acervo(acervo, lacuna_seca=LACUNA_SECA_HORAS, profundidade_minima=PROFUNDIDADE_MINIMA_MM,
+                      limiar_molhado=LIMIAR_MOLHADO_MM, inicio=None, fim=None, usar_qc=False,
+                      estacoes_por_bloco=ESTACOES_POR_BLOCO):
+    """Eventos de todas as estações do acervo horário, em blocos de estações (memória limitada)."""
+    horas = acervo.horas_do_intervalo(inicio, fim)
+    mascaras = None
+    if usar_qc:
+        from controle_qualidade import QC_REJEITADO, abrir_flags
+        mascaras = abrir_flags(acervo)[COLUNA_PRECIPITACAO]
+    inicio_grade = acervo.inicio + horas.start * UMA_HORA
+    partes = []
+    for a in range(0, len(acervo.estacoes), estacoes_por_bloco):
+        b = min(a + estacoes_por_bloco, len(acervo.estacoes))
+        chuva = np.atleast_2d(acervo.array(COLUNA_PRECIPITACAO, acervo.estacoes[a:b], inicio, fim))
+        if mascaras is not None:
+            chuva = np.where((mascaras[a:b, horas] & QC_REJEITADO) != 0, np.nan, chuva)
+        partes.append(tabela_eventos(segmentar(chuva, lacuna_seca, profundidade_minima, limiar_molhado),
+                                     acervo.estacoes[a:b], inicio_grade))
+    return pd.concat(partes, ignore_index=True).rename_axis('Evento')
+
+
+def eventos_dos_arquivos(arquivos, lacuna_seca=LACUNA_SECA_HORAS, profundidade_minima=PROFUNDIDADE_MINIMA_MM,
+                         limiar_molhado=LIMIAR_MOLHADO_MM):
+    """Eventos de uma estação a partir dos CSVs do INMET (concatenados, atravessando a virada do ano)."""
+    from features_chuva_acumulada import ler_precipitacao_horaria, grade_horaria
+    from inmet_comum import extrair_info_nome_arquivo
+    info = extrair_info_nome_arquivo(arquivos[0]) or {}
+    valores, indice = grade_horaria(ler_precipitacao_horaria(arquivos)[COLUNA_PRECIPITACAO])
+    return tabela_eventos(segmentar(valores[None], lacuna_seca, profundidade_minima, limiar_molhado),
+                          [info.get('codigo', 'estacao')], indice[0])
+
+
+# ============================================================================
+# LIGAÇÃO COM OS DESASTRES
+# ============================================================================
+
+def ligar_eventos_indice(eventos, indice_eventos, defasagem_horas=DEFASAGEM_HORAS):
+    """Colunas de desastre (0/1): algum evento real ativo entre o início e o fim + defasagem."""
+    fim = eventos['Fim'].to_numpy() + np.timedelta64(1 + defasagem_horas, 'h')
+    contagens = indice_eventos.contar_intervalos(eventos['Codigo_Estacao'].to_numpy(), eventos['Inicio'].to_numpy(),
+                                                 fim)
+    ligados = eventos.copy()
+    for k, coluna in enumerate(indice_eventos.colunas):
+        ligados[coluna] = (contagens[:, k] > 0).astype(int)
+    return ligados
+
+
+def ligar_eventos_diarios(eventos, df_flags, defasagem_horas=DEFASAGEM_HORAS, colunas=COLUNAS_DESASTRES):
+    """Colunas de desastre (0/1) pelas flags diárias (Codigo_Estacao, Data) da tabela em lote.
+
+    Um evento é ligado se algum dia entre o dia do início e o dia do fim +
+    defasagem tem a flag. As flags de cada estação viram somas acumuladas na
+    grade diária; cada evento é uma diferença de duas posições. Estações sem
+    flags na tabela ficam NaN.
+    """
+    colunas = [c for c in colunas if c in df_flags.columns]
+    datas = df_flags.index.get_level_values('Data')
+    primeiro = np.datetime64(datas.min(), 'D')
+    n_dias = int((np.datetime64(datas.max(), 'D') - primeiro).astype(np.int64)) + 1
+    estacoes = pd.Index(df_flags.index.get_level_values('Codigo_Estacao').unique())
+    linha = estacoes.get_indexer(df_flags.index.get_level_values('Codigo_Estacao'))
+    dia = (datas.to_numpy().astype('datetime64[D]') - primeiro).astype(np.int64)
+
+    posicao = estacoes.get_indexer(eventos['Codigo_Estacao'])
+    conhecida = posicao >= 0
+    a = np.clip((eventos['Inicio'].to_numpy().astype('datetime64[D]') - primeiro).astype(np.int64), 0, n_dias)
+    fim = eventos['Fim'].to_numpy() + np.timedelta64(defasagem_horas, 'h')
+    b = np.clip((fim.astype('datetime64[D]') - primeiro).astype(np.int64) + 1, 0, n_dias)
+
+    ligados = eventos.copy()
+    for coluna in colunas:
+        grade = np.zeros((len(estacoes), n_dias))
+        grade[linha, dia] = np.nan_to_num(df_flags[coluna].to_numpy(dtype=np.float64)) > 0
+        acumulado = np.concatenate([np.zeros((len(estacoes), 1)), np.cumsum(grade, axis=1)], axis=1)
+        contagem = np.full(len(eventos), np.nan)
+        p = posicao[conhecida]
+        contagem[conhecida] = acumulado[p, b[conhecida]] - acumulado[p, a[conhecida]]
+        ligados[coluna] = np.where(np.isnan(contagem), np.nan, contagem > 0)
+    return ligados
+
+
+def resumo_eventos(eventos, colunas=COLUNAS_DESASTRES):
+    """Por estação: número de eventos, total médio, duração média, % que atravessa a meia-noite e ligados."""
+    grupos = eventos.groupby('Codigo_Estacao')
+    resumo = pd.DataFrame({
+        'Eventos': grupos.size(),
+        'Total_medio_mm': grupos['Total_mm'].mean(),
+        'Duracao_media_h': grupos['Duracao_h'].mean(),
+        'Pico_max_mm_h': grupos['Pico_mm_h'].max(),
+        'Fracao_multidia': grupos['Dias_calendario'].apply(lambda d: (d > 1).mean()),
+    })
+    for coluna in [c for c in colunas if c in eventos.columns]:
+        resumo[f'Ligados_{coluna}'] = grupos[coluna].sum()
+    return resumo
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _segmentar_por_laco(serie, lacuna_seca, profundidade_minima, limiar_molhado=LIMIAR_MOLHADO_MM):
+    """Referência: percorre a série hora a hora."""
+    eventos = []
+    atual = None
+    secas = 0
+    for h, valor in enumerate(serie):
+        if valor > limiar_molhado:
+            if atual is not None and secas < lacuna_seca:
+                atual['fim'] = h
+                atual['total'] += valor
+                atual['pico'] = max(atual['pico'], valor)
+            else:
+                if atual is not None:
+                    eventos.append(atual)
+                atual = {'inicio': h, 'fim': h, 'total': valor, 'pico': valor}
+            secas = 0
+        else:
+            secas += 1
+    if atual is not None:
+        eventos.append(atual)
+    return [e for e in eventos if round(e['total'], CASAS_DECIMAIS) >= profundidade_minima]
+
+
+def chuva_sintetica(n_estacoes, anos, semente=0):
+    """Matriz (estações, horas) float32: tempestades (chegadas de Poisson) com horas secas intercaladas e falhas."""
+    rng = np.random.default_rng(semente)
+    n_horas = int(anos * 365.25 * 24)
+    chuva = np.zeros((n_estacoes, n_horas), dtype=np.float32)
+    n_tempestades = int(n_horas / 60)
+    for s in range(n_estacoes):
+        inicios = rng.integers(0, n_horas, n_tempestades)
+        duracoes = rng.geometric(0.15, n_tempestades)
+        horas = np.repeat(inicios, duracoes) + (np.arange(duracoes.sum()) - np.repeat(np.cumsum(duracoes) - duracoes,
+                                                                                      duracoes))
+        horas = horas[(horas < n_horas) & (rng.random(len(horas)) < 0.8)]
+        chuva[s, horas] = np.round(rng.gamma(0.6, 3.0, len(horas)) / 0.2) * 0.2 + 0.2
+        falhas = rng.integers(0, n_horas, 20)
+        for f in falhas:
+            chuva[s, f:f + rng.integers(1, 72)] = np.nan
+    return chuva
+
+
+def benchmark(n_estacoes, anos, lacuna_seca=LACUNA_SECA_HORAS, profundidade_minima=PROFUNDIDADE_MINIMA_MM):
+    chuva = chuva_sintetica(n_estacoes, anos)
+    print(f"   Estações: {n_estacoes} | Anos: {anos} | Horas: {chuva.size:,} "
+          f"({chuva.nbytes / 1e9:.2f} GB em float32) | Lacuna seca: {lacuna_seca} h | "
+          f"Mínimo: {profundidade_minima} mm")
+    inicio = time.perf_counter()
+    n_eventos = 0
+    for a in range(0, n_estacoes, ESTACOES_POR_BLOCO):
+        n_eventos += len(segmentar(chuva[a:a + ESTACOES_POR_BLOCO], lacuna_seca, profundidade_minima)['total'])
+    t_vetorizado = time.perf_counter() - inicio
+
+    serie = chuva[0].astype(np.float64)
+    inicio = time.perf_counter()
+    referencia = _segmentar_por_laco(serie, lacuna_seca, profundidade_minima)
+    t_laco = (time.perf_counter() - inicio) * n_estacoes
+    eventos = segmentar(serie[None], lacuna_seca, profundidade_minima)
+    iguais = (len(referencia) == len(eventos['total'])
+              and np.array_equal([e['inicio'] for e in referencia], eventos['inicio'])
+              and np.array_equal([e['fim'] for e in referencia], eventos['fim'])
+              and np.allclose([e['total'] for e in referencia], eventos['total'])
+              and np.allclose([e['pico'] for e in referencia], eventos['pico']))
+
+    tabela = tabela_eventos(segmentar(chuva[:ESTACOES_POR_BLOCO], lacuna_seca, profundidade_minima),
+                            [f'S{i:04d}' for i in range(ESTACOES_POR_BLOCO)], '2000-01-01T00')
+    multidia = tabela['Dias_calendario'] > 1
+    print(f"   Vetorizado (run-length): {t_vetorizado:7.2f}s -> {n_eventos:,} eventos "
+          f"({chuva.size / t_vetorizado / 1e6:,.0f}M horas/s)")
+    print(f"   Laço por hora (estimado): {t_laco:7.0f}s (1 estação medida) | speedup {t_laco / t_vetorizado:,.0f}x | "
+          f"eventos iguais: {iguais}")
+    print(f"   Eventos que atravessam a meia-noite: {multidia.mean():.0%} dos eventos, "
+          f"{tabela.loc[multidia, 'Total_mm'].sum() / tabela['Total_mm'].sum():.0%} da chuva dos eventos")
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Eventos de tempestade a partir da chuva horária")
+    origem = parser.add_mutually_exclusive_group()
+    origem.add_argument('--acervo', help="Acervo horário (acervo_horario) com todas as estações")
+    origem.add_argument('--arquivos', nargs='+', help="CSVs do INMET de uma estação")
+    origem.add_argument('--benchmark', type=int, metavar='ESTACOES', help="Rede sintética com N estações")
+    parser.add_argument('--anos', type=float, default=20, help="Anos da rede sintética (--benchmark)")
+    parser.add_argument('--inicio')
+    parser.add_argument('--fim')
+    parser.add_argument('--lacuna-seca', type=int, default=LACUNA_SECA_HORAS,
+                        help="Horas secas que encerram um evento")
+    parser.add_argument('--profundidade-minima', type=float, default=PROFUNDIDADE_MINIMA_MM,
+                        help="Total mínimo (mm) de um evento")
+    parser.add_argument('--limiar-molhado', type=float, default=LIMIAR_MOLHADO_MM,
+                        help="Chuva (mm) acima da qual a hora é molhada")
+    parser.add_argument('--qc', action='store_true', help="Descarta horas rejeitadas pelo controle_qualidade")
+    parser.add_argument('--eventos', nargs='*', help="CSVs de desastres reais (eventos_desastre)")
+    parser.add_argument('--catalogo', help="Catálogo de estações (desastres com Latitude/Longitude)")
+    parser.add_argument('--lote', help="Tabela diária (Codigo_Estacao, Data) com as flags de desastre")
+    parser.add_argument('--defasagem', type=int, default=DEFASAGEM_HORAS,
+                        help="Horas após o fim do evento em que um desastre ainda é ligado a ele")
+    parser.add_argument('--saida', default=ARQUIVO_EVENTOS_CHUVA)
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("EVENTOS DE TEMPESTADE (CHUVA HORÁRIA)")
+    print("=" * 70)
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.anos, args.lacuna_seca, args.profundidade_minima)
+        return 0
+
+    inicio = time.perf_counter()
+    acervo = None
+    if args.arquivos:
+        faltando = [a for a in args.arquivos if not os.path.exists(a)]
+        if faltando:
+            print(f"❌ ERRO: Arquivo não encontrado: {', '.join(faltando)}")
+            return 1
+        eventos = eventos_dos_arquivos(args.arquivos, args.lacuna_seca, args.profundidade_minima, args.limiar_molhado)
+    else:
+        from acervo_horario import AcervoHorario, DIRETORIO_ACERVO
+        try:
+            acervo = AcervoHorario(args.acervo or DIRETORIO_ACERVO)
+        except FileNotFoundError as e:
+            print(f"❌ ERRO: {e}")
+            return 1
+        eventos = eventos_do_acervo(acervo, args.lacuna_seca, args.profundidade_minima, args.limiar_molhado,
+                                    args.inicio, args.fim, args.qc)
+    print(f"✓ {len(eventos):,} eventos em {eventos['Codigo_Estacao'].nunique()} estação(ões) "
+          f"em {time.perf_counter() - inicio:.2f}s")
+
+    if args.eventos:
+        from eventos_desastre import ler_eventos
+        from indice_estacoes import ler_catalogo
+        catalogo = ler_catalogo(args.catalogo) if args.catalogo else (acervo.catalogo if acervo else None)
+        try:
+            indice = ler_eventos(args.eventos, catalogo)
+        except ValueError as e:
+            print(f"❌ ERRO: {e}")
+            return 1
+        eventos = ligar_eventos_indice(eventos, indice, args.defasagem)
+        print(f"✓ Ligados aos desastres de {', '.join(args.eventos)} (até {args.defasagem} h após o fim)")
+    elif args.lote:
+        from correlacao_defasada import ler_lote
+        eventos = ligar_eventos_diarios(eventos, ler_lote(args.lote), args.defasagem)
+        print(f"✓ Ligados às flags diárias de {args.lote} (até {args.defasagem} h após o fim)")
+
+    eventos.to_csv(args.saida)
+    print(f"✓ Salvo: {args.saida}")
+
+    if len(eventos):
+        multidia = eventos['Dias_calendario'] > 1
+        print(f"\n📊 {multidia.mean():.0%} dos eventos atravessam a meia-noite UTC "
+              f"({eventos.loc[multidia, 'Total_mm'].sum() / eventos['Total_mm'].sum():.0%} da chuva dos eventos)")
+        print(f"   {eventos['Borda_sem_dado'].mean():.0%} encostam em horas sem dado (podem estar cortados)")
+        maiores = eventos.nlargest(5, 'Total_mm')
+        colunas = ['Codigo_Estacao', 'Inicio', 'Duracao_h', 'Total_mm', 'Pico_mm_h'] + [
+            c for c in COLUNAS_DESASTRES if c in eventos.columns]
+        print("   Maiores eventos:")
+        print(maiores[colunas].to_string(index=False))
+    print("=" * 70)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
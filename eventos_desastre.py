@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ingestão de registros reais de desastres (Defesa Civil / S2iD) com início e
+fim, vários eventos por dia e muitos municípios, no lugar do DataFrame de
+datas + pd.merge(how='left') + fillna(0) do dataset dummy.
+
+Cada evento vira dois inteiros de 64 bits, chave = (estação, tipo) << 32 |
+minuto: um para o início e outro para o fim do intervalo. Os inícios e os
+fins são ordenados separadamente (IndiceEventos), e o número de eventos
+ativos em [t, t + passo) para uma estação e um tipo é
+
+    #(inícios < t + passo) - #(fins < t)
+
+ou seja, duas buscas binárias (np.searchsorted) por consulta, para qualquer
+conjunto de instantes: os dias da tabela diária, as horas de uma série
+horária ou a grade completa de todas as estações. Nada é expandido evento a
+evento e não há atribuição por .loc.
+
+Os CSVs são lidos em blocos; de cada bloco só ficam as duas chaves (16 bytes
+por evento), então dezenas de milhões de eventos cabem em poucas centenas de
+MB. As tabelas densas (estação x dia/hora) são geradas em blocos de estações.
+
+Colunas aceitas nos CSVs de eventos:
+  - Inicio e Fim em ISO 8601 (ou só Data: o evento ocupa o dia inteiro;
+    Fim vazio = Inicio);
+  - Tipo: nome da coluna de desastre, descrição ou código COBRADE;
+  - Codigo_Estacao, ou Latitude/Longitude + catálogo de estações
+    (indice_estacoes: estação mais próxima dentro de --raio-max km).
+
+Uso:
+    python eventos_desastre.py --eventos s2id_2000_2023.csv --catalogo estacoes_inmet.csv --freq D
+    python eventos_desastre.py --eventos s2id_*.csv --catalogo estacoes_inmet.csv --lote inmet_diario_lote.csv
+    python eventos_desastre.py --benchmark 10000000
+"""
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from etapas_pipeline import COLUNAS_DESASTRES
+from indice_estacoes import (IndiceEstacoes, catalogo_estacoes, ler_catalogo, COLUNA_DATA, COLUNA_LATITUDE,
+                             COLUNA_LONGITUDE, COLUNA_TIPO)
+
+COLUNA_INICIO = 'Inicio'
+COLUNA_FIM = 'Fim'
+
+LINHAS_POR_BLOCO = 1_000_000      # eventos lidos por vez / linhas por bloco das tabelas densas
+RAIO_MAXIMO_KM = 50.0
+ARQUIVO_CONTAGENS = 'desastres_estacao_dia.csv'
+
+# Chave = (estação * n_tipos + tipo) << DESLOCAMENTO | minutos desde ORIGEM
+DESLOCAMENTO = 32
+ORIGEM = np.datetime64('1900-01-01T00:00', 'm')
+
+# Tipo (sem acento, minúsculo) -> coluna de desastre: prefixo de código COBRADE ou trecho da descrição
+PADROES_TIPO = {
+    'Inundacao_Alagamento': ('1.2.1', '1.2.2', '1.2.3', 'inunda', 'alaga', 'enxurr'),
+    'Deslizamento': ('1.1.3', 'desliza', 'movimento de massa', 'corrida de massa', 'queda de bloco'),
+    'Chuvas_Intensas': ('1.3.2.1.4', 'chuva', 'tempestade'),
+}
+
+
+# ============================================================================
+# NORMALIZAÇÃO DOS REGISTROS
+# ============================================================================
+
+def _sem_acentos(texto):
+    texto = unicodedata.normalize('NFKD', str(texto))
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower().strip()
+
+
+def classificar_tipos(tipos, colunas=COLUNAS_DESASTRES, padroes=PADROES_TIPO):
+    """Índice da coluna de desastre de cada registro (-1 = tipo não reconhecido).
+
+    Só os valores distintos são classificados; o resultado volta por código.
+    """
+    codigos, valores = pd.factorize(pd.Series(tipos), use_na_sentinel=True)
+    mapa = np.full(len(valores) + 1, -1, dtype=np.int64)
+    normalizadas = {_sem_acentos(c): i for i, c in enumerate(colunas)}
+    for i, valor in enumerate(valores):
+        texto = _sem_acentos(valor)
+        if texto in normalizadas:
+            mapa[i] = normalizadas[texto]
+            continue
+        for j, coluna in enumerate(colunas):
+            if any(texto.startswith(p) if p[0].isdigit() else p in texto for p in padroes.get(coluna, ())):
+                mapa[i] = j
+                break
+    return mapa[codigos]   # código -1 (NaN) cai na última posição, que é -1
+
+
+def _minutos(instantes):
+    """Minutos desde ORIGEM (int64), limitados à faixa da chave."""
+    valores = np.asarray(instantes, dtype='datetime64[m]')
+    minutos = (valores - ORIGEM).astype(np.int64)
+    return np.clip(minutos, 0, (1 << DESLOCAMENTO) - 1)
+
+
+def _minutos_do_passo(passo):
+    origem = pd.Timestamp('2000-01-01')
+    return (origem + pd.tseries.frequencies.to_offset(passo) - origem) // pd.Timedelta(minutes=1)
+
+
+def normalizar_eventos(bloco, indice_estacoes=None, raio_max_km=RAIO_MAXIMO_KM, colunas=COLUNAS_DESASTRES):
+    """DataFrame (Codigo_Estacao, tipo, Inicio, Fim) com só os eventos válidos de um bloco."""
+    if COLUNA_INICIO in bloco.columns:
+        inicio = pd.to_datetime(bloco[COLUNA_INICIO], errors='coerce', format='ISO8601')
+        fim = pd.to_datetime(bloco[COLUNA_FIM], errors='coerce', format='ISO8601') if COLUNA_FIM in bloco.columns else inicio
+        fim = fim.fillna(inicio)
+    else:
+        # Só a data: o evento cobre o dia inteiro
+        inicio = pd.to_datetime(bloco[COLUNA_DATA], errors='coerce').dt.normalize()
+        fim = inicio + pd.Timedelta(days=1) - pd.Timedelta(minutes=1)
+    inicio, fim = inicio.to_numpy(), fim.to_numpy()
+    inicio, fim = np.minimum(inicio, fim), np.maximum(inicio, fim)
+
+    if 'Codigo_Estacao' in bloco.columns:
+        estacao = bloco['Codigo_Estacao'].astype(str).to_numpy()
+        valido = bloco['Codigo_Estacao'].notna().to_numpy()
+    elif indice_estacoes is not None:
+        indices, distancias = indice_estacoes.vizinhos(bloco[COLUNA_LATITUDE], bloco[COLUNA_LONGITUDE], k=1)
+        valido = distancias[:, 0] <= (np.inf if raio_max_km is None else raio_max_km)
+        estacao = indice_estacoes.codigos[np.maximum(indices[:, 0], 0)]
+    else:
+        raise ValueError("Eventos sem Codigo_Estacao: informe um catálogo de estações para Latitude/Longitude")
+
+    tipo = classificar_tipos(bloco[COLUNA_TIPO], colunas)
+    valido = valido & (tipo >= 0) & ~np.isnat(inicio)
+    return pd.DataFrame({'Codigo_Estacao': estacao[valido], 'tipo': tipo[valido],
+                         COLUNA_INICIO: inicio[valido], COLUNA_FIM: fim[valido]})
+
+
+# ============================================================================
+# ÍNDICE DE INTERVALOS
+# ============================================================================
+
+class IndiceEventos:
+    """Inícios e fins dos eventos, ordenados separadamente por (estação, tipo, minuto)."""
+
+    def __init__(self, codigos, inicios, fins, colunas=COLUNAS_DESASTRES, ordenado=False):
+        self.codigos = np.asarray(codigos, dtype=object)
+        self.colunas = list(colunas)
+        self._posicao = pd.Index(self.codigos)
+        self.inicios = np.asarray(inicios, dtype=np.int64)
+        self.fins = np.asarray(fins, dtype=np.int64)
+        if not ordenado:
+            self.inicios = np.sort(self.inicios)
+            self.fins = np.sort(self.fins)
+
+    def __len__(self):
+        return len(self.inicios)
+
+    @property
+    def nbytes(self):
+        return self.inicios.nbytes + self.fins.nbytes
+
+    @classmethod
+    def de_blocos(cls, blocos, colunas=COLUNAS_DESASTRES, codigos=None):
+        """Monta o índice a partir de DataFrames de normalizar_eventos (só as chaves ficam na memória)."""
+        ids = {}
+        if codigos is not None:
+            ids = {codigo: i for i, codigo in enumerate(codigos)}
+        inicios, fins = [], []
+        for bloco in blocos:
+            unicos, inversa = np.unique(bloco['Codigo_Estacao'].to_numpy(dtype=str), return_inverse=True)
+            if codigos is None:
+                for codigo in unicos:
+                    ids.setdefault(codigo, len(ids))
+            estacao = np.array([ids.get(codigo, -1) for codigo in unicos], dtype=np.int64)[inversa]
+            manter = estacao >= 0
+            grupo = (estacao[manter] * len(colunas) + bloco['tipo'].to_numpy()[manter]) << DESLOCAMENTO
+            inicios.append(grupo | _minutos(bloco[COLUNA_INICIO].to_numpy()[manter]))
+            fins.append(grupo | _minutos(bloco[COLUNA_FIM].to_numpy()[manter]))
+        vazio = np.empty(0, dtype=np.int64)
+        return cls(list(ids), np.concatenate(inicios or [vazio]), np.concatenate(fins or [vazio]), colunas)
+
+    @classmethod
+    def de_eventos(cls, eventos, indice_estacoes=None, raio_max_km=RAIO_MAXIMO_KM, colunas=COLUNAS_DESASTRES):
+        return cls.de_blocos([normalizar_eventos(eventos, indice_estacoes, raio_max_km, colunas)], colunas)
+
+    def contar(self, codigos, instantes, passo='D'):
+        """(N, tipos) eventos ativos em [t, t + passo) para cada par (codigo, t)."""
+        t = _minutos(instantes)
+        return self._contar(codigos, t, t + _minutos_do_passo(passo))
+
+    def contar_intervalos(self, codigos, inicios, fins):
+        """(N, tipos) eventos ativos em algum momento de [inicio, fim) para cada (codigo, inicio, fim)."""
+        return self._contar(codigos, _minutos(inicios), _minutos(fins))
+
+    def _contar(self, codigos, t, t_fim):
+        codigos = np.broadcast_to(np.asarray(codigos, dtype=object), np.shape(t))
+        estacao = self._posicao.get_indexer(codigos).astype(np.int64)
+        t_fim = np.minimum(t_fim, (1 << DESLOCAMENTO) - 1)
+        contagens = np.zeros((len(t), len(self.colunas)), dtype=np.int32)
+        conhecida = estacao >= 0
+        for k in range(len(self.colunas)):
+            grupo = (estacao[conhecida] * len(self.colunas) + k) << DESLOCAMENTO
+            contagens[conhecida, k] = (np.searchsorted(self.inicios, grupo | t_fim[conhecida], side='left')
+                                       - np.searchsorted(self.fins, grupo | t[conhecida], side='left'))
+        return contagens
+
+    def grade(self, inicio, fim, passo='D', codigos=None, linhas_por_bloco=LINHAS_POR_BLOCO):
+        """Tabelas densas (Codigo_Estacao, Data) x colunas de desastre, em blocos de estações."""
+        instantes = pd.date_range(inicio, fim, freq=passo, name='Data')
+        codigos = self.codigos if codigos is None else np.asarray(codigos, dtype=object)
+        estacoes_por_bloco = max(1, linhas_por_bloco // max(len(instantes), 1))
+        for i in range(0, len(codigos), estacoes_por_bloco):
+            bloco = codigos[i:i + estacoes_por_bloco]
+            indice = pd.MultiIndex.from_product([bloco, instantes], names=['Codigo_Estacao', 'Data'])
+            contagens = self.contar(np.repeat(bloco, len(instantes)), np.tile(instantes.to_numpy(), len(bloco)),
+                                    passo)
+            yield pd.DataFrame(contagens, index=indice, columns=self.colunas)
+
+
+def ler_eventos(caminhos, catalogo=None, raio_max_km=RAIO_MAXIMO_KM, linhas_por_bloco=LINHAS_POR_BLOCO,
+                colunas=COLUNAS_DESASTRES, codigos=None):
+    """IndiceEventos de um ou mais CSVs de eventos, lidos em blocos de `linhas_por_bloco`.
+
+    Com `codigos`, só os eventos dessas estações entram no índice.
+    """
+    if isinstance(caminhos, str):
+        caminhos = [caminhos]
+    indice_estacoes = IndiceEstacoes(catalogo) if catalogo is not None else None
+
+    def blocos():
+        for caminho in caminhos:
+            for bloco in pd.read_csv(caminho, chunksize=linhas_por_bloco, dtype={'Codigo_Estacao': str}):
+                yield normalizar_eventos(bloco, indice_estacoes, raio_max_km, colunas)
+
+    return IndiceEventos.de_blocos(blocos(), colunas, codigos)
+
+
+# ============================================================================
+# JUNÇÃO COM A TABELA CLIMÁTICA
+# ============================================================================
+
+def mesclar_eventos(df_clima, indice, codigo=None, passo='D', contagens=False):
+    """Tabela climática + colunas de desastre (flag 0/1 ou contagem de eventos ativos).
+
+    `df_clima` é a tabela diária de uma estação (índice de datas, informe
+    `codigo`) ou a tabela em lote indexada por (Codigo_Estacao, Data).
+    Substitui o pd.merge(how='left') + fillna(0): cada linha é consultada
+    direto no índice de intervalos.
+    """
+    if codigo is None:
+        codigos = df_clima.index.get_level_values('Codigo_Estacao').astype(str)
+        instantes = df_clima.index.get_level_values('Data')
+    else:
+        codigos, instantes = codigo, df_clima.index
+    valores = indice.contar(codigos, instantes.to_numpy(), passo)
+    if not contagens:
+        valores = (valores > 0).astype(int)
+    df_merged = df_clima.copy()
+    for k, coluna in enumerate(indice.colunas):
+        df_merged[coluna] = valores[:, k]
+    return df_merged
+
+
+def mesclar_eventos_arquivo(df_inmet_daily, arquivo_eventos, arquivo_csv, raio_max_km=RAIO_MAXIMO_KM):
+    """Nó do pipeline: desastres reais da estação de `arquivo_csv` (catálogo = cabeçalho do arquivo)."""
+    catalogo = catalogo_estacoes([arquivo_csv])
+    indice = ler_eventos(arquivo_eventos, catalogo, raio_max_km, codigos=list(catalogo.index))
+    return mesclar_eventos(df_inmet_daily, indice, catalogo.index[0])
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def eventos_intervalo_sinteticos(n_eventos, n_estacoes=600, anos=(2000, 2023), semente=0):
+    """Eventos com Codigo_Estacao, Tipo, Inicio e Fim (duração exponencial, média de 18 h)."""
+    rng = np.random.default_rng(semente)
+    inicio = (np.datetime64(f'{anos[0]}-01-01T00:00', 'm')
+              + rng.integers(0, (anos[1] - anos[0] + 1) * 365 * 1440, n_eventos).astype('timedelta64[m]'))
+    return pd.DataFrame({
+        'Codigo_Estacao': np.char.add('A', np.char.zfill(rng.integers(0, n_estacoes, n_eventos).astype(str), 3)),
+        COLUNA_TIPO: np.asarray(COLUNAS_DESASTRES)[rng.integers(0, len(COLUNAS_DESASTRES), n_eventos)],
+        COLUNA_INICIO: inicio,
+        COLUNA_FIM: inicio + rng.exponential(18 * 60, n_eventos).astype('timedelta64[m]'),
+    })
+
+
+def _por_loc(eventos, codigo, dias):
+    """Referência: um DataFrame de dias por estação e .loc evento a evento (como o dataset dummy)."""
+    df = pd.DataFrame(0, index=dias, columns=COLUNAS_DESASTRES)
+    for linha in eventos[eventos['Codigo_Estacao'] == codigo].itertuples(index=False):
+        df.loc[pd.Timestamp(linha.Inicio).normalize():pd.Timestamp(linha.Fim), linha.Tipo] += 1
+    return df
+
+
+def _pico_rss_mb():
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return float('nan')
+
+
+def benchmark(n_eventos, n_estacoes=600, linhas_por_bloco=LINHAS_POR_BLOCO):
+    eventos = eventos_intervalo_sinteticos(n_eventos, n_estacoes)
+    print(f"   {n_eventos:,} eventos, {n_estacoes} estações, 2000-2023")
+
+    inicio = time.perf_counter()
+    indice = IndiceEventos.de_eventos(eventos)
+    t_indice = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    linhas = sum(len(tabela) for tabela in indice.grade('2000-01-01', '2023-12-31', 'D'))
+    t_diario = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    horas = sum(len(tabela) for tabela in indice.grade('2023-01-01', '2023-12-31 23:00', 'h'))
+    t_horario = time.perf_counter() - inicio
+
+    # Referência por .loc em algumas estações, extrapolada para a rede
+    dias = pd.date_range('2000-01-01', '2023-12-31', freq='D')
+    amostra = indice.codigos[:3]
+    inicio = time.perf_counter()
+    referencia = {codigo: _por_loc(eventos, codigo, dias) for codigo in amostra}
+    t_loc = (time.perf_counter() - inicio) * len(indice.codigos) / len(amostra)
+    diferenca = max(np.abs(next(indice.grade(dias[0], dias[-1], 'D', [codigo])).to_numpy()
+                           - referencia[codigo].to_numpy()).max() for codigo in amostra)
+
+    print(f"   - índice (ordenação):         {t_indice:7.2f}s ({indice.nbytes / 1e6:,.0f} MB de chaves)")
+    print(f"   - grade diária, rede inteira: {t_diario:7.2f}s ({linhas:,} linhas)")
+    print(f"   - grade horária de 2023:      {t_horario:7.2f}s ({horas:,} linhas)")
+    print(f"   - DataFrame + .loc por evento: {t_loc:6.1f}s (estimado de {len(amostra)} estações) "
+          f"-> {t_loc / t_diario:,.0f}x")
+    print(f"   - diferença máx. vs .loc: {diferenca}")
+
+    # Leitura em blocos de um CSV: a memória depende do bloco, não do arquivo
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'eventos.csv')
+        eventos.to_csv(caminho, index=False)
+        del eventos, indice
+        rss_antes = _pico_rss_mb()
+        inicio = time.perf_counter()
+        indice = ler_eventos(caminho, linhas_por_bloco=linhas_por_bloco)
+        t_csv = time.perf_counter() - inicio
+        print(f"   - CSV em blocos de {linhas_por_bloco:,}: {t_csv:7.2f}s "
+              f"({os.path.getsize(caminho) / 1e6:,.0f} MB, {len(indice):,} eventos, "
+              f"pico de RSS {max(rss_antes, _pico_rss_mb()):,.0f} MB)")
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestão de eventos de desastre e junção por intervalos")
+    parser.add_argument('--eventos', nargs='*', default=[], help="CSVs de eventos (aceita padrões glob)")
+    parser.add_argument('--catalogo', help="Catálogo de estações (indice_estacoes) para eventos com coordenadas")
+    parser.add_argument('--raio-max', type=float, default=RAIO_MAXIMO_KM)
+    parser.add_argument('--lote', help="Tabela diária (Codigo_Estacao, Data) a receber as colunas de desastre")
+    parser.add_argument('--freq', default='D', help="Passo da grade densa (D, h...)")
+    parser.add_argument('--inicio', help="Início da grade densa (padrão: primeiro evento)")
+    parser.add_argument('--fim', help="Fim da grade densa (padrão: último evento)")
+    parser.add_argument('--contagens', action='store_true', help="Contagem de eventos em vez de flag 0/1 (--lote)")
+    parser.add_argument('--linhas-por-bloco', type=int, default=LINHAS_POR_BLOCO)
+    parser.add_argument('--saida', default=ARQUIVO_CONTAGENS)
+    parser.add_argument('--benchmark', type=int, metavar='EVENTOS', help="Benchmark com N eventos sintéticos")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("INGESTÃO DE EVENTOS DE DESASTRE (ÍNDICE DE INTERVALOS)")
+    print("=" * 70)
+
+    if args.benchmark:
+        benchmark(args.benchmark, linhas_por_bloco=args.linhas_por_bloco)
+        return 0
+
+    arquivos = sorted({c for padrao in args.eventos for c in (glob.glob(padrao) or [padrao])})
+    faltando = [a for a in arquivos if not os.path.exists(a)]
+    if not arquivos or faltando:
+        print(f"❌ ERRO: Arquivo(s) de eventos não encontrado(s): {', '.join(faltando) or '(nenhum informado)'}")
+        return 1
+    catalogo = ler_catalogo(args.catalogo) if args.catalogo else None
+
+    inicio = time.perf_counter()
+    indice = ler_eventos(arquivos, catalogo, args.raio_max, args.linhas_por_bloco)
+    print(f"✓ {len(indice):,} evento(s) em {len(indice.codigos)} estação(ões) | "
+          f"{indice.nbytes / 1e6:,.1f} MB | {time.perf_counter() - inicio:.2f}s")
+    if not len(indice):
+        return 1
+
+    inicio = time.perf_counter()
+    if args.lote:
+        df_lote = pd.read_csv(args.lote, index_col=['Codigo_Estacao', 'Data'], parse_dates=['Data'],
+                              dtype={'Codigo_Estacao': str})
+        mesclar_eventos(df_lote, indice, contagens=args.contagens).to_csv(args.saida)
+        linhas = len(df_lote)
+    else:
+        minuto = np.timedelta64(1, 'm')
+        primeiro = ORIGEM + (indice.inicios & ((1 << DESLOCAMENTO) - 1)).min() * minuto
+        ultimo = ORIGEM + (indice.fins & ((1 << DESLOCAMENTO) - 1)).max() * minuto
+        periodo_inicio = pd.Timestamp(args.inicio or primeiro).floor(args.freq)
+        periodo_fim = pd.Timestamp(args.fim or ultimo)
+        linhas = 0
+        for i, tabela in enumerate(indice.grade(periodo_inicio, periodo_fim, args.freq,
+                                                linhas_por_bloco=args.linhas_por_bloco)):
+            tabela.to_csv(args.saida, mode='w' if i == 0 else 'a', header=i == 0)
+            linhas += len(tabela)
+    print(f"✓ {linhas:,} linha(s) em {time.perf_counter() - inicio:.2f}s")
+    print(f"✓ Salvo: {args.saida}")
+    print("=" * 70)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
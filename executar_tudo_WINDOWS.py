@@ -1,6 +1,87 @@
+import time
+
+INICIO_PROCESSO = time.perf_counter()
+
+import argparse
+import glob
+import os
 import subprocess
 import sys
-import os
+
+import etapas_pipeline
+from executor_dag import executar_dag, CACHE, ERRO, CANCELADO
+
+TEMPO_IMPORTS = time.perf_counter() - INICIO_PROCESSO
+
+# Scripts da cadeia antiga (usados só por --comparar)
+SCRIPTS_LEGADOS = [
+    "preprocess_inmet_aracaju_WINDOWS*.py",
+    "create_dummy_disaster_data_WINDOWS*.py",
+    "correlation_analysis_and_plotting_WINDOWS*.py"
+]
+
+
+def executar_cadeia_legada():
+    """Roda os três scripts em interpretadores separados e devolve o tempo total."""
+    inicio = time.perf_counter()
+    for padrao in SCRIPTS_LEGADOS:
+        scripts = sorted(glob.glob(padrao))
+        if not scripts:
+            print(f"  ✗ {padrao} - NÃO ENCONTRADO!")
+            return None
+        subprocess.run([sys.executable, scripts[0]], check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - inicio
+
+
+def _imprimir_no(nome, info):
+    simbolo = {CACHE: '↺', ERRO: '✗', CANCELADO: '-'}.get(info['status'], '✓')
+    print(f"  {simbolo} {nome:<22} {info['status']:<10} {info['segundos']:7.3f}s")
+    if 'erro' in info:
+        print(f"      {info['erro']}")
+
+
+parser = argparse.ArgumentParser(description="Executa o pipeline completo em processo")
+parser.add_argument('--arquivo', default=etapas_pipeline.ARQUIVO_INMET, help="CSV do INMET")
+parser.add_argument('--workers', type=int, default=None, help="Threads para nós independentes")
+parser.add_argument('--sem-cache', action='store_true', help="Reexecuta todos os nós")
+parser.add_argument('--comparar', action='store_true', help="Mede também a cadeia antiga de subprocess")
+parser.add_argument('--features-chuva', action='store_true',
+                    help="Inclui chuva acumulada (3h..30d) e índices API na matriz de correlação")
+parser.add_argument('--eventos', help="CSV de eventos reais de desastre (eventos_desastre) no lugar do dummy")
+parser.add_argument('--qc', action='store_true',
+                    help="Controle de qualidade horário e cobertura diária antes da agregação (controle_qualidade)")
+modo_graficos = parser.add_mutually_exclusive_group()
+modo_graficos.add_argument('--no-plots', action='store_true',
+                           help="Só dados e correlação (matplotlib nem é importado)")
+modo_graficos.add_argument('--plots-only', action='store_true',
+                           help="Só os gráficos, a partir dos CSVs já gerados")
+args = parser.parse_args()
+
+
+def renderizar_somente_graficos():
+    """Redesenha as figuras a partir do CSV mesclado e da matriz de correlação salvos."""
+    import pandas as pd
+    from renderizacao_graficos import tarefas_estacao, renderizar_em_lote
+
+    for arquivo in (etapas_pipeline.ARQUIVO_MESCLADO, etapas_pipeline.ARQUIVO_CORRELACAO):
+        if not os.path.exists(arquivo):
+            print(f"  ✗ {arquivo} - NÃO ENCONTRADO! Rode o pipeline sem --plots-only primeiro.")
+            sys.exit(1)
+    df_merged = pd.read_csv(etapas_pipeline.ARQUIVO_MESCLADO, index_col=0, parse_dates=True)
+    correlation_matrix = pd.read_csv(etapas_pipeline.ARQUIVO_CORRELACAO, index_col=0)
+    inicio = time.perf_counter()
+    for caminho, segundos in renderizar_em_lote(tarefas_estacao(df_merged, correlation_matrix, 'Aracaju 2023'),
+                                                workers=args.workers):
+        print(f"  ✓ {caminho:<45} {segundos:7.3f}s")
+    print(f"\n⏱️  Gráficos: {time.perf_counter() - inicio:.3f}s")
+    sys.exit(0)
+
+
+if args.plots_only:
+    print("=" * 70)
+    print("GERANDO SOMENTE OS GRÁFICOS")
+    print("=" * 70)
+    renderizar_somente_graficos()
 
 print("=" * 70)
 print("ANÁLISE DE CORRELAÇÃO: DADOS CLIMÁTICOS E DESASTRES NATURAIS")
@@ -8,7 +89,7 @@ print("Aracaju, Sergipe (2023)")
 print("=" * 70)
 
 # Verificar se o arquivo CSV do INMET existe
-arquivo_csv = "INMET_NE_SE_A409_ARACAJU_01-01-2023_A_31-12-2023.CSV"
+arquivo_csv = args.arquivo
 
 print("\n[VERIFICAÇÃO] Verificando arquivos necessários...")
 if os.path.exists(arquivo_csv):
@@ -26,66 +107,59 @@ else:
     print(f"      INMET_NE_SE_A409_ARACAJU_01-01-2023_A_31-12-2023.CSV")
     print(f"   6. Copie esse arquivo para esta pasta")
     print(f"   7. Execute este script novamente")
+    print(f"\n   Sem extrair o ZIP (várias estações/anos de uma vez):")
+    print(f"      python processar_lote_inmet.py --zip 2023.zip --estacao A409")
     sys.exit(1)
 
-# Verificar scripts Python
-scripts = [
-    "preprocess_inmet_aracaju_WINDOWS.py",
-    "create_dummy_disaster_data_WINDOWS.py",
-    "correlation_analysis_and_plotting_WINDOWS.py"
-]
-
-for script in scripts:
-    if os.path.exists(script):
-        print(f"  ✓ {script}")
-    else:
-        print(f"  ✗ {script} - NÃO ENCONTRADO!")
-
 print("\n" + "=" * 70)
 print("INICIANDO PROCESSAMENTO")
 print("=" * 70)
 
-# Passo 1: Pré-processamento
-print("\n[PASSO 1/3] Pré-processando dados climáticos do INMET...")
+# Pré-processamento -> desastres -> correlação -> gráficos, tudo em memória
+print("\n[PIPELINE] Executando grafo de etapas...")
 print("-" * 70)
-try:
-    subprocess.run([sys.executable, "preprocess_inmet_aracaju_WINDOWS.py"], check=True)
-    print("✓ Pré-processamento concluído com sucesso!")
-except subprocess.CalledProcessError as e:
-    print(f"✗ Erro ao pré-processar dados: {e}")
-    sys.exit(1)
+nos = etapas_pipeline.montar_dag(arquivo_csv, gerar_graficos=not args.no_plots, features_chuva=args.features_chuva,
+                                  arquivo_eventos=args.eventos, qc=args.qc)
+resultados, relatorio = executar_dag(nos, max_workers=args.workers, usar_cache=not args.sem_cache,
+                                     ao_concluir=_imprimir_no)
 
-# Passo 2: Criar dados de desastres
-print("\n[PASSO 2/3] Criando dataset dummy de desastres naturais...")
-print("-" * 70)
-try:
-    subprocess.run([sys.executable, "create_dummy_disaster_data_WINDOWS.py"], check=True)
-    print("✓ Dataset de desastres criado com sucesso!")
-except subprocess.CalledProcessError as e:
-    print(f"✗ Erro ao criar dados de desastres: {e}")
+if relatorio['falhas']:
+    print(f"\n✗ Erro em {len(relatorio['falhas'])} etapa(s):")
+    for nome, erro in relatorio['falhas'].items():
+        print(f"   - {nome}: {erro}")
     sys.exit(1)
 
-# Passo 3: Análise de correlação
-print("\n[PASSO 3/3] Analisando correlação e gerando gráficos...")
-print("-" * 70)
-try:
-    subprocess.run([sys.executable, "correlation_analysis_and_plotting_WINDOWS.py"], check=True)
-    print("✓ Análise de correlação concluída com sucesso!")
-except subprocess.CalledProcessError as e:
-    print(f"✗ Erro ao analisar correlação: {e}")
-    sys.exit(1)
+tempo_total = time.perf_counter() - INICIO_PROCESSO
+soma_nos = sum(info['segundos'] for info in relatorio['nos'].values())
+n_cache = sum(1 for info in relatorio['nos'].values() if info['status'] == CACHE)
+
+print("\n⏱️  Tempos:")
+print(f"   - Inicialização (imports): {TEMPO_IMPORTS:.3f}s")
+print(f"   - Execução do grafo:       {relatorio['total']:.3f}s "
+      f"(soma dos nós {soma_nos:.3f}s, {n_cache}/{len(nos)} do cache)")
+print(f"   - Total:                   {tempo_total:.3f}s")
+
+if args.comparar:
+    print("\n[COMPARAÇÃO] Executando a cadeia antiga (3 interpretadores via subprocess)...")
+    tempo_legado = executar_cadeia_legada()
+    if tempo_legado is not None:
+        print(f"   - Cadeia antiga: {tempo_legado:.3f}s | grafo em processo: {tempo_total:.3f}s "
+              f"({tempo_legado / tempo_total:.1f}x mais rápido)")
 
 print("\n" + "=" * 70)
 print("PROCESSAMENTO COMPLETO!")
 print("=" * 70)
-print("\n✓ Todos os scripts foram executados com sucesso!")
+print("\n✓ Todas as etapas foram executadas com sucesso!")
 print("\nArquivos gerados:")
-print("  1. INMET_ARACAJU_2023_CLEAN.CSV - Dados climáticos pré-processados")
-print("  2. merged_climatic_disaster_data_aracaju_2023.csv - Dados mesclados")
-print("  3. correlation_matrix.csv - Matriz de correlação")
-print("  4. correlation_heatmap.png - Mapa de calor da correlação")
-print("  5. precipitation_inundation_timeseries.png - Série temporal de precipitação")
-print("  6. temperature_landslide_timeseries.png - Série temporal de temperatura")
-print("\n💡 Os gráficos estão prontos para visualização!")
-print("   Clique nos arquivos .png no VS Code para visualizar!")
+print("  1. merged_climatic_disaster_data_aracaju_2023.csv - Dados mesclados")
+print("  2. correlation_matrix.csv - Matriz de correlação")
+if args.no_plots:
+    print("\n💡 Gráficos não gerados (--no-plots); use --plots-only para gerá-los depois.")
+    print(f"   matplotlib importado: {'sim' if 'matplotlib' in sys.modules else 'não'}")
+else:
+    print("  3. correlation_heatmap.png - Mapa de calor da correlação")
+    print("  4. precipitation_inundation_timeseries.png - Série temporal de precipitação")
+    print("  5. temperature_landslide_timeseries.png - Série temporal de temperatura")
+    print("\n💡 Os gráficos estão prontos para visualização!")
+    print("   Clique nos arquivos .png no VS Code para visualizar!")
 print("=" * 70)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Executor de grafo de dependências (DAG) em processo, para substituir a cadeia
+de subprocess de executar_tudo_WINDOWS.py.
+
+Cada nó é uma função chamada com os resultados das dependências (em memória)
+seguidos dos seus parâmetros. Nós independentes (ex.: os três gráficos, ou
+estações diferentes) rodam ao mesmo tempo em um pool de threads.
+
+Nós cujas entradas não mudaram são pulados:
+  - nós que devolvem DataFrame ficam em cache_etapas (chave = hash do nó,
+    do código da função e dos módulos que ela usa, dos parâmetros, das
+    chaves das dependências e do conteúdo de `entradas`);
+  - nós que só gravam arquivos (`saidas`) deixam um carimbo com a chave e o
+    tamanho/mtime das saídas, e são pulados se os arquivos continuarem iguais.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import pandas as pd
+
+from cache_etapas import chave_cache, ler_cache, salvar_cache, assinatura_codigo, DIRETORIO_CACHE
+
+EXECUTADO = 'executado'
+CACHE = 'cache'
+ERRO = 'erro'
+CANCELADO = 'cancelado'
+
+
+@dataclass
+class No:
+    nome: str
+    funcao: Callable
+    dependencias: tuple = ()
+    parametros: dict = field(default_factory=dict)
+    entradas: tuple = ()   # arquivos cujo conteúdo entra na chave
+    saidas: tuple = ()     # arquivos gravados pelo nó
+    versao: Any = None     # qualquer outro valor que deva invalidar o cache
+    cache: bool = True
+
+
+def ordenar_topologicamente(nos):
+    """Devolve os nós em ordem topológica; erro se houver ciclo ou dependência inexistente."""
+    por_nome = {no.nome: no for no in nos}
+    for no in nos:
+        for dep in no.dependencias:
+            if dep not in por_nome:
+                raise ValueError(f"Nó '{no.nome}' depende de '{dep}', que não existe")
+    ordem, estado = [], {}
+
+    def visitar(nome, caminho):
+        if estado.get(nome) == 'feito':
+            return
+        if estado.get(nome) == 'visitando':
+            raise ValueError(f"Ciclo no grafo: {' -> '.join(caminho + [nome])}")
+        estado[nome] = 'visitando'
+        for dep in por_nome[nome].dependencias:
+            visitar(dep, caminho + [nome])
+        estado[nome] = 'feito'
+        ordem.append(por_nome[nome])
+
+    for no in nos:
+        visitar(no.nome, [])
+    return ordem
+
+
+def _chave_no(no, chaves):
+    # assinatura_codigo cobre o fonte dos módulos que o nó chama: wrappers
+    # finos (gráficos, mesclagem com eventos reais) mudam de chave junto
+    parametros = {'parametros': no.parametros, 'versao': no.versao, 'funcao': assinatura_codigo(no.funcao)}
+    return chave_cache(no.nome, [chaves[d] for d in no.dependencias] + list(no.entradas), parametros)
+
+
+def _carimbo(chave, diretorio):
+    return os.path.join(diretorio, chave + '.feito')
+
+
+def _estado_saidas(saidas):
+    estado = {}
+    for saida in saidas:
+        if os.path.exists(saida):
+            info = os.stat(saida)
+            estado[saida] = [info.st_size, info.st_mtime_ns]
+    return estado
+
+
+def _esta_atualizado(no, chave, diretorio):
+    if no.saidas:
+        # As saídas precisam existir e estar como o nó as deixou
+        try:
+            with open(_carimbo(chave, diretorio)) as f:
+                gravado = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return len(gravado) == len(no.saidas) and gravado == _estado_saidas(no.saidas)
+    return os.path.exists(os.path.join(diretorio, chave + '.npz'))
+
+
+def executar_dag(nos, max_workers=None, usar_cache=True, diretorio_cache=None, ao_concluir=None):
+    """Executa o grafo e devolve (resultados, relatorio).
+
+    `resultados` mapeia nome -> valor devolvido (DataFrames de nós pulados são
+    lidos do cache). `relatorio` tem, por nó: status, segundos, inicio e fim
+    (relativos ao início da execução), e o tempo total em relatorio['total'].
+    Um erro em um nó cancela só os nós que dependem dele.
+    """
+    diretorio = diretorio_cache or DIRETORIO_CACHE
+    max_workers = max_workers or os.cpu_count() or 1
+    ordem = ordenar_topologicamente(nos)
+    inicio = time.perf_counter()
+
+    chaves = {}
+    for no in ordem:
+        chaves[no.nome] = _chave_no(no, chaves)
+
+    resultados, relatorio = {}, {'nos': {}}
+
+    def registrar(no, status, t0, t1, erro=None):
+        info = {'status': status, 'segundos': t1 - t0, 'inicio': t0 - inicio, 'fim': t1 - inicio}
+        if erro is not None:
+            info['erro'] = f"{type(erro).__name__}: {erro}"
+        relatorio['nos'][no.nome] = info
+        if ao_concluir:
+            ao_concluir(no.nome, info)
+
+    # Nós atualizados (e seus DataFrames) são resolvidos antes de agendar o resto
+    pendentes = []
+    for no in ordem:
+        if usar_cache and no.cache and _esta_atualizado(no, chaves[no.nome], diretorio):
+            t0 = time.perf_counter()
+            resultados[no.nome] = None if no.saidas else ler_cache(chaves[no.nome], diretorio)
+            registrar(no, CACHE, t0, time.perf_counter())
+        else:
+            pendentes.append(no)
+
+    def executar_no(no):
+        argumentos = [resultados[d] for d in no.dependencias]
+        t0 = time.perf_counter()
+        valor = no.funcao(*argumentos, **no.parametros)
+        if usar_cache and no.cache:
+            if no.saidas:
+                os.makedirs(diretorio, exist_ok=True)
+                with open(_carimbo(chaves[no.nome], diretorio), 'w') as f:
+                    json.dump(_estado_saidas(no.saidas), f)
+            elif isinstance(valor, pd.DataFrame):
+                salvar_cache(chaves[no.nome], valor, diretorio)
+        return valor, t0, time.perf_counter()
+
+    falhas = {}
+    em_execucao = {}
+    restantes = list(pendentes)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while restantes or em_execucao:
+            for no in list(restantes):
+                if any(d in falhas for d in no.dependencias):
+                    restantes.remove(no)
+                    falhas[no.nome] = CANCELADO
+                    agora = time.perf_counter()
+                    registrar(no, CANCELADO, agora, agora)
+                elif all(d in resultados for d in no.dependencias):
+                    restantes.remove(no)
+                    em_execucao[executor.submit(executar_no, no)] = no
+            if not em_execucao:
+                continue
+            feitos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in feitos:
+                no = em_execucao.pop(futuro)
+                try:
+                    valor, t0, t1 = futuro.result()
+                    resultados[no.nome] = valor
+                    registrar(no, EXECUTADO, t0, t1)
+                except Exception as e:
+                    falhas[no.nome] = e
+                    agora = time.perf_counter()
+                    registrar(no, ERRO, agora, agora, erro=e)
+
+    relatorio['total'] = time.perf_counter() - inicio
+    relatorio['falhas'] = {nome: str(e) for nome, e in falhas.items()}
+    return resultados, relatorio
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Features de chuva acumulada para a correlação com desastres.
+
+Inundações e deslizamentos respondem à chuva acumulada de vários dias, não
+ao total de um dia. A partir dos dados HORÁRIOS (antes da agregação diária):
+
+  - somas móveis de 3h, 24h, 72h, 7d e 30d, calculadas por diferença de
+    somas acumuladas (cumsum), com custo O(n) independente da janela;
+  - uma janela só vale se tiver ao menos COBERTURA_MINIMA das horas com dado;
+  - cada janela vira um valor diário: máximo no dia (intensidade, 3h e 24h)
+    ou valor no fim do dia (acumulado, 72h em diante);
+  - índices de precipitação antecedente API_t = k * API_{t-1} + P_t sobre a
+    chuva diária, resolvidos em blocos vetorizados (sem laço por dia).
+
+Para várias estações, os arquivos de cada estação são concatenados (as
+janelas atravessam a virada do ano) e processados em um pool de processos;
+a correlação feature x desastre sai para todas as estações de uma vez.
+
+Uso:
+    python features_chuva_acumulada.py --pasta dados_inmet --saida correlacao_features.csv
+    python features_chuva_acumulada.py --benchmark 10 30 50
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from inmet_comum import COLUNAS_MAPEAMENTO, extrair_info_nome_arquivo
+
+COLUNA_PRECIPITACAO = 'Precipitacao_mm'
+
+# Janela -> (horas, como vira valor diário)
+JANELAS = {
+    '3h': (3, 'max'),
+    '24h': (24, 'max'),
+    '72h': (72, 'fim'),
+    '7d': (7 * 24, 'fim'),
+    '30d': (30 * 24, 'fim'),
+}
+COEFICIENTES_API = (0.85, 0.90, 0.95)
+COBERTURA_MINIMA = 0.8
+TAMANHO_BLOCO_API = 256
+
+
+def nome_feature_janela(janela):
+    return f"Chuva_{janela}_{'max_' if JANELAS[janela][1] == 'max' else ''}mm"
+
+
+def nome_feature_api(k):
+    return f"API_{int(round(k * 100)):03d}_mm"
+
+
+COLUNAS_FEATURES = [nome_feature_janela(j) for j in JANELAS] + [nome_feature_api(k) for k in COEFICIENTES_API]
+
+
+# ============================================================================
+# NÚCLEOS VETORIZADOS
+# ============================================================================
+
+def grade_horaria(serie):
+    """Reindexa a série horária para uma grade completa 00:00 do 1º dia .. 23:00 do último."""
+    serie = serie[~serie.index.duplicated(keep='first')].sort_index()
+    inicio = serie.index.min().floor('D')
+    fim = serie.index.max().floor('D') + pd.Timedelta(hours=23)
+    indice = pd.date_range(inicio, fim, freq='h', name=serie.index.name)
+    return serie.reindex(indice).to_numpy(dtype=np.float64), indice
+
+
+def somas_moveis(valores, horas_janelas, cobertura_minima=COBERTURA_MINIMA):
+    """Somas móveis (janela terminando em t) para várias janelas a partir de um único cumsum.
+
+    Horas sem dado contam como 0 na soma; janelas incompletas no início da
+    série ou com cobertura abaixo do mínimo ficam NaN.
+    """
+    validos = ~np.isnan(valores)
+    soma_acumulada = np.concatenate(([0.0], np.cumsum(np.where(validos, valores, 0.0))))
+    contagem_acumulada = np.concatenate(([0], np.cumsum(validos)))
+    n = len(valores)
+    resultado = {}
+    for w in horas_janelas:
+        soma = np.full(n, np.nan)
+        if n >= w:
+            soma[w - 1:] = soma_acumulada[w:] - soma_acumulada[:-w]
+            cobertura = (contagem_acumulada[w:] - contagem_acumulada[:-w]) / w
+            soma[w - 1:][cobertura < cobertura_minima] = np.nan
+        # Remove o resíduo de arredondamento da diferença de somas grandes
+        resultado[w] = np.round(soma, 6)
+    return resultado
+
+
+def indice_precipitacao_antecedente(chuva_diaria, k, tamanho_bloco=TAMANHO_BLOCO_API):
+    """API_t = k * API_{t-1} + P_t (NaN = sem chuva), sem laço por dia.
+
+    Dentro de cada bloco, API local = k^t * cumsum(P_j * k^-j); entre blocos
+    só o valor final é propagado (um passo por bloco).
+    """
+    p = np.nan_to_num(np.asarray(chuva_diaria, dtype=np.float64))
+    n = len(p)
+    if n == 0:
+        return p
+    n_blocos = -(-n // tamanho_bloco)
+    blocos = np.zeros(n_blocos * tamanho_bloco)
+    blocos[:n] = p
+    blocos = blocos.reshape(n_blocos, tamanho_bloco)
+
+    expoentes = np.arange(tamanho_bloco)
+    local = np.cumsum(blocos * k ** -expoentes, axis=1) * k ** expoentes
+    # Valor que entra em cada bloco vindo dos anteriores
+    entrada = np.zeros(n_blocos)
+    fator_bloco = k ** tamanho_bloco
+    for b in range(1, n_blocos):
+        entrada[b] = entrada[b - 1] * fator_bloco + local[b - 1, -1]
+    api = local + entrada[:, None] * k ** (expoentes + 1)
+    return api.ravel()[:n]
+
+
+# ============================================================================
+# FEATURES POR ESTAÇÃO
+# ============================================================================
+
+def features_horarias(df_horario, janelas=JANELAS, coluna=COLUNA_PRECIPITACAO, cobertura_minima=COBERTURA_MINIMA):
+    """Somas móveis horárias (uma coluna por janela) na grade horária completa."""
+    valores, indice = grade_horaria(df_horario[coluna])
+    somas = somas_moveis(valores, [horas for horas, _ in janelas.values()], cobertura_minima)
+    return pd.DataFrame({f'Chuva_{nome}_mm': somas[horas] for nome, (horas, _) in janelas.items()}, index=indice)
+
+
+def features_diarias(df_horario, janelas=JANELAS, coeficientes_api=COEFICIENTES_API,
+                     coluna=COLUNA_PRECIPITACAO, cobertura_minima=COBERTURA_MINIMA):
+    """Features diárias de chuva acumulada a partir dos dados horários de uma estação."""
+    valores, indice = grade_horaria(df_horario[coluna])
+    n_dias = len(valores) // 24
+    dias = indice[::24]
+    somas = somas_moveis(valores, [horas for horas, _ in janelas.values()], cobertura_minima)
+
+    features = {}
+    for nome, (horas, agregacao) in janelas.items():
+        por_dia = somas[horas].reshape(n_dias, 24)
+        # fmax.reduce ignora NaN (e dá NaN só se o dia inteiro for NaN)
+        features[nome_feature_janela(nome)] = np.fmax.reduce(por_dia, axis=1) if agregacao == 'max' else por_dia[:, -1]
+
+    # Chuva diária como no resample('D').sum() (horas sem dado = 0)
+    chuva_diaria = np.nansum(valores.reshape(n_dias, 24), axis=1)
+    for k in coeficientes_api:
+        features[nome_feature_api(k)] = indice_precipitacao_antecedente(chuva_diaria, k)
+    return pd.DataFrame(features, index=pd.DatetimeIndex(dias, name='Data_Hora'))
+
+
+def ler_precipitacao_horaria(arquivos):
+    """Precipitação horária de uma estação a partir de um ou mais CSVs do INMET."""
+    from parser_inmet import ler_inmet_rapido
+    mapeamento = {orig: novo for orig, novo in COLUNAS_MAPEAMENTO.items() if novo == COLUNA_PRECIPITACAO}
+    frames = [ler_inmet_rapido(arquivo, mapeamento, dtype=np.float64)[1] for arquivo in arquivos]
+    return pd.concat(frames).sort_index()
+
+
+def features_do_arquivo(arquivo_csv):
+    """Features diárias de um único CSV (nó do pipeline em etapas_pipeline)."""
+    return features_diarias(ler_precipitacao_horaria([arquivo_csv]))
+
+
+def juntar_features(df_merged, df_features):
+    """Acrescenta as features ao dataset mesclado (mesmo índice diário)."""
+    return df_merged.join(df_features.reindex(df_merged.index))
+
+
+# ============================================================================
+# VÁRIAS ESTAÇÕES
+# ============================================================================
+
+def agrupar_por_estacao(arquivos):
+    """{codigo WMO: [arquivos]} a partir dos nomes dos CSVs."""
+    grupos = defaultdict(list)
+    for arquivo in arquivos:
+        info = extrair_info_nome_arquivo(arquivo)
+        if info is not None:
+            grupos[info['codigo']].append(arquivo)
+    return dict(sorted(grupos.items()))
+
+
+def _processar_estacao(item):
+    from etapas_pipeline import criar_desastres_dummy, COLUNAS_DESASTRES, PARAMETROS_DESASTRES
+    codigo, arquivos = item
+    inicio = time.perf_counter()
+    df_horario = ler_precipitacao_horaria(arquivos)
+    df_features = features_diarias(df_horario)
+    # Desastres simulados como no pipeline de uma estação (PASSO 2)
+    chuva_diaria = df_horario[[COLUNA_PRECIPITACAO]].resample('D').sum()
+    df_desastres = criar_desastres_dummy(chuva_diaria, **PARAMETROS_DESASTRES)[COLUNAS_DESASTRES]
+    df = df_features.join(df_desastres)
+    df.index.name = 'Data'
+    df.insert(0, 'Codigo_Estacao', codigo)
+    return df, len(df_horario), time.perf_counter() - inicio
+
+
+def features_estacoes(arquivos, workers=None, ao_concluir=None):
+    """Features diárias + desastres de todas as estações, indexadas por (Codigo_Estacao, Data)."""
+    grupos = list(agrupar_por_estacao(arquivos).items())
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        resultados = map(_processar_estacao, grupos)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        resultados = executor.map(_processar_estacao, grupos)
+    frames = []
+    try:
+        for (codigo, _), (df, linhas, segundos) in zip(grupos, resultados):
+            frames.append(df)
+            if ao_concluir:
+                ao_concluir(codigo, linhas, segundos)
+    finally:
+        if workers != 1:
+            executor.shutdown()
+    return pd.concat(frames).reset_index().set_index(['Codigo_Estacao', 'Data']).sort_index()
+
+
+def correlacao_estacoes(df_estacoes, colunas_x=COLUNAS_FEATURES, colunas_y=None):
+    """Correlação de Pearson (pares completos) de cada feature com cada desastre, por estação.
+
+    Vetorizada em todas as estações ao mesmo tempo: as séries são empilhadas em
+    uma matriz estações x dias. Devolve (por_estacao, rede), onde por_estacao é
+    indexado por (Codigo_Estacao, feature) e rede usa todos os dias de todas as
+    estações juntos.
+    """
+    from etapas_pipeline import COLUNAS_DESASTRES
+    colunas_y = colunas_y or COLUNAS_DESASTRES
+    estacoes = df_estacoes.index.get_level_values('Codigo_Estacao').unique()
+
+    def matriz(coluna):
+        return df_estacoes[coluna].unstack('Data').reindex(estacoes).to_numpy(dtype=np.float64)
+
+    def pearson(x, y, eixo):
+        m = ~np.isnan(x) & ~np.isnan(y)
+        n = m.sum(axis=eixo)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mx = np.where(m, x, 0).sum(axis=eixo) / n
+            my = np.where(m, y, 0).sum(axis=eixo) / n
+            dx = np.where(m, x - np.expand_dims(mx, eixo), 0)
+            dy = np.where(m, y - np.expand_dims(my, eixo), 0)
+            r = (dx * dy).sum(axis=eixo) / np.sqrt((dx * dx).sum(axis=eixo) * (dy * dy).sum(axis=eixo))
+        return np.where(n >= 2, np.clip(r, -1, 1), np.nan)
+
+    x_por_coluna = {c: matriz(c) for c in colunas_x}
+    y_por_coluna = {c: matriz(c) for c in colunas_y}
+    por_estacao = {}
+    rede = {}
+    for cy, y in y_por_coluna.items():
+        por_estacao[cy] = np.concatenate([pearson(x_por_coluna[cx], y, 1) for cx in colunas_x])
+        rede[cy] = [float(pearson(x_por_coluna[cx].ravel(), y.ravel(), 0)) for cx in colunas_x]
+    indice = pd.MultiIndex.from_product([colunas_x, estacoes], names=['Feature', 'Codigo_Estacao'])
+    por_estacao = pd.DataFrame(por_estacao, index=indice).swaplevel().sort_index()
+    return por_estacao, pd.DataFrame(rede, index=pd.Index(colunas_x, name='Feature'))
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _serie_sintetica(anos, semente=0):
+    from gerador_inmet_sintetico import metadados_estacao, gerar_horario, COLUNAS_INMET
+    meta = metadados_estacao(0, semente)
+    frames = [gerar_horario(meta, ano, semente)[[COLUNAS_INMET[0]]] for ano in range(1990, 1990 + anos)]
+    return pd.concat(frames).rename(columns={COLUNAS_INMET[0]: COLUNA_PRECIPITACAO})
+
+
+def benchmark(anos_lista, repeticoes=3):
+    print(f"   {'anos':>5} {'horas':>10} {'features (s)':>13} {'Mhoras/s':>9} {'rolling (s)':>12} {'dif. máx':>9}")
+    for anos in anos_lista:
+        df_horario = _serie_sintetica(anos)
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            features_diarias(df_horario)
+            tempos.append(time.perf_counter() - inicio)
+        t_features = min(tempos)
+
+        # Referência: rolling do pandas, janela a janela
+        valores, indice = grade_horaria(df_horario[COLUNA_PRECIPITACAO])
+        serie = pd.Series(valores, index=indice)
+        inicio = time.perf_counter()
+        referencias = {h: serie.rolling(h, min_periods=int(np.ceil(COBERTURA_MINIMA * h))).sum().to_numpy()
+                       for h, _ in JANELAS.values()}
+        t_rolling = time.perf_counter() - inicio
+        somas = somas_moveis(valores, list(referencias))
+        diferenca = max(np.nanmax(np.abs(somas[h][h - 1:] - referencias[h][h - 1:])) for h in referencias)
+        print(f"   {anos:5d} {len(valores):10,d} {t_features:13.3f} {len(valores) / t_features / 1e6:9.1f} "
+              f"{t_rolling:12.3f} {diferenca:9.1e}")
+
+    # Custo por janela: o mesmo para 3h e 30d
+    valores, _ = grade_horaria(_serie_sintetica(anos_lista[-1])[COLUNA_PRECIPITACAO])
+    print(f"\n   Custo por janela ({anos_lista[-1]} anos):")
+    for nome, (horas, _) in JANELAS.items():
+        inicio = time.perf_counter()
+        somas_moveis(valores, [horas])
+        print(f"   - {nome:>4}: {time.perf_counter() - inicio:.4f}s")
+
+
+def _imprimir_estacao(codigo, linhas, segundos):
+    print(f"  ✓ {codigo}: {linhas:,} horas em {segundos:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Features de chuva acumulada e correlação com desastres")
+    parser.add_argument('--pasta', default='.', help="Pasta com os CSVs do INMET (busca recursiva)")
+    parser.add_argument('--padrao', default='INMET_*.CSV')
+    parser.add_argument('--saida', default='correlacao_features_chuva.csv',
+                        help="Correlação feature x desastre por estação")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--benchmark', type=int, nargs='*', metavar='ANOS',
+                        help="Mede a vazão em séries sintéticas de N anos (ex.: 10 30 50)")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("FEATURES DE CHUVA ACUMULADA")
+    print("=" * 70)
+
+    if args.benchmark is not None:
+        benchmark(args.benchmark or [10, 30, 50])
+        return 0
+
+    from processar_lote_inmet import encontrar_arquivos_inmet
+    arquivos = encontrar_arquivos_inmet(args.pasta, args.padrao)
+    if not arquivos:
+        print(f"\n❌ ERRO: Nenhum arquivo INMET encontrado em: {os.path.abspath(args.pasta)}")
+        return 1
+
+    inicio = time.perf_counter()
+    df_estacoes = features_estacoes(arquivos, args.workers, ao_concluir=_imprimir_estacao)
+    por_estacao, rede = correlacao_estacoes(df_estacoes)
+    por_estacao.to_csv(args.saida)
+
+    print(f"\n📊 Correlação com desastres (todas as estações, {len(df_estacoes):,} dias):")
+    print(rede.round(3).to_string())
+    print(f"\n✓ {len(arquivos)} arquivo(s) em {time.perf_counter() - inicio:.2f}s | Salvo: {args.saida}")
+    print("=" * 70)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
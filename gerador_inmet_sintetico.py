@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gerador de CSVs sintéticos no formato do INMET (estações automáticas).
+
+Os arquivos seguem o layout real: latin1, separador ';', vírgula decimal,
+8 linhas de cabeçalho da estação, as 19 colunas horárias na ordem do portal,
+'Hora UTC' no formato '0000 UTC', células vazias (falhas de sensor e
+radiação à noite) e ';' no fim de cada linha. Os valores seguem ciclos
+diário e sazonal plausíveis para o Brasil, o suficiente para exercitar o
+pipeline em qualquer número de estações e anos.
+
+Cada (estação, ano) usa sua própria semente derivada de --semente, então o
+mesmo ano de uma estação sai idêntico qualquer que seja o tamanho do conjunto.
+
+Uso:
+    python gerador_inmet_sintetico.py --pasta dados_sinteticos --estacoes 50 --anos 2019 2020 2021
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from inmet_comum import LINHAS_CABECALHO
+
+# Colunas horárias na ordem dos arquivos do portal (a partir de 2019)
+COLUNAS_INMET = [
+    'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)',
+    'PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB)',
+    'PRESSÃO ATMOSFERICA MAX.NA HORA ANT. (AUT) (mB)',
+    'PRESSÃO ATMOSFERICA MIN. NA HORA ANT. (AUT) (mB)',
+    'RADIACAO GLOBAL (Kj/m²)',
+    'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)',
+    'TEMPERATURA DO PONTO DE ORVALHO (°C)',
+    'TEMPERATURA MÁXIMA NA HORA ANT. (AUT) (°C)',
+    'TEMPERATURA MÍNIMA NA HORA ANT. (AUT) (°C)',
+    'TEMPERATURA ORVALHO MAX. NA HORA ANT. (AUT) (°C)',
+    'TEMPERATURA ORVALHO MIN. NA HORA ANT. (AUT) (°C)',
+    'UMIDADE REL. MAX. NA HORA ANT. (AUT) (%)',
+    'UMIDADE REL. MIN. NA HORA ANT. (AUT) (%)',
+    'UMIDADE RELATIVA DO AR, HORARIA (%)',
+    'VENTO, DIREÇÃO HORARIA (gr) (° (gr))',
+    'VENTO, RAJADA MAXIMA (m/s)',
+    'VENTO, VELOCIDADE HORARIA (m/s)',
+]
+
+UFS_POR_REGIAO = {
+    'N': ['AC', 'AM', 'AP', 'PA', 'RO', 'RR', 'TO'],
+    'NE': ['AL', 'BA', 'CE', 'MA', 'PB', 'PE', 'PI', 'RN', 'SE'],
+    'CO': ['DF', 'GO', 'MS', 'MT'],
+    'SE': ['ES', 'MG', 'RJ', 'SP'],
+    'S': ['PR', 'RS', 'SC'],
+}
+
+# Faixas aproximadas de (latitude, longitude) de cada região
+LIMITES_REGIAO = {
+    'N': ((-13.0, 4.0), (-73.0, -46.0)),
+    'NE': ((-18.0, -1.0), (-48.0, -35.0)),
+    'CO': ((-24.0, -7.0), (-61.0, -46.0)),
+    'SE': ((-25.0, -14.0), (-53.0, -39.0)),
+    'S': ((-33.0, -22.0), (-57.0, -48.0)),
+}
+
+FUSO_HORARIO = -3          # horário local = UTC - 3 (ciclo diário)
+FRACAO_FALTANTE = 0.01     # células vazias isoladas
+FALHAS_SENSOR_POR_ANO = 0.5  # blocos longos de um sensor sem dados, por coluna
+
+
+# ============================================================================
+# ESTAÇÕES
+# ============================================================================
+
+def metadados_estacao(indice, semente=0):
+    """Região, UF, nome, código WMO e posição da estação sintética `indice`."""
+    rng = np.random.default_rng(np.random.SeedSequence(semente, spawn_key=(indice,)))
+    regiao = list(UFS_POR_REGIAO)[indice % len(UFS_POR_REGIAO)]
+    (lat_min, lat_max), (lon_min, lon_max) = LIMITES_REGIAO[regiao]
+    return {
+        'regiao': regiao,
+        'uf': str(rng.choice(UFS_POR_REGIAO[regiao])),
+        'estacao': f'SINTETICA-{indice:04d}',
+        'codigo': f"{'ABCDEFGHIJ'[indice // 1000 % 10]}{indice % 1000:03d}",
+        'latitude': round(float(rng.uniform(lat_min, lat_max)), 8),
+        'longitude': round(float(rng.uniform(lon_min, lon_max)), 8),
+        'altitude': round(float(rng.uniform(0.0, 1200.0)), 2),
+        'fundacao': f"{rng.integers(1, 29):02d}/{rng.integers(1, 13):02d}/{rng.integers(0, 19):02d}",
+    }
+
+
+def nome_arquivo(meta, ano_inicio, ano_fim):
+    return (f"INMET_{meta['regiao']}_{meta['uf']}_{meta['codigo']}_{meta['estacao']}_"
+            f"01-01-{ano_inicio}_A_31-12-{ano_fim}.CSV")
+
+
+# ============================================================================
+# SÉRIES HORÁRIAS
+# ============================================================================
+
+def _falhas_de_sensor(rng, n, taxa):
+    """Máscara com blocos contíguos de falha (duração média de ~15 dias)."""
+    mascara = np.zeros(n, dtype=bool)
+    for _ in range(rng.poisson(taxa)):
+        inicio = rng.integers(0, n)
+        mascara[inicio:inicio + int(rng.exponential(15 * 24))] = True
+    return mascara
+
+
+def gerar_horario(meta, ano, semente=0, fracao_faltante=FRACAO_FALTANTE,
+                  falhas_por_ano=FALHAS_SENSOR_POR_ANO, indice=0):
+    """Um ano de dados horários com os nomes de coluna originais (NaN = célula vazia)."""
+    rng = np.random.default_rng(np.random.SeedSequence(semente, spawn_key=(indice, ano)))
+    horarios = pd.date_range(f'{ano}-01-01', f'{ano}-12-31 23:00', freq='h')
+    n = len(horarios)
+    n_dias = n // 24
+    dia_ano = horarios.dayofyear.to_numpy()
+    hora_local = (horarios.hour.to_numpy() + FUSO_HORARIO) % 24
+    fase_anual = 2 * np.pi * (dia_ano - 15) / 365.25
+    # Hemisfério sul: verão em janeiro; amplitude sazonal cresce para o sul
+    amplitude_sazonal = 1.0 + 0.18 * max(0.0, -meta['latitude'])
+
+    # Temperatura: média pela latitude/altitude + ciclos + anomalia diária
+    temperatura_media = 27.0 - 0.25 * max(0.0, -meta['latitude'] - 5) - 0.0065 * meta['altitude']
+    anomalia_diaria = np.repeat(np.cumsum(rng.normal(0, 0.6, n_dias)) * 0.3 + rng.normal(0, 1.0, n_dias), 24)
+    temperatura = (temperatura_media + amplitude_sazonal * np.cos(fase_anual)
+                   + 4.0 * np.cos(2 * np.pi * (hora_local - 15) / 24)
+                   + anomalia_diaria + rng.normal(0, 0.3, n))
+
+    # Chuva: dias úmidos com probabilidade sazonal, chuva em algumas horas do dia
+    prob_dia_umido = np.clip(0.3 + 0.2 * np.cos(fase_anual[::24] - rng.uniform(0, np.pi)), 0.05, 0.9)
+    dia_umido = np.repeat(rng.random(n_dias) < prob_dia_umido, 24)
+    chove = dia_umido & (rng.random(n) < 0.2)
+    precipitacao = np.where(chove, np.round(rng.gamma(0.7, 4.0, n) / 0.2) * 0.2, 0.0)
+
+    umidade = np.clip(78 - 2.5 * (temperatura - temperatura_media) + 10 * dia_umido + rng.normal(0, 4, n), 15, 100)
+    orvalho = temperatura - (100 - umidade) / 5
+    pressao = (1013 - 0.12 * meta['altitude'] - 3 * np.cos(fase_anual)
+               + 1.2 * np.cos(4 * np.pi * (hora_local - 10) / 24) + rng.normal(0, 0.3, n))
+    dia_claro = (hora_local >= 6) & (hora_local <= 18)
+    radiacao = np.where(dia_claro,
+                        3500 * np.sin(np.pi * np.clip(hora_local - 6, 0, 12) / 12) * (1 - 0.6 * dia_umido)
+                        * rng.uniform(0.7, 1.0, n),
+                        np.nan)
+    velocidade = rng.gamma(2.0, 1.1, n)
+    rajada = velocidade * rng.uniform(1.5, 2.5, n) + 0.5
+    direcao = rng.integers(1, 361, n).astype(float)
+
+    variacao = np.abs(rng.normal(0, 0.4, (3, n)))
+    valores = {
+        COLUNAS_INMET[0]: precipitacao,
+        COLUNAS_INMET[1]: np.round(pressao, 1),
+        COLUNAS_INMET[2]: np.round(pressao + variacao[0], 1),
+        COLUNAS_INMET[3]: np.round(pressao - variacao[0], 1),
+        COLUNAS_INMET[4]: np.round(radiacao, 1),
+        COLUNAS_INMET[5]: np.round(temperatura, 1),
+        COLUNAS_INMET[6]: np.round(orvalho, 1),
+        COLUNAS_INMET[7]: np.round(temperatura + variacao[1], 1),
+        COLUNAS_INMET[8]: np.round(temperatura - variacao[2], 1),
+        COLUNAS_INMET[9]: np.round(orvalho + variacao[1], 1),
+        COLUNAS_INMET[10]: np.round(orvalho - variacao[2], 1),
+        COLUNAS_INMET[11]: np.minimum(np.round(umidade + 3 * variacao[1]), 100),
+        COLUNAS_INMET[12]: np.round(umidade - 3 * variacao[2]),
+        COLUNAS_INMET[13]: np.round(umidade),
+        COLUNAS_INMET[14]: direcao,
+        COLUNAS_INMET[15]: np.round(rajada, 1),
+        COLUNAS_INMET[16]: np.round(velocidade, 1),
+    }
+    for coluna, serie in valores.items():
+        faltante = (rng.random(n) < fracao_faltante) | _falhas_de_sensor(rng, n, falhas_por_ano)
+        serie[faltante] = np.nan
+    return pd.DataFrame(valores, index=horarios)
+
+
+# ============================================================================
+# ESCRITA NO FORMATO DO INMET
+# ============================================================================
+
+def _formatar(serie):
+    """Números como no portal: vírgula decimal, sem ',0' em inteiros, vazio para NaN."""
+    valores = serie.to_numpy(dtype=float) + 0.0   # +0.0 evita '-0'
+    texto = pd.Series(np.round(valores, 1)).astype(str).str.removesuffix('.0').str.replace('.', ',', regex=False)
+    return texto.where(~np.isnan(valores), '')
+
+
+def _numero(valor):
+    return f'{valor:g}'.replace('.', ',')
+
+
+def escrever_csv_inmet(caminho, meta, df_horario):
+    """Grava o DataFrame de gerar_horario com o cabeçalho e o layout do INMET."""
+    cabecalho = [
+        f"REGIAO:;{meta['regiao']}",
+        f"UF:;{meta['uf']}",
+        f"ESTACAO:;{meta['estacao']}",
+        f"CODIGO (WMO):;{meta['codigo']}",
+        f"LATITUDE:;{_numero(meta['latitude'])}",
+        f"LONGITUDE:;{_numero(meta['longitude'])}",
+        f"ALTITUDE:;{_numero(meta['altitude'])}",
+        f"DATA DE FUNDACAO:;{meta['fundacao']}",
+        ';'.join(['Data', 'Hora UTC'] + COLUNAS_INMET) + ';',
+    ]
+    assert len(cabecalho) == LINHAS_CABECALHO + 1
+
+    corpo = pd.DataFrame({
+        'Data': df_horario.index.strftime('%Y/%m/%d'),
+        'Hora UTC': df_horario.index.strftime('%H%M UTC'),
+    })
+    for coluna in COLUNAS_INMET:
+        corpo[coluna] = _formatar(df_horario[coluna]).to_numpy()
+    corpo[''] = ''   # ';' final das linhas
+
+    with open(caminho, 'w', encoding='latin1', newline='') as f:
+        f.write('\n'.join(cabecalho) + '\n')
+        corpo.to_csv(f, sep=';', header=False, index=False, lineterminator='\n')
+    return caminho
+
+
+def gerar_arquivo(pasta, indice, anos, semente=0, fracao_faltante=FRACAO_FALTANTE,
+                  falhas_por_ano=FALHAS_SENSOR_POR_ANO):
+    """Um CSV da estação `indice` cobrindo os `anos` informados (contíguos)."""
+    meta = metadados_estacao(indice, semente)
+    anos = sorted(anos)
+    df_horario = pd.concat([gerar_horario(meta, ano, semente, fracao_faltante, falhas_por_ano, indice)
+                            for ano in anos])
+    caminho = os.path.join(pasta, nome_arquivo(meta, anos[0], anos[-1]))
+    return escrever_csv_inmet(caminho, meta, df_horario)
+
+
+def gerar_conjunto(pasta, n_estacoes, anos, semente=0, fracao_faltante=FRACAO_FALTANTE,
+                   falhas_por_ano=FALHAS_SENSOR_POR_ANO, um_arquivo_por_ano=True):
+    """Gera os CSVs de `n_estacoes` estações x `anos`; devolve a lista de caminhos."""
+    os.makedirs(pasta, exist_ok=True)
+    grupos = [[ano] for ano in anos] if um_arquivo_por_ano else [list(anos)]
+    return [gerar_arquivo(pasta, indice, grupo, semente, fracao_faltante, falhas_por_ano)
+            for indice in range(n_estacoes) for grupo in grupos]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera CSVs sintéticos no formato do INMET")
+    parser.add_argument('--pasta', default='dados_sinteticos')
+    parser.add_argument('--estacoes', type=int, default=1)
+    parser.add_argument('--anos', type=int, nargs='+', default=[2023])
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--faltantes', type=float, default=FRACAO_FALTANTE,
+                        help="Fração de células vazias isoladas")
+    parser.add_argument('--falhas-por-ano', type=float, default=FALHAS_SENSOR_POR_ANO,
+                        help="Blocos longos de sensor sem dados por coluna e ano")
+    parser.add_argument('--arquivo-unico', action='store_true',
+                        help="Um arquivo por estação com todos os anos (em vez de um por ano)")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("GERADOR DE DADOS SINTÉTICOS DO INMET")
+    print(f"Estações: {args.estacoes} | Anos: {args.anos[0]}-{args.anos[-1]} | Semente: {args.semente}")
+    print("=" * 70)
+
+    inicio = time.perf_counter()
+    arquivos = gerar_conjunto(args.pasta, args.estacoes, args.anos, args.semente, args.faltantes,
+                              args.falhas_por_ano, um_arquivo_por_ano=not args.arquivo_unico)
+    tamanho_mb = sum(os.path.getsize(caminho) for caminho in arquivos) / 1e6
+    print(f"✓ {len(arquivos)} arquivo(s), {tamanho_mb:.1f} MB em {args.pasta} "
+          f"({time.perf_counter() - inicio:.1f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
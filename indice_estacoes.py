@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice espacial das estações do INMET e junção de eventos de desastre
+georreferenciados às k estações mais próximas.
+
+O cabeçalho de cada CSV traz LATITUDE/LONGITUDE/ALTITUDE da estação;
+catalogo_estacoes() lê só essas 8 linhas de cada arquivo (ou membro de ZIP)
+e monta o catálogo indexado pelo código WMO.
+
+IndiceEstacoes é uma grade regular em graus sobre esse catálogo. Para cada
+célula usada guarda-se a lista de estações candidatas: as que estão a até
+d_k(centro) + 2 * h do centro da célula, onde d_k é a distância da k-ésima
+estação mais próxima do centro e h a distância do centro ao canto mais
+distante. Pela desigualdade triangular os k vizinhos de qualquer ponto da
+célula estão nessa lista, então a busca é exata. As distâncias usam a
+corda entre vetores unitários (mesma ordem da distância de haversine) e
+são convertidas para km só no fim.
+
+juntar_eventos() faz a junção em uma passada vetorizada: as coordenadas
+repetidas (eventos de um mesmo município) são buscadas uma vez só, cada
+evento recebe até k estações com peso inverso da distância (normalizado)
+e agregar_por_estacao_dia() soma os pesos por (Codigo_Estacao, Data) e
+tipo de desastre, no formato da tabela de processar_lote_inmet.
+
+Uso:
+    python indice_estacoes.py --pasta dados_inmet --catalogo estacoes_inmet.csv
+    python indice_estacoes.py --catalogo estacoes_inmet.csv --eventos eventos.csv --k 3 --raio-max 150
+    python indice_estacoes.py --benchmark 1000000
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from etapas_pipeline import COLUNAS_DESASTRES
+from parser_inmet import ler_cabecalho_estacao
+
+RAIO_TERRA_KM = 6371.0088
+VIZINHOS = 3
+POTENCIA_IDW = 2.0
+DISTANCIA_MINIMA_KM = 1.0     # evita peso infinito para evento em cima da estação
+TAMANHO_CELULA_GRAUS = 0.5
+EVENTOS_POR_BLOCO = 100_000
+
+ARQUIVO_CATALOGO = 'estacoes_inmet.csv'
+ARQUIVO_JUNCAO = 'eventos_estacoes.csv'
+ARQUIVO_DESASTRES_ESTACAO = 'desastres_estacao_dia.csv'
+
+# Colunas esperadas na tabela de eventos
+COLUNA_DATA = 'Data'
+COLUNA_LATITUDE = 'Latitude'
+COLUNA_LONGITUDE = 'Longitude'
+COLUNA_TIPO = 'Tipo'
+
+
+# ============================================================================
+# CATÁLOGO DE ESTAÇÕES
+# ============================================================================
+
+def catalogo_estacoes(origens):
+    """Catálogo (Codigo_Estacao -> uf, estacao, latitude, longitude, altitude...) dos cabeçalhos.
+
+    `origens` são caminhos de CSV ou tuplas (caminho_zip, nome_membro). Se
+    a estação aparece em vários arquivos, vale o último (o mais recente,
+    na ordem em que os arquivos foram listados).
+    """
+    registros = []
+    zips = {}
+    try:
+        for origem in origens:
+            if isinstance(origem, tuple):
+                caminho_zip, nome_membro = origem
+                if caminho_zip not in zips:
+                    zips[caminho_zip] = zipfile.ZipFile(caminho_zip)
+                with zips[caminho_zip].open(nome_membro) as f:
+                    registros.append(ler_cabecalho_estacao(f))
+            else:
+                registros.append(ler_cabecalho_estacao(origem))
+    finally:
+        for zf in zips.values():
+            zf.close()
+
+    catalogo = pd.DataFrame(registros).dropna(subset=['codigo'])
+    catalogo = catalogo.drop_duplicates('codigo', keep='last').set_index('codigo').sort_index()
+    catalogo.index.name = 'Codigo_Estacao'
+    return catalogo
+
+
+def ler_catalogo(caminho):
+    return pd.read_csv(caminho, index_col='Codigo_Estacao', dtype={'Codigo_Estacao': str})
+
+
+# ============================================================================
+# GEOMETRIA
+# ============================================================================
+
+def vetores_unitarios(latitude, longitude):
+    """(..., 3) posições na esfera unitária."""
+    lat = np.radians(np.asarray(latitude, dtype=np.float64))
+    lon = np.radians(np.asarray(longitude, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def corda_para_km(corda):
+    """Distância de haversine (km) a partir da corda entre vetores unitários."""
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.clip(np.asarray(corda) / 2, 0.0, 1.0))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _corda(a, b):
+    """Cordas (..., S) entre vetores (..., 3) e (S, 3)."""
+    return np.sqrt(np.maximum(2.0 - 2.0 * (a @ b.T), 0.0))
+
+
+# ============================================================================
+# ÍNDICE EM GRADE
+# ============================================================================
+
+class IndiceEstacoes:
+    """Busca exata dos k vizinhos mais próximos com uma grade de `celula` graus."""
+
+    def __init__(self, catalogo, celula=TAMANHO_CELULA_GRAUS):
+        catalogo = catalogo.dropna(subset=['latitude', 'longitude'])
+        if catalogo.empty:
+            raise ValueError("Catálogo sem estações com latitude/longitude")
+        self.codigos = catalogo.index.to_numpy()
+        self.latitude = catalogo['latitude'].to_numpy(dtype=np.float64)
+        self.longitude = catalogo['longitude'].to_numpy(dtype=np.float64)
+        self.vetores = vetores_unitarios(self.latitude, self.longitude)
+        self.celula = celula
+        self._colunas_grade = math.ceil(360 / celula)
+        # k -> {id da célula: índices candidatos ordenados pela distância ao centro}
+        self._candidatos = {}
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def _celulas(self, latitude, longitude):
+        i = np.floor((np.clip(latitude, -90, 90 - 1e-9) + 90) / self.celula).astype(np.int64)
+        j = np.floor(((longitude + 180) % 360) / self.celula).astype(np.int64) % self._colunas_grade
+        return i * self._colunas_grade + j
+
+    def _candidatos_celulas(self, celulas, k):
+        """Matriz (células, C) de candidatos, completada com -1."""
+        cache = self._candidatos.setdefault(k, {})
+        novas = np.array([c for c in celulas if c not in cache], dtype=np.int64)
+        if len(novas):
+            i, j = np.divmod(novas, self._colunas_grade)
+            lat0, lon0 = -90 + i * self.celula, -180 + j * self.celula
+            centro = vetores_unitarios(np.minimum(lat0 + self.celula / 2, 90), lon0 + self.celula / 2)
+            cantos = vetores_unitarios(np.minimum(lat0[:, None] + self.celula * np.array([0, 0, 1, 1]), 90),
+                                       lon0[:, None] + self.celula * np.array([0, 1, 0, 1]))
+            h = np.linalg.norm(cantos - centro[:, None, :], axis=-1).max(axis=1)
+            distancias = _corda(centro, self.vetores)
+            dk = np.partition(distancias, k - 1, axis=1)[:, k - 1]
+            dentro = distancias <= (dk + 2 * h + 1e-12)[:, None]
+            for celula, d, m in zip(novas, distancias, dentro):
+                indices = np.flatnonzero(m)
+                cache[celula] = indices[np.argsort(d[indices])]
+        largura = max(len(cache[c]) for c in celulas)
+        matriz = np.full((len(celulas), largura), -1, dtype=np.int64)
+        for linha, c in enumerate(celulas):
+            matriz[linha, :len(cache[c])] = cache[c]
+        return matriz
+
+    def vizinhos(self, latitude, longitude, k=VIZINHOS, bloco=EVENTOS_POR_BLOCO):
+        """(índices, distâncias_km), ambos (N, k) e ordenados; coordenadas inválidas -> -1 / NaN."""
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        k = min(k, len(self))
+        indices = np.full((len(latitude), k), -1, dtype=np.int64)
+        distancias = np.full((len(latitude), k), np.nan)
+        validos = np.flatnonzero(np.isfinite(latitude) & np.isfinite(longitude))
+        if not len(validos):
+            return indices, distancias
+
+        celulas, inversa = np.unique(self._celulas(latitude[validos], longitude[validos]), return_inverse=True)
+        candidatos = self._candidatos_celulas(celulas, k)
+        for inicio in range(0, len(validos), bloco):
+            linhas = validos[inicio:inicio + bloco]
+            c = candidatos[inversa[inicio:inicio + bloco]]
+            v = vetores_unitarios(latitude[linhas], longitude[linhas])
+            corda = np.sqrt(np.maximum(2.0 - 2.0 * np.einsum('nd,ncd->nc', v, self.vetores[c]), 0.0))
+            corda[c < 0] = np.inf
+            if c.shape[1] > k:
+                parte = np.argpartition(corda, k - 1, axis=1)[:, :k]
+                corda = np.take_along_axis(corda, parte, axis=1)
+                c = np.take_along_axis(c, parte, axis=1)
+            ordem = np.argsort(corda, axis=1)
+            indices[linhas] = np.take_along_axis(c, ordem, axis=1)
+            distancias[linhas] = corda_para_km(np.take_along_axis(corda, ordem, axis=1))
+        return indices, distancias
+
+
+# ============================================================================
+# JUNÇÃO DE EVENTOS
+# ============================================================================
+
+def pesos_idw(distancias_km, potencia=POTENCIA_IDW, distancia_minima=DISTANCIA_MINIMA_KM):
+    """Pesos inversos da distância, normalizados por linha (NaN = vizinho descartado)."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pesos = 1.0 / np.maximum(distancias_km, distancia_minima) ** potencia
+        pesos = np.nan_to_num(pesos)
+        return pesos / pesos.sum(axis=1, keepdims=True)
+
+
+def juntar_eventos(eventos, indice, k=VIZINHOS, potencia=POTENCIA_IDW, raio_max_km=None,
+                   distancia_minima=DISTANCIA_MINIMA_KM):
+    """Uma linha por (evento, estação próxima): Evento, Codigo_Estacao, Data, distancia_km, peso.
+
+    Demais colunas do evento (ex.: Tipo, Municipio) são repetidas. Vizinhos
+    além de `raio_max_km` são descartados e os pesos renormalizados entre os
+    que sobram; eventos sem estação no raio ficam de fora.
+    """
+    latitude = eventos[COLUNA_LATITUDE].to_numpy(dtype=np.float64)
+    longitude = eventos[COLUNA_LONGITUDE].to_numpy(dtype=np.float64)
+
+    # Eventos de um mesmo município repetem a coordenada: busca uma vez por coordenada
+    coordenadas, inversa = np.unique(latitude + 1j * longitude, return_inverse=True)
+    indices, distancias = indice.vizinhos(coordenadas.real, coordenadas.imag, k)
+    indices, distancias = indices[inversa], distancias[inversa]
+    if raio_max_km is not None:
+        distancias = np.where(distancias <= raio_max_km, distancias, np.nan)
+    pesos = pesos_idw(distancias, potencia, distancia_minima)
+
+    linha, vizinho = np.nonzero(np.isfinite(distancias))
+    juncao = eventos.iloc[linha].reset_index(drop=True)
+    juncao.insert(0, 'Evento', eventos.index.to_numpy()[linha])
+    juncao.insert(1, 'Codigo_Estacao', indice.codigos[indices[linha, vizinho]])
+    juncao[COLUNA_DATA] = pd.to_datetime(juncao[COLUNA_DATA]).dt.normalize()
+    juncao['Vizinho'] = vizinho + 1
+    juncao['distancia_km'] = distancias[linha, vizinho]
+    juncao['peso'] = pesos[linha, vizinho]
+    return juncao
+
+
+def agregar_por_estacao_dia(juncao, tipos=COLUNAS_DESASTRES):
+    """Soma dos pesos por (Codigo_Estacao, Data) e tipo de desastre (colunas de COLUNAS_DESASTRES)."""
+    tipos = list(tipos)
+    tipo = pd.Index(tipos).get_indexer(juncao[COLUNA_TIPO])
+    juncao = juncao[tipo >= 0]
+    tipo = tipo[tipo >= 0]
+    # Chave inteira (estação, dia): agrupar inteiros é bem mais rápido que strings + datas
+    estacao, codigos = pd.factorize(juncao['Codigo_Estacao'])
+    dia = juncao[COLUNA_DATA].to_numpy().astype('datetime64[D]').astype(np.int64)
+    primeiro = dia.min() if len(dia) else 0
+    n_dias = (dia.max() - primeiro + 1) if len(dia) else 1
+    chaves, linha = np.unique(estacao * n_dias + (dia - primeiro), return_inverse=True)
+    somas = np.zeros((len(chaves), len(tipos)))
+    np.add.at(somas, (linha, tipo), juncao['peso'].to_numpy())
+
+    estacao, dia = np.divmod(chaves, n_dias)
+    indice = pd.MultiIndex.from_arrays(
+        [np.asarray(codigos)[estacao], pd.DatetimeIndex((dia + primeiro).astype('datetime64[D]'))],
+        names=['Codigo_Estacao', 'Data'])
+    return pd.DataFrame(somas, index=indice, columns=tipos).sort_index()
+
+
+def vizinhos_ingenuo(latitude, longitude, cat_latitude, cat_longitude, k=VIZINHOS):
+    """Referência: laço Python por evento e por estação (haversine com math)."""
+    resultado = []
+    for lat, lon in zip(latitude, longitude):
+        distancias = []
+        for i, (lat_e, lon_e) in enumerate(zip(cat_latitude, cat_longitude)):
+            f1, f2 = math.radians(lat), math.radians(lat_e)
+            a = (math.sin((f2 - f1) / 2) ** 2
+                 + math.cos(f1) * math.cos(f2) * math.sin(math.radians(lon_e - lon) / 2) ** 2)
+            distancias.append((2 * RAIO_TERRA_KM * math.asin(math.sqrt(min(a, 1.0))), i))
+        distancias.sort()
+        resultado.append(distancias[:k])
+    return resultado
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def eventos_sinteticos(n_eventos, n_municipios=5570, semente=0):
+    """Eventos em municípios sorteados (coordenadas repetidas, como nos registros reais)."""
+    from gerador_inmet_sintetico import LIMITES_REGIAO
+    rng = np.random.default_rng(semente)
+    limites = np.array(list(LIMITES_REGIAO.values()))[rng.integers(0, len(LIMITES_REGIAO), n_municipios)]
+    mun_lat = rng.uniform(limites[:, 0, 0], limites[:, 0, 1])
+    mun_lon = rng.uniform(limites[:, 1, 0], limites[:, 1, 1])
+    municipio = rng.integers(0, n_municipios, n_eventos)
+    return pd.DataFrame({
+        COLUNA_DATA: pd.Timestamp('2000-01-01') + pd.to_timedelta(rng.integers(0, 24 * 365, n_eventos), unit='D'),
+        COLUNA_LATITUDE: mun_lat[municipio],
+        COLUNA_LONGITUDE: mun_lon[municipio],
+        COLUNA_TIPO: np.asarray(COLUNAS_DESASTRES)[rng.integers(0, len(COLUNAS_DESASTRES), n_eventos)],
+    })
+
+
+def benchmark(n_eventos, n_estacoes=600, k=VIZINHOS):
+    from gerador_inmet_sintetico import metadados_estacao
+    catalogo = pd.DataFrame([metadados_estacao(i) for i in range(n_estacoes)]).set_index('codigo')
+    eventos = eventos_sinteticos(n_eventos)
+    print(f"   {n_eventos:,} eventos, {n_estacoes} estações, k = {k}")
+
+    inicio = time.perf_counter()
+    indice = IndiceEstacoes(catalogo)
+    juncao = juntar_eventos(eventos, indice, k)
+    t_juncao = time.perf_counter() - inicio
+    agregar_por_estacao_dia(juncao)
+    t_total = time.perf_counter() - inicio
+
+    # Busca sem a deduplicação de coordenadas (todos os eventos passam pela grade)
+    inicio = time.perf_counter()
+    indices, distancias = indice.vizinhos(eventos[COLUNA_LATITUDE], eventos[COLUNA_LONGITUDE], k)
+    t_grade = time.perf_counter() - inicio
+
+    amostra = min(2000, n_eventos)
+    inicio = time.perf_counter()
+    ingenuo = vizinhos_ingenuo(eventos[COLUNA_LATITUDE][:amostra], eventos[COLUNA_LONGITUDE][:amostra],
+                               indice.latitude, indice.longitude, k)
+    t_laco = (time.perf_counter() - inicio) * n_eventos / amostra
+
+    # Conferência com a força bruta vetorizada (todas as estações)
+    forca = haversine_km(eventos[COLUNA_LATITUDE].to_numpy()[:amostra, None],
+                         eventos[COLUNA_LONGITUDE].to_numpy()[:amostra, None],
+                         indice.latitude[None], indice.longitude[None])
+    forca = np.sort(forca, axis=1)[:, :k]
+    erro = max(np.abs(forca - distancias[:amostra]).max(),
+               np.abs(np.array([[d for d, _ in viz] for viz in ingenuo]) - distancias[:amostra]).max())
+
+    print(f"   - junção + pesos:        {t_juncao:7.2f}s ({n_eventos / t_juncao:,.0f} eventos/s)")
+    print(f"   - + agregação diária:    {t_total:7.2f}s")
+    print(f"   - só a grade, sem dedup: {t_grade:7.2f}s")
+    print(f"   - laço Python:           {t_laco:7.1f}s (estimado de {amostra})  -> {t_laco / t_juncao:,.0f}x")
+    print(f"   - diferença máx. vs força bruta/laço: {erro:.2e} km")
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Índice espacial das estações e junção de eventos de desastre")
+    parser.add_argument('--pasta', help="Pasta com os CSVs do INMET (monta o catálogo dos cabeçalhos)")
+    parser.add_argument('--zip', nargs='*', default=[], help="ZIPs anuais do INMET (monta o catálogo)")
+    parser.add_argument('--catalogo', default=ARQUIVO_CATALOGO, help="Catálogo de estações (lido ou gravado)")
+    parser.add_argument('--eventos', help="CSV de eventos com Data, Latitude, Longitude e Tipo")
+    parser.add_argument('--saida', default=ARQUIVO_JUNCAO, help="Junção evento x estação")
+    parser.add_argument('--diario', default=ARQUIVO_DESASTRES_ESTACAO,
+                        help="Desastres ponderados por (Codigo_Estacao, Data)")
+    parser.add_argument('--k', type=int, default=VIZINHOS)
+    parser.add_argument('--potencia', type=float, default=POTENCIA_IDW, help="Expoente do inverso da distância")
+    parser.add_argument('--raio-max', type=float, default=None, help="Descarta estações além de X km")
+    parser.add_argument('--benchmark', type=int, metavar='EVENTOS', help="Benchmark com N eventos sintéticos")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("ÍNDICE ESPACIAL DAS ESTAÇÕES E JUNÇÃO DE EVENTOS")
+    print("=" * 70)
+
+    if args.benchmark:
+        benchmark(args.benchmark, k=args.k)
+        return 0
+
+    if args.pasta or args.zip:
+        from processar_lote_inmet import encontrar_arquivos_inmet, encontrar_membros_zip
+        origens = encontrar_membros_zip(args.zip) if args.zip else encontrar_arquivos_inmet(args.pasta)
+        if not origens:
+            print("❌ ERRO: Nenhum arquivo INMET encontrado")
+            return 1
+        catalogo = catalogo_estacoes(origens)
+        catalogo.to_csv(args.catalogo)
+        print(f"✓ Catálogo: {len(catalogo)} estação(ões) de {len(origens)} arquivo(s) -> {args.catalogo}")
+    elif os.path.exists(args.catalogo):
+        catalogo = ler_catalogo(args.catalogo)
+    else:
+        print(f"❌ ERRO: Catálogo não encontrado: {args.catalogo} (use --pasta ou --zip)")
+        return 1
+
+    if not args.eventos:
+        return 0
+    if not os.path.exists(args.eventos):
+        print(f"❌ ERRO: Arquivo não encontrado: {args.eventos}")
+        return 1
+
+    inicio = time.perf_counter()
+    eventos = pd.read_csv(args.eventos, parse_dates=[COLUNA_DATA])
+    juncao = juntar_eventos(eventos, IndiceEstacoes(catalogo), args.k, args.potencia, args.raio_max)
+    juncao.to_csv(args.saida, index=False)
+    print(f"✓ {len(eventos):,} evento(s) -> {len(juncao):,} par(es) evento x estação "
+          f"({juncao['Evento'].nunique():,} eventos com estação) | {time.perf_counter() - inicio:.2f}s")
+    print(f"✓ Salvo: {args.saida}")
+    if COLUNA_TIPO in juncao.columns:
+        diario = agregar_por_estacao_dia(juncao)
+        diario.to_csv(args.diario)
+        print(f"✓ Salvo: {args.diario} ({len(diario):,} dias-estação)")
+    print("=" * 70)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Funções compartilhadas do PASSO 1 (pré-processamento dos CSVs do INMET).
+
+Mantém em um único lugar o mapeamento de colunas, a montagem do timestamp
+Data + Hora UTC e a reamostragem diária usados por analise_completa.py e
+pelo modo em lote (processar_lote_inmet.py).
+"""
+
+import os
+import re
+
+import pandas as pd
+
+# Mapeamento das colunas do INMET para nomes simplificados
+COLUNAS_MAPEAMENTO = {
+    'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)': 'Precipitacao_mm',
+    'TEMPERATURA MÁXIMA NA HORA ANT. (AUT) (°C)': 'Temperatura_Maxima_C',
+    'TEMPERATURA MÍNIMA NA HORA ANT. (AUT) (°C)': 'Temperatura_Minima_C',
+    'UMIDADE RELATIVA DO AR, HORARIA (%)': 'Umidade_Relativa_Media_pct',
+    'VENTO, RAJADA MAXIMA (m/s)': 'Vento_Rajada_Maxima_ms'
+}
+
+# Agregação de cada variável na reamostragem diária
+AGREGACOES_DIARIAS = {
+    'Precipitacao_mm': 'sum',
+    'Temperatura_Maxima_C': 'max',
+    'Temperatura_Minima_C': 'min',
+    'Umidade_Relativa_Media_pct': 'mean',
+    'Vento_Rajada_Maxima_ms': 'max'
+}
+
+# Arquivos anteriores a 2019 usam outros nomes para as colunas de data/hora
+ALIASES_DATA_HORA = {
+    'DATA (YYYY-MM-DD)': 'Data',
+    'HORA (UTC)': 'Hora UTC',
+}
+
+LINHAS_CABECALHO = 8
+
+# Ex.: INMET_NE_SE_A409_ARACAJU_01-01-2023_A_31-12-2023.CSV
+PADRAO_NOME_ARQUIVO = re.compile(
+    r'^INMET_(?P<regiao>[A-Z]{1,2})_(?P<uf>[A-Z]{2})_(?P<codigo>[A-Z]\d{3})_'
+    r'(?P<estacao>.+)_(?P<inicio>\d{2}-\d{2}-\d{4})_A_(?P<fim>\d{2}-\d{2}-\d{4})\.CSV$',
+    re.IGNORECASE
+)
+
+
+def extrair_info_nome_arquivo(caminho):
+    """Retorna regiao, uf, codigo (WMO), estacao, inicio e fim a partir do nome do arquivo, ou None."""
+    correspondencia = PADRAO_NOME_ARQUIVO.match(os.path.basename(caminho))
+    if correspondencia is None:
+        return None
+    return correspondencia.groupdict()
+
+
+def _limpar_colunas(df_inmet):
+    df_inmet.columns = df_inmet.columns.str.strip()
+    return df_inmet.rename(columns=ALIASES_DATA_HORA)
+
+
+def ler_csv_inmet(origem, **kwargs):
+    """Lê um CSV do INMET (arquivo ou objeto de arquivo) pulando o cabeçalho da estação."""
+    return _limpar_colunas(pd.read_csv(origem, encoding='latin1', sep=';', skiprows=LINHAS_CABECALHO, **kwargs))
+
+
+def ler_csv_inmet_em_blocos(origem, linhas_por_bloco, **kwargs):
+    """Como ler_csv_inmet, mas gera DataFrames de até `linhas_por_bloco` linhas."""
+    with pd.read_csv(origem, encoding='latin1', sep=';', skiprows=LINHAS_CABECALHO,
+                     chunksize=linhas_por_bloco, **kwargs) as leitor:
+        for bloco in leitor:
+            yield _limpar_colunas(bloco)
+
+
+def processar_datas(df_inmet):
+    """Combina Data e Hora UTC em um índice Data_Hora."""
+    # Normaliza os formatos antigos (2018-01-01 / 00:00) para 2023/01/01 / 0000
+    datas = df_inmet['Data'].astype(str).str.replace('-', '/', regex=False)
+    horas = df_inmet['Hora UTC'].astype(str).str.replace(' UTC', '', regex=False).str.replace(':', '', regex=False)
+    df_inmet['Data_Hora'] = pd.to_datetime(datas + ' ' + horas, format='%Y/%m/%d %H%M')
+    return df_inmet.set_index('Data_Hora')
+
+
+def converter_colunas(df_inmet, colunas_mapeamento=COLUNAS_MAPEAMENTO):
+    """Seleciona as colunas mapeadas e converte vírgula decimal para float."""
+    df_processado = pd.DataFrame(index=df_inmet.index)
+    for col_original, col_novo in colunas_mapeamento.items():
+        if col_original in df_inmet.columns:
+            df_processado[col_novo] = df_inmet[col_original].astype(str).str.replace(',', '.').astype(float)
+    return df_processado
+
+
+def reamostrar_diario(df_processado, agregacoes=AGREGACOES_DIARIAS):
+    """Reamostra os dados horários para frequência diária."""
+    agregacoes = {col: func for col, func in agregacoes.items() if col in df_processado.columns}
+    return df_processado.resample('D').agg(agregacoes)
+
+
+def preprocessar_inmet(origem):
+    """PASSO 1 completo: leitura, datas, conversão numérica e reamostragem diária."""
+    df_inmet = processar_datas(ler_csv_inmet(origem))
+    return reamostrar_diario(converter_colunas(df_inmet))
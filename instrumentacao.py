@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instrumentação das etapas: tempo de parede, tempo de CPU, pico de RSS,
+linhas e bytes lidos por etapa (e por estação), gravados como trace JSONL
+(um registro por etapa concluída) ou JSON (documento único no final).
+
+A saída de console é uma visão dos mesmos registros: o rótulo da etapa é
+impresso ao iniciar e a linha de métricas (formatar_registro) ao terminar;
+`python instrumentacao.py resumo trace.jsonl` reimprime um trace gravado.
+
+    rastro = rastreador_do_ambiente('analise_completa', estacao='A409')
+    rastro.proximo('passo1', "[PASSO 1/3] ...")      # etapas sequenciais
+    with rastro.etapa('leitura', "  [1/4] Lendo..."):  # subetapas
+        df = ler_csv_inmet(arquivo)
+        rastro.anotar(linhas=len(df))
+    rastro.encerrar()
+
+Configuração (argumentos do script ou variáveis de ambiente):
+    --trace ARQUIVO.jsonl   / INSTRUMENTACAO_TRACE
+    --perfil ETAPA[,ETAPA]  / INSTRUMENTACAO_PERFIL  (cProfile; '*' = todas)
+
+Pico de RSS: no Linux o pico é zerado no início de cada etapa
+(/proc/self/clear_refs), então o valor é o da própria etapa; nos demais
+sistemas é o pico do processo até ali (escopo 'processo'). Etapas em threads
+paralelas compartilham o mesmo pico.
+"""
+
+import argparse
+import atexit
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+
+# ============================================================================
+# MEDIDAS DO PROCESSO
+# ============================================================================
+
+def _ler_proc(arquivo, padrao):
+    try:
+        with open(arquivo) as f:
+            correspondencia = re.search(padrao, f.read())
+        return int(correspondencia.group(1)) if correspondencia else None
+    except OSError:
+        return None
+
+
+def _reiniciar_pico_rss():
+    """Zera o pico de RSS (Linux). Devolve False se não for possível."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _pico_rss_bytes():
+    kb = _ler_proc('/proc/self/status', r'VmHWM:\s+(\d+)')
+    if kb is not None:
+        return kb * 1024
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if sys.platform == 'darwin' else pico * 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset
+    except (ImportError, AttributeError):
+        return None
+
+
+def _bytes_lidos_processo():
+    return _ler_proc('/proc/self/io', r'rchar:\s+(\d+)')
+
+
+# ============================================================================
+# RASTREADOR
+# ============================================================================
+
+class _Etapa:
+    def __init__(self, rastreador, nome, rotulo, contexto):
+        self.rastreador = rastreador
+        self.nome = nome
+        self.rotulo = rotulo
+        self.contexto = contexto
+        self.campos = {}
+        self.pico_filhos = 0
+        self.perfil = None
+
+    def __enter__(self):
+        self.rastreador._abrir(self)
+        return self
+
+    def __exit__(self, tipo, erro, _tb):
+        if erro is not None and not isinstance(erro, SystemExit):
+            self.campos.setdefault('status', 'erro')
+            self.campos.setdefault('erro', f'{tipo.__name__}: {erro}')
+        self.rastreador._fechar(self)
+        return False
+
+
+class Rastreador:
+    """Coleta registros de etapas; grava trace JSON/JSONL e imprime a visão de console."""
+
+    def __init__(self, script, arquivo_trace=None, perfilar=(), pasta_perfis=None, imprimir=True, **contexto):
+        self.script = script
+        self.arquivo_trace = arquivo_trace
+        self.perfilar = set(perfilar)
+        self.pasta_perfis = pasta_perfis or (os.path.dirname(arquivo_trace) if arquivo_trace else '.') or '.'
+        self.imprimir = imprimir
+        self.contexto = contexto
+        self.registros = []
+        self.inicio = time.perf_counter()
+        self.cpu_inicio = time.process_time()
+        self._local = threading.local()
+        self._trava = threading.Lock()
+        self._sequencial = None
+        self._encerrado = False
+        self._pico_por_etapa = _reiniciar_pico_rss()
+        if arquivo_trace and arquivo_trace.endswith('.jsonl'):
+            open(arquivo_trace, 'w').close()
+
+    # --- pilha de etapas abertas (por thread) ---
+
+    def _pilha(self):
+        if not hasattr(self._local, 'pilha'):
+            self._local.pilha = []
+        return self._local.pilha
+
+    def etapa(self, nome, rotulo=None, **contexto):
+        """Context manager de uma etapa (aninhável)."""
+        return _Etapa(self, nome, rotulo, contexto)
+
+    def proximo(self, nome, rotulo=None, **contexto):
+        """Encerra a etapa sequencial anterior (se houver) e abre a próxima."""
+        if self._sequencial is not None:
+            self._fechar(self._sequencial)
+        self._sequencial = _Etapa(self, nome, rotulo, contexto)
+        self._abrir(self._sequencial)
+        return self._sequencial
+
+    def anotar(self, **campos):
+        """Adiciona campos (linhas, bytes_lidos, cache, ...) à etapa aberta mais interna."""
+        pilha = self._pilha()
+        if pilha:
+            pilha[-1].campos.update(campos)
+
+    def falhar(self, erro):
+        """Marca as etapas abertas como falhas (antes de um exit)."""
+        for etapa in self._pilha():
+            etapa.campos['status'] = 'erro'
+            etapa.campos['erro'] = f'{type(erro).__name__}: {erro}'
+
+    def _abrir(self, etapa):
+        pilha = self._pilha()
+        if pilha:
+            # O pico acumulado até aqui pertence à etapa mãe
+            pilha[-1].pico_filhos = max(pilha[-1].pico_filhos, _pico_rss_bytes() or 0)
+        etapa.caminho = '/'.join([e.nome for e in pilha] + [etapa.nome])
+        etapa.herdado = {**self.contexto, **{k: v for e in pilha for k, v in e.contexto.items()}, **etapa.contexto}
+        pilha.append(etapa)
+        if etapa.rotulo and self.imprimir:
+            print(etapa.rotulo)
+        if self._pico_por_etapa:
+            _reiniciar_pico_rss()
+        if '*' in self.perfilar or etapa.nome in self.perfilar:
+            try:
+                etapa.perfil = cProfile.Profile()
+                etapa.perfil.enable()
+            except ValueError:
+                # Outro profiler já ativo (etapa mãe também perfilada)
+                etapa.perfil = None
+        etapa.inicio_data = datetime.now().isoformat(timespec='milliseconds')
+        etapa.bytes_inicio = _bytes_lidos_processo()
+        etapa.cpu_inicio = time.process_time()
+        etapa.t_inicio = time.perf_counter()
+
+    def _fechar(self, etapa):
+        pilha = self._pilha()
+        # Fecha antes as subetapas deixadas abertas
+        while etapa in pilha and pilha[-1] is not etapa:
+            self._fechar(pilha[-1])
+
+        segundos = time.perf_counter() - etapa.t_inicio
+        cpu = time.process_time() - etapa.cpu_inicio
+        if etapa.perfil is not None:
+            etapa.perfil.disable()
+        pico = max(_pico_rss_bytes() or 0, etapa.pico_filhos) or None
+        bytes_fim = _bytes_lidos_processo()
+
+        if etapa in pilha:
+            pilha.pop()
+        if pilha and pico:
+            pilha[-1].pico_filhos = max(pilha[-1].pico_filhos, pico)
+        if etapa is self._sequencial:
+            self._sequencial = None
+
+        registro = {
+            'tipo': 'etapa',
+            'script': self.script,
+            'etapa': etapa.caminho,
+            **etapa.herdado,
+            'inicio': etapa.inicio_data,
+            'segundos': round(segundos, 6),
+            'cpu_segundos': round(cpu, 6),
+            'pico_rss_mb': round(pico / 1e6, 2) if pico else None,
+            'escopo_pico': 'etapa' if self._pico_por_etapa else 'processo',
+            'linhas': None,
+            'bytes_lidos': (bytes_fim - etapa.bytes_inicio) if bytes_fim is not None else None,
+            'status': 'ok',
+        }
+        registro.update(etapa.campos)
+
+        if etapa.perfil is not None:
+            nome_perfil = re.sub(r'[^\w.-]+', '_', f'perfil_{self.script}_{etapa.caminho}') + '.prof'
+            registro['perfil'] = os.path.join(self.pasta_perfis, nome_perfil)
+            etapa.perfil.dump_stats(registro['perfil'])
+
+        self._registrar(registro)
+        if self.imprimir:
+            print(formatar_registro(registro, recuo=len(pilha)))
+
+    def _registrar(self, registro):
+        with self._trava:
+            self.registros.append(registro)
+            if self.arquivo_trace and self.arquivo_trace.endswith('.jsonl'):
+                with open(self.arquivo_trace, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+    def encerrar(self, imprimir_resumo=True):
+        """Fecha etapas abertas, grava o registro final e imprime o resumo."""
+        if self._encerrado:
+            return
+        self._encerrado = True
+        pilha = self._pilha()
+        while pilha:
+            self._fechar(pilha[0])
+        pico = _pico_rss_bytes()
+        resumo = {
+            'tipo': 'processo',
+            'script': self.script,
+            **self.contexto,
+            'segundos': round(time.perf_counter() - self.inicio, 6),
+            'cpu_segundos': round(time.process_time() - self.cpu_inicio, 6),
+            'status': 'erro' if any(r.get('status') == 'erro' for r in self.registros) else 'ok',
+        }
+        if not self._pico_por_etapa and pico:
+            resumo['pico_rss_mb'] = round(pico / 1e6, 2)
+        self._registrar(resumo)
+        if self.arquivo_trace and not self.arquivo_trace.endswith('.jsonl'):
+            with open(self.arquivo_trace, 'w', encoding='utf-8') as f:
+                json.dump(self.registros, f, ensure_ascii=False, indent=2)
+        if self.imprimir and imprimir_resumo:
+            imprimir_tabela(self.registros)
+            if self.arquivo_trace:
+                print(f"   Trace salvo em: {self.arquivo_trace}")
+
+
+# ============================================================================
+# VISÃO DE CONSOLE
+# ============================================================================
+
+def formatar_registro(registro, recuo=0):
+    """Linha de métricas de um registro de etapa."""
+    partes = [f"{registro['segundos']:.3f}s", f"CPU {registro['cpu_segundos']:.3f}s"]
+    if registro.get('pico_rss_mb') is not None:
+        partes.append(f"RSS pico {registro['pico_rss_mb']:.1f} MB")
+    if registro.get('linhas') is not None:
+        partes.append(f"{registro['linhas']:,} linhas")
+    if (registro.get('bytes_lidos') or 0) >= 10_000:
+        partes.append(f"{registro['bytes_lidos'] / 1e6:.2f} MB lidos")
+    if registro.get('cache'):
+        partes.append("cache")
+    nome = registro['etapa'].rsplit('/', 1)[-1]
+    linha = f"{'   ' * (recuo + 1)}⏱️  {nome}: {' | '.join(partes)}"
+    if registro.get('perfil'):
+        linha += f"\n{'   ' * (recuo + 1)}🔬 Perfil: {registro['perfil']} (python -m pstats)"
+    if registro.get('status') == 'erro':
+        linha += f"\n{'   ' * (recuo + 1)}❌ {registro.get('erro', 'erro')}"
+    return linha
+
+
+def imprimir_tabela(registros):
+    etapas = [r for r in registros if r['tipo'] == 'etapa']
+    processo = next((r for r in registros if r['tipo'] == 'processo'), None)
+    print("\n⏱️  Instrumentação por etapa:")
+    print(f"   {'etapa':<32} {'parede (s)':>10} {'CPU (s)':>9} {'RSS (MB)':>9} {'linhas':>9} {'lidos (MB)':>10}")
+    for r in etapas:
+        niveis = r['etapa'].split('/')
+        nome = '  ' * (len(niveis) - 1) + niveis[-1]
+        print(f"   {nome[:32]:<32} {r['segundos']:10.3f} {r['cpu_segundos']:9.3f} "
+              f"{_ou_traco(r.get('pico_rss_mb'), '.1f'):>9} {_ou_traco(r.get('linhas'), ','):>9} "
+              f"{_ou_traco(r['bytes_lidos'] / 1e6 if r.get('bytes_lidos') else None, '.2f'):>10}")
+    if processo:
+        print(f"   {'TOTAL (processo)':<32} {processo['segundos']:10.3f} {processo['cpu_segundos']:9.3f}")
+
+
+def _ou_traco(valor, formato):
+    return '-' if valor is None else format(valor, formato)
+
+
+def ler_trace(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        if caminho.endswith('.jsonl'):
+            return [json.loads(linha) for linha in f if linha.strip()]
+        return json.load(f)
+
+
+# ============================================================================
+# CONFIGURAÇÃO PELOS SCRIPTS
+# ============================================================================
+
+def rastreador_do_ambiente(script, argv=None, **contexto):
+    """Rastreador configurado por --trace/--perfil (ou variáveis de ambiente).
+
+    Os argumentos desconhecidos são ignorados, então os scripts não precisam
+    de argparse próprio. O trace é gravado também se o script sair com exit().
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--trace', default=os.environ.get('INSTRUMENTACAO_TRACE'))
+    parser.add_argument('--perfil', default=os.environ.get('INSTRUMENTACAO_PERFIL', ''))
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    perfilar = [nome.strip() for nome in args.perfil.split(',') if nome.strip()]
+    rastreador = Rastreador(script, args.trace, perfilar, **contexto)
+    atexit.register(rastreador.encerrar)
+    return rastreador
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mostra um trace de instrumentação gravado")
+    sub = parser.add_subparsers(dest='comando', required=True)
+    p_resumo = sub.add_parser('resumo', help="Tabela por etapa de um trace JSON/JSONL")
+    p_resumo.add_argument('arquivo')
+    args = parser.parse_args(argv)
+
+    registros = ler_trace(args.arquivo)
+    for script in dict.fromkeys(r['script'] for r in registros):
+        print("=" * 70)
+        print(f"TRACE: {script}")
+        print("=" * 70)
+        imprimir_tabela([r for r in registros if r['script'] == script])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Leitura dos CSVs do INMET direto dos ZIPs anuais (ex.: 2023.zip), sem extrair
+nada para o disco.
+
+Os membros são filtrados por região/UF/estação usando apenas o nome do arquivo
+(INMET_NE_SE_A409_...), ou seja, antes de descomprimir qualquer byte. Cada
+membro selecionado é lido em blocos a partir do fluxo descomprimido e passa
+pelo mesmo caminho de parsing de inmet_comum.ler_csv_inmet (em blocos).
+
+Uso:
+    python leitor_zip_inmet.py 2023.zip --uf SE --estacao A409
+"""
+
+import argparse
+import sys
+import zipfile
+
+import pandas as pd
+
+from inmet_comum import (extrair_info_nome_arquivo, ler_csv_inmet_em_blocos, processar_datas,
+                         converter_colunas, reamostrar_diario)
+
+LINHAS_POR_BLOCO = 100_000
+
+
+def _normalizar_filtro(valores):
+    if valores is None:
+        return None
+    if isinstance(valores, str):
+        valores = [valores]
+    return {v.upper() for v in valores}
+
+
+def listar_membros_zip(caminho_zip, regiao=None, uf=None, estacao=None):
+    """Lista (nome_do_membro, info) dos CSVs do INMET que passam pelos filtros.
+
+    Os filtros aceitam um valor ou uma lista; `estacao` casa com o código WMO
+    (A409) ou com o nome da estação (ARACAJU). Só o diretório central do ZIP é lido.
+    """
+    regiao, uf, estacao = (_normalizar_filtro(f) for f in (regiao, uf, estacao))
+    membros = []
+    with zipfile.ZipFile(caminho_zip) as zf:
+        for zinfo in zf.infolist():
+            if zinfo.is_dir():
+                continue
+            info = extrair_info_nome_arquivo(zinfo.filename)
+            if info is None:
+                continue
+            if regiao and info['regiao'].upper() not in regiao:
+                continue
+            if uf and info['uf'].upper() not in uf:
+                continue
+            if estacao and not ({info['codigo'].upper(), info['estacao'].upper()} & estacao):
+                continue
+            membros.append((zinfo.filename, info))
+    return membros
+
+
+def ler_membro_em_blocos(zf, nome_membro, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """Gera DataFrames brutos (como ler_csv_inmet) lidos em blocos do membro do ZIP."""
+    with zf.open(nome_membro) as fluxo:
+        yield from ler_csv_inmet_em_blocos(fluxo, linhas_por_bloco)
+
+
+def preprocessar_membro_zip(caminho_zip, nome_membro, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """PASSO 1 de um membro do ZIP, convertendo bloco a bloco.
+
+    Só as colunas mapeadas (já em float) de cada bloco ficam em memória; a
+    reamostragem diária é feita no final sobre os blocos concatenados.
+    """
+    with zipfile.ZipFile(caminho_zip) as zf:
+        blocos = [converter_colunas(processar_datas(bloco))
+                  for bloco in ler_membro_em_blocos(zf, nome_membro, linhas_por_bloco)]
+    return reamostrar_diario(pd.concat(blocos))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lista/pré-processa CSVs do INMET dentro de um ZIP anual")
+    parser.add_argument('zip', help="ZIP anual do INMET (ex.: 2023.zip)")
+    parser.add_argument('--regiao', nargs='*', help="Filtrar por região (NE, SE, ...)")
+    parser.add_argument('--uf', nargs='*', help="Filtrar por UF (SE, BA, ...)")
+    parser.add_argument('--estacao', nargs='*', help="Filtrar por código WMO ou nome da estação")
+    parser.add_argument('--saida', help="Se informado, pré-processa os membros e salva o diário neste CSV")
+    args = parser.parse_args(argv)
+
+    membros = listar_membros_zip(args.zip, args.regiao, args.uf, args.estacao)
+    print(f"✓ {len(membros)} membro(s) selecionado(s) em {args.zip}")
+    for nome, info in membros:
+        print(f"   - {info['codigo']} {info['uf']} {info['estacao']}: {nome}")
+
+    if args.saida and membros:
+        frames = []
+        for nome, info in membros:
+            df_diario = preprocessar_membro_zip(args.zip, nome)
+            df_diario.index.name = 'Data'
+            df_diario.insert(0, 'Codigo_Estacao', info['codigo'])
+            frames.append(df_diario)
+        pd.concat(frames).reset_index().set_index(['Codigo_Estacao', 'Data']).sort_index().to_csv(args.saida)
+        print(f"✓ Arquivo salvo: {args.saida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modo fora da memória (out-of-core) para o histórico horário inteiro.
+
+Os scripts do pipeline fazem pd.read_csv do arquivo todo e df_processado
+copia as colunas de novo: bom para 8.760 linhas, inviável para 100M+ linhas
+horárias de todas as estações desde 2000. Aqui pré-processamento,
+reamostragem diária, junção com os desastres e correlação rodam em blocos
+de tamanho fixo, com a memória limitada por --limite-memoria-mb:
+
+  1. MAPA: a entrada (tabela horária longa ou CSVs do INMET) é lida em
+     blocos de linhas; cada bloco vira parciais diárias mescláveis por
+     (estação, dia) -- soma e contagem (sum/mean), máximo, mínimo, como no
+     modo_incremental -- gravadas em disco (registros binários de tamanho
+     fixo) em uma de N partições escolhida pelo hash da estação;
+  2. REDUÇÃO: cada partição (um subconjunto das estações, todos os dias
+     delas) é lida sozinha; parciais do mesmo (estação, dia) vindas de
+     blocos diferentes são combinadas exatamente (somas somadas,
+     máximo dos máximos...), a grade diária de cada estação é completada
+     como no resample('D') e os valores diários saem por valores_diarios;
+  3. os desastres entram por estação (eventos reais de eventos_desastre ou
+     o dummy do PASSO 2) e cada partição vira um acumulador de co-momentos
+     (estatisticas_online), combinado exatamente com os das outras: a matriz
+     de correlação final é a mesma do df.corr() da tabela inteira;
+  4. a tabela diária é anexada ao CSV de saída partição a partição.
+
+Nada guarda a entrada inteira: o pico de RSS depende do tamanho do bloco e
+de uma partição, não do tamanho da entrada.
+
+Uso:
+    python modo_fora_de_memoria.py --tabela horario_rede.csv --limite-memoria-mb 512
+    python modo_fora_de_memoria.py --pasta dados_inmet --eventos s2id.csv --catalogo estacoes.csv
+    python modo_fora_de_memoria.py --benchmark 0.5 2 --limite-memoria-mb 256
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from etapas_pipeline import COLUNAS_ANALISE, COLUNAS_DESASTRES, PARAMETROS_DESASTRES
+from inmet_comum import (AGREGACOES_DIARIAS, extrair_info_nome_arquivo, ler_csv_inmet_em_blocos, processar_datas,
+                         converter_colunas)
+from modo_incremental import valores_diarios
+import estatisticas_online as eo
+
+LIMITE_MEMORIA_MB = 512
+# Memória por linha horária de um bloco em processamento (texto lido, colunas
+# convertidas e o groupby), medida com a tabela longa; inclui folga
+BYTES_POR_LINHA = 400
+# Interpretador + numpy/pandas importados, antes do primeiro bloco
+MEMORIA_BASE_MB = 130
+LINHAS_POR_BLOCO_MINIMO = 50_000
+PARTICOES = 32
+ARQUIVO_DIARIO = 'inmet_diario_rede.csv'
+ARQUIVO_CORRELACAO = 'correlation_matrix_rede.csv'
+ARQUIVO_ACUMULADOR = 'acumulador_rede.npz'
+EPOCA = np.datetime64('1970-01-01', 'D')
+
+
+def linhas_por_bloco_para(limite_mb):
+    """Linhas horárias por bloco para o pico de RSS do processo ficar dentro de `limite_mb`."""
+    return max(LINHAS_POR_BLOCO_MINIMO, int((limite_mb - MEMORIA_BASE_MB) * 1e6 / BYTES_POR_LINHA))
+
+
+def _pico_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for linha in f:
+                if linha.startswith('VmHWM:'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return float('nan')
+
+
+# ============================================================================
+# FONTES EM BLOCOS (Codigo_Estacao, Data_Hora, variáveis)
+# ============================================================================
+
+def blocos_tabela_longa(caminho, linhas_por_bloco):
+    """Tabela horária longa (Codigo_Estacao, Data_Hora, variáveis) lida em blocos."""
+    with pd.read_csv(caminho, chunksize=linhas_por_bloco, dtype={'Codigo_Estacao': 'category'}) as leitor:
+        for bloco in leitor:
+            bloco['Data_Hora'] = pd.to_datetime(bloco['Data_Hora'], format='ISO8601')
+            yield bloco
+
+
+def blocos_inmet(arquivos, linhas_por_bloco):
+    """CSVs do INMET (um por estação e ano) lidos em blocos, já convertidos como no PASSO 1."""
+    for caminho in arquivos:
+        info = extrair_info_nome_arquivo(caminho)
+        if info is None:
+            print(f"⚠️  Nome fora do padrão INMET, ignorado: {caminho}")
+            continue
+        for bloco in ler_csv_inmet_em_blocos(caminho, linhas_por_bloco):
+            df = converter_colunas(processar_datas(bloco)).reset_index()
+            df.insert(0, 'Codigo_Estacao', info['codigo'])
+            yield df
+
+
+# ============================================================================
+# PARCIAIS DIÁRIAS EM REGISTROS BINÁRIOS
+# ============================================================================
+
+def _campos_parciais(agregacoes=AGREGACOES_DIARIAS):
+    """(nome do campo, variável, combinação) na mesma convenção do modo_incremental."""
+    campos = []
+    for coluna, funcao in agregacoes.items():
+        if funcao in ('sum', 'mean'):
+            campos += [(f'{coluna}__soma', coluna, 'sum'), (f'{coluna}__n', coluna, 'count')]
+        else:
+            campos.append((f'{coluna}__{funcao}', coluna, funcao))
+    return campos
+
+
+def dtype_parciais(agregacoes=AGREGACOES_DIARIAS):
+    # 'estacao' é a posição do código em uma lista à parte (códigos de qualquer tamanho)
+    return np.dtype([('estacao', '<i4'), ('dia', '<i4')]
+                    + [(nome, '<f8') for nome, _, _ in _campos_parciais(agregacoes)])
+
+
+def parciais_do_bloco(bloco, agregacoes=AGREGACOES_DIARIAS):
+    """(codigos, registros): parciais (estação, dia) das linhas horárias de um bloco.
+
+    registros['estacao'] é a posição em `codigos` (np.ndarray de str).
+    """
+    dias = (bloco['Data_Hora'].to_numpy().astype('datetime64[D]') - EPOCA).astype(np.int32)
+    colunas = [c for c in agregacoes if c in bloco.columns]
+    grupos = bloco[colunas].groupby([bloco['Codigo_Estacao'].astype(str).to_numpy(), dias], sort=False)
+    resultados = {}
+    for funcao in {'sum', 'count', 'max', 'min'}:
+        if any(f == funcao for _, c, f in _campos_parciais(agregacoes) if c in colunas):
+            resultados[funcao] = getattr(grupos, funcao)()
+    chaves = next(iter(resultados.values())).index
+    registros = np.empty(len(chaves), dtype=dtype_parciais(agregacoes))
+    posicoes, codigos = pd.factorize(chaves.get_level_values(0))
+    registros['estacao'] = posicoes
+    registros['dia'] = chaves.get_level_values(1).to_numpy()
+    for nome, coluna, funcao in _campos_parciais(agregacoes):
+        if coluna in colunas:
+            registros[nome] = resultados[funcao][coluna].to_numpy(dtype=np.float64)
+        else:
+            registros[nome] = 0.0 if funcao in ('sum', 'count') else np.nan
+    return np.asarray(codigos, dtype=object), registros
+
+
+class ParticoesEmDisco:
+    """N arquivos de registros de parciais; a estação decide a partição (crc32).
+
+    Os códigos das estações ficam em memória (`estacoes`, poucas centenas);
+    nos arquivos vai só a posição de cada código nessa lista.
+    """
+
+    def __init__(self, pasta, n_particoes=PARTICOES, agregacoes=AGREGACOES_DIARIAS):
+        os.makedirs(pasta, exist_ok=True)
+        self.pasta = pasta
+        self.n = n_particoes
+        self.dtype = dtype_parciais(agregacoes)
+        self.bytes_gravados = 0
+        self.estacoes = []
+        self._posicoes = {}
+        self._destinos = []
+        self._arquivos = [open(self._caminho(p), 'wb') for p in range(n_particoes)]
+
+    def _caminho(self, particao):
+        return os.path.join(self.pasta, f'parte_{particao:04d}.bin')
+
+    def _posicao(self, codigo):
+        if codigo not in self._posicoes:
+            self._posicoes[codigo] = len(self.estacoes)
+            self.estacoes.append(codigo)
+            self._destinos.append(zlib.crc32(str(codigo).encode()) % self.n)
+        return self._posicoes[codigo]
+
+    def gravar(self, codigos, registros):
+        posicoes = np.array([self._posicao(c) for c in codigos], dtype=np.int32)
+        registros['estacao'] = posicoes[registros['estacao']]
+        destino = np.asarray(self._destinos)[registros['estacao']]
+        ordem = np.argsort(destino, kind='stable')
+        fronteiras = np.searchsorted(destino[ordem], np.arange(self.n + 1))
+        for p in range(self.n):
+            if fronteiras[p + 1] > fronteiras[p]:
+                registros[ordem[fronteiras[p]:fronteiras[p + 1]]].tofile(self._arquivos[p])
+        self.bytes_gravados += registros.nbytes
+
+    def fechar(self):
+        for arquivo in self._arquivos:
+            arquivo.close()
+
+    def ler(self, particao):
+        return np.fromfile(self._caminho(particao), dtype=self.dtype)
+
+    def maior_particao_bytes(self):
+        return max(os.path.getsize(self._caminho(p)) for p in range(self.n))
+
+
+def reduzir_particao(registros, estacoes, agregacoes=AGREGACOES_DIARIAS):
+    """Tabela diária (Codigo_Estacao, Data) de uma partição, igual ao resample('D').agg por estação.
+
+    Parciais do mesmo (estação, dia) são combinadas; dias sem nenhuma linha
+    horária entre o primeiro e o último dia da estação entram como no
+    resample (soma 0, demais NaN).
+    """
+    campos = _campos_parciais(agregacoes)
+    df = pd.DataFrame({nome: registros[nome] for nome, _, _ in campos})
+    codigos = np.asarray(estacoes, dtype=object)[registros['estacao']]
+    chave = [pd.Index(codigos, name='Codigo_Estacao'), pd.Index(registros['dia'], name='dia')]
+    grupos = df.groupby(chave, sort=True)
+    combinacao = {nome: ('sum' if funcao in ('sum', 'count') else funcao) for nome, _, funcao in campos}
+    parciais = grupos.agg(combinacao)
+
+    # Grade diária completa de cada estação (primeiro..último dia)
+    limites = parciais.reset_index().groupby('Codigo_Estacao')['dia'].agg(['min', 'max'])
+    tamanhos = (limites['max'] - limites['min'] + 1).to_numpy()
+    estacoes = np.repeat(limites.index.to_numpy(), tamanhos)
+    dias = np.repeat(limites['min'].to_numpy(), tamanhos) + (np.arange(tamanhos.sum())
+                                                              - np.repeat(np.cumsum(tamanhos) - tamanhos, tamanhos))
+    parciais = parciais.reindex(pd.MultiIndex.from_arrays([estacoes, dias], names=['Codigo_Estacao', 'dia']))
+    for nome, _, funcao in campos:
+        if funcao in ('sum', 'count'):
+            parciais[nome] = parciais[nome].fillna(0.0)
+
+    diario = valores_diarios(parciais, {c: f for c, f in agregacoes.items()})
+    diario.index = pd.MultiIndex.from_arrays(
+        [estacoes, pd.DatetimeIndex((EPOCA + dias.astype('timedelta64[D]')).astype('datetime64[ns]'))],
+        names=['Codigo_Estacao', 'Data'])
+    return diario
+
+
+def _desastres_dummy(diario):
+    """Desastres simulados por estação, como em correlacao_defasada.ler_lote (PASSO 2)."""
+    from etapas_pipeline import criar_desastres_dummy
+    df = diario.groupby(level='Codigo_Estacao', group_keys=True).apply(
+        lambda g: criar_desastres_dummy(g.droplevel('Codigo_Estacao'), **PARAMETROS_DESASTRES))
+    df.index.names = ['Codigo_Estacao', 'Data']
+    return df
+
+
+# ============================================================================
+# EXECUÇÃO
+# ============================================================================
+
+def executar(blocos, pasta_temporaria, saida_diaria=ARQUIVO_DIARIO, n_particoes=PARTICOES, indice_eventos=None,
+             colunas=COLUNAS_ANALISE, ao_concluir_bloco=None):
+    """Pipeline completo em blocos. Devolve (acumulador, colunas, resumo).
+
+    `blocos` é um iterável de DataFrames horários (blocos_tabela_longa ou
+    blocos_inmet). As parciais ficam em `pasta_temporaria`.
+    """
+    resumo = {'blocos': 0, 'linhas_horarias': 0, 'estacoes': 0, 'dias': 0}
+    inicio = time.perf_counter()
+    particoes = ParticoesEmDisco(pasta_temporaria, n_particoes)
+    try:
+        for bloco in blocos:
+            particoes.gravar(*parciais_do_bloco(bloco))
+            resumo['blocos'] += 1
+            resumo['linhas_horarias'] += len(bloco)
+            if ao_concluir_bloco:
+                ao_concluir_bloco(resumo['blocos'], resumo['linhas_horarias'])
+    finally:
+        particoes.fechar()
+    resumo['segundos_mapa'] = time.perf_counter() - inicio
+    resumo['mb_derramados'] = particoes.bytes_gravados / 1e6
+    resumo['mb_maior_particao'] = particoes.maior_particao_bytes() / 1e6
+
+    inicio = time.perf_counter()
+    acumulador = None
+    colunas_usadas = None
+    cabecalho = True
+    for p in range(particoes.n):
+        registros = particoes.ler(p)
+        if len(registros) == 0:
+            continue
+        diario = reduzir_particao(registros, particoes.estacoes)
+        del registros
+        if indice_eventos is not None:
+            from eventos_desastre import mesclar_eventos
+            diario = mesclar_eventos(diario, indice_eventos)
+        else:
+            diario = _desastres_dummy(diario)
+        colunas_usadas = colunas_usadas or [c for c in colunas if c in diario.columns]
+        parcial = eo.acumular_lote(diario[colunas_usadas].to_numpy(dtype=np.float64))
+        acumulador = parcial if acumulador is None else eo.combinar(acumulador, parcial)
+        if saida_diaria:
+            diario.to_csv(saida_diaria, mode='w' if cabecalho else 'a', header=cabecalho)
+            cabecalho = False
+        resumo['estacoes'] += diario.index.get_level_values('Codigo_Estacao').nunique()
+        resumo['dias'] += len(diario)
+    resumo['segundos_reducao'] = time.perf_counter() - inicio
+    return acumulador, colunas_usadas, resumo
+
+
+def executar_em_memoria(caminho, colunas=COLUNAS_ANALISE):
+    """Referência: tabela inteira na memória, resample por estação, desastres e .corr()."""
+    df = pd.read_csv(caminho, dtype={'Codigo_Estacao': 'category'})
+    df['Data_Hora'] = pd.to_datetime(df['Data_Hora'], format='ISO8601')
+    df['Codigo_Estacao'] = df['Codigo_Estacao'].astype(str)
+    agregacoes = {c: f for c, f in AGREGACOES_DIARIAS.items() if c in df.columns}
+    diario = df.set_index('Data_Hora').groupby('Codigo_Estacao').resample('D').agg(agregacoes)
+    diario.index.names = ['Codigo_Estacao', 'Data']
+    diario = _desastres_dummy(diario)
+    return diario, diario[[c for c in colunas if c in diario.columns]].corr()
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def gerar_tabela_sintetica(caminho, n_linhas, n_estacoes=600, linhas_por_bloco=2_000_000, semente=0):
+    """Tabela horária longa sintética gravada em blocos (memória constante); estação a estação."""
+    rng = np.random.default_rng(semente)
+    horas_por_estacao = -(-n_linhas // n_estacoes)
+    inicio = np.datetime64('2000-01-01T00', 'h')
+    # Os mesmos instantes servem a todas as estações: formatados uma vez só
+    instantes = np.char.replace(np.datetime_as_string(inicio + np.arange(horas_por_estacao).astype('timedelta64[h]'),
+                                                      unit='s'), 'T', ' ')
+    escritas = 0
+    cabecalho = True
+    for e in range(n_estacoes):
+        for h0 in range(0, horas_por_estacao, linhas_por_bloco):
+            n = min(linhas_por_bloco, horas_por_estacao - h0, n_linhas - escritas)
+            if n <= 0:
+                return escritas
+            horas = np.arange(h0, h0 + n)
+            ciclo = np.sin(2 * np.pi * (horas % 24) / 24)
+            sazonal = np.sin(2 * np.pi * horas / (24 * 365.25))
+            chuva = np.where(rng.random(n) < 0.08, np.round(rng.gamma(0.5, 4.0, n), 1), 0.0)
+            tmax = np.round(26 + 3 * sazonal + 4 * ciclo + rng.normal(0, 1, n), 1)
+            df = pd.DataFrame({
+                'Codigo_Estacao': f'S{e:04d}',
+                'Data_Hora': instantes[h0:h0 + n],
+                'Precipitacao_mm': chuva,
+                'Temperatura_Maxima_C': tmax,
+                'Temperatura_Minima_C': np.round(tmax - np.abs(rng.normal(1.0, 0.5, n)), 1),
+                'Umidade_Relativa_Media_pct': np.round(np.clip(75 - 10 * ciclo + rng.normal(0, 8, n), 5, 100)),
+                'Vento_Rajada_Maxima_ms': np.round(np.abs(rng.normal(6, 2.5, n)), 1),
+            })
+            # Falhas de sensor (~3%) e horas inteiras ausentes (~1%)
+            df.loc[rng.random(n) < 0.03, 'Umidade_Relativa_Media_pct'] = np.nan
+            df = df[rng.random(n) >= 0.01]
+            df.to_csv(caminho, mode='w' if cabecalho else 'a', header=cabecalho, index=False)
+            cabecalho = False
+            escritas += n
+    return escritas
+
+
+def _medir_fora_de_memoria(caminho, limite_mb, pasta_temporaria, n_particoes):
+    inicio = time.perf_counter()
+    acumulador, colunas, resumo = executar(blocos_tabela_longa(caminho, linhas_por_bloco_para(limite_mb)),
+                                           pasta_temporaria, os.path.join(pasta_temporaria, 'diario.csv'),
+                                           n_particoes)
+    return time.perf_counter() - inicio, _pico_rss_mb(), eo.correlacao(acumulador, colunas), resumo
+
+
+def _medir_em_memoria(caminho):
+    inicio = time.perf_counter()
+    _, correlacao = executar_em_memoria(caminho)
+    return time.perf_counter() - inicio, _pico_rss_mb(), correlacao
+
+
+def _em_processo_novo(funcao, *args):
+    """Roda `funcao` em um processo filho, para o pico de RSS ser só dela."""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(funcao, *args).result()
+
+
+def benchmark(tamanhos_gb, limite_mb=LIMITE_MEMORIA_MB, pasta=None, n_particoes=PARTICOES, comparar_ate_gb=1.0):
+    memoria_total = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 1e9 if hasattr(os, 'sysconf') else np.nan
+    print(f"   Limite de memória: {limite_mb} MB ({linhas_por_bloco_para(limite_mb):,} linhas por bloco) | "
+          f"RAM da máquina: {memoria_total:.1f} GB | partições: {n_particoes}")
+    pasta = pasta or tempfile.mkdtemp(prefix='fora_de_memoria_')
+    try:
+        for gb in tamanhos_gb:
+            caminho = os.path.join(pasta, f'horario_{gb:g}gb.csv')
+            inicio = time.perf_counter()
+            # ~55 bytes por linha no CSV
+            linhas = gerar_tabela_sintetica(caminho, int(gb * 1e9 / 55))
+            tamanho = os.path.getsize(caminho) / 1e9
+            print(f"\n   Entrada: {linhas:,} linhas horárias, {tamanho:.2f} GB "
+                  f"(gerada em {time.perf_counter() - inicio:.0f}s)")
+
+            temporaria = os.path.join(pasta, 'particoes')
+            segundos, pico, correlacao, resumo = _em_processo_novo(
+                _medir_fora_de_memoria, caminho, limite_mb, temporaria, n_particoes)
+            print(f"   - fora da memória: {segundos:7.1f}s ({linhas / segundos / 1e6:.2f}M linhas/s), "
+                  f"pico RSS {pico:,.0f} MB | {resumo['blocos']} blocos, {resumo['dias']:,} dias, "
+                  f"{resumo['mb_derramados']:,.0f} MB em disco (maior partição {resumo['mb_maior_particao']:.0f} MB)")
+            if tamanho <= comparar_ate_gb:
+                s_mem, pico_mem, correlacao_mem = _em_processo_novo(_medir_em_memoria, caminho)
+                diferenca = np.nanmax(np.abs(correlacao.to_numpy() - correlacao_mem.to_numpy()))
+                print(f"   - tudo na memória:  {s_mem:7.1f}s, pico RSS {pico_mem:,.0f} MB "
+                      f"(~{pico_mem / tamanho / 1e3:.1f}x o tamanho do CSV) | diferença na correlação: {diferenca:.1e}")
+            else:
+                print(f"   - tudo na memória: não executado (precisaria de vários GB além dos "
+                      f"{memoria_total:.1f} GB de RAM)")
+            shutil.rmtree(temporaria, ignore_errors=True)
+            os.remove(caminho)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline horário -> diário -> correlação fora da memória")
+    origem = parser.add_mutually_exclusive_group()
+    origem.add_argument('--tabela', help="Tabela horária longa (Codigo_Estacao, Data_Hora, variáveis)")
+    origem.add_argument('--pasta', help="Pasta com os CSVs do INMET (busca recursiva)")
+    origem.add_argument('--benchmark', type=float, nargs='+', metavar='GB', help="Tabelas sintéticas desses tamanhos")
+    parser.add_argument('--limite-memoria-mb', type=int, default=LIMITE_MEMORIA_MB)
+    parser.add_argument('--particoes', type=int, default=PARTICOES, help="Partições das parciais em disco")
+    parser.add_argument('--temp', help="Pasta das parciais (padrão: temporária, apagada no fim)")
+    parser.add_argument('--eventos', nargs='*', help="CSVs de eventos reais (eventos_desastre); sem isso, dummy")
+    parser.add_argument('--catalogo', help="Catálogo de estações (eventos com Latitude/Longitude)")
+    parser.add_argument('--saida', default=ARQUIVO_DIARIO, help="Tabela diária (Codigo_Estacao, Data)")
+    parser.add_argument('--correlacao', default=ARQUIVO_CORRELACAO)
+    parser.add_argument('--acumulador', default=ARQUIVO_ACUMULADOR, help="Acumulador de co-momentos (.npz)")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("MODO FORA DA MEMÓRIA")
+    print("=" * 70)
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.limite_memoria_mb, args.temp, args.particoes)
+        return 0
+
+    linhas_por_bloco = linhas_por_bloco_para(args.limite_memoria_mb)
+    if args.pasta:
+        arquivos = sorted(glob.glob(os.path.join(args.pasta, '**', 'INMET_*.CSV'), recursive=True))
+        if not arquivos:
+            print(f"❌ ERRO: Nenhum CSV do INMET em {args.pasta}")
+            return 1
+        blocos = blocos_inmet(arquivos, linhas_por_bloco)
+        print(f"✓ {len(arquivos)} arquivo(s) do INMET")
+    else:
+        if not args.tabela or not os.path.exists(args.tabela):
+            print(f"❌ ERRO: Tabela não encontrada: {args.tabela}")
+            return 1
+        blocos = blocos_tabela_longa(args.tabela, linhas_por_bloco)
+
+    indice_eventos = None
+    if args.eventos:
+        from eventos_desastre import ler_eventos
+        from indice_estacoes import ler_catalogo
+        indice_eventos = ler_eventos(args.eventos, ler_catalogo(args.catalogo) if args.catalogo else None)
+        print(f"✓ Eventos de desastre: {', '.join(args.eventos)}")
+    else:
+        print(f"⚠️  Sem --eventos: desastres simulados por estação (PASSO 2: {', '.join(COLUNAS_DESASTRES)})")
+
+    temporaria = args.temp or tempfile.mkdtemp(prefix='fora_de_memoria_')
+    print(f"   Limite de memória: {args.limite_memoria_mb} MB -> {linhas_por_bloco:,} linhas por bloco | "
+          f"{args.particoes} partições em {temporaria}")
+
+    def progresso(n_blocos, linhas):
+        print(f"   [{n_blocos}] {linhas:,} linhas horárias | pico RSS {_pico_rss_mb():,.0f} MB", end='\r')
+
+    try:
+        acumulador, colunas, resumo = executar(blocos, temporaria, args.saida, args.particoes, indice_eventos,
+                                               ao_concluir_bloco=progresso)
+    finally:
+        if not args.temp:
+            shutil.rmtree(temporaria, ignore_errors=True)
+    print()
+    if acumulador is None:
+        print("❌ ERRO: Nenhuma linha horária lida")
+        return 1
+    print(f"✓ Mapa: {resumo['linhas_horarias']:,} linhas em {resumo['blocos']} blocos, "
+          f"{resumo['segundos_mapa']:.1f}s ({resumo['mb_derramados']:,.0f} MB de parciais em disco)")
+    print(f"✓ Redução: {resumo['estacoes']} estações, {resumo['dias']:,} dias em {resumo['segundos_reducao']:.1f}s")
+    print(f"✓ Salvo: {args.saida}")
+
+    eo.correlacao(acumulador, colunas).to_csv(args.correlacao)
+    eo.salvar_acumulador(args.acumulador, acumulador, colunas)
+    print(f"✓ Salvo: {args.correlacao} e {args.acumulador}")
+    print(f"   Pico de RSS: {_pico_rss_mb():,.0f} MB")
+    print("=" * 70)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
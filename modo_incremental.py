@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modo incremental (append) para uma estação.
+
+Em vez de reler o ano inteiro, refazer o resample('D'), o merge e o .corr(),
+o estado persistido em uma pasta guarda:
+
+  - parciais diárias mescláveis (soma, contagem, máximo, mínimo) por ano,
+    em arquivos colunares (parciais_<ano>.npz);
+  - os flags de desastre de cada dia;
+  - os acumuladores de co-momentos da matriz de correlação (estatisticas_online).
+
+Linhas horárias novas só recalculam os dias que tocam: a linha diária antiga
+desses dias sai dos acumuladores e a nova entra. Para um CSV do INMET que
+cresce, só os bytes após o último ponto lido são interpretados.
+
+O dataset dummy de desastres (quantil 0,95 da série inteira) depende da série
+completa e por isso não é incremental; aqui os flags vêm de uma tabela diária
+de desastres informada em --desastres (dias ausentes = 0, como o fillna(0)),
+guardada no estado e atualizável em qualquer append.
+
+Uso:
+    python modo_incremental.py anexar --estado estado_A409 INMET_...CSV --desastres desastres.csv
+    python modo_incremental.py correlacao --estado estado_A409 --saida correlation_matrix.csv
+    python modo_incremental.py verificar --estado estado_A409
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from cache_etapas import salvar_frame_colunar, ler_frame_colunar
+from etapas_pipeline import COLUNAS_CLIMATICAS, COLUNAS_DESASTRES
+from inmet_comum import (AGREGACOES_DIARIAS, LINHAS_CABECALHO, ler_csv_inmet, processar_datas,
+                         converter_colunas)
+import estatisticas_online as eo
+
+ARQUIVO_ESTADO = 'estado.json'
+ARQUIVO_ACUMULADOR = 'acumulador.npz'
+ARQUIVO_DESASTRES = 'desastres.npz'
+
+
+# ============================================================================
+# PARCIAIS DIÁRIAS MESCLÁVEIS
+# ============================================================================
+
+def _colunas_parciais(coluna, funcao):
+    if funcao in ('sum', 'mean'):
+        return [f'{coluna}__soma', f'{coluna}__n']
+    return [f'{coluna}__{funcao}']
+
+
+def parciais_diarias(df_processado, agregacoes=AGREGACOES_DIARIAS):
+    """Soma/contagem/máximo/mínimo por dia das linhas horárias (vetorizado)."""
+    dias = df_processado.index.floor('D')
+    grupos = df_processado.groupby(dias)
+    partes = {}
+    for coluna, funcao in agregacoes.items():
+        serie = df_processado[coluna] if coluna in df_processado.columns else pd.Series(np.nan, index=df_processado.index)
+        grupo = serie.groupby(dias)
+        if funcao in ('sum', 'mean'):
+            partes[f'{coluna}__soma'] = grupo.sum()
+            partes[f'{coluna}__n'] = grupo.count().astype(np.float64)
+        else:
+            partes[f'{coluna}__{funcao}'] = getattr(grupo, funcao)()
+    parciais = pd.DataFrame(partes, index=grupos.size().index)
+    parciais.index.name = 'Data'
+    return parciais
+
+
+def _parciais_vazias(dias, agregacoes=AGREGACOES_DIARIAS):
+    partes = {}
+    for coluna, funcao in agregacoes.items():
+        for nome in _colunas_parciais(coluna, funcao):
+            partes[nome] = 0.0 if nome.endswith(('__soma', '__n')) else np.nan
+    parciais = pd.DataFrame(partes, index=pd.DatetimeIndex(dias, name='Data'))
+    return parciais
+
+
+def mesclar_parciais(a, b, agregacoes=AGREGACOES_DIARIAS):
+    """Combina duas tabelas de parciais (dias em comum são somados/maximizados)."""
+    indice = a.index.union(b.index)
+    a, b = a.reindex(indice), b.reindex(indice)
+    resultado = pd.DataFrame(index=indice)
+    for coluna, funcao in agregacoes.items():
+        for nome in _colunas_parciais(coluna, funcao):
+            if nome.endswith(('__soma', '__n')):
+                resultado[nome] = a[nome].fillna(0) + b[nome].fillna(0)
+            elif funcao == 'max':
+                resultado[nome] = np.fmax(a[nome], b[nome])
+            else:
+                resultado[nome] = np.fmin(a[nome], b[nome])
+    return resultado
+
+
+def valores_diarios(parciais, agregacoes=AGREGACOES_DIARIAS):
+    """Valores diários equivalentes a resample('D').agg(agregacoes)."""
+    diario = pd.DataFrame(index=parciais.index)
+    for coluna, funcao in agregacoes.items():
+        if funcao == 'sum':
+            # Como no pandas: soma de um dia sem dados = 0
+            diario[coluna] = parciais[f'{coluna}__soma']
+        elif funcao == 'mean':
+            n = parciais[f'{coluna}__n']
+            diario[coluna] = (parciais[f'{coluna}__soma'] / n).where(n > 0)
+        else:
+            diario[coluna] = parciais[f'{coluna}__{funcao}']
+    return diario
+
+
+# ============================================================================
+# ESTADO EM DISCO
+# ============================================================================
+
+def _colunas_analise():
+    return COLUNAS_CLIMATICAS + COLUNAS_DESASTRES
+
+
+def carregar_estado(pasta):
+    caminho = os.path.join(pasta, ARQUIVO_ESTADO)
+    if os.path.exists(caminho):
+        with open(caminho, encoding='utf-8') as f:
+            estado = json.load(f)
+        acumulador, _ = eo.ler_acumulador(os.path.join(pasta, ARQUIVO_ACUMULADOR))
+    else:
+        estado = {'colunas': _colunas_analise(), 'anos': [], 'inicio': None, 'fim': None,
+                  'ultimo_horario': None, 'arquivos': {}}
+        acumulador = eo.acumulador_vazio(len(estado['colunas']))
+    return estado, acumulador
+
+
+def salvar_estado(pasta, estado, acumulador):
+    os.makedirs(pasta, exist_ok=True)
+    eo.salvar_acumulador(os.path.join(pasta, ARQUIVO_ACUMULADOR), acumulador, estado['colunas'])
+    temporario = os.path.join(pasta, ARQUIVO_ESTADO + '.tmp')
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2)
+    os.replace(temporario, os.path.join(pasta, ARQUIVO_ESTADO))
+
+
+def _caminho_ano(pasta, ano):
+    return os.path.join(pasta, f'parciais_{ano}.npz')
+
+
+def _ler_ano(pasta, ano):
+    caminho = _caminho_ano(pasta, ano)
+    if os.path.exists(caminho):
+        return ler_frame_colunar(caminho)
+    return None
+
+
+def _ler_desastres_estado(pasta):
+    caminho = os.path.join(pasta, ARQUIVO_DESASTRES)
+    if os.path.exists(caminho):
+        return ler_frame_colunar(caminho)
+    return pd.DataFrame(columns=COLUNAS_DESASTRES, index=pd.DatetimeIndex([], name='Data'), dtype=int)
+
+
+def _linhas(parciais_com_flags, colunas):
+    diario = valores_diarios(parciais_com_flags)
+    for coluna in COLUNAS_DESASTRES:
+        diario[coluna] = parciais_com_flags[coluna]
+    return diario[colunas].to_numpy(dtype=np.float64)
+
+
+# ============================================================================
+# APPEND
+# ============================================================================
+
+def anexar_horario(pasta, df_processado, df_desastres=None):
+    """Incorpora linhas horárias novas (formato de converter_colunas) ao estado.
+
+    Linhas com horário <= último horário já incorporado são ignoradas
+    (semântica de append). Devolve um resumo do que foi atualizado.
+    """
+    estado, acumulador = carregar_estado(pasta)
+    colunas = estado['colunas']
+
+    df_processado = df_processado.sort_index()
+    if estado['ultimo_horario'] is not None:
+        novas = df_processado.index > pd.Timestamp(estado['ultimo_horario'])
+    else:
+        novas = np.ones(len(df_processado), dtype=bool)
+    ignoradas = int((~novas).sum())
+    df_processado = df_processado[novas]
+
+    novas_parciais = parciais_diarias(df_processado) if len(df_processado) else _parciais_vazias([])
+
+    # Dias sem nenhuma linha entre o fim anterior e os dias novos (o resample os cria)
+    if len(novas_parciais):
+        inicio_antigo = pd.Timestamp(estado['inicio']) if estado['inicio'] else None
+        fim_antigo = pd.Timestamp(estado['fim']) if estado['fim'] else None
+        inicio = min(filter(None, [inicio_antigo, novas_parciais.index.min()]))
+        fim = max(filter(None, [fim_antigo, novas_parciais.index.max()]))
+        faixa = pd.date_range(inicio, fim, freq='D')
+        if inicio_antigo is not None:
+            faixa = faixa[(faixa < inicio_antigo) | (faixa > fim_antigo)]
+        lacunas = faixa.difference(novas_parciais.index)
+        if len(lacunas):
+            novas_parciais = mesclar_parciais(novas_parciais, _parciais_vazias(lacunas))
+        estado['inicio'], estado['fim'] = str(inicio.date()), str(fim.date())
+
+    # A tabela de desastres fica no estado para valer também para os dias que chegarem depois
+    flags_armazenados = _ler_desastres_estado(pasta)
+    if df_desastres is not None:
+        # Colunas/dias não informados mantêm o valor guardado (ou 0)
+        df_desastres = df_desastres.reindex(columns=COLUNAS_DESASTRES).astype(float)
+        df_desastres.index = pd.DatetimeIndex(df_desastres.index, name='Data').floor('D')
+        df_desastres = df_desastres[~df_desastres.index.duplicated(keep='last')]
+        flags_armazenados = df_desastres.combine_first(flags_armazenados.astype(float)).fillna(0).astype(int)
+        os.makedirs(pasta, exist_ok=True)
+        salvar_frame_colunar(flags_armazenados, os.path.join(pasta, ARQUIVO_DESASTRES))
+
+    anos = set(novas_parciais.index.year)
+    if df_desastres is not None and len(df_desastres):
+        anos |= set(df_desastres.index.year) & set(estado['anos'])
+
+    dias_tocados = 0
+    for ano in sorted(anos):
+        particao = _ler_ano(pasta, ano)
+        do_ano = novas_parciais[novas_parciais.index.year == ano]
+        if particao is None:
+            particao = pd.DataFrame(columns=list(do_ano.columns) + COLUNAS_DESASTRES,
+                                    index=pd.DatetimeIndex([], name='Data'), dtype=np.float64)
+
+        # Dias afetados: novas linhas horárias ou flags de desastre diferentes
+        afetados = do_ano.index
+        if df_desastres is not None:
+            flags_ano = df_desastres[df_desastres.index.year == ano]
+            existentes = flags_ano.index.intersection(particao.index)
+            informados = flags_ano.loc[existentes].to_numpy()
+            guardados = particao.loc[existentes, COLUNAS_DESASTRES].to_numpy()
+            mudou = (~np.isnan(informados) & (informados != guardados)).any(axis=1)
+            afetados = afetados.union(existentes[mudou])
+        if not len(afetados):
+            continue
+
+        antigos = particao.index.intersection(afetados)
+        if len(antigos):
+            acumulador = eo.remover(acumulador, eo.acumular_lote(_linhas(particao.loc[antigos], colunas)))
+
+        parciais = mesclar_parciais(particao.drop(columns=COLUNAS_DESASTRES).loc[afetados.intersection(particao.index)],
+                                    do_ano)
+        flags = flags_armazenados.reindex(parciais.index).fillna(0)
+        atualizados = pd.concat([parciais, flags], axis=1)
+        acumulador = eo.combinar(acumulador, eo.acumular_lote(_linhas(atualizados, colunas)))
+
+        particao = pd.concat([particao.drop(index=antigos), atualizados]).sort_index()
+        particao.index.name = 'Data'
+        os.makedirs(pasta, exist_ok=True)
+        salvar_frame_colunar(particao, _caminho_ano(pasta, ano))
+        dias_tocados += len(afetados)
+        if ano not in estado['anos']:
+            estado['anos'] = sorted(estado['anos'] + [int(ano)])
+
+    if len(df_processado):
+        estado['ultimo_horario'] = str(df_processado.index.max())
+    salvar_estado(pasta, estado, acumulador)
+    return {'linhas_novas': len(df_processado), 'linhas_ignoradas': ignoradas, 'dias_recalculados': dias_tocados}
+
+
+def ler_linhas_novas(pasta, arquivo_csv):
+    """Lê só as linhas completas do CSV posteriores ao último byte já incorporado.
+
+    Devolve (df_processado, novo_offset).
+    """
+    estado, _ = carregar_estado(pasta)
+    registro = estado['arquivos'].get(os.path.abspath(arquivo_csv), {})
+    with open(arquivo_csv, 'rb') as f:
+        cabecalho = b''.join(f.readline() for _ in range(LINHAS_CABECALHO + 1))
+        offset = registro.get('offset', len(cabecalho))
+        if os.path.getsize(arquivo_csv) < offset:
+            raise ValueError(f"{arquivo_csv} diminuiu desde a última leitura; recrie o estado")
+        f.seek(offset)
+        resto = f.read()
+    # Uma linha ainda incompleta fica para a próxima leitura
+    completo = resto[:resto.rfind(b'\n') + 1]
+    if not completo.strip():
+        return None, offset
+    df_inmet = processar_datas(ler_csv_inmet(io.BytesIO(cabecalho + completo)))
+    return converter_colunas(df_inmet), offset + len(completo)
+
+
+def anexar_arquivo(pasta, arquivo_csv, df_desastres=None):
+    df_processado, offset = ler_linhas_novas(pasta, arquivo_csv)
+    if df_processado is None:
+        df_processado = pd.DataFrame(columns=COLUNAS_CLIMATICAS, index=pd.DatetimeIndex([]), dtype=float)
+    resumo = anexar_horario(pasta, df_processado, df_desastres)
+    estado, acumulador = carregar_estado(pasta)
+    estado['arquivos'][os.path.abspath(arquivo_csv)] = {'offset': offset}
+    salvar_estado(pasta, estado, acumulador)
+    return resumo
+
+
+# ============================================================================
+# CONSULTAS
+# ============================================================================
+
+def matriz_correlacao(pasta):
+    """Matriz de correlação atual, direto dos acumuladores (sem reler dados)."""
+    estado, acumulador = carregar_estado(pasta)
+    return eo.correlacao(acumulador, estado['colunas'])
+
+
+def tabela_diaria(pasta):
+    """Tabela diária mesclada (clima + desastres) reconstruída das parciais."""
+    estado, _ = carregar_estado(pasta)
+    particoes = [ler_frame_colunar(_caminho_ano(pasta, ano)) for ano in estado['anos']]
+    if not particoes:
+        return pd.DataFrame(columns=estado['colunas'])
+    parciais = pd.concat(particoes).sort_index()
+    diario = valores_diarios(parciais)
+    for coluna in COLUNAS_DESASTRES:
+        diario[coluna] = parciais[coluna].astype(int)
+    diario.index.name = 'Data_Hora'
+    return diario
+
+
+def verificar(pasta):
+    """Maior diferença absoluta entre a matriz incremental e um recálculo completo."""
+    estado, _ = carregar_estado(pasta)
+    incremental = matriz_correlacao(pasta)
+    completa = tabela_diaria(pasta)[estado['colunas']].corr()
+    diferenca = (incremental - completa).abs().to_numpy()
+    mesmos_nan = np.array_equal(np.isnan(incremental.to_numpy()), np.isnan(completa.to_numpy()))
+    return float(np.nanmax(diferenca)) if np.isfinite(diferenca).any() else 0.0, mesmos_nan
+
+
+def _ler_desastres(caminho):
+    if caminho is None:
+        return None
+    return pd.read_csv(caminho, index_col=0, parse_dates=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Modo incremental: append de linhas horárias do INMET")
+    sub = parser.add_subparsers(dest='comando', required=True)
+    p_anexar = sub.add_parser('anexar', help="Incorpora as linhas novas de um CSV do INMET")
+    p_anexar.add_argument('arquivo')
+    p_anexar.add_argument('--desastres', help="CSV diário com colunas de desastre (índice = data)")
+    p_corr = sub.add_parser('correlacao', help="Mostra/salva a matriz de correlação atual")
+    p_corr.add_argument('--saida')
+    sub.add_parser('verificar', help="Compara com um recálculo completo")
+    for p in (p_anexar, p_corr, sub.choices['verificar']):
+        p.add_argument('--estado', required=True, help="Pasta do estado incremental")
+    args = parser.parse_args(argv)
+
+    if args.comando == 'anexar':
+        resumo = anexar_arquivo(args.estado, args.arquivo, _ler_desastres(args.desastres))
+        print(f"✓ {resumo['linhas_novas']} linha(s) horária(s) nova(s), "
+              f"{resumo['dias_recalculados']} dia(s) recalculado(s)"
+              + (f", {resumo['linhas_ignoradas']} já incorporada(s)" if resumo['linhas_ignoradas'] else ''))
+    elif args.comando == 'correlacao':
+        correlation_matrix = matriz_correlacao(args.estado)
+        print(correlation_matrix.round(3))
+        if args.saida:
+            correlation_matrix.to_csv(args.saida)
+            print(f"✓ Matriz salva em: {args.saida}")
+    else:
+        diferenca, mesmos_nan = verificar(args.estado)
+        ok = diferenca < 1e-9 and mesmos_nan
+        print(f"{'✓' if ok else '❌'} Diferença máxima vs recálculo completo: {diferenca:.2e}"
+              + ("" if mesmos_nan else " (NaN em posições diferentes)"))
+        return 0 if ok else 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
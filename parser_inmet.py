@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Parser rápido dos CSVs do INMET em uma única passada.
+
+Diferente do caminho atual (pd.read_csv com skiprows=8 + str.replace(',', '.')
+coluna a coluna + concatenação de strings para o timestamp), este parser:
+
+  - lê o cabeçalho de 8 linhas da estação para um registro de metadados
+    (regiao, uf, estacao, codigo, latitude, longitude, altitude, fundacao);
+  - lê apenas Data, Hora UTC e as colunas de COLUNAS_MAPEAMENTO, com a
+    vírgula decimal tratada pelo próprio leitor C do pandas (decimal=',');
+  - guarda as variáveis em float32;
+  - monta o timestamp convertendo só os valores distintos de Data e Hora
+    (365 datas e 24 horas por ano) e combinando-os por código de categoria.
+
+O DataFrame devolvido tem o mesmo formato de inmet_comum.converter_colunas
+(índice Data_Hora, colunas renomeadas) e pode seguir para reamostrar_diario.
+"""
+
+import io
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from inmet_comum import ALIASES_DATA_HORA, COLUNAS_MAPEAMENTO, LINHAS_CABECALHO
+
+# Chave normalizada (sem acento, maiúscula) do cabeçalho -> campo do registro
+CAMPOS_CABECALHO = {
+    'REGIAO': 'regiao',
+    'UF': 'uf',
+    'ESTACAO': 'estacao',
+    'CODIGO (WMO)': 'codigo',
+    'LATITUDE': 'latitude',
+    'LONGITUDE': 'longitude',
+    'ALTITUDE': 'altitude',
+    'DATA DE FUNDACAO': 'data_fundacao',
+}
+CAMPOS_NUMERICOS = ('latitude', 'longitude', 'altitude')
+
+
+def _sem_acentos(texto):
+    return ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+
+
+def _para_float(texto):
+    try:
+        return float(texto.replace(',', '.'))
+    except (AttributeError, ValueError):
+        return np.nan
+
+
+def _interpretar_cabecalho(linhas):
+    metadados = {campo: None for campo in CAMPOS_CABECALHO.values()}
+    for linha in linhas:
+        chave, _, valor = linha.rstrip('\r\n').partition(';')
+        chave = _sem_acentos(chave).upper().rstrip(':').strip()
+        # Arquivos antigos trazem "DATA DE FUNDACAO (YYYY-MM-DD)"
+        chave = chave.split(' (YYYY')[0]
+        campo = CAMPOS_CABECALHO.get(chave)
+        if campo:
+            valor = valor.strip().rstrip(';')
+            metadados[campo] = _para_float(valor) if campo in CAMPOS_NUMERICOS else valor
+    return metadados
+
+
+def _abrir_texto(origem):
+    """Devolve (handle de texto latin1, deve_fechar)."""
+    if isinstance(origem, (str, bytes)) or hasattr(origem, '__fspath__'):
+        return open(origem, 'r', encoding='latin1', newline=''), True
+    if isinstance(origem, io.TextIOBase):
+        return origem, False
+    return io.TextIOWrapper(origem, encoding='latin1', newline=''), False
+
+
+def ler_cabecalho_estacao(origem):
+    """Lê apenas as 8 linhas de metadados da estação."""
+    handle, fechar = _abrir_texto(origem)
+    try:
+        return _interpretar_cabecalho([handle.readline() for _ in range(LINHAS_CABECALHO)])
+    finally:
+        if fechar:
+            handle.close()
+
+
+def _timestamps(datas, horas):
+    """Monta Data_Hora a partir de colunas categóricas de Data e Hora UTC (NaT onde Data ou Hora está vazia)."""
+    cat_datas = datas.cat.categories.astype(str).str.replace('-', '/', regex=False)
+    dias = pd.to_datetime(cat_datas, format='%Y/%m/%d').values.astype('datetime64[ns]')
+    cat_horas = horas.cat.categories.astype(str).str.replace(' UTC', '', regex=False).str.replace(':', '', regex=False)
+    hhmm = cat_horas.astype(int).values
+    deslocamentos = ((hhmm // 100) * 60 + hhmm % 100).astype('timedelta64[m]').astype('timedelta64[ns]')
+    codigos_datas, codigos_horas = datas.cat.codes.values, horas.cat.codes.values
+    # Código -1 = vazio/NaN; indexar com ele pegaria a última categoria
+    valores = dias[codigos_datas] + deslocamentos[codigos_horas]
+    valores[(codigos_datas < 0) | (codigos_horas < 0)] = np.datetime64('NaT')
+    return pd.DatetimeIndex(valores, name='Data_Hora')
+
+
+def ler_inmet_rapido(origem, colunas_mapeamento=COLUNAS_MAPEAMENTO, dtype=np.float32, linhas_por_bloco=None):
+    """Lê um CSV do INMET em uma passada e devolve (metadados, df_horario).
+
+    `origem` pode ser um caminho ou um objeto de arquivo (texto ou binário,
+    ex.: zipfile.ZipFile.open). Com `linhas_por_bloco`, o corpo é lido em
+    blocos e só as colunas já convertidas são acumuladas.
+    """
+    handle, fechar = _abrir_texto(origem)
+    try:
+        metadados = _interpretar_cabecalho([handle.readline() for _ in range(LINHAS_CABECALHO)])
+        nomes = [ALIASES_DATA_HORA.get(n.strip(), n.strip()) for n in handle.readline().rstrip('\r\n').split(';')]
+        colunas = {'Data': 'Data', 'Hora UTC': 'Hora UTC'}
+        colunas.update({orig: novo for orig, novo in colunas_mapeamento.items() if orig in nomes})
+        indices = [nomes.index(c) for c in colunas]
+        tipos = {i: dtype for i, c in zip(indices, colunas) if c not in ('Data', 'Hora UTC')}
+        tipos[nomes.index('Data')] = 'category'
+        tipos[nomes.index('Hora UTC')] = 'category'
+
+        leitura = pd.read_csv(handle, sep=';', header=None, usecols=indices, dtype=tipos,
+                              decimal=',', engine='c', chunksize=linhas_por_bloco)
+        blocos = leitura if linhas_por_bloco else [leitura]
+        frames = []
+        for bloco in blocos:
+            bloco.columns = [nomes[i] for i in bloco.columns]
+            indice = _timestamps(bloco['Data'], bloco['Hora UTC'])
+            valido = ~indice.isna()
+            # Linhas sem Data ou Hora UTC não têm onde cair no dia: são descartadas
+            frames.append(pd.DataFrame(
+                {novo: bloco[orig].to_numpy()[valido] for orig, novo in colunas.items()
+                 if novo not in ('Data', 'Hora UTC')},
+                index=indice[valido]))
+        if linhas_por_bloco:
+            leitura.close()
+    finally:
+        if fechar:
+            handle.close()
+
+    df_horario = frames[0] if len(frames) == 1 else pd.concat(frames)
+    return metadados, df_horario
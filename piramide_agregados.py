@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pirâmide de agregados do acervo horário: dia, semana, mês e ano.
+
+Cada nível guarda, por variável, estatísticas combináveis de cada período
+(estações, períodos): soma, contagem, mínimo, máximo e soma dos quadrados.
+Média e variância saem exatas dessas cinco (em float64), e um período
+maior é só a combinação dos menores, então cada nível é calculado a partir
+do nível de baixo em uma única passada sobre as horas:
+
+  hora -> dia -> semana (segunda a domingo)
+              -> mês -> ano
+
+(semanas não cabem em meses, por isso as duas saem do nível diário).
+A agregação diária do PASSO 1 (AGREGACOES_DIARIAS: soma, máximo, mínimo ou
+média) vira uma escolha de estatística, e vale para qualquer nível.
+
+Os níveis ficam no próprio acervo, em <acervo>/piramide/<nivel>/
+<variavel>.<estatistica>, no mesmo layout (estações, períodos) dos mapas
+horários. Se o acervo tem as máscaras do controle_qualidade, as horas
+rejeitadas ficam de fora (a contagem vira cobertura).
+
+Consultas:
+  serie()          - série de uma estação em um nível (ou no nível mais
+                     grosso com até max_pontos no intervalo);
+  resumo()         - estatísticas de um intervalo qualquer, somando os
+                     períodos completos mais grossos que cabem nele e
+                     descendo de nível só nas pontas (até a hora).
+
+Uso:
+    python piramide_agregados.py construir --destino acervo_inmet
+    python piramide_agregados.py consultar --destino acervo_inmet --estacao A409 --variavel Precipitacao_mm --nivel mes
+    python piramide_agregados.py resumo --destino acervo_inmet --variavel Temperatura_Maxima_C --inicio 2021-03-17 --fim 2023-10-02
+    python piramide_agregados.py benchmark --estacoes 20 --anos 2019 2020 2021 2022 2023
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from inmet_comum import AGREGACOES_DIARIAS
+from acervo_horario import AcervoHorario, DIRETORIO_ACERVO, ARQUIVO_META
+
+DIRETORIO_PIRAMIDE = 'piramide'
+ARQUIVO_META_PIRAMIDE = 'piramide.json'
+VERSAO = 1
+
+# nível -> (início dos períodos no pandas, nível de origem)
+NIVEIS = {
+    'dia': ('D', 'hora'),
+    'semana': ('W-MON', 'dia'),
+    'mes': ('MS', 'dia'),
+    'ano': ('YS', 'mes'),
+}
+# Cadeia usada para cobrir um intervalo (do mais grosso ao mais fino)
+CADEIA_RESUMO = ('ano', 'mes', 'dia', 'hora')
+
+# Estatísticas guardadas e seus dtypes (min/max no dtype do acervo)
+ESTATISTICAS = {
+    'soma': np.float64,
+    'contagem': np.int32,
+    'minimo': None,
+    'maximo': None,
+    'soma_quadrados': np.float64,
+}
+# AGREGACOES_DIARIAS -> estatística derivada
+ESTATISTICA_DA_AGREGACAO = {'sum': 'soma', 'max': 'maximo', 'min': 'minimo', 'mean': 'media'}
+ESTATISTICAS_DERIVADAS = ('media', 'variancia', 'desvio', 'cobertura', 'agregado')
+MAX_PONTOS = 2000
+ESTACOES_POR_BLOCO = 32
+
+
+def _pasta_nivel(pasta_acervo, nivel):
+    return os.path.join(pasta_acervo, DIRETORIO_PIRAMIDE, nivel)
+
+
+def _caminho(pasta_acervo, nivel, variavel, estatistica):
+    return os.path.join(_pasta_nivel(pasta_acervo, nivel), f'{variavel}.{estatistica}')
+
+
+def inicios_dos_periodos(inicio, horas, nivel):
+    """Deslocamento (em horas a partir de `inicio`) do começo de cada período do nível na grade.
+
+    O primeiro período começa na hora 0 mesmo que a grade comece no meio dele.
+    """
+    if nivel == 'hora':
+        return np.arange(horas, dtype=np.int64)
+    primeira = pd.Timestamp(inicio)
+    ultima = primeira + pd.Timedelta(hours=horas - 1)
+    freq = NIVEIS[nivel][0]
+    ancora = primeira.normalize() - pd.tseries.frequencies.to_offset(freq)
+    inicios = pd.date_range(ancora, ultima, freq=freq)
+    deslocamentos = ((inicios - primeira) // pd.Timedelta(hours=1)).to_numpy(dtype=np.int64)
+    deslocamentos = deslocamentos[deslocamentos > 0]
+    return np.concatenate([[0], deslocamentos[deslocamentos < horas]])
+
+
+# ============================================================================
+# ESTATÍSTICAS COMBINÁVEIS
+# ============================================================================
+
+def estatisticas_horarias(valores, dtype_extremos=np.float32):
+    """As cinco estatísticas de cada hora (período de uma hora) de um array (estações, horas)."""
+    presente = ~np.isnan(valores)
+    v = np.where(presente, valores, 0.0).astype(np.float64)
+    return {
+        'soma': v,
+        'contagem': presente.astype(np.int32),
+        'minimo': valores.astype(dtype_extremos, copy=False),
+        'maximo': valores.astype(dtype_extremos, copy=False),
+        'soma_quadrados': v * v,
+    }
+
+
+def combinar(estatisticas, fronteiras):
+    """Combina períodos consecutivos: o período i do nível de cima vai de fronteiras[i] a fronteiras[i+1]."""
+    return {
+        'soma': np.add.reduceat(estatisticas['soma'], fronteiras, axis=1),
+        'contagem': np.add.reduceat(estatisticas['contagem'], fronteiras, axis=1),
+        'minimo': np.fmin.reduceat(estatisticas['minimo'], fronteiras, axis=1),
+        'maximo': np.fmax.reduceat(estatisticas['maximo'], fronteiras, axis=1),
+        'soma_quadrados': np.add.reduceat(estatisticas['soma_quadrados'], fronteiras, axis=1),
+    }
+
+
+def somar(partes):
+    """Combina uma lista de estatísticas (estações,) ou (estações, n) já reduzidas no último eixo."""
+    total = dict(partes[0])
+    for parte in partes[1:]:
+        total = {
+            'soma': total['soma'] + parte['soma'],
+            'contagem': total['contagem'] + parte['contagem'],
+            'minimo': np.fmin(total['minimo'], parte['minimo']),
+            'maximo': np.fmax(total['maximo'], parte['maximo']),
+            'soma_quadrados': total['soma_quadrados'] + parte['soma_quadrados'],
+        }
+    return total
+
+
+def derivar(estatisticas, estatistica, horas_por_periodo=None, variavel=None):
+    """Estatística pedida a partir das cinco guardadas (média/variância amostral/desvio/cobertura)."""
+    if estatistica == 'agregado':
+        estatistica = ESTATISTICA_DA_AGREGACAO[AGREGACOES_DIARIAS.get(variavel, 'mean')]
+    if estatistica in ESTATISTICAS:
+        valores = np.asarray(estatisticas[estatistica], dtype=np.float64)
+        if estatistica in ('soma', 'soma_quadrados'):
+            # Período sem nenhuma hora com dado não soma 0
+            valores = np.where(estatisticas['contagem'] > 0, valores, np.nan)
+        return valores
+    n = np.asarray(estatisticas['contagem'], dtype=np.float64)
+    soma = np.asarray(estatisticas['soma'])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if estatistica == 'media':
+            return np.where(n > 0, soma / n, np.nan)
+        if estatistica in ('variancia', 'desvio'):
+            variancia = (estatisticas['soma_quadrados'] - soma * soma / n) / (n - 1)
+            variancia = np.where(n > 1, np.maximum(variancia, 0.0), np.nan)
+            return np.sqrt(variancia) if estatistica == 'desvio' else variancia
+        if estatistica == 'cobertura':
+            return n / horas_por_periodo
+    raise ValueError(f"Estatística desconhecida: {estatistica}")
+
+
+# ============================================================================
+# CONSTRUÇÃO
+# ============================================================================
+
+def _horarios_aceitos(acervo, variavel, linhas, mascaras):
+    valores = acervo.array(variavel, acervo.estacoes[linhas])
+    if mascaras is None:
+        return valores
+    from controle_qualidade import QC_REJEITADO
+    return np.where((mascaras[variavel][linhas] & QC_REJEITADO) != 0, np.nan, valores)
+
+
+def construir_piramide(acervo, usar_qc=None, estacoes_por_bloco=ESTACOES_POR_BLOCO):
+    """Calcula todos os níveis do acervo (uma passada pelas horas) e grava em <acervo>/piramide.
+
+    `usar_qc`: None usa as máscaras do controle_qualidade se existirem e
+    forem do acervo atual; True exige as máscaras; False ignora.
+    """
+    pasta = acervo.pasta
+    mascaras = None
+    if usar_qc is not False:
+        from controle_qualidade import ARQUIVO_PARAMETROS_QC, abrir_flags
+        caminho_qc = os.path.join(pasta, ARQUIVO_PARAMETROS_QC)
+        atual = False
+        if os.path.exists(caminho_qc):
+            with open(caminho_qc, 'r', encoding='utf-8') as f:
+                parametros = json.load(f)
+            atual = parametros.get('estacoes') == list(acervo.estacoes) and parametros.get('horas') == acervo.horas
+        if usar_qc and not atual:
+            raise FileNotFoundError(f"Máscaras de QC ausentes ou desatualizadas em {pasta} (rode controle_qualidade)")
+        if atual:
+            mascaras = abrir_flags(acervo)
+
+    inicio = pd.Timestamp(acervo.inicio)
+    inicios = {nivel: inicios_dos_periodos(inicio, acervo.horas, nivel) for nivel in ('hora',) + tuple(NIVEIS)}
+    # Fronteiras de cada nível em índices de períodos do nível de origem
+    fronteiras = {nivel: np.searchsorted(inicios[origem], inicios[nivel]) for nivel, (_, origem) in NIVEIS.items()}
+
+    n_estacoes = len(acervo.estacoes)
+    mapas = {}
+    for nivel in NIVEIS:
+        os.makedirs(_pasta_nivel(pasta, nivel), exist_ok=True)
+        forma = (n_estacoes, len(inicios[nivel]))
+        for variavel in acervo.variaveis:
+            for estatistica, dtype in ESTATISTICAS.items():
+                mapas[nivel, variavel, estatistica] = np.memmap(
+                    _caminho(pasta, nivel, variavel, estatistica), dtype=dtype or acervo.dtype, mode='w+', shape=forma)
+
+    for a in range(0, n_estacoes, estacoes_por_bloco):
+        linhas = slice(a, min(a + estacoes_por_bloco, n_estacoes))
+        for variavel in acervo.variaveis:
+            niveis = {'hora': estatisticas_horarias(_horarios_aceitos(acervo, variavel, linhas, mascaras),
+                                                    acervo.dtype)}
+            for nivel, (_, origem) in NIVEIS.items():
+                niveis[nivel] = combinar(niveis[origem], fronteiras[nivel])
+                for estatistica, valores in niveis[nivel].items():
+                    mapas[nivel, variavel, estatistica][linhas] = valores
+            del niveis
+
+    for mapa in mapas.values():
+        mapa.flush()
+    meta = {'versao': VERSAO, 'inicio': str(acervo.inicio), 'horas': acervo.horas,
+            'estacoes': list(acervo.estacoes), 'variaveis': list(acervo.variaveis),
+            'dtype': acervo.dtype.name, 'qc': mascaras is not None,
+            'periodos': {nivel: len(inicios[nivel]) for nivel in NIVEIS}}
+    with open(os.path.join(pasta, DIRETORIO_PIRAMIDE, ARQUIVO_META_PIRAMIDE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1)
+    return meta
+
+
+# ============================================================================
+# CONSULTA
+# ============================================================================
+
+class PiramideAgregados:
+    """Pirâmide aberta para leitura (visões sem cópia dos níveis) sobre um AcervoHorario."""
+
+    def __init__(self, pasta=DIRETORIO_ACERVO, acervo=None):
+        self.acervo = acervo or AcervoHorario(pasta)
+        with open(os.path.join(self.acervo.pasta, DIRETORIO_PIRAMIDE, ARQUIVO_META_PIRAMIDE), 'r',
+                  encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['estacoes'] != list(self.acervo.estacoes) or meta['horas'] != self.acervo.horas:
+            raise ValueError(f"Pirâmide desatualizada em {self.acervo.pasta} (rode construir_piramide)")
+        self.qc = meta['qc']
+        self.inicio = pd.Timestamp(self.acervo.inicio)
+        self._inicios = {nivel: inicios_dos_periodos(self.inicio, self.acervo.horas, nivel)
+                         for nivel in ('hora',) + tuple(NIVEIS)}
+        # Horas de cada período (o último acaba no fim da grade)
+        self._horas = {nivel: np.diff(np.append(inicio, self.acervo.horas)) for nivel, inicio in self._inicios.items()}
+        self._mapas = {}
+        for nivel in NIVEIS:
+            forma = (len(self.acervo.estacoes), meta['periodos'][nivel])
+            for variavel in meta['variaveis']:
+                for estatistica, dtype in ESTATISTICAS.items():
+                    self._mapas[nivel, variavel, estatistica] = np.memmap(
+                        _caminho(self.acervo.pasta, nivel, variavel, estatistica),
+                        dtype=dtype or meta['dtype'], mode='r', shape=forma)
+
+    def __repr__(self):
+        periodos = ', '.join(f"{nivel} {len(self._inicios[nivel])}" for nivel in NIVEIS)
+        return f"PiramideAgregados({self.acervo.pasta!r}, {periodos}{', com QC' if self.qc else ''})"
+
+    @property
+    def nbytes(self):
+        return sum(m.nbytes for m in self._mapas.values())
+
+    def indice(self, nivel):
+        return pd.DatetimeIndex(self.inicio + pd.to_timedelta(self._inicios[nivel], unit='h'), name='Data_Hora')
+
+    def periodos(self, nivel, inicio=None, fim=None):
+        """slice dos períodos do nível que começam em [inicio, fim] (fim só com a data = dia inteiro)."""
+        horas = self.acervo.horas_do_intervalo(inicio, fim)
+        inicios = self._inicios[nivel]
+        primeiro = np.searchsorted(inicios, horas.start, side='right') - 1 if inicio is not None else 0
+        # Período que começa antes de `inicio` só entra se `inicio` for o começo dele
+        if inicio is not None and inicios[max(primeiro, 0)] < horas.start:
+            primeiro += 1
+        return slice(max(primeiro, 0), int(np.searchsorted(inicios, horas.stop, side='left')))
+
+    def escolher_nivel(self, inicio=None, fim=None, max_pontos=MAX_PONTOS):
+        """Nível mais fino com até `max_pontos` períodos no intervalo (hora, se couber)."""
+        horas = self.acervo.horas_do_intervalo(inicio, fim)
+        if horas.stop - horas.start <= max_pontos:
+            return 'hora'
+        for nivel in ('dia', 'semana', 'mes', 'ano'):
+            periodos = self.periodos(nivel, inicio, fim)
+            if periodos.stop - periodos.start <= max_pontos:
+                return nivel
+        return 'ano'
+
+    def estatisticas(self, variavel, nivel, estacoes=None, inicio=None, fim=None):
+        """{estatística: array (estações, períodos)} do nível; visões do mapa quando possível."""
+        linhas = self.acervo.linhas(estacoes)
+        if nivel == 'hora':
+            horas = self.acervo.horas_do_intervalo(inicio, fim)
+            valores = np.atleast_2d(self.acervo.array(variavel, estacoes, inicio, fim))
+            if self.qc:
+                from controle_qualidade import QC_REJEITADO, abrir_flags
+                mascara = np.atleast_2d(abrir_flags(self.acervo)[variavel][linhas, horas])
+                valores = np.where((mascara & QC_REJEITADO) != 0, np.nan, valores)
+            return estatisticas_horarias(valores, self.acervo.dtype)
+        periodos = self.periodos(nivel, inicio, fim)
+        return {e: np.atleast_2d(self._mapas[nivel, variavel, e][linhas, periodos]) for e in ESTATISTICAS}
+
+    def serie(self, estacao, variavel, nivel=None, inicio=None, fim=None, estatistica='agregado',
+              max_pontos=MAX_PONTOS):
+        """Série de uma estação no nível pedido (ou escolhido por escolher_nivel)."""
+        nivel = nivel or self.escolher_nivel(inicio, fim, max_pontos)
+        if nivel == 'hora':
+            periodos = self.acervo.horas_do_intervalo(inicio, fim)
+        else:
+            periodos = self.periodos(nivel, inicio, fim)
+        valores = derivar(self.estatisticas(variavel, nivel, [estacao], inicio, fim), estatistica,
+                          self._horas[nivel][periodos], variavel)[0]
+        return pd.Series(valores, index=self.indice(nivel)[periodos], name=variavel)
+
+    def cobrir(self, a, b, cadeia=CADEIA_RESUMO):
+        """Lista (nível, slice de períodos) que cobre exatamente as horas [a, b) com os níveis mais grossos."""
+        if a >= b:
+            return []
+        nivel = cadeia[0]
+        if nivel == 'hora':
+            return [('hora', slice(a, b))]
+        inicios = self._inicios[nivel]
+        fins = inicios + self._horas[nivel]
+        i = int(np.searchsorted(inicios, a, side='left'))
+        j = int(np.searchsorted(fins, b, side='right'))
+        if i >= j:
+            return self.cobrir(a, b, cadeia[1:])
+        return (self.cobrir(a, int(inicios[i]), cadeia[1:]) + [(nivel, slice(i, j))]
+                + self.cobrir(int(fins[j - 1]), b, cadeia[1:]))
+
+    def resumo(self, variavel, estacoes=None, inicio=None, fim=None):
+        """Soma, contagem, mínimo, máximo, média, variância e desvio do intervalo, por estação."""
+        horas = self.acervo.horas_do_intervalo(inicio, fim)
+        linhas = self.acervo.linhas(estacoes)
+        partes = []
+        for nivel, periodos in self.cobrir(horas.start, horas.stop):
+            if nivel == 'hora':
+                primeira = self.inicio + pd.Timedelta(hours=periodos.start)
+                ultima = self.inicio + pd.Timedelta(hours=periodos.stop - 1)
+                base = self.estatisticas(variavel, 'hora', estacoes, primeira, ultima)
+            else:
+                base = {e: np.atleast_2d(self._mapas[nivel, variavel, e][linhas, periodos]) for e in ESTATISTICAS}
+            partes.append({'soma': base['soma'].sum(axis=1), 'contagem': base['contagem'].sum(axis=1),
+                           'minimo': np.fmin.reduce(base['minimo'], axis=1),
+                           'maximo': np.fmax.reduce(base['maximo'], axis=1),
+                           'soma_quadrados': base['soma_quadrados'].sum(axis=1)})
+        codigos = self.acervo.estacoes[linhas] if not isinstance(linhas, (int, np.integer)) else [estacoes]
+        if not partes:
+            return pd.DataFrame(index=pd.Index(codigos, name='Codigo_Estacao'))
+        total = somar(partes)
+        df = pd.DataFrame({e: derivar(total, e) for e in ('soma', 'contagem', 'minimo', 'maximo', 'media',
+                                                          'variancia', 'desvio')},
+                          index=pd.Index(codigos, name='Codigo_Estacao'))
+        df['cobertura'] = total['contagem'] / max(horas.stop - horas.start, 1)
+        return df
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def benchmark(n_estacoes, anos, workers=None):
+    from gerador_inmet_sintetico import gerar_conjunto
+    from acervo_horario import construir_acervo
+
+    variavel = 'Temperatura_Maxima_C'
+    with tempfile.TemporaryDirectory() as temporario:
+        pasta_csv = os.path.join(temporario, 'csv')
+        pasta_acervo = os.path.join(temporario, 'acervo')
+        arquivos = gerar_conjunto(pasta_csv, n_estacoes, anos)
+        construir_acervo(arquivos, pasta_acervo, workers=workers)
+        acervo = AcervoHorario(pasta_acervo)
+
+        inicio = time.perf_counter()
+        construir_piramide(acervo, usar_qc=False)
+        t_construir = time.perf_counter() - inicio
+        piramide = PiramideAgregados(acervo=acervo)
+        print(f"   {n_estacoes} estações x {len(anos)} anos | {piramide}")
+        print(f"   - construir a pirâmide (todas as variáveis): {t_construir:7.2f}s "
+              f"({piramide.nbytes / 1e6:,.1f} MB, acervo {acervo.nbytes / 1e6:,.1f} MB)")
+
+        # Média e variância mensais da rede: pirâmide x resample das horas (pandas)
+        inicio = time.perf_counter()
+        mensal = piramide.estatisticas(variavel, 'mes')
+        media = derivar(mensal, 'media')
+        variancia = derivar(mensal, 'variancia')
+        t_piramide = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        referencias = [acervo.serie(codigo, variavel).astype(np.float64).resample('MS').agg(['mean', 'var'])
+                       for codigo in acervo.estacoes]
+        t_pandas = time.perf_counter() - inicio
+        media_ref = np.array([r['mean'].to_numpy() for r in referencias])
+        variancia_ref = np.array([r['var'].to_numpy() for r in referencias])
+        print(f"   - média e variância mensais da rede: pirâmide {t_piramide * 1e3:7.2f}ms | "
+              f"resample das horas {t_pandas * 1e3:8.1f}ms ({t_pandas / t_piramide:,.0f}x)")
+        print(f"     iguais ao pandas: média {np.allclose(media, media_ref, rtol=1e-12, equal_nan=True)}, "
+              f"variância {np.allclose(variancia, variancia_ref, rtol=1e-9, equal_nan=True)}")
+
+        # Intervalo arbitrário: períodos grossos + pontas x varrer as horas
+        a, b = f'{anos[0]}-03-17 05:00', f'{anos[-1]}-10-02 13:00'
+        inicio = time.perf_counter()
+        for _ in range(20):
+            df_resumo = piramide.resumo(variavel, None, a, b)
+        t_resumo = (time.perf_counter() - inicio) / 20
+        inicio = time.perf_counter()
+        for _ in range(20):
+            horas = acervo.array(variavel, None, a, b).astype(np.float64)
+            media_horas = np.nanmean(horas, axis=1)
+            variancia_horas = np.nanvar(horas, axis=1, ddof=1)
+        t_horas = (time.perf_counter() - inicio) / 20
+        partes = ', '.join(f"{n}:{p.stop - p.start}" for n, p in piramide.cobrir(
+            *(lambda h: (h.start, h.stop))(acervo.horas_do_intervalo(a, b))))
+        print(f"   - resumo {a} .. {b} da rede: pirâmide {t_resumo * 1e3:6.2f}ms | "
+              f"varrendo as horas {t_horas * 1e3:7.2f}ms ({t_horas / t_resumo:,.0f}x)")
+        print(f"     cobertura: {partes}")
+        print(f"     iguais: média {np.allclose(df_resumo['media'], media_horas, rtol=1e-12)}, "
+              f"variância {np.allclose(df_resumo['variancia'], variancia_horas, rtol=1e-9)}")
+
+        codigo = acervo.estacoes[0]
+        nivel = piramide.escolher_nivel(f'{anos[0]}-01-01', f'{anos[-1]}-12-31', max_pontos=500)
+        print(f"   - série {anos[0]}..{anos[-1]} de {codigo} com até 500 pontos: nível '{nivel}' "
+              f"({len(piramide.serie(codigo, variavel, inicio=f'{anos[0]}-01-01', max_pontos=500))} pontos)")
+        del piramide, acervo, mensal
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pirâmide de agregados (dia/semana/mês/ano) do acervo horário")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p = sub.add_parser('construir', help="Calcula e grava todos os níveis no acervo")
+    p.add_argument('--destino', default=DIRETORIO_ACERVO)
+    p.add_argument('--sem-qc', action='store_true', help="Ignora as máscaras do controle_qualidade")
+
+    p = sub.add_parser('consultar', help="Série de uma estação em um nível")
+    p.add_argument('--destino', default=DIRETORIO_ACERVO)
+    p.add_argument('--estacao', required=True)
+    p.add_argument('--variavel', default='Precipitacao_mm')
+    p.add_argument('--nivel', choices=('hora',) + tuple(NIVEIS), help="Padrão: o mais fino com até --max-pontos")
+    p.add_argument('--estatistica', default='agregado', choices=tuple(ESTATISTICAS) + ESTATISTICAS_DERIVADAS)
+    p.add_argument('--inicio')
+    p.add_argument('--fim')
+    p.add_argument('--max-pontos', type=int, default=MAX_PONTOS)
+    p.add_argument('--saida', help="Grava a série em CSV")
+
+    p = sub.add_parser('resumo', help="Estatísticas de um intervalo para várias estações")
+    p.add_argument('--destino', default=DIRETORIO_ACERVO)
+    p.add_argument('--variavel', default='Precipitacao_mm')
+    p.add_argument('--estacao', nargs='*', help="Padrão: todas")
+    p.add_argument('--inicio')
+    p.add_argument('--fim')
+
+    p = sub.add_parser('benchmark', help="Compara a pirâmide com a reamostragem das horas")
+    p.add_argument('--estacoes', type=int, default=20)
+    p.add_argument('--anos', type=int, nargs='+', default=[2019, 2020, 2021, 2022, 2023])
+    p.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("PIRÂMIDE DE AGREGADOS DO ACERVO HORÁRIO")
+    print("=" * 70)
+
+    if args.comando == 'benchmark':
+        benchmark(args.estacoes, args.anos, args.workers)
+        return 0
+
+    if not os.path.exists(os.path.join(args.destino, ARQUIVO_META)):
+        print(f"❌ ERRO: Acervo não encontrado: {args.destino}")
+        return 1
+    acervo = AcervoHorario(args.destino)
+
+    if args.comando == 'construir':
+        inicio = time.perf_counter()
+        meta = construir_piramide(acervo, usar_qc=False if args.sem_qc else None)
+        print(f"✓ {PiramideAgregados(acervo=acervo)} em {time.perf_counter() - inicio:.2f}s")
+        if not meta['qc'] and not args.sem_qc:
+            print("⚠️  Sem máscaras de QC atualizadas: todas as horas com valor entraram na pirâmide")
+        return 0
+
+    try:
+        piramide = PiramideAgregados(acervo=acervo)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ ERRO: {e}")
+        return 1
+
+    if args.comando == 'consultar':
+        if args.estacao not in acervo.estacoes:
+            print(f"❌ ERRO: Estação fora do acervo: {args.estacao}")
+            return 1
+        nivel = args.nivel or piramide.escolher_nivel(args.inicio, args.fim, args.max_pontos)
+        serie = piramide.serie(args.estacao, args.variavel, nivel, args.inicio, args.fim, args.estatistica)
+        print(f"✓ {args.estacao} / {args.variavel} / {args.estatistica} no nível '{nivel}': {len(serie)} períodos")
+        print(serie.to_string(max_rows=30))
+        if args.saida:
+            serie.to_csv(args.saida)
+            print(f"\n✓ Série salva: {args.saida}")
+        return 0
+
+    df = piramide.resumo(args.variavel, args.estacao or None, args.inicio, args.fim)
+    print(f"✓ {args.variavel} de {args.inicio or 'início'} a {args.fim or 'fim'}:")
+    print(df.to_string(max_rows=40, float_format=lambda x: f"{x:,.3f}"))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,11 @@
 import pandas as pd
 import os
 
+from instrumentacao import rastreador_do_ambiente
+
+# Tempo, CPU, pico de RSS, linhas e bytes lidos por passo (--trace / --perfil)
+rastro = rastreador_do_ambiente('preprocess_inmet_aracaju', estacao='A409')
+
 print("=" * 70)
 print("PRÉ-PROCESSAMENTO DE DADOS CLIMÁTICOS DO INMET")
 print("Aracaju, Sergipe (2023)")
@@ -30,35 +35,39 @@ print("   Iniciando pré-processamento...")
 try:
     # Ler o arquivo CSV com encoding latin1
     # O arquivo do INMET tem cabeçalhos nas primeiras linhas, então pulamos elas
-    print("\n[1/5] Lendo arquivo CSV (pulando cabeçalhos)...")
+    rastro.proximo('leitura', "\n[1/5] Lendo arquivo CSV (pulando cabeçalhos)...")
     df = pd.read_csv(arquivo_csv, encoding='latin1', sep=';', skiprows=8)
+    rastro.anotar(linhas=len(df))
     print(f"   ✓ Lido com sucesso! Dimensões: {df.shape}")
     
     # Exibir as primeiras linhas
-    print("\n[2/5] Primeiras linhas do arquivo:")
+    rastro.proximo('amostra', "\n[2/5] Primeiras linhas do arquivo:")
     print(df.head())
     
     # Limpar nomes das colunas (remover espaços em branco)
-    print("\n[3/5] Limpando nomes das colunas...")
+    rastro.proximo('colunas', "\n[3/5] Limpando nomes das colunas...")
     df.columns = df.columns.str.strip()
     print(f"   ✓ Colunas encontradas ({len(df.columns)}):")
     for i, col in enumerate(df.columns, 1):
         print(f"      {i}. {col}")
     
     # Converter para UTF-8 e salvar
-    print("\n[4/5] Convertendo para UTF-8...")
+    rastro.proximo('gravacao', "\n[4/5] Convertendo para UTF-8...")
     arquivo_limpo = "INMET_ARACAJU_2023_CLEAN.CSV"
     df.to_csv(arquivo_limpo, encoding='utf-8', index=False)
+    rastro.anotar(linhas=len(df))
     print(f"   ✓ Arquivo salvo: {arquivo_limpo}")
     
     # Exibir informações
-    print("\n[5/5] Informações do arquivo processado:")
+    rastro.proximo('informacoes', "\n[5/5] Informações do arquivo processado:")
     print(f"   - Linhas: {len(df)}")
     print(f"   - Colunas: {len(df.columns)}")
     print(f"   - Tipos de dados:")
     for col, dtype in df.dtypes.items():
         print(f"      {col}: {dtype}")
     
+    rastro.encerrar()
+    
     print("\n" + "=" * 70)
     print("✓ PRÉ-PROCESSAMENTO CONCLUÍDO COM SUCESSO!")
     print("=" * 70)
@@ -66,6 +75,7 @@ try:
     print(f"Próximo passo: execute 'python create_dummy_disaster_data_WINDOWS.py'")
     
 except Exception as e:
+    rastro.falhar(e)
     print(f"\n❌ ERRO ao processar arquivo: {e}")
     print(f"   Tipo de erro: {type(e).__name__}")
     
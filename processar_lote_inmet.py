@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modo em lote do PASSO 1: pré-processa todos os CSVs de estações automáticas
+do INMET (várias estações e vários anos) em paralelo e grava uma única tabela
+diária indexada por código da estação (WMO) e data.
+
+Uso:
+    python processar_lote_inmet.py --pasta dados_inmet --saida inmet_diario_lote.csv
+    python processar_lote_inmet.py --zip 2022.zip 2023.zip --uf SE AL --saida inmet_diario_lote.csv
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from inmet_comum import extrair_info_nome_arquivo, preprocessar_inmet
+from leitor_zip_inmet import listar_membros_zip, preprocessar_membro_zip
+
+
+def encontrar_arquivos_inmet(pasta, padrao='INMET_*.CSV'):
+    """Procura recursivamente os CSVs de estações do INMET (sem diferenciar maiúsculas)."""
+    arquivos = set()
+    for variante in (padrao, padrao.lower()):
+        arquivos.update(glob.glob(os.path.join(pasta, '**', variante), recursive=True))
+    return sorted(a for a in arquivos if extrair_info_nome_arquivo(a) is not None)
+
+
+def encontrar_membros_zip(arquivos_zip, regiao=None, uf=None, estacao=None):
+    """Lista os membros (caminho_zip, nome_membro) selecionados de cada ZIP anual."""
+    return [(caminho_zip, nome)
+            for caminho_zip in arquivos_zip
+            for nome, _ in listar_membros_zip(caminho_zip, regiao, uf, estacao)]
+
+
+def _tamanho_origem(origem):
+    if isinstance(origem, tuple):
+        caminho_zip, nome_membro = origem
+        with zipfile.ZipFile(caminho_zip) as zf:
+            return zf.getinfo(nome_membro).file_size
+    return os.path.getsize(origem) if os.path.exists(origem) else 0
+
+
+def processar_arquivo(origem):
+    """Processa um arquivo e devolve um dicionário de resultado (nunca lança exceção).
+
+    `origem` é o caminho de um CSV ou uma tupla (caminho_zip, nome_membro).
+    """
+    inicio = time.perf_counter()
+    caminho = origem[1] if isinstance(origem, tuple) else origem
+    info = extrair_info_nome_arquivo(caminho) or {}
+    resultado = {
+        'arquivo': caminho,
+        'codigo': info.get('codigo'),
+        'bytes': 0,
+        'df': None,
+        'erro': None,
+    }
+    try:
+        resultado['bytes'] = _tamanho_origem(origem)
+        if isinstance(origem, tuple):
+            df_diario = preprocessar_membro_zip(*origem)
+        else:
+            df_diario = preprocessar_inmet(caminho)
+        df_diario.index.name = 'Data'
+        df_diario.insert(0, 'Codigo_Estacao', info['codigo'])
+        resultado['df'] = df_diario
+        resultado['linhas'] = len(df_diario)
+    except Exception as e:
+        resultado['erro'] = f"{type(e).__name__}: {e}"
+    resultado['segundos'] = time.perf_counter() - inicio
+    return resultado
+
+
+def processar_lote(arquivos, workers=None, ao_concluir=None):
+    """Distribui os arquivos em um pool de processos e combina os resultados diários.
+
+    Retorna (df_combinado, lista_de_resultados). Falhas ficam registradas em
+    resultado['erro'] sem interromper os demais arquivos.
+    """
+    workers = workers or os.cpu_count() or 1
+    resultados = []
+    if workers == 1:
+        for caminho in arquivos:
+            resultado = processar_arquivo(caminho)
+            resultados.append(resultado)
+            if ao_concluir:
+                ao_concluir(resultado, len(resultados), len(arquivos))
+    else:
+        # Resultados na ordem dos arquivos, não na de conclusão: a regra de
+        # duplicatas abaixo precisa ser reprodutível entre execuções
+        resultados = [None] * len(arquivos)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            posicoes = {executor.submit(processar_arquivo, caminho): i for i, caminho in enumerate(arquivos)}
+            for n, futuro in enumerate(as_completed(posicoes), 1):
+                resultado = futuro.result()
+                resultados[posicoes[futuro]] = resultado
+                if ao_concluir:
+                    ao_concluir(resultado, n, len(arquivos))
+
+    frames = [r['df'] for r in resultados if r['df'] is not None]
+    if frames:
+        df_combinado = pd.concat(frames).reset_index().set_index(['Codigo_Estacao', 'Data'])
+        # O mesmo dia pode aparecer em dois arquivos (virada de ano); mantém o
+        # do primeiro arquivo da lista, antes de ordenar
+        df_combinado = df_combinado[~df_combinado.index.duplicated(keep='first')].sort_index()
+    else:
+        df_combinado = pd.DataFrame()
+    for r in resultados:
+        r.pop('df', None)
+    return df_combinado, resultados
+
+
+def _imprimir_progresso(resultado, n, total):
+    nome = os.path.basename(resultado['arquivo'])
+    if resultado['erro']:
+        print(f"  [{n}/{total}] ❌ {nome}: {resultado['erro']}")
+        return
+    mb = resultado['bytes'] / 1e6
+    seg = max(resultado['segundos'], 1e-9)
+    print(f"  [{n}/{total}] ✓ {resultado['codigo']} {nome} "
+          f"({resultado['linhas']} dias, {seg:.2f}s, {mb / seg:.1f} MB/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pré-processamento em lote dos CSVs do INMET")
+    parser.add_argument('--pasta', default='.', help="Pasta com os CSVs (busca recursiva)")
+    parser.add_argument('--padrao', default='INMET_*.CSV', help="Padrão glob dos arquivos")
+    parser.add_argument('--zip', nargs='*', default=[], help="ZIPs anuais do INMET (lidos sem extrair)")
+    parser.add_argument('--regiao', nargs='*', help="Filtrar membros dos ZIPs por região")
+    parser.add_argument('--uf', nargs='*', help="Filtrar membros dos ZIPs por UF")
+    parser.add_argument('--estacao', nargs='*', help="Filtrar membros dos ZIPs por código WMO ou nome")
+    parser.add_argument('--saida', default='inmet_diario_lote.csv', help="Tabela diária combinada")
+    parser.add_argument('--workers', type=int, default=None, help="Processos (padrão: núcleos da CPU)")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("PRÉ-PROCESSAMENTO EM LOTE - ESTAÇÕES AUTOMÁTICAS DO INMET")
+    print("=" * 70)
+
+    if args.zip:
+        arquivos = encontrar_membros_zip(args.zip, args.regiao, args.uf, args.estacao)
+    else:
+        arquivos = encontrar_arquivos_inmet(args.pasta, args.padrao)
+    if not arquivos:
+        print(f"\n❌ ERRO: Nenhum arquivo INMET encontrado em: {', '.join(args.zip) or os.path.abspath(args.pasta)}")
+        return 1
+
+    workers = args.workers or os.cpu_count() or 1
+    print(f"\n✓ {len(arquivos)} arquivo(s) encontrado(s) | {workers} processo(s)")
+
+    inicio = time.perf_counter()
+    df_combinado, resultados = processar_lote(arquivos, workers, ao_concluir=_imprimir_progresso)
+    duracao = time.perf_counter() - inicio
+
+    falhas = [r for r in resultados if r['erro']]
+    total_mb = sum(r['bytes'] for r in resultados) / 1e6
+
+    if not df_combinado.empty:
+        df_combinado.to_csv(args.saida)
+
+    print("\n" + "=" * 70)
+    print(f"✓ {len(resultados) - len(falhas)} arquivo(s) processado(s) em {duracao:.2f}s "
+          f"({total_mb / max(duracao, 1e-9):.1f} MB/s, {len(arquivos) / max(duracao, 1e-9):.1f} arquivos/s)")
+    if not df_combinado.empty:
+        n_estacoes = df_combinado.index.get_level_values('Codigo_Estacao').nunique()
+        print(f"  - Estações: {n_estacoes} | Linhas diárias: {len(df_combinado)}")
+        print(f"  - Arquivo salvo: {args.saida}")
+    if falhas:
+        print(f"\n⚠️  {len(falhas)} arquivo(s) com erro:")
+        for r in falhas:
+            print(f"   - {os.path.basename(r['arquivo'])}: {r['erro']}")
+    print("=" * 70)
+
+    return 0 if len(falhas) < len(resultados) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Renderização das figuras do PASSO 3 (heatmap, precipitação x inundação,
+temperatura x deslizamento) pensada para muitas estações.
+
+  - backend não interativo (Agg) e API orientada a objetos, sem pyplot;
+  - matplotlib/seaborn só são importados na primeira figura;
+  - cada processo guarda um modelo (Figure + Axes + artistas) por tipo de
+    figura e, nas estações seguintes, só troca os dados, o título e os
+    limites em vez de recriar tudo;
+  - o layout é calculado uma vez por modelo e o savefig não usa
+    bbox_inches='tight' (que desenha a figura duas vezes);
+  - séries mais densas que os pixels da figura (anos de dados horários)
+    são reduzidas ao mínimo e ao máximo de cada coluna de pixels e
+    desenhadas como uma faixa (fill_between), que cobre os mesmos pixels da
+    linha completa; o tempo de desenho fica limitado pela largura da figura
+    e não pelo tamanho da série. Os marcadores de evento usam a série
+    completa e nunca são descartados;
+  - renderizar_em_lote distribui as figuras em um pool de processos.
+
+Uso (benchmark):
+    python renderizacao_graficos.py --benchmark 1 600 --workers 4
+    python renderizacao_graficos.py --series-anos 1 5 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DPI = 150
+PONTOS_POR_COLUNA = 4      # acima disso por coluna de pixels, a série vira a faixa mínimo..máximo
+TIPOS = ('heatmap', 'precipitacao', 'temperatura')
+
+FIGURAS = {
+    'heatmap': {
+        'arquivo': 'correlation_heatmap.png',
+        'titulo': 'Matriz de Correlação - {local}',
+        'tamanho': (12, 10),
+    },
+    'precipitacao': {
+        'arquivo': 'precipitation_inundation_timeseries.png',
+        'titulo': 'Precipitação Diária e Inundação/Alagamento - {local}',
+        'tamanho': (15, 7),
+        'coluna': 'Precipitacao_mm',
+        'coluna_evento': 'Inundacao_Alagamento',
+        'rotulo': 'Precipitação (mm)',
+        'ylabel': 'Precipitação (mm)',
+        'cor': 'blue',
+        'cor_evento': 'red',
+        'rotulo_evento': 'Inundação/Alagamento',
+    },
+    'temperatura': {
+        'arquivo': 'temperature_landslide_timeseries.png',
+        'titulo': 'Temperatura Máxima e Deslizamento - {local}',
+        'tamanho': (15, 7),
+        'coluna': 'Temperatura_Maxima_C',
+        'coluna_evento': 'Deslizamento',
+        'rotulo': 'Temperatura Máxima (°C)',
+        'ylabel': 'Temperatura Máxima (°C)',
+        'cor': 'orange',
+        'cor_evento': 'green',
+        'rotulo_evento': 'Deslizamento',
+    },
+}
+
+# Modelos por processo (tipo -> dict com figura e artistas) e uma trava por
+# tipo, para que threads do executor_dag não desenhem no mesmo modelo ao mesmo tempo
+_modelos = {}
+_travas = defaultdict(threading.Lock)
+
+
+def _importar_matplotlib():
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    return Figure
+
+
+# ============================================================================
+# HEATMAP
+# ============================================================================
+
+def _criar_heatmap(correlation_matrix, titulo):
+    import seaborn as sns
+    Figure = _importar_matplotlib()
+    fig = Figure(figsize=FIGURAS['heatmap']['tamanho'])
+    ax = fig.add_subplot()
+    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt='.2f', linewidths=.5, ax=ax)
+    ax.set_title(titulo)
+    fig.tight_layout()
+    return {
+        'fig': fig, 'ax': ax, 'malha': ax.collections[0], 'textos': list(ax.texts),
+        'rotulos': (list(correlation_matrix.index), list(correlation_matrix.columns)),
+        'mascara': np.isnan(correlation_matrix.to_numpy()),
+    }
+
+
+def _atualizar_heatmap(modelo, correlation_matrix, titulo):
+    from seaborn.utils import relative_luminance
+    valores = correlation_matrix.to_numpy()
+    malha = modelo['malha']
+    malha.set_array(np.ma.masked_invalid(valores).ravel())
+    # Como o seaborn: limites da escala = mínimo/máximo dos dados
+    malha.set_clim(np.nanmin(valores), np.nanmax(valores))
+    malha.update_scalarmappable()
+    cores = malha.get_facecolors()
+    validos = ~modelo['mascara'].ravel()
+    for texto, valor, cor in zip(modelo['textos'], valores.ravel()[validos], cores[validos]):
+        texto.set_text(f'{valor:.2f}')
+        texto.set_color('.15' if relative_luminance(cor) > .408 else 'w')
+    modelo['ax'].set_title(titulo)
+
+
+def _desenhar_heatmap(correlation_matrix, titulo, caminho, dpi):
+    modelo = _modelos.get('heatmap')
+    # O modelo só serve para matrizes com os mesmos rótulos e as mesmas células vazias
+    compativel = (modelo is not None
+                  and modelo['rotulos'] == (list(correlation_matrix.index), list(correlation_matrix.columns))
+                  and np.array_equal(modelo['mascara'], np.isnan(correlation_matrix.to_numpy())))
+    if compativel:
+        _atualizar_heatmap(modelo, correlation_matrix, titulo)
+    else:
+        modelo = _modelos['heatmap'] = _criar_heatmap(correlation_matrix, titulo)
+    modelo['fig'].savefig(caminho, dpi=dpi)
+
+
+# ============================================================================
+# SÉRIES TEMPORAIS COM EVENTOS
+# ============================================================================
+
+def envelope_por_coluna(x, y, colunas):
+    """Mínimo e máximo de y em cada coluna de pixels: (posições do 1º ponto de cada coluna, mínimos, máximos).
+
+    `x` numérico e crescente. Devolve None quando a série já cabe na
+    largura (até PONTOS_POR_COLUNA pontos por coluna) e pode ser desenhada
+    inteira. Coluna só com NaN dá mínimo/máximo NaN (lacuna na faixa).
+    """
+    n = len(y)
+    if n <= PONTOS_POR_COLUNA * colunas:
+        return None
+    x = np.asarray(x, dtype=np.float64)
+    extensao = x[-1] - x[0]
+    if extensao > 0:
+        coluna = np.minimum(((x - x[0]) / extensao * colunas).astype(np.int64), colunas - 1)
+    else:
+        coluna = np.zeros(n, dtype=np.int64)
+    inicios = np.flatnonzero(np.r_[True, coluna[1:] != coluna[:-1]])
+    return inicios, np.fmin.reduceat(y, inicios), np.fmax.reduceat(y, inicios)
+
+
+def _criar_serie(config, x, y):
+    Figure = _importar_matplotlib()
+    fig = Figure(figsize=config['tamanho'])
+    ax = fig.add_subplot()
+    linha, = ax.plot(x, y, label=config['rotulo'], color=config['cor'], linewidth=2)
+    pontos = ax.scatter(x[:0], y[:0], color=config['cor_evento'], marker='o', s=50,
+                        label=config['rotulo_evento'], zorder=5)
+    ax.set_xlabel('Data', fontsize=12)
+    ax.set_ylabel(config['ylabel'], fontsize=12)
+    ax.grid(True, alpha=0.3)
+    return {'fig': fig, 'ax': ax, 'linha': linha, 'pontos': pontos, 'faixa': None, 'layout': False}
+
+
+def _desenhar_serie(tipo, df, titulo, caminho, dpi):
+    from matplotlib.dates import date2num
+    config = FIGURAS[tipo]
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    x = pd.DatetimeIndex(df.index).to_numpy()
+    y = df[config['coluna']].to_numpy(dtype=float)
+
+    modelo = _modelos.get(tipo)
+    if modelo is None:
+        modelo = _modelos[tipo] = _criar_serie(config, x[:0], y[:0])
+    ax, pontos = modelo['ax'], modelo['pontos']
+    if modelo['faixa'] is not None:
+        modelo['faixa'].remove()
+        modelo['faixa'] = None
+
+    # Série mais densa que os pixels: a linha em zigue-zague de cada coluna
+    # ocupa exatamente a faixa mínimo..máximo, que é desenhada como um
+    # polígono só (custo pela largura da figura, não pelo número de horas)
+    envelope = envelope_por_coluna(x.view(np.int64), y, int(config['tamanho'][0] * dpi))
+    if envelope is None:
+        modelo['linha'].set_data(x, y)
+    else:
+        inicios, minimos, maximos = envelope
+        modelo['linha'].set_data(x[:0], y[:0])
+        modelo['faixa'] = ax.fill_between(x[inicios], minimos, maximos, facecolor=config['cor'],
+                                          edgecolor=config['cor'], linewidth=2)
+
+    # Marcadores sempre da série completa: nenhum evento some na redução
+    if config['coluna_evento'] in df.columns:
+        eventos = df[config['coluna_evento']].to_numpy() == 1
+    else:
+        eventos = np.zeros(len(df), dtype=bool)
+    pontos.set_offsets(np.column_stack([date2num(x[eventos]), y[eventos]]))
+
+    ax.relim()
+    if envelope is not None:
+        # relim() não considera coleções; a faixa entra nos limites à parte
+        ax.update_datalim([(date2num(x[0]), np.nanmin(minimos)), (date2num(x[-1]), np.nanmax(maximos))])
+    ax.autoscale_view()
+    ax.set_title(titulo, fontsize=14)
+    # Como no original, o marcador de evento só entra na legenda se houver eventos
+    handles = [modelo['linha']] + ([pontos] if eventos.any() else [])
+    ax.legend(handles=handles, fontsize=10)
+    if not modelo['layout']:
+        modelo['fig'].tight_layout()
+        modelo['layout'] = True
+    modelo['fig'].savefig(caminho, dpi=dpi)
+
+
+# ============================================================================
+# API
+# ============================================================================
+
+def renderizar_figura(tipo, dados, caminho, titulo, dpi=DPI):
+    """Desenha uma figura reaproveitando o modelo do tipo neste processo.
+
+    `dados` é a matriz de correlação (heatmap) ou o DataFrame mesclado (séries).
+    """
+    with _travas[tipo]:
+        if tipo == 'heatmap':
+            _desenhar_heatmap(dados, titulo, caminho, dpi)
+        else:
+            _desenhar_serie(tipo, dados, titulo, caminho, dpi)
+    return caminho
+
+
+def tarefas_estacao(df_merged, correlation_matrix, local, pasta='.', prefixo='', tipos=TIPOS):
+    """Lista de tarefas (tipo, dados, caminho, titulo) das figuras de uma estação."""
+    tarefas = []
+    for tipo in tipos:
+        config = FIGURAS[tipo]
+        if tipo == 'heatmap':
+            dados = correlation_matrix
+        else:
+            colunas = [c for c in (config['coluna'], config['coluna_evento']) if c in df_merged.columns]
+            dados = df_merged[colunas]
+        caminho = os.path.join(pasta, prefixo + config['arquivo'])
+        tarefas.append((tipo, dados, caminho, config['titulo'].format(local=local)))
+    return tarefas
+
+
+def _renderizar_tarefa(tarefa, dpi):
+    inicio = time.perf_counter()
+    tipo, dados, caminho, titulo = tarefa
+    renderizar_figura(tipo, dados, caminho, titulo, dpi)
+    return caminho, time.perf_counter() - inicio
+
+
+def renderizar_em_lote(tarefas, workers=None, dpi=DPI):
+    """Renderiza as tarefas (no processo atual se workers == 1) e devolve [(caminho, segundos)]."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tarefas) <= 1:
+        return [_renderizar_tarefa(t, dpi) for t in tarefas]
+    # Tarefas do mesmo tipo seguidas no mesmo worker aproveitam o modelo dele
+    ordenadas = sorted(tarefas, key=lambda t: t[0])
+    tamanho_bloco = max(1, len(ordenadas) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_renderizar_tarefa, ordenadas, [dpi] * len(ordenadas), chunksize=tamanho_bloco))
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _renderizar_ingenuo(tarefa, dpi):
+    """Caminho antigo: figura nova a cada gráfico e bbox_inches='tight'."""
+    import seaborn as sns
+    Figure = _importar_matplotlib()
+    tipo, dados, caminho, titulo = tarefa
+    config = FIGURAS[tipo]
+    fig = Figure(figsize=config['tamanho'])
+    ax = fig.add_subplot()
+    if tipo == 'heatmap':
+        sns.heatmap(dados, annot=True, cmap='coolwarm', fmt='.2f', linewidths=.5, ax=ax)
+        ax.set_title(titulo)
+    else:
+        ax.plot(dados.index, dados[config['coluna']], label=config['rotulo'], color=config['cor'], linewidth=2)
+        dias = dados[dados[config['coluna_evento']] == 1].index
+        if len(dias) > 0:
+            ax.scatter(dias, dados.loc[dias, config['coluna']], color=config['cor_evento'], marker='o', s=50,
+                       label=config['rotulo_evento'], zorder=5)
+        ax.set_title(titulo, fontsize=14)
+        ax.set_xlabel('Data', fontsize=12)
+        ax.set_ylabel(config['ylabel'], fontsize=12)
+        ax.legend(fontsize=10)
+        ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(caminho, dpi=dpi, bbox_inches='tight')
+
+
+def _estacoes_sinteticas(df_merged, n, semente=0):
+    """Variações do dataset mesclado real, uma por estação."""
+    from etapas_pipeline import calcular_correlacao
+    rng = np.random.default_rng(semente)
+    for i in range(n):
+        df = df_merged.copy()
+        df['Precipitacao_mm'] = df['Precipitacao_mm'] * rng.uniform(0.5, 1.5)
+        df['Temperatura_Maxima_C'] = df['Temperatura_Maxima_C'] + rng.normal(0, 1, len(df))
+        yield f'E{i:03d}', df, calcular_correlacao(df)
+
+
+def benchmark(n_estacoes_lista, workers, arquivo_mesclado, dpi=DPI):
+    df_merged = pd.read_csv(arquivo_mesclado, index_col=0, parse_dates=True)
+    print(f"   {'estações':>9} {'figuras':>8} {'antigo (s)':>11} {'novo (s)':>9} {'speedup':>8}")
+    for n in n_estacoes_lista:
+        with tempfile.TemporaryDirectory() as pasta:
+            tarefas = []
+            for codigo, df, corr in _estacoes_sinteticas(df_merged, n):
+                tarefas += tarefas_estacao(df, corr, codigo, pasta=pasta, prefixo=f'{codigo}_')
+
+            inicio = time.perf_counter()
+            for tarefa in tarefas:
+                _renderizar_ingenuo(tarefa, dpi)
+            t_antigo = time.perf_counter() - inicio
+
+            _modelos.clear()
+            inicio = time.perf_counter()
+            renderizar_em_lote(tarefas, workers=workers, dpi=dpi)
+            t_novo = time.perf_counter() - inicio
+        print(f"   {n:9d} {len(tarefas):8d} {t_antigo:11.2f} {t_novo:9.2f} {t_antigo / t_novo:7.1f}x")
+
+
+def _serie_horaria_sintetica(anos, semente=0):
+    """Precipitação/temperatura horárias de `anos` anos com ~20 inundações e deslizamentos por ano."""
+    rng = np.random.default_rng(semente)
+    indice = pd.date_range('2000-01-01', periods=int(anos * 8760), freq='h', name='Data_Hora')
+    horas = np.arange(len(indice))
+    chuva = np.where(rng.random(len(indice)) < 0.08, rng.gamma(0.6, 4.0, len(indice)), 0.0)
+    temperatura = (27 + 3 * np.sin(2 * np.pi * horas / 8766) + 4 * np.sin(2 * np.pi * (horas - 9) / 24)
+                   + rng.normal(0, 0.8, len(indice)))
+    df = pd.DataFrame({'Precipitacao_mm': chuva, 'Temperatura_Maxima_C': temperatura,
+                       'Inundacao_Alagamento': 0, 'Deslizamento': 0}, index=indice)
+    n_eventos = max(int(20 * anos), 1)
+    df.iloc[np.argsort(chuva)[-n_eventos:], df.columns.get_loc('Inundacao_Alagamento')] = 1
+    df.iloc[rng.choice(len(df), n_eventos, replace=False), df.columns.get_loc('Deslizamento')] = 1
+    return df
+
+
+def _fracao_pixels_diferentes(caminho_a, caminho_b):
+    import matplotlib.image as mpimg
+    a, b = mpimg.imread(caminho_a), mpimg.imread(caminho_b)
+    return float((np.abs(a - b).max(axis=-1) > 0.25).mean()) if a.shape == b.shape else float('nan')
+
+
+def benchmark_series(anos_lista, dpi=DPI, tipos=('precipitacao', 'temperatura')):
+    """Tempo por figura de séries horárias longas: caminho antigo x faixa por coluna de pixels.
+
+    Também desenha a série completa no mesmo modelo e compara os pixels com
+    a figura reduzida, e confere que todo evento virou marcador.
+    """
+    print(f"   {'anos':>5} {'figura':>12} {'pontos':>9} {'desenhados':>10} {'antigo (s)':>11} "
+          f"{'novo (s)':>9} {'speedup':>8} {'px diferentes':>14} {'eventos':>8}")
+    with tempfile.TemporaryDirectory() as pasta:
+        # Aquece os imports do matplotlib/seaborn fora das medições
+        df = _serie_horaria_sintetica(0.01)
+        _renderizar_ingenuo(('precipitacao', df, os.path.join(pasta, 'x.png'), ''), dpi)
+    for anos in anos_lista:
+        df = _serie_horaria_sintetica(anos)
+        for tipo in tipos:
+            config = FIGURAS[tipo]
+            dados = df[[config['coluna'], config['coluna_evento']]]
+            with tempfile.TemporaryDirectory() as pasta:
+                tarefa = (tipo, dados, os.path.join(pasta, 'antigo.png'), config['titulo'].format(local='Teste'))
+                inicio = time.perf_counter()
+                _renderizar_ingenuo(tarefa, dpi)
+                t_antigo = time.perf_counter() - inicio
+
+                # Modelo já criado (estado das estações seguintes do lote)
+                _modelos.clear()
+                caminho_novo = os.path.join(pasta, 'novo.png')
+                renderizar_figura(tipo, dados, caminho_novo, tarefa[3], dpi)
+                inicio = time.perf_counter()
+                renderizar_figura(tipo, dados, caminho_novo, tarefa[3], dpi)
+                t_novo = time.perf_counter() - inicio
+
+                modelo = _modelos[tipo]
+                if modelo['faixa'] is None:
+                    desenhados = len(modelo['linha'].get_xdata())
+                else:
+                    desenhados = sum(len(p.vertices) for p in modelo['faixa'].get_paths())
+                    modelo['faixa'].remove()
+                    modelo['faixa'] = None
+                marcadores = len(modelo['pontos'].get_offsets())
+                caminho_completo = os.path.join(pasta, 'completo.png')
+                modelo['linha'].set_data(dados.index.to_numpy(), dados[config['coluna']].to_numpy(dtype=float))
+                modelo['fig'].savefig(caminho_completo, dpi=dpi)
+                diferentes = _fracao_pixels_diferentes(caminho_novo, caminho_completo)
+                n_eventos = int((dados[config['coluna_evento']] == 1).sum())
+            print(f"   {anos:5g} {tipo:>12} {len(dados):9,} {desenhados:10,} {t_antigo:11.2f} {t_novo:9.3f} "
+                  f"{t_antigo / t_novo:7.1f}x {diferentes:13.4%} {marcadores:>4}/{n_eventos:<4}")
+    _modelos.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da renderização de figuras por estação")
+    parser.add_argument('--benchmark', type=int, nargs='+', default=[1, 600], help="Números de estações")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--mesclado', default='merged_climatic_disaster_data_aracaju_2023.csv')
+    parser.add_argument('--series-anos', type=float, nargs='+',
+                        help="Só o benchmark de séries horárias longas com esses números de anos")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("BENCHMARK DE RENDERIZAÇÃO DE FIGURAS")
+    if args.series_anos:
+        print("Séries horárias longas: faixa mínimo..máximo por coluna de pixels")
+        print("=" * 70)
+        benchmark_series(args.series_anos)
+        return 0
+    print(f"Workers: {args.workers or os.cpu_count()} | Figuras por estação: {len(TIPOS)}")
+    print("=" * 70)
+    benchmark(args.benchmark, args.workers, args.mesclado)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sensibilidade das regras de gatilho de desastre ao limiar de chuva.
+
+As flags simuladas (PASSO 2) dependem de uma regra arbitrária:
+Precipitacao_mm > quantil 0.95 para inundação e > 5 mm para candidatos a
+deslizamento. Aqui a regra "chuva acumulada em J dias > limiar" é avaliada
+contra as flags observadas para centenas de limiares (mm fixos e quantis de
+cada estação), várias janelas de acumulação e todas as estações de uma vez.
+
+Para cada (estação, janela), os dias são ordenados uma vez pela chuva
+acumulada e as flags observadas viram somas acumuladas nessa ordem. O
+número de dias com chuva <= limiar sai de uma busca binária
+(np.searchsorted) em todas as linhas ao mesmo tempo, e daí a tabela de
+contingência de cada limiar:
+
+    acertos            = eventos - eventos entre os dias <= limiar
+    falsos alarmes     = dias > limiar - acertos
+    perdas             = eventos - acertos
+    negativos corretos = dias sem evento - falsos alarmes
+
+sem refiltrar o DataFrame por limiar. Os quantis de cada estação também
+saem das linhas já ordenadas. Dias sem dado de chuva ou sem flag não entram.
+
+Métricas: POD (taxa de acerto), FAR (razão de falsos alarmes), POFD (taxa
+de falso alarme, eixo x da curva ROC), CSI e Phi (correlação de Pearson
+entre a regra binária e a flag observada).
+
+Uso:
+    python sensibilidade_limiares.py --lote inmet_diario_lote.csv --saida sensibilidade.npz
+    python sensibilidade_limiares.py --lote inmet_diario_lote.csv --estacao A409 --grafico roc_A409.png
+    python sensibilidade_limiares.py --benchmark 600
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from etapas_pipeline import COLUNAS_DESASTRES, PARAMETROS_DESASTRES, ARQUIVO_MESCLADO
+
+JANELAS_DIAS = (1, 3, 7, 15, 30)
+LIMIARES_MM = np.arange(0.0, 200.5, 1.0)
+QUANTIS = np.round(np.linspace(0.50, 0.995, 100), 4)
+COBERTURA_MINIMA = 0.8
+CONTAGENS = ('acertos', 'falsos_alarmes', 'perdas', 'negativos_corretos')
+METRICAS = ('POD', 'FAR', 'POFD', 'CSI', 'Phi')
+ARQUIVO_ROC = 'sensibilidade_roc.png'
+
+# Regras do PASSO 2 (criar_desastres_dummy): (tipo, janela em dias, limiar)
+REGRAS_ATUAIS = {
+    'Inundacao_Alagamento': ('quantil', 1, PARAMETROS_DESASTRES['quantil_inundacao']),
+    'Chuvas_Intensas': ('quantil', 1, PARAMETROS_DESASTRES['quantil_inundacao']),
+    'Deslizamento': ('mm', 1, PARAMETROS_DESASTRES['limiar_deslizamento_mm']),
+}
+
+
+# ============================================================================
+# NÚCLEOS VETORIZADOS
+# ============================================================================
+
+def chuva_acumulada(chuva, janela, cobertura_minima=COBERTURA_MINIMA):
+    """Soma móvel de `janela` dias terminando em cada dia (estações, dias), por cumsum.
+
+    A soma só vale com ao menos `cobertura_minima` dos dias com dado; os
+    primeiros janela - 1 dias ficam NaN.
+    """
+    if janela == 1:
+        return chuva
+    presente = ~np.isnan(chuva)
+    zeros = np.zeros((chuva.shape[0], 1))
+    soma = np.concatenate([zeros, np.cumsum(np.where(presente, chuva, 0.0), axis=1)], axis=1)
+    n = np.concatenate([zeros, np.cumsum(presente, axis=1)], axis=1)
+    saida = np.full(chuva.shape, np.nan)
+    # Arredonda o ruído da diferença de somas (sem isso 5.0 vira 5.000000001 > 5)
+    saida[:, janela - 1:] = np.where(n[:, janela:] - n[:, :-janela] >= cobertura_minima * janela,
+                                     np.round(soma[:, janela:] - soma[:, :-janela], 6), np.nan)
+    return saida
+
+
+def _ordenar(preditor, observados):
+    """Linhas ordenadas pelo preditor (faltas no fim) e somas acumuladas das flags nessa ordem.
+
+    Devolve (ordenado, n_validos, acum_eventos, acum_dias), com as somas
+    acumuladas por desastre no formato (linhas, dias + 1, desastres).
+    """
+    ordem = np.argsort(preditor, axis=1)
+    ordenado = np.take_along_axis(preditor, ordem, axis=1)
+    obs = np.take_along_axis(observados, ordem[:, :, None], axis=1)
+    valido = ~np.isnan(obs) & ~np.isnan(ordenado)[:, :, None]
+    zeros = np.zeros((obs.shape[0], 1, obs.shape[2]), dtype=np.int32)
+    acum_eventos = np.concatenate([zeros, np.cumsum(valido & (obs > 0), axis=1, dtype=np.int32)], axis=1)
+    acum_dias = np.concatenate([zeros, np.cumsum(valido, axis=1, dtype=np.int32)], axis=1)
+    return ordenado, (~np.isnan(preditor)).sum(axis=1), acum_eventos, acum_dias
+
+
+def _quantis_ordenados(ordenado, n_validos, quantis):
+    """Quantis (interpolação linear, como pandas/numpy) de cada linha já ordenada -> (linhas, quantis)."""
+    posicao = np.asarray(quantis)[None, :] * np.maximum(n_validos - 1, 0)[:, None]
+    abaixo = np.floor(posicao).astype(np.int64)
+    acima = np.minimum(abaixo + 1, np.maximum(n_validos - 1, 0)[:, None])
+    fracao = posicao - abaixo
+    a = np.take_along_axis(ordenado, abaixo, axis=1)
+    b = np.take_along_axis(ordenado, acima, axis=1)
+    valores = a + (b - a) * fracao
+    return np.where(n_validos[:, None] > 0, valores, np.nan)
+
+
+def _contar_ate(ordenado, n_validos, limiares):
+    """Dias com preditor <= limiar, para limiares (linhas, K), com uma busca binária só.
+
+    Cada linha é deslocada por um múltiplo da amplitude dos dados, o que
+    torna o vetor inteiro crescente; as faltas ficam acima de qualquer limiar
+    da própria linha.
+    """
+    linhas, dias = ordenado.shape
+    finitos = ordenado[np.isfinite(ordenado)]
+    minimo, maximo = (float(finitos.min()), float(finitos.max())) if finitos.size else (0.0, 0.0)
+    amplitude = maximo - minimo + 2.0
+    deslocamento = np.arange(linhas)[:, None] * amplitude
+    chaves = (np.where(np.isnan(ordenado), maximo + 1.0, ordenado) - minimo + deslocamento).ravel()
+    alvos = np.clip(np.nan_to_num(limiares, nan=maximo + 0.5), minimo - 0.5, maximo + 0.5) - minimo + deslocamento
+    ate = np.searchsorted(chaves, alvos.ravel(), side='right').reshape(limiares.shape) - np.arange(linhas)[:, None] * dias
+    return np.minimum(ate, n_validos[:, None])
+
+
+def _contingencia(ordenacao, limiares):
+    """Contagens (linhas, limiares, desastres, 4) a partir de uma ordenação de _ordenar."""
+    ordenado, n_validos, acum_eventos, acum_dias = ordenacao
+    ate = _contar_ate(ordenado, n_validos, limiares)
+    eventos = acum_eventos[:, -1][:, None, :]
+    dias = acum_dias[:, -1][:, None, :]
+    eventos_ate = np.take_along_axis(acum_eventos, ate[:, :, None], axis=1)
+    dias_ate = np.take_along_axis(acum_dias, ate[:, :, None], axis=1)
+    acertos = eventos - eventos_ate
+    falsos = (dias - dias_ate) - acertos
+    contagens = np.stack([acertos, falsos, eventos - acertos, (dias - eventos) - falsos], axis=-1)
+    contagens[np.isnan(limiares)] = 0
+    return contagens
+
+
+def tabelas_contingencia(preditor, observados, limiares=LIMIARES_MM, quantis=None):
+    """Contagens (linhas, limiares, desastres, 4) da regra `preditor > limiar` contra `observados`.
+
+    `preditor` é (linhas, dias) e `observados` (linhas, dias, desastres), com
+    NaN onde falta dado. Com `quantis`, os limiares são os quantis do preditor
+    em cada linha, devolvidos junto: (contagens, limiares (linhas, quantis)).
+    """
+    ordenacao = _ordenar(preditor, observados)
+    if quantis is not None:
+        limiares = _quantis_ordenados(ordenacao[0], ordenacao[1], quantis)
+        return _contingencia(ordenacao, limiares), limiares
+    limiares = np.broadcast_to(np.asarray(limiares, dtype=np.float64), (preditor.shape[0], len(limiares)))
+    return _contingencia(ordenacao, limiares)
+
+
+def metricas(contagens):
+    """{métrica: array} a partir das contagens (..., 4); NaN onde a razão não existe."""
+    a, b, c, d = (np.asarray(contagens[..., i], dtype=np.float64) for i in range(4))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'POD': a / (a + c),
+            'FAR': b / (a + b),
+            'POFD': b / (b + d),
+            'CSI': a / (a + b + c),
+            'Phi': (a * d - b * c) / np.sqrt((a + b) * (c + d) * (a + c) * (b + d)),
+        }
+
+
+def varrer_limiares(chuva, observados, janelas=JANELAS_DIAS, limiares_mm=LIMIARES_MM, quantis=QUANTIS,
+                    cobertura_minima=COBERTURA_MINIMA):
+    """Varredura completa para chuva (estações, dias) e observados (estações, dias, desastres).
+
+    Devolve {'mm': (estações, janelas, limiares, desastres, 4),
+    'quantil': (estações, janelas, quantis, desastres, 4),
+    'limiares_quantil': (estações, janelas, quantis)}.
+    """
+    mm, quantil, limiares_quantil = [], [], []
+    for janela in janelas:
+        acumulada = chuva_acumulada(chuva, janela, cobertura_minima)
+        # Uma ordenação por janela serve aos limiares em mm e aos quantis
+        ordenacao = _ordenar(acumulada, observados)
+        limiares = _quantis_ordenados(ordenacao[0], ordenacao[1], quantis)
+        mm.append(_contingencia(ordenacao, np.broadcast_to(np.asarray(limiares_mm, dtype=np.float64),
+                                                           (chuva.shape[0], len(limiares_mm)))))
+        quantil.append(_contingencia(ordenacao, limiares))
+        limiares_quantil.append(limiares)
+    return {'mm': np.stack(mm, axis=1), 'quantil': np.stack(quantil, axis=1),
+            'limiares_quantil': np.stack(limiares_quantil, axis=1)}
+
+
+# ============================================================================
+# TABELAS
+# ============================================================================
+
+def melhores_limiares(resultado, estacoes, desastres, janelas=JANELAS_DIAS, limiares_mm=LIMIARES_MM,
+                      quantis=QUANTIS, criterio='CSI'):
+    """Por estação, desastre, janela e tipo de limiar: o limiar de maior `criterio`."""
+    partes = []
+    for tipo, parametros in (('mm', np.asarray(limiares_mm)), ('quantil', np.asarray(quantis))):
+        valores = metricas(resultado[tipo])
+        alvo = np.where(np.isnan(valores[criterio]), -np.inf, valores[criterio])
+        melhor = alvo.argmax(axis=2)[:, :, None, :]
+        tabela = {m: np.take_along_axis(v, melhor, axis=2)[:, :, 0, :] for m, v in valores.items()}
+        parametro = parametros[melhor[:, :, 0, :]]
+        if tipo == 'mm':
+            limiar = parametro
+        else:
+            limiar = np.take_along_axis(resultado['limiares_quantil'], melhor[:, :, 0, :], axis=2)
+        indice = pd.MultiIndex.from_product([estacoes, [f'{j}d' for j in janelas], desastres],
+                                            names=['Codigo_Estacao', 'Janela', 'Desastre'])
+        df = pd.DataFrame({'Tipo': tipo, 'Parametro': parametro.ravel(), 'Limiar_mm': limiar.ravel(),
+                           **{m: v.ravel() for m, v in tabela.items()}}, index=indice)
+        partes.append(df[~np.isnan(df[criterio])])
+    return pd.concat(partes).reset_index().sort_values(['Codigo_Estacao', 'Desastre', 'Janela', 'Tipo'],
+                                                       ignore_index=True)
+
+
+def _posicao_regra(tipo, janela, limiar, janelas, limiares_mm, quantis):
+    grade = np.asarray(limiares_mm if tipo == 'mm' else quantis)
+    if janela not in janelas or not np.isclose(grade, limiar).any():
+        return None
+    return list(janelas).index(janela), int(np.argmin(np.abs(grade - limiar)))
+
+
+def regras_atuais(resultado, desastres, janelas=JANELAS_DIAS, limiares_mm=LIMIARES_MM, quantis=QUANTIS):
+    """Métricas da rede para a regra atual de cada desastre vs o melhor CSI da varredura (rede)."""
+    linhas = []
+    for k, desastre in enumerate(desastres):
+        if desastre not in REGRAS_ATUAIS:
+            continue
+        tipo, janela, limiar = REGRAS_ATUAIS[desastre]
+        posicao = _posicao_regra(tipo, janela, limiar, janelas, limiares_mm, quantis)
+        if posicao is None:
+            continue
+        rede = {t: metricas(resultado[t][..., k, :].sum(axis=0)) for t in ('mm', 'quantil')}
+        atual = {m: v[posicao] for m, v in rede[tipo].items()}
+        melhor_csi, melhor = -np.inf, None
+        for t, valores in rede.items():
+            csi = np.where(np.isnan(valores['CSI']), -np.inf, valores['CSI'])
+            j, i = np.unravel_index(int(csi.argmax()), csi.shape)
+            if csi[j, i] > melhor_csi:
+                grade = limiares_mm if t == 'mm' else quantis
+                melhor_csi, melhor = csi[j, i], f"{'> ' if t == 'mm' else 'quantil '}{grade[i]:g}{' mm' if t == 'mm' else ''} em {janelas[j]}d"
+        linhas.append({'Desastre': desastre,
+                       'Regra': f"{'> ' if tipo == 'mm' else 'quantil '}{limiar:g}{' mm' if tipo == 'mm' else ''} em {janela}d",
+                       **{m: atual[m] for m in METRICAS}, 'Melhor_regra': melhor, 'Melhor_CSI': melhor_csi})
+    return pd.DataFrame(linhas)
+
+
+# ============================================================================
+# GRÁFICO
+# ============================================================================
+
+def grafico_roc(contagens_mm, contagens_quantil, desastres, caminho, titulo, janelas=JANELAS_DIAS,
+                limiares_mm=LIMIARES_MM, quantis=QUANTIS, dpi=150):
+    """Curvas ROC (POFD x POD) por desastre: uma linha por janela (mm cheia, quantis tracejada).
+
+    As contagens são (janelas, limiares, desastres, 4), de uma estação ou já
+    somadas na rede. A regra atual de cada desastre é marcada com uma estrela.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(5 * len(desastres), 5.2))
+    eixos = fig.subplots(1, len(desastres), squeeze=False)[0]
+    cores = matplotlib.colormaps['viridis'](np.linspace(0, 0.9, len(janelas)))
+    valores = {'mm': metricas(contagens_mm), 'quantil': metricas(contagens_quantil)}
+    for k, (ax, desastre) in enumerate(zip(eixos, desastres)):
+        for j, janela in enumerate(janelas):
+            for tipo, estilo in (('mm', '-'), ('quantil', '--')):
+                ax.plot(valores[tipo]['POFD'][j, :, k], valores[tipo]['POD'][j, :, k], estilo, color=cores[j],
+                        linewidth=1.3, label=f'{janela}d' if tipo == 'mm' else None)
+        if desastre in REGRAS_ATUAIS:
+            tipo, janela, limiar = REGRAS_ATUAIS[desastre]
+            posicao = _posicao_regra(tipo, janela, limiar, janelas, limiares_mm, quantis)
+            if posicao is not None:
+                ax.plot(valores[tipo]['POFD'][posicao[0], posicao[1], k], valores[tipo]['POD'][posicao[0], posicao[1], k],
+                        'r*', markersize=14, label='regra atual')
+        ax.plot([0, 1], [0, 1], color='gray', linewidth=0.8, linestyle=':')
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1.02)
+        ax.set_xlabel('POFD (taxa de falso alarme)', fontsize=11)
+        ax.set_title(desastre, fontsize=12)
+        ax.grid(True, alpha=0.3)
+    eixos[0].set_ylabel('POD (taxa de acerto)', fontsize=11)
+    eixos[0].legend(title='janela (— mm, - - quantil)', fontsize=9)
+    fig.suptitle(titulo, fontsize=14)
+    fig.tight_layout()
+    fig.savefig(caminho, dpi=dpi)
+    return caminho
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _contagens_por_filtro(df, coluna, desastres, limiares):
+    """Referência: um filtro do DataFrame por limiar, como em criar_desastres_dummy."""
+    saida = np.zeros((len(limiares), len(desastres), 4), dtype=np.int64)
+    for i, limiar in enumerate(limiares):
+        for k, desastre in enumerate(desastres):
+            dias = df[df[coluna].notna() & df[desastre].notna()]
+            alerta = dias[dias[coluna] > limiar]
+            acertos = int((alerta[desastre] > 0).sum())
+            falsos = len(alerta) - acertos
+            eventos = int((dias[desastre] > 0).sum())
+            saida[i, k] = (acertos, falsos, eventos - acertos, len(dias) - eventos - falsos)
+    return saida
+
+
+def _rede_sintetica(n_estacoes, n_dias, semente=0):
+    """Chuva diária (gama, ~35% dos dias com chuva) e flags de desastre ligadas à chuva acumulada."""
+    rng = np.random.default_rng(semente)
+    escala = rng.uniform(4.0, 14.0, (n_estacoes, 1))
+    chuva = np.where(rng.random((n_estacoes, n_dias)) < 0.35,
+                     np.round(rng.gamma(0.7, 1.0, (n_estacoes, n_dias)) * escala / 0.2) * 0.2, 0.0)
+    chuva[rng.random(chuva.shape) < 0.03] = np.nan
+    acumulada = chuva_acumulada(chuva, 3)
+    gatilho = np.nan_to_num(acumulada) > np.nanquantile(acumulada, 0.97, axis=1, keepdims=True)
+    inundacao = (gatilho & (rng.random(chuva.shape) < 0.6)) | (rng.random(chuva.shape) < 0.005)
+    deslizamento = (np.roll(gatilho, 1, axis=1) & (rng.random(chuva.shape) < 0.2)) | (rng.random(chuva.shape) < 0.001)
+    observados = np.stack([inundacao, deslizamento, gatilho], axis=2).astype(np.float64)
+    return chuva, observados, ['Inundacao_Alagamento', 'Deslizamento', 'Chuvas_Intensas']
+
+
+def benchmark(n_estacoes, n_dias=365 * 24, janelas=JANELAS_DIAS):
+    chuva, observados, desastres = _rede_sintetica(n_estacoes, n_dias)
+    inicio = time.perf_counter()
+    resultado = varrer_limiares(chuva, observados, janelas)
+    t_vetorizado = time.perf_counter() - inicio
+    n_regras = len(janelas) * (len(LIMIARES_MM) + len(QUANTIS)) * len(desastres)
+
+    # Referência: filtros do DataFrame em uma estação e uma janela, com parte dos limiares
+    amostra = LIMIARES_MM[::10]
+    j = list(janelas).index(3) if 3 in janelas else 0
+    df = pd.DataFrame(observados[0], columns=desastres)
+    df['chuva'] = chuva_acumulada(chuva[:1], janelas[j])[0]
+    inicio = time.perf_counter()
+    referencia = _contagens_por_filtro(df, 'chuva', desastres, amostra)
+    t_filtro = time.perf_counter() - inicio
+    t_estimado = t_filtro * (n_regras / (len(amostra) * len(desastres))) * n_estacoes
+    iguais = np.array_equal(referencia, resultado['mm'][0, j, ::10])
+
+    rede = metricas(resultado['mm'][:, j].sum(axis=0))
+    print(f"   Estações: {n_estacoes} | Dias: {n_dias:,} | Janelas: {len(janelas)} | "
+          f"Limiares: {len(LIMIARES_MM)} mm + {len(QUANTIS)} quantis | Desastres: {len(desastres)}")
+    print(f"   Regras avaliadas: {n_regras * n_estacoes:,}")
+    print(f"   Vetorizado (ordenação + busca binária): {t_vetorizado:8.2f}s")
+    print(f"   Filtro do DataFrame por limiar (estimado): {t_estimado:8.0f}s "
+          f"({len(amostra) * len(desastres)} regras de 1 estação medidas em {t_filtro:.2f}s)")
+    print(f"   Speedup: {t_estimado / t_vetorizado:,.0f}x | Contagens iguais à referência: {iguais}")
+    k = int(np.nanargmax(rede['CSI'][:, 0]))
+    print(f"   Rede, inundação x chuva de {janelas[j]}d: melhor CSI {rede['CSI'][k, 0]:.3f} "
+          f"em > {LIMIARES_MM[k]:g} mm (POD {rede['POD'][k, 0]:.2f}, FAR {rede['FAR'][k, 0]:.2f})")
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sensibilidade das regras de desastre ao limiar de chuva")
+    parser.add_argument('--mesclado', default=ARQUIVO_MESCLADO, help="Dataset diário mesclado de uma estação")
+    parser.add_argument('--lote', help="Tabela diária (Codigo_Estacao, Data) de várias estações")
+    parser.add_argument('--janelas', type=int, nargs='+', default=list(JANELAS_DIAS), help="Dias de acumulação")
+    parser.add_argument('--limiar-maximo', type=float, default=float(LIMIARES_MM[-1]), help="Último limiar em mm")
+    parser.add_argument('--passo', type=float, default=1.0, help="Passo dos limiares em mm")
+    parser.add_argument('--criterio', choices=METRICAS, default='CSI', help="Métrica do melhor limiar")
+    parser.add_argument('--saida', default='sensibilidade_limiares.npz', help=".npz com as contagens")
+    parser.add_argument('--tabela', default='sensibilidade_melhores.csv',
+                        help="CSV com o melhor limiar por estação, desastre e janela")
+    parser.add_argument('--estacao', help="Curvas ROC de uma estação (padrão: rede inteira)")
+    parser.add_argument('--grafico', default=ARQUIVO_ROC)
+    parser.add_argument('--benchmark', type=int, metavar='ESTACOES', help="Benchmark com N estações sintéticas")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("SENSIBILIDADE DOS LIMIARES DE DESASTRE")
+    print("=" * 70)
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return 0
+
+    origem = args.lote or args.mesclado
+    if not os.path.exists(origem):
+        print(f"❌ ERRO: Arquivo não encontrado: {origem}")
+        return 1
+
+    from correlacao_defasada import ler_lote, matrizes_estacao, matrizes_rede
+    inicio = time.perf_counter()
+    if args.lote:
+        X, Y, estacoes, variaveis, desastres = matrizes_rede(ler_lote(args.lote), ['Precipitacao_mm'])
+    else:
+        df_merged = pd.read_csv(origem, index_col=0, parse_dates=True)
+        X, Y, variaveis, desastres = matrizes_estacao(df_merged, ['Precipitacao_mm'])
+        estacoes = [args.estacao or 'estacao']
+    if not variaveis or not desastres:
+        print("❌ ERRO: É preciso Precipitacao_mm e ao menos uma coluna de desastre "
+              f"({', '.join(COLUNAS_DESASTRES)})")
+        return 1
+
+    janelas = tuple(sorted(set(args.janelas)))
+    limiares_mm = np.arange(0.0, args.limiar_maximo + args.passo / 2, args.passo)
+    resultado = varrer_limiares(X[:, :, 0], Y, janelas, limiares_mm)
+    print(f"✓ {len(estacoes)} estação(ões) x {X.shape[1]:,} dias x {len(janelas)} janelas x "
+          f"{len(limiares_mm) + len(QUANTIS)} limiares x {len(desastres)} desastres "
+          f"em {time.perf_counter() - inicio:.2f}s")
+
+    np.savez(args.saida, mm=resultado['mm'], quantil=resultado['quantil'],
+             limiares_quantil=resultado['limiares_quantil'], limiares_mm=limiares_mm, quantis=QUANTIS,
+             janelas=np.asarray(janelas), contagens=np.asarray(CONTAGENS),
+             estacoes=np.asarray(estacoes, dtype=str), desastres=np.asarray(desastres, dtype=str))
+    print(f"✓ Salvo: {args.saida}")
+
+    melhores_limiares(resultado, estacoes, desastres, janelas, limiares_mm, QUANTIS, args.criterio).to_csv(
+        args.tabela, index=False)
+    print(f"✓ Salvo: {args.tabela}")
+
+    if args.estacao and args.lote:
+        if args.estacao not in estacoes:
+            print(f"❌ ERRO: Estação {args.estacao} não está na tabela")
+            return 1
+        s = estacoes.index(args.estacao)
+        contagens_mm, contagens_quantil = resultado['mm'][s], resultado['quantil'][s]
+        titulo = f'Sensibilidade dos limiares - {args.estacao}'
+    else:
+        contagens_mm, contagens_quantil = resultado['mm'].sum(axis=0), resultado['quantil'].sum(axis=0)
+        titulo = f'Sensibilidade dos limiares - {len(estacoes)} estação(ões)'
+    grafico_roc(contagens_mm, contagens_quantil, desastres, args.grafico, titulo, janelas, limiares_mm)
+    print(f"✓ Salvo: {args.grafico}")
+
+    print("\n📊 Regra atual vs melhor CSI (rede):")
+    for _, linha in regras_atuais(resultado, desastres, janelas, limiares_mm).iterrows():
+        print(f"   - {linha['Desastre']:<22} {linha['Regra']:<20} CSI {linha['CSI']:.3f} "
+              f"(POD {linha['POD']:.2f}, FAR {linha['FAR']:.2f}) | melhor: {linha['Melhor_regra']} "
+              f"CSI {linha['Melhor_CSI']:.3f}")
+    print("=" * 70)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
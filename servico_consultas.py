@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serviço HTTP/JSON local para consultas de agregados diários e matrizes de
+correlação por estação e período, sem editar constantes e rodar de novo
+analise_completa.py.
+
+Os dados diários de todas as estações são carregados uma vez na partida (de
+uma tabela em lote, do acervo horário ou do CSV padrão de Aracaju), com as
+colunas de desastre dos eventos reais (--eventos) ou do PASSO 2 simulado.
+Cada consulta só fatia a tabela da estação, reamostra (se pedido) e chama o
+mesmo .corr() de calcular_correlacao. As respostas já serializadas ficam em
+um cache LRU em memória; consultas repetidas não recalculam nada.
+
+As requisições são atendidas por um pool de threads (ThreadingHTTPServer,
+HTTP/1.1 com keep-alive); a base é somente leitura e o cache tem trava
+própria, então consultas simultâneas não se bloqueiam.
+
+Rotas (GET):
+    /estacoes
+    /diario?estacao=A409&inicio=2023-01-01&fim=2023-03-31&variaveis=Precipitacao_mm,Deslizamento&freq=D
+    /correlacao?estacao=A409&inicio=2023-01-01&fim=2023-12-31&variaveis=...
+    /saude                                   (uptime, requisições e acertos do cache)
+
+Uso:
+    python servico_consultas.py                               # Aracaju 2023 em http://127.0.0.1:8765
+    python servico_consultas.py --lote inmet_diario_lote.csv --porta 8080
+    python servico_consultas.py --acervo acervo_inmet --eventos s2id.csv --catalogo estacoes_inmet.csv
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+from inmet_comum import AGREGACOES_DIARIAS, extrair_info_nome_arquivo, preprocessar_inmet
+from etapas_pipeline import (ARQUIVO_INMET, COLUNAS_ANALISE, COLUNAS_DESASTRES, PARAMETROS_DESASTRES,
+                             criar_desastres_dummy, calcular_correlacao)
+
+ENDERECO = '127.0.0.1'
+PORTA = 8765
+ITENS_CACHE = 2048
+# Agregação de cada coluna quando freq != 'D' (desastres: houve evento no período)
+AGREGACOES_PERIODO = {**AGREGACOES_DIARIAS, **{coluna: 'max' for coluna in COLUNAS_DESASTRES}}
+
+
+class ErroConsulta(Exception):
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.status = status
+
+
+# ============================================================================
+# CACHE LRU
+# ============================================================================
+
+class CacheLRU:
+    """Dicionário LRU com limite de itens, seguro entre threads."""
+
+    def __init__(self, max_itens=ITENS_CACHE):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, chave):
+        with self._trava:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave]
+            self.faltas += 1
+            return None
+
+    def guardar(self, chave, valor):
+        with self._trava:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def obter_ou_calcular(self, chave, calcular):
+        valor = self.obter(chave)
+        if valor is None:
+            # Calculado fora da trava: duas threads podem calcular a mesma chave, mas nenhuma espera a outra
+            valor = calcular()
+            self.guardar(chave, valor)
+        return valor
+
+    def estatisticas(self):
+        with self._trava:
+            total = self.acertos + self.faltas
+            return {'itens': len(self._itens), 'max_itens': self.max_itens, 'acertos': self.acertos,
+                    'faltas': self.faltas, 'taxa_acerto': self.acertos / total if total else None}
+
+
+# ============================================================================
+# BASE PRÉ-CARREGADA
+# ============================================================================
+
+class BaseDiaria:
+    """Tabelas diárias por estação (índice de datas ordenado), somente leitura."""
+
+    def __init__(self, df_lote, catalogo=None):
+        self.estacoes = {str(codigo): df.droplevel('Codigo_Estacao').sort_index()
+                         for codigo, df in df_lote.groupby(level='Codigo_Estacao')}
+        self.catalogo = catalogo
+
+    def __len__(self):
+        return len(self.estacoes)
+
+    def tabela(self, estacao):
+        if estacao not in self.estacoes:
+            raise ErroConsulta(f"Estação desconhecida: {estacao}", 404)
+        return self.estacoes[estacao]
+
+    def resumo_estacoes(self):
+        itens = []
+        for codigo, df in self.estacoes.items():
+            item = {'codigo': codigo, 'inicio': df.index.min().date().isoformat(),
+                    'fim': df.index.max().date().isoformat(), 'dias': len(df), 'colunas': list(df.columns)}
+            if self.catalogo is not None and codigo in self.catalogo.index:
+                linha = self.catalogo.loc[codigo]
+                item.update({c: (None if pd.isna(linha[c]) else linha[c])
+                             for c in ('estacao', 'uf', 'latitude', 'longitude') if c in linha.index})
+            itens.append(item)
+        return itens
+
+
+def _com_desastres(df_lote, eventos=None, catalogo=None):
+    """Colunas de desastre dos eventos reais ou, sem eventos, do PASSO 2 simulado por estação."""
+    if eventos:
+        from eventos_desastre import ler_eventos, mesclar_eventos
+        indice = ler_eventos(eventos, catalogo)
+        return mesclar_eventos(df_lote, indice)
+    if set(COLUNAS_DESASTRES) & set(df_lote.columns):
+        return df_lote
+    partes = {codigo: criar_desastres_dummy(df.droplevel('Codigo_Estacao'), **PARAMETROS_DESASTRES)
+              for codigo, df in df_lote.groupby(level='Codigo_Estacao')}
+    return pd.concat(partes, names=['Codigo_Estacao', 'Data'])
+
+
+def carregar_base(lote=None, acervo=None, arquivo_csv=ARQUIVO_INMET, eventos=None, catalogo=None):
+    """BaseDiaria de uma tabela em lote, de um acervo horário ou de um CSV do INMET."""
+    df_catalogo = None
+    if catalogo:
+        from indice_estacoes import ler_catalogo
+        df_catalogo = ler_catalogo(catalogo)
+    if lote:
+        df_lote = pd.read_csv(lote, index_col=['Codigo_Estacao', 'Data'], parse_dates=['Data'],
+                              dtype={'Codigo_Estacao': str})
+    elif acervo:
+        from acervo_horario import AcervoHorario
+        base = AcervoHorario(acervo)
+        df_catalogo = base.catalogo if df_catalogo is None else df_catalogo
+        df_lote = pd.concat({codigo: base.diario(codigo) for codigo in base.estacoes}, names=['Codigo_Estacao', 'Data'])
+    else:
+        codigo = (extrair_info_nome_arquivo(arquivo_csv) or {}).get('codigo', 'estacao')
+        df_lote = pd.concat({codigo: preprocessar_inmet(arquivo_csv)}, names=['Codigo_Estacao', 'Data'])
+    return BaseDiaria(_com_desastres(df_lote, eventos, df_catalogo), df_catalogo)
+
+
+# ============================================================================
+# CONSULTAS
+# ============================================================================
+
+def _parametros(consulta):
+    """(estacao, inicio, fim, variaveis, freq) normalizados da query string."""
+    valores = {k: v[-1] for k, v in parse_qs(consulta).items()}
+    if 'estacao' not in valores:
+        raise ErroConsulta("Parâmetro obrigatório: estacao")
+    try:
+        inicio = pd.Timestamp(valores['inicio']).date().isoformat() if 'inicio' in valores else None
+        fim = pd.Timestamp(valores['fim']).date().isoformat() if 'fim' in valores else None
+    except ValueError as e:
+        raise ErroConsulta(f"Data inválida: {e}")
+    variaveis = tuple(v for v in valores.get('variaveis', '').split(',') if v)
+    return valores['estacao'], inicio, fim, variaveis, valores.get('freq', 'D')
+
+
+def _recorte(base, estacao, inicio, fim, variaveis, padrao):
+    df = base.tabela(estacao)
+    variaveis = list(variaveis) or [c for c in padrao if c in df.columns]
+    faltando = [v for v in variaveis if v not in df.columns]
+    if faltando:
+        raise ErroConsulta(f"Variável(is) desconhecida(s): {', '.join(faltando)}")
+    return df.loc[inicio:fim, variaveis]
+
+
+def consultar_diario(base, estacao, inicio, fim, variaveis, freq='D'):
+    df = _recorte(base, estacao, inicio, fim, variaveis, list(base.tabela(estacao).columns))
+    if freq != 'D':
+        try:
+            df = df.resample(freq).agg({c: AGREGACOES_PERIODO.get(c, 'mean') for c in df.columns})
+        except ValueError:
+            raise ErroConsulta(f"freq inválida: {freq}")
+    df.index.name = 'Data'
+    corpo = json.loads(df.to_json(orient='split', date_format='iso', date_unit='s'))
+    return {'estacao': estacao, 'inicio': inicio, 'fim': fim, 'freq': freq,
+            'colunas': corpo['columns'], 'datas': [d[:10] for d in corpo['index']], 'dados': corpo['data']}
+
+
+def consultar_correlacao(base, estacao, inicio, fim, variaveis):
+    df = _recorte(base, estacao, inicio, fim, variaveis, COLUNAS_ANALISE)
+    matriz = calcular_correlacao(df, list(df.columns))
+    return {'estacao': estacao, 'inicio': inicio, 'fim': fim, 'dias': len(df),
+            'colunas': list(matriz.columns),
+            'matriz': json.loads(matriz.to_json(orient='values'))}
+
+
+# ============================================================================
+# SERVIDOR
+# ============================================================================
+
+class Servico:
+    """Base + cache + contadores; compartilhado por todas as threads do servidor."""
+
+    def __init__(self, base, max_itens_cache=ITENS_CACHE):
+        self.base = base
+        self.cache = CacheLRU(max_itens_cache)
+        self.inicio = time.time()
+        self.requisicoes = 0
+        self._trava = threading.Lock()
+
+    def responder(self, caminho, consulta):
+        """(status, corpo JSON em bytes)."""
+        with self._trava:
+            self.requisicoes += 1
+        try:
+            if caminho == '/saude':
+                return 200, _json({'uptime_s': time.time() - self.inicio, 'requisicoes': self.requisicoes,
+                                   'estacoes': len(self.base), 'cache': self.cache.estatisticas()})
+            if caminho == '/estacoes':
+                return 200, self.cache.obter_ou_calcular(('estacoes',), lambda: _json(self.base.resumo_estacoes()))
+            if caminho == '/diario':
+                p = _parametros(consulta)
+                return 200, self.cache.obter_ou_calcular(('diario',) + p, lambda: _json(consultar_diario(self.base, *p)))
+            if caminho == '/correlacao':
+                p = _parametros(consulta)[:4]
+                return 200, self.cache.obter_ou_calcular(('correlacao',) + p,
+                                                         lambda: _json(consultar_correlacao(self.base, *p)))
+            raise ErroConsulta(f"Rota desconhecida: {caminho}", 404)
+        except ErroConsulta as e:
+            return e.status, _json({'erro': str(e)})
+        except Exception as e:
+            return 500, _json({'erro': f"{type(e).__name__}: {e}"})
+
+
+def _json(objeto):
+    return json.dumps(objeto, ensure_ascii=False, allow_nan=False, default=str).encode('utf-8')
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # cabeçalho e corpo saem em dois send(); com Nagle ligado o segundo espera
+    # o ACK atrasado do cliente (~40 ms por resposta em keep-alive)
+    disable_nagle_algorithm = True
+    servico = None
+    silencioso = False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        status, corpo = self.servico.responder(url.path.rstrip('/') or '/', url.query)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        if not self.silencioso:
+            super().log_message(formato, *args)
+
+
+def criar_servidor(base, endereco=ENDERECO, porta=PORTA, max_itens_cache=ITENS_CACHE, silencioso=False):
+    """ThreadingHTTPServer pronto para serve_forever() (uma thread por conexão)."""
+    manipulador = type('Manipulador', (_Manipulador,), {'servico': Servico(base, max_itens_cache),
+                                                        'silencioso': silencioso})
+    servidor = ThreadingHTTPServer((endereco, porta), manipulador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço local de consultas diárias e correlações")
+    parser.add_argument('--arquivo', default=ARQUIVO_INMET, help="CSV do INMET (sem --lote/--acervo)")
+    parser.add_argument('--lote', help="Tabela diária (Codigo_Estacao, Data) de processar_lote_inmet")
+    parser.add_argument('--acervo', help="Pasta do acervo horário (acervo_horario)")
+    parser.add_argument('--eventos', nargs='*', help="CSVs de eventos reais (eventos_desastre)")
+    parser.add_argument('--catalogo', help="Catálogo de estações (indice_estacoes)")
+    parser.add_argument('--endereco', default=ENDERECO)
+    parser.add_argument('--porta', type=int, default=PORTA)
+    parser.add_argument('--cache', type=int, default=ITENS_CACHE, help="Máximo de respostas no cache LRU")
+    parser.add_argument('--silencioso', action='store_true', help="Não registra cada requisição")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("SERVIÇO DE CONSULTAS - DADOS DIÁRIOS E CORRELAÇÕES")
+    print("=" * 70)
+
+    origem = args.lote or args.acervo or args.arquivo
+    if not os.path.exists(origem):
+        print(f"❌ ERRO: Arquivo não encontrado: {origem}")
+        return 1
+
+    inicio = time.perf_counter()
+    base = carregar_base(args.lote, args.acervo, args.arquivo, args.eventos, args.catalogo)
+    print(f"✓ {len(base)} estação(ões) carregada(s) em {time.perf_counter() - inicio:.2f}s")
+
+    servidor = criar_servidor(base, args.endereco, args.porta, args.cache, args.silencioso)
+    print(f"✓ Ouvindo em http://{args.endereco}:{servidor.server_address[1]}  (Ctrl+C para encerrar)")
+    print(f"   Ex.: /correlacao?estacao={next(iter(base.estacoes))}&inicio=2023-01-01&fim=2023-06-30")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n✓ Encerrado")
+    finally:
+        servidor.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Intervalos de confiança e p-valores para cada célula da matriz de correlação.
+
+Com poucos dias de evento, boa parte das correlações impressas em
+"Correlações Principais" pode ser ruído. Para cada par de colunas de
+COLUNAS_ANALISE:
+
+  - IC por bootstrap: os dias do dataset mesclado são reamostrados com
+    reposição e a matriz é recalculada (IC percentil);
+  - p-valor por permutação: cada coluna é embaralhada independentemente
+    (hipótese nula: nenhuma associação), p = (1 + #|r*| >= |r|) / (B + 1);
+  - --bloco L > 1 reamostra/embaralha blocos de L dias consecutivos
+    (moving block bootstrap), preservando a autocorrelação das séries;
+  - p ajustado por Benjamini-Hochberg sobre todas as células.
+
+As reamostragens são feitas em lotes vetorizados (uma multiplicação de
+matrizes por lote, com máscaras para a correlação pareada igual ao
+DataFrame.corr()) e os lotes de todas as estações são distribuídos em um
+pool de processos. Cada lote tem sua própria semente derivada de
+(estação, lote), então o resultado não depende do número de workers.
+
+Uso:
+    python significancia_correlacao.py                       # Aracaju 2023
+    python significancia_correlacao.py --reamostragens 10000 --bloco 7
+    python significancia_correlacao.py --lote inmet_diario_lote.csv --workers 8
+    python significancia_correlacao.py --benchmark 50
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from etapas_pipeline import COLUNAS_ANALISE, ARQUIVO_MESCLADO
+
+ARQUIVO_SIGNIFICANCIA = 'correlation_significance.csv'
+REAMOSTRAGENS = 2000
+TAMANHO_LOTE = 250
+NIVEL_CONFIANCA = 0.95
+
+
+# ============================================================================
+# CORRELAÇÃO EM LOTE
+# ============================================================================
+
+def _pearson_das_somas(n, sx, sxx, sxy):
+    """r a partir das somas pareadas (..., colunas, colunas); sx[i, j] = soma de x_i onde x_j existe."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sxy - sx * np.swapaxes(sx, -1, -2) / n
+        vx = sxx - sx ** 2 / n
+        vy = np.swapaxes(vx, -1, -2)
+        r = cov / np.sqrt(vx * vy)
+    r[(n < 2) | (vx <= 0) | (vy <= 0)] = np.nan
+    return np.clip(r, -1.0, 1.0)
+
+
+def _centralizar(dados):
+    """(valores centralizados com NaN -> 0, máscara float). Centralizar não muda a correlação."""
+    m = ~np.isnan(dados)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = np.nan_to_num(np.where(m, dados, 0.0).sum(axis=-2, keepdims=True) / m.sum(axis=-2, keepdims=True))
+    return np.where(m, dados - media, 0.0), m.astype(np.float64)
+
+
+def correlacao_em_lote(dados):
+    """(r, n_pares) de um lote (B, dias, colunas), ambos (B, colunas, colunas); pares completos como no .corr()."""
+    a, mf = _centralizar(dados)
+    at = np.ascontiguousarray(a.transpose(0, 2, 1))
+    n = np.ascontiguousarray(mf.transpose(0, 2, 1)) @ mf
+    return _pearson_das_somas(n, at @ mf, (at * at) @ mf, at @ a), n
+
+
+def produtos_diarios(dados):
+    """(dias, 4 * colunas²): produtos m_i*m_j, x_i*m_j, x_i²*m_j e x_i*x_j de cada dia.
+
+    Uma reamostragem bootstrap é só um vetor de pesos (quantas vezes cada dia
+    foi sorteado); as somas de todas as reamostragens de um lote saem então de
+    uma única multiplicação pesos @ produtos.
+    """
+    a, mf = _centralizar(dados)
+    produtos = np.stack([mf[:, :, None] * mf[:, None, :], a[:, :, None] * mf[:, None, :],
+                         (a * a)[:, :, None] * mf[:, None, :], a[:, :, None] * a[:, None, :]], axis=1)
+    return produtos.reshape(len(dados), -1)
+
+
+def correlacao_ponderada(pesos, produtos, n_colunas):
+    """Matrizes de correlação (B, colunas, colunas) para B vetores de pesos por dia."""
+    somas = (pesos @ produtos).reshape(len(pesos), 4, n_colunas, n_colunas)
+    return _pearson_das_somas(*np.moveaxis(somas, 1, 0))
+
+
+def indices_bootstrap(rng, reamostragens, n_dias, bloco=1):
+    """(B, n_dias) índices do moving block bootstrap (bloco=1: bootstrap simples)."""
+    n_blocos = -(-n_dias // bloco)
+    inicios = rng.integers(0, n_dias - bloco + 1, size=(reamostragens, n_blocos))
+    return (inicios[:, :, None] + np.arange(bloco)).reshape(reamostragens, -1)[:, :n_dias]
+
+
+def pesos_bootstrap(rng, reamostragens, n_dias, bloco=1):
+    """(B, n_dias) quantas vezes cada dia entra em cada reamostragem."""
+    indices = indices_bootstrap(rng, reamostragens, n_dias, bloco) + n_dias * np.arange(reamostragens)[:, None]
+    return np.bincount(indices.ravel(), minlength=reamostragens * n_dias).reshape(reamostragens, n_dias).astype(np.float64)
+
+
+def indices_permutacao(rng, reamostragens, n_dias, n_colunas, bloco=1):
+    """(B, n_dias, colunas) índices que embaralham cada coluna (em blocos de `bloco` dias)."""
+    n_blocos = -(-n_dias // bloco)
+    ordem = np.argsort(rng.random((reamostragens, n_colunas, n_blocos)), axis=-1)
+    indices = (ordem[..., None] * bloco + np.arange(bloco)).reshape(reamostragens, n_colunas, -1)
+    # Cada linha tem exatamente n_dias índices válidos (o último bloco pode ser parcial)
+    indices = indices[indices < n_dias].reshape(reamostragens, n_colunas, n_dias)
+    return indices.transpose(0, 2, 1)
+
+
+def _lote(tarefa):
+    """Executa um lote de reamostragens (worker do pool): (estação, lote, r_boot, |r_perm| >= |r|)."""
+    estacao, lote, dados, r_observado, reamostragens, bloco, semente = tarefa
+    rng = np.random.default_rng(np.random.SeedSequence(semente, spawn_key=(estacao, lote)))
+    n_dias, n_colunas = dados.shape
+
+    r_boot = correlacao_ponderada(pesos_bootstrap(rng, reamostragens, n_dias, bloco), produtos_diarios(dados), n_colunas)
+
+    indices = indices_permutacao(rng, reamostragens, n_dias, n_colunas, bloco)
+    permutados = np.take_along_axis(np.broadcast_to(dados, (reamostragens, n_dias, n_colunas)), indices, axis=1)
+    r_perm, _ = correlacao_em_lote(permutados)
+    extremos = (np.abs(r_perm) >= np.abs(r_observado) - 1e-12).sum(axis=0)
+    return estacao, lote, r_boot, extremos
+
+
+# ============================================================================
+# SIGNIFICÂNCIA
+# ============================================================================
+
+def benjamini_hochberg(p):
+    """p-valores ajustados (FDR) de um vetor, ignorando NaN."""
+    p = np.asarray(p, dtype=np.float64)
+    ajustado = np.full_like(p, np.nan)
+    validos = np.flatnonzero(~np.isnan(p))
+    if len(validos):
+        ordem = validos[np.argsort(p[validos])]
+        m = len(ordem)
+        valores = p[ordem] * m / np.arange(1, m + 1)
+        ajustado[ordem] = np.minimum(np.minimum.accumulate(valores[::-1])[::-1], 1.0)
+    return ajustado
+
+
+def significancia_estacoes(estacoes, reamostragens=REAMOSTRAGENS, bloco=1, nivel=NIVEL_CONFIANCA,
+                           workers=None, semente=0, tamanho_lote=TAMANHO_LOTE):
+    """Significância para várias estações: {codigo: DataFrame (dias x colunas)} -> tabela longa.
+
+    Cada estação é dividida em lotes de `tamanho_lote` reamostragens e todos
+    os lotes vão para o mesmo pool (escala com o número de núcleos).
+    """
+    colunas = {codigo: list(df.columns) for codigo, df in estacoes.items()}
+    dados = {codigo: df.to_numpy(dtype=np.float64) for codigo, df in estacoes.items()}
+    observado = {}
+    pares = {}
+    for codigo, matriz in dados.items():
+        r, n = correlacao_em_lote(matriz[None])
+        observado[codigo], pares[codigo] = r[0], n[0]
+
+    tarefas = []
+    for i, codigo in enumerate(dados):
+        for lote, inicio in enumerate(range(0, reamostragens, tamanho_lote)):
+            tarefas.append((i, lote, dados[codigo], observado[codigo],
+                            min(tamanho_lote, reamostragens - inicio), bloco, semente))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tarefas) == 1:
+        resultados = list(map(_lote, tarefas))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            resultados = list(executor.map(_lote, tarefas, chunksize=max(1, len(tarefas) // (4 * workers))))
+
+    codigos = list(dados)
+    boot = {codigo: [] for codigo in codigos}
+    extremos = {codigo: 0 for codigo in codigos}
+    for estacao, _, r_boot, n_extremos in sorted(resultados, key=lambda x: (x[0], x[1])):
+        boot[codigos[estacao]].append(r_boot)
+        extremos[codigos[estacao]] = extremos[codigos[estacao]] + n_extremos
+
+    alfa = (1 - nivel) / 2
+    tabelas = []
+    for codigo in codigos:
+        distribuicao = np.concatenate(boot[codigo])
+        with np.errstate(invalid='ignore'):
+            inferior, superior = np.nanquantile(distribuicao, [alfa, 1 - alfa], axis=0)
+        p = np.where(np.isnan(observado[codigo]), np.nan, (1 + extremos[codigo]) / (reamostragens + 1))
+        nomes = colunas[codigo]
+        i, j = np.triu_indices(len(nomes), k=1)
+        tabela = pd.DataFrame({
+            'Variavel_1': np.asarray(nomes)[i],
+            'Variavel_2': np.asarray(nomes)[j],
+            'r': observado[codigo][i, j],
+            'ic_inferior': inferior[i, j],
+            'ic_superior': superior[i, j],
+            'p_valor': p[i, j],
+            'n_pares': pares[codigo][i, j].astype(int),
+        })
+        tabela['p_ajustado_bh'] = benjamini_hochberg(tabela['p_valor'])
+        tabela.insert(0, 'Codigo_Estacao', codigo)
+        tabelas.append(tabela)
+    return pd.concat(tabelas, ignore_index=True)
+
+
+def significancia(df_merged, colunas=COLUNAS_ANALISE, **opcoes):
+    """Tabela (um par de colunas por linha) com r, IC, p-valor e p ajustado de uma estação."""
+    colunas = [c for c in colunas if c in df_merged.columns]
+    return significancia_estacoes({'estacao': df_merged[colunas]}, **opcoes).drop(columns='Codigo_Estacao')
+
+
+def matriz_da_tabela(tabela, coluna):
+    """Reconstrói uma matriz simétrica (como correlation_matrix.csv) a partir da tabela longa."""
+    nomes = list(dict.fromkeys(list(tabela['Variavel_1']) + list(tabela['Variavel_2'])))
+    matriz = pd.DataFrame(np.nan, index=nomes, columns=nomes)
+    for linha in tabela.itertuples():
+        matriz.loc[linha.Variavel_1, linha.Variavel_2] = getattr(linha, coluna)
+        matriz.loc[linha.Variavel_2, linha.Variavel_1] = getattr(linha, coluna)
+    return matriz
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def benchmark(n_estacoes, reamostragens, bloco, workers):
+    df_merged = pd.read_csv(ARQUIVO_MESCLADO, index_col=0, parse_dates=True)[COLUNAS_ANALISE]
+
+    inicio = time.perf_counter()
+    significancia(df_merged, reamostragens=reamostragens, bloco=bloco, workers=1)
+    t_uma = time.perf_counter() - inicio
+
+    # Referência: um DataFrame.corr() por reamostragem
+    rng = np.random.default_rng(0)
+    amostra = min(200, reamostragens)
+    inicio = time.perf_counter()
+    for indices in indices_bootstrap(rng, amostra, len(df_merged), bloco):
+        df_merged.iloc[indices].corr()
+    t_laco = (time.perf_counter() - inicio) * 2 * reamostragens / amostra
+
+    print(f"   1 estação, {reamostragens:,} bootstrap + {reamostragens:,} permutações (bloco {bloco}):")
+    print(f"   - em lote:               {t_uma:7.2f}s")
+    print(f"   - laço com .corr():      {t_laco:7.2f}s (estimado de {amostra})  -> {t_laco / t_uma:.0f}x")
+
+    estacoes = {f'E{i:03d}': df_merged for i in range(n_estacoes)}
+    print(f"\n   Rede com {n_estacoes} estações ({os.cpu_count()} CPU):")
+    for n in sorted({1, workers or os.cpu_count() or 1}):
+        inicio = time.perf_counter()
+        significancia_estacoes(estacoes, reamostragens, bloco, workers=n)
+        segundos = time.perf_counter() - inicio
+        print(f"   - {n:2d} worker(s): {segundos:7.2f}s ({segundos / n_estacoes:.3f}s por estação)")
+
+
+def imprimir_principais(tabela):
+    print("\n📈 Correlações Principais (IC e p-valor por permutação):")
+    principais = [('Precipitacao_mm', 'Inundacao_Alagamento', 'Precip vs Inundação'),
+                  ('Precipitacao_mm', 'Deslizamento', 'Precip vs Deslizamento'),
+                  ('Precipitacao_mm', 'Chuvas_Intensas', 'Precip vs Chuvas Intensas'),
+                  ('Temperatura_Maxima_C', 'Inundacao_Alagamento', 'Temp. Máx. vs Inundação'),
+                  ('Temperatura_Minima_C', 'Inundacao_Alagamento', 'Temp. Mín. vs Inundação')]
+    for v1, v2, rotulo in principais:
+        linha = tabela[(tabela['Variavel_1'] == v1) & (tabela['Variavel_2'] == v2)]
+        if linha.empty:
+            continue
+        linha = linha.iloc[0]
+        marca = '✓' if linha['p_ajustado_bh'] < 0.05 else '~'
+        print(f"   {marca} {rotulo:<26} r = {linha['r']:+.3f}  IC [{linha['ic_inferior']:+.3f}, "
+              f"{linha['ic_superior']:+.3f}]  p = {linha['p_valor']:.4f}  p_BH = {linha['p_ajustado_bh']:.4f}")
+    print("   (✓ = significativo a 5% após Benjamini-Hochberg)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="IC (bootstrap) e p-valores (permutação) da matriz de correlação")
+    parser.add_argument('--mesclado', default=ARQUIVO_MESCLADO)
+    parser.add_argument('--lote', help="Tabela diária (Codigo_Estacao, Data) de várias estações")
+    parser.add_argument('--saida', default=ARQUIVO_SIGNIFICANCIA)
+    parser.add_argument('--reamostragens', type=int, default=REAMOSTRAGENS)
+    parser.add_argument('--bloco', type=int, default=1,
+                        help="Dias por bloco (>1 = block bootstrap/permutação, preserva autocorrelação)")
+    parser.add_argument('--nivel', type=float, default=NIVEL_CONFIANCA)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--benchmark', type=int, metavar='ESTACOES', help="Benchmark com N cópias da estação")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("SIGNIFICÂNCIA DA MATRIZ DE CORRELAÇÃO (BOOTSTRAP + PERMUTAÇÃO)")
+    print("=" * 70)
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.reamostragens, args.bloco, args.workers)
+        return 0
+
+    origem = args.lote or args.mesclado
+    if not os.path.exists(origem):
+        print(f"❌ ERRO: Arquivo não encontrado: {origem}")
+        return 1
+
+    opcoes = dict(reamostragens=args.reamostragens, bloco=args.bloco, nivel=args.nivel,
+                  workers=args.workers, semente=args.semente)
+    inicio = time.perf_counter()
+    if args.lote:
+        from correlacao_defasada import ler_lote
+        df_lote = ler_lote(args.lote)
+        colunas = [c for c in COLUNAS_ANALISE if c in df_lote.columns]
+        estacoes = {codigo: df[colunas] for codigo, df in df_lote.groupby(level='Codigo_Estacao')}
+        tabela = significancia_estacoes(estacoes, **opcoes)
+    else:
+        df_merged = pd.read_csv(origem, index_col=0, parse_dates=True)
+        tabela = significancia(df_merged, **opcoes)
+        imprimir_principais(tabela)
+    segundos = time.perf_counter() - inicio
+
+    tabela.to_csv(args.saida, index=False)
+    significativas = (tabela['p_ajustado_bh'] < 0.05).sum()
+    print(f"\n✓ {len(tabela)} célula(s), {significativas} significativa(s) a 5% (BH) | "
+          f"{args.reamostragens:,} reamostragens, bloco {args.bloco} | {segundos:.2f}s")
+    print(f"✓ Salvo: {args.saida}")
+    print("=" * 70)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste de carga do servico_consultas: N clientes simultâneos (threads, uma
+conexão HTTP/1.1 keep-alive cada) disparando consultas /diario e
+/correlacao sorteadas de um conjunto de estações x períodos. O tamanho do
+conjunto controla a taxa de acerto do cache LRU.
+
+Relata requisições/s, latência p50/p90/p99/máx por rota e a taxa de acerto
+informada pelo próprio serviço em /saude.
+
+Sem --url, sobe o serviço na mesma máquina (thread) com a base padrão.
+
+Uso:
+    python teste_carga_servico.py --clientes 16 --duracao 10
+    python teste_carga_servico.py --url http://127.0.0.1:8080 --clientes 32 --consultas-distintas 500
+"""
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from urllib.parse import urlparse, urlencode
+
+import numpy as np
+import pandas as pd
+
+from etapas_pipeline import COLUNAS_CLIMATICAS
+
+PERCENTIS = (50, 90, 99)
+
+
+def _obter(conexao, caminho):
+    conexao.request('GET', caminho)
+    resposta = conexao.getresponse()
+    corpo = resposta.read()
+    return resposta.status, corpo
+
+
+def montar_consultas(estacoes, n_distintas, semente=0):
+    """Caminhos /diario e /correlacao para períodos e variáveis sorteados."""
+    rng = np.random.default_rng(semente)
+    consultas = []
+    for _ in range(n_distintas):
+        estacao = estacoes[rng.integers(len(estacoes))]
+        inicio = pd.Timestamp(estacao['inicio']) + pd.Timedelta(days=int(rng.integers(0, max(estacao['dias'] - 30, 1))))
+        fim = min(inicio + pd.Timedelta(days=int(rng.integers(30, 366))), pd.Timestamp(estacao['fim']))
+        parametros = {'estacao': estacao['codigo'], 'inicio': inicio.date().isoformat(), 'fim': fim.date().isoformat()}
+        if rng.random() < 0.5:
+            rota = '/correlacao'
+        else:
+            rota = '/diario'
+            parametros['variaveis'] = ','.join(rng.choice(COLUNAS_CLIMATICAS, size=rng.integers(1, 4), replace=False))
+            parametros['freq'] = str(rng.choice(['D', 'D', 'W', 'MS']))
+        consultas.append(f"{rota}?{urlencode(parametros)}")
+    return consultas
+
+
+def _cliente(host, porta, consultas, fim, semente, resultados):
+    rng = np.random.default_rng(semente)
+    conexao = http.client.HTTPConnection(host, porta, timeout=30)
+    latencias, erros = {}, 0
+    while time.perf_counter() < fim:
+        caminho = consultas[rng.integers(len(consultas))]
+        inicio = time.perf_counter()
+        status, _ = _obter(conexao, caminho)
+        latencias.setdefault(caminho.split('?')[0], []).append(time.perf_counter() - inicio)
+        erros += status != 200
+    conexao.close()
+    resultados.append((latencias, erros))
+
+
+def executar_carga(url, clientes, duracao, n_distintas, semente=0):
+    alvo = urlparse(url)
+    conexao = http.client.HTTPConnection(alvo.hostname, alvo.port, timeout=30)
+    estacoes = json.loads(_obter(conexao, '/estacoes')[1])
+    _, saude_antes = _obter(conexao, '/saude')
+    consultas = montar_consultas(estacoes, n_distintas, semente)
+
+    resultados = []
+    fim = time.perf_counter() + duracao
+    threads = [threading.Thread(target=_cliente, args=(alvo.hostname, alvo.port, consultas, fim, semente + i + 1,
+                                                       resultados)) for i in range(clientes)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    segundos = time.perf_counter() - inicio
+
+    cache_antes = json.loads(saude_antes)['cache']
+    cache = json.loads(_obter(conexao, '/saude')[1])['cache']
+    conexao.close()
+
+    por_rota = {}
+    for latencias, _ in resultados:
+        for rota, valores in latencias.items():
+            por_rota.setdefault(rota, []).extend(valores)
+    todas = np.concatenate([np.array(v) for v in por_rota.values()]) if por_rota else np.array([])
+    erros = sum(e for _, e in resultados)
+    acertos = cache['acertos'] - cache_antes['acertos']
+    faltas = cache['faltas'] - cache_antes['faltas']
+
+    print(f"   {clientes} cliente(s), {duracao:.0f}s, {n_distintas} consultas distintas, {len(estacoes)} estação(ões)")
+    print(f"   - requisições: {len(todas):,} ({len(todas) / segundos:,.0f} req/s), erros: {erros}")
+    for rota, valores in [('todas', todas)] + sorted(por_rota.items()):
+        ms = np.array(valores) * 1e3
+        if len(ms):
+            texto = '  '.join(f"p{p} {np.percentile(ms, p):6.2f}ms" for p in PERCENTIS)
+            print(f"   - {rota:<12} {texto}  máx {ms.max():7.2f}ms  (n = {len(ms):,})")
+    print(f"   - cache: {acertos:,} acertos / {faltas:,} faltas "
+          f"({acertos / max(acertos + faltas, 1):.1%}), {cache['itens']} itens")
+    return len(todas) / segundos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga do serviço de consultas")
+    parser.add_argument('--url', help="Serviço já em execução (sem isso, sobe um local)")
+    parser.add_argument('--clientes', type=int, default=8)
+    parser.add_argument('--duracao', type=float, default=10.0, help="Segundos de carga")
+    parser.add_argument('--consultas-distintas', type=int, default=200)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("TESTE DE CARGA - SERVIÇO DE CONSULTAS")
+    print("=" * 70)
+
+    servidor = None
+    url = args.url
+    if url is None:
+        from servico_consultas import carregar_base, criar_servidor
+        servidor = criar_servidor(carregar_base(), porta=0, silencioso=True)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{servidor.server_address[1]}"
+        print(f"✓ Serviço local em {url}")
+
+    try:
+        executar_carga(url, args.clientes, args.duracao, args.consultas_distintas, args.semente)
+    finally:
+        if servidor is not None:
+            servidor.shutdown()
+            servidor.server_close()
+    print("=" * 70)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())